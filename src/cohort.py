@@ -0,0 +1,168 @@
+"""Batched (cohort) integration of the Hovorka + ETH model.
+
+The cohort engine advances N candidate patients together: states are one
+(18, N) matrix, parameters one (N,) array per key (stack_parameter_sets) and
+the right-hand side is hovorka_equations_batch. Inputs are piecewise constant
+per minute in the scalar engine as well, so each minute is integrated with a
+fixed-step classical RK4 (SimulationConfig.cohort_substeps_per_min steps) under
+inputs that are frozen at the minute boundary:
+
+  1. glucose / IOB of every patient are read from the state at minute m,
+  2. the vectorized controller (apply_guard_iob_isf_batch,
+     compute_hypo_rescue_rate_batch) updates the per-patient latches,
+  3. per-patient insulin / CHO / AC inputs are resolved from the cached day plans,
+  4. the (18, N) state is stepped from m to m + 1.
+
+Rejected patients are dropped by the caller between days (rows removed from
+the state matrix, parameter arrays and controller state), so no work is spent
+on candidates that can no longer be accepted.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np  # type: ignore[import-untyped]
+
+from src.input import get_day_input_tape, stack_day_input_tapes
+from src.model import CohortParameterSet, hovorka_equations_batch
+from src.simulation_config import SimulationConfig
+from src.simulation_control import (
+    CohortControllerState,
+    apply_guard_iob_isf_batch,
+    compute_hypo_rescue_rate_batch,
+)
+
+
+@dataclass
+class CohortDayTrajectory:
+    """Result of one simulated day for a block of N patients."""
+
+    states: np.ndarray          # (18, N, n_minutes + 1) minute-sampled states, or (18, N, k) states at the k sample minutes
+    insulin_mU_min: np.ndarray  # (N, n_minutes + 1) applied insulin input per minute
+    cho_mg_min: np.ndarray      # (N, n_minutes + 1) applied meal CHO input per minute (rescue carbs excluded)
+
+    @property
+    def final_state(self) -> np.ndarray:
+        return self.states[:, :, -1]
+
+
+def take_cohort_parameters(params: CohortParameterSet, idx: np.ndarray) -> CohortParameterSet:
+    """Return the parameter arrays restricted to the patients at positions idx."""
+    return {key: values[idx] for key, values in params.items()}
+
+
+def _guarded_rhs(
+    t: float,
+    x: np.ndarray,
+    params: CohortParameterSet,
+    u: np.ndarray,
+    d: np.ndarray,
+    ac: np.ndarray,
+    rescue_d1: np.ndarray,
+    derivative_clip: float,
+) -> np.ndarray:
+    """Batched counterpart of the scalar ode_func guards (state/derivative nan_to_num + clip)."""
+    x_safe = np.nan_to_num(x, copy=True, nan=0.0, posinf=1e6, neginf=-1e6)
+    np.clip(x_safe, -1e6, 1e6, out=x_safe)
+    dy = hovorka_equations_batch(t, x_safe, params, u, d, ac)
+    dy[8] += rescue_d1
+    dy = np.nan_to_num(dy, copy=False, nan=0.0, posinf=derivative_clip, neginf=-derivative_clip)
+    np.clip(dy, -derivative_clip, derivative_clip, out=dy)
+    return dy
+
+
+def simulate_cohort_day(
+    x0: np.ndarray,
+    params: CohortParameterSet,
+    *,
+    plan_ids: list[int],
+    day: int,
+    basal_hourly: np.ndarray,
+    insulin_carbo_ratio: np.ndarray,
+    insulin_sensitivity: np.ndarray,
+    config: SimulationConfig,
+    controller: CohortControllerState,
+    abs_minute_offset: int,
+    scenario: int | None = None,
+    keep_trajectory: bool = True,
+    sample_minutes: np.ndarray | None = None,
+    minutes_per_day: int = 1440,
+) -> CohortDayTrajectory:
+    """Integrate one day for all N columns of x0 with minute-frozen inputs.
+
+    plan_ids[j] is the meal/exercise plan id of column j (cache key for
+    get_day_input_tape together with `day`); abs_minute_offset is added
+    to the minute index for the controller latch timers, matching the absolute
+    minute used by the scalar engine. With keep_trajectory=False only the states
+    at sample_minutes (increasing, ending at minutes_per_day; default the final
+    minute) are kept (warm-up days).
+    """
+    n = x0.shape[1]
+    n_points = minutes_per_day + 1
+    substeps = max(1, int(config.cohort_substeps_per_min))
+    h = 1.0 / substeps
+    clip = config.derivative_clip
+
+    vg_bw = params["VG"] * params["BW"]
+    safe_vg_bw = np.where(vg_bw > 0.0, vg_bw, 1.0)
+    ag = params["Ag"]
+    mwg = params["MwG"]
+
+    if sample_minutes is None:
+        sample_minutes = np.array([minutes_per_day])
+    states = np.empty((x0.shape[0], n, n_points if keep_trajectory else sample_minutes.size), dtype=np.float64)
+    next_sample = 0
+    insulin = np.empty((n, n_points), dtype=np.float64)
+    cho = np.empty((n, n_points), dtype=np.float64)
+    # One rendered input tape per patient, stacked so each minute is a column lookup.
+    tape = stack_day_input_tapes([
+        get_day_input_tape(patient_id=plan_id, day=day, scenario=scenario, seed=config.random_seed)
+        for plan_id in plan_ids
+    ])
+
+    x = np.array(x0, dtype=np.float64, copy=True)
+    for minute in range(n_points):
+        if keep_trajectory:
+            states[:, :, minute] = x
+        elif next_sample < sample_minutes.size and minute == sample_minutes[next_sample]:
+            states[:, :, next_sample] = x
+            next_sample += 1
+
+        current_abs_min = abs_minute_offset + minute
+        x_safe = np.clip(np.nan_to_num(x[:4], nan=0.0, posinf=1e6, neginf=-1e6), -1e6, 1e6)
+        g_est = np.where(vg_bw > 0.0, x_safe[0] / safe_vg_bw, 0.0)
+        iob_u = np.maximum(0.0, x_safe[2] + x_safe[3]) / 1000.0
+        basal_eff, icr_eff, _ = apply_guard_iob_isf_batch(
+            current_abs_min=current_abs_min,
+            g_est=g_est,
+            iob_u=iob_u,
+            basal_hourly_patient=basal_hourly,
+            insulin_carbo_ratio_patient=insulin_carbo_ratio,
+            insulin_sensitivity_patient=insulin_sensitivity,
+            config=config,
+            state=controller,
+        )
+        u, d, ac = tape.inputs_at_batch(minute, basal_eff, icr_eff)
+        rescue_d1 = compute_hypo_rescue_rate_batch(
+            current_abs_min=current_abs_min,
+            g_est=g_est,
+            ag=ag,
+            mwg=mwg,
+            config=config,
+            state=controller,
+        )
+        insulin[:, minute] = u
+        cho[:, minute] = d
+        if minute == minutes_per_day:
+            break
+
+        t = float(minute)
+        for _ in range(substeps):
+            k1 = _guarded_rhs(t, x, params, u, d, ac, rescue_d1, clip)
+            k2 = _guarded_rhs(t, x + 0.5 * h * k1, params, u, d, ac, rescue_d1, clip)
+            k3 = _guarded_rhs(t, x + 0.5 * h * k2, params, u, d, ac, rescue_d1, clip)
+            k4 = _guarded_rhs(t, x + h * k3, params, u, d, ac, rescue_d1, clip)
+            x = x + (h / 6.0) * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+
+    return CohortDayTrajectory(states=states, insulin_mU_min=insulin, cho_mg_min=cho)
@@ -9,6 +9,8 @@ from dataclasses import dataclass
 from typing import List, Optional, Mapping, Sequence, SupportsFloat, TypedDict, cast, Any
 
 # File imports
+from src.parameters import parameter_table
+
 PatientId = int | str
 DaySeries = Sequence[SupportsFloat] | np.ndarray
 DayRecord = Mapping[str, DaySeries]
@@ -146,6 +148,8 @@ def _flatten_results(results_dict: ResultsDict) -> pd.DataFrame:
                 _bolus_status_raw = values.get("bolus_status", None)
                 _meal_size_raw = values.get("meal_size", None)
                 _exercise_type_raw = values.get("exercise_type", None)
+                # Readings of extra sensor profiles (absent in single-sensor data)
+                _sensor_glucose_raw = values.get("sensor_glucose", None)
             else:
                 values_arr = np.asarray(values, dtype=np.float64)
                 insulin_arr = np.full(values_arr.size, np.nan, dtype=np.float64)
@@ -162,6 +166,7 @@ def _flatten_results(results_dict: ResultsDict) -> pd.DataFrame:
                 _bolus_status_raw = None
                 _meal_size_raw = None
                 _exercise_type_raw = None
+                _sensor_glucose_raw = None
 
             if values_arr.size == 0:
                 continue
@@ -192,6 +197,16 @@ def _flatten_results(results_dict: ResultsDict) -> pd.DataFrame:
             meal_size_col = _align_label_list(_meal_size_raw, None, n)
             exercise_type_col = _align_label_list(_exercise_type_raw, "none", n)
 
+            # One blood_glucose_<name> column per extra sensor profile, aligned to glucose length.
+            sensor_cols: dict[str, np.ndarray] = {}
+            if isinstance(_sensor_glucose_raw, Mapping):
+                for profile_name, readings in _sensor_glucose_raw.items():
+                    readings_arr = np.asarray(readings, dtype=np.float64)
+                    aligned = np.full(n, np.nan, dtype=np.float64)
+                    common = min(readings_arr.size, n)
+                    aligned[:common] = readings_arr[:common]
+                    sensor_cols[f"blood_glucose_{profile_name}"] = aligned
+
             blocks.append(pd.DataFrame({
                 "patient_id": p_id_str,
                 "patient_age_years": patient_age_years,
@@ -200,6 +215,7 @@ def _flatten_results(results_dict: ResultsDict) -> pd.DataFrame:
                 "absolute_minute": absolute_minutes,
                 "time": times.tolist(),
                 "blood_glucose": values_arr.astype(float),
+                **sensor_cols,
                 "cho_mg_min": cho_arr.astype(float),
                 "insulin_mU_min": insulin_arr.astype(float),
                 # Day-level scenario metadata (scalar broadcast to all rows).
@@ -256,6 +272,24 @@ def _flatten_results(results_dict: ResultsDict) -> pd.DataFrame:
     return df
 
 
+def _patient_parameter_frame(results_dict: ResultsDict) -> pd.DataFrame:
+    """
+    One row per patient with its parameters (PATIENT_PARAMETER_DTYPE columns).
+
+    Patients without params are skipped; ParameterRecords are copied row-wise.
+    """
+    patient_ids: List[str] = []
+    params_list: List[Mapping[str, float]] = []
+    for p_id, p_data in results_dict.items():
+        params_obj = p_data.get("params")
+        if isinstance(params_obj, Mapping):
+            patient_ids.append(_format_patient_id(p_id))
+            params_list.append(cast(Mapping[str, float], params_obj))
+    df = pd.DataFrame(parameter_table(params_list))
+    df.insert(0, "patient_id", patient_ids)
+    return df
+
+
 def _validate_parquet_output(parquet_path: Path, expected_rows: int) -> None:
     """Validate a parquet file footer and metadata after write."""
     import pyarrow.parquet as pq
@@ -357,6 +391,27 @@ def export_to_formats(
                 parquet_tmp.unlink()
             raise RuntimeError(f"Parquet export failed: {e}") from e
 
+    # Patient-level parameter table (one row per patient)
+    patients_df = _patient_parameter_frame(validated_results_dict)
+    if not patients_df.empty:
+        patients_file_name = f"patients_{n_patients}p_{n_days}d"
+        if export_parquet:
+            patients_parquet_path = output_path / f"{patients_file_name}.parquet"
+            patients_parquet_tmp = output_path / f"{patients_file_name}.parquet.tmp"
+            try:
+                patients_df.to_parquet(patients_parquet_tmp, index=False)
+                _validate_parquet_output(patients_parquet_tmp, expected_rows=len(patients_df))
+                patients_parquet_tmp.replace(patients_parquet_path)
+                print(f"Patient parameters exported in parquet format to {patients_parquet_path}")
+            except Exception as e:
+                if patients_parquet_tmp.exists():
+                    patients_parquet_tmp.unlink()
+                raise RuntimeError(f"Patient parameter parquet export failed: {e}") from e
+        if export_csv:
+            patients_csv_path = output_path / f"{patients_file_name}.csv"
+            patients_df.to_csv(patients_csv_path, index=False)
+            print(f"Patient parameters exported in csv format to {patients_csv_path}")
+
     # Export to CSV
     if export_csv:
         if csv_tmp.exists():
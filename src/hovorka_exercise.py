@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import TypedDict
+from dataclasses import dataclass
+from typing import Mapping, TypedDict
+
+import numpy as np
 
 
 class ETHExerciseTerms(TypedDict):
@@ -8,6 +11,7 @@ class ETHExerciseTerms(TypedDict):
 
     State derivatives drive the 8 new exercise states forward in time.
     Q1 interaction terms are grafted onto the Hovorka glucose equation.
+    Values are floats for the scalar path and (N,) arrays for the batch path.
     """
 
     # --- State derivatives ---
@@ -26,6 +30,107 @@ class ETHExerciseTerms(TypedDict):
     exercise_si: float      # Z * x1 * Q1: post-exercise enhanced insulin sensitivity [mmol/min]
 
 
+@dataclass(frozen=True)
+class ETHConstants:
+    """ETH parameters after the clamps applied by compute_eth_exercise_terms.
+
+    Built once per patient (see PatientModel in src/model.py) so the hot RHS does
+    not repeat ~20 dict lookups and max() clamps on every call.
+    """
+
+    inv_tau_AC: float
+    b: float
+    tau_Z: float
+    Z_max: float
+    q1: float
+    q2: float
+    q3l: float
+    q4l: float
+    q3h: float
+    q4h: float
+    q5: float
+    q6: float
+    adepl: float
+    bdepl: float
+    aY: float
+    aAC: float
+    ah: float
+    n1: float
+    n2: float
+    tp: float
+    # Quiescence thresholds: below them every Hill power underflows to exactly 0.0
+    # (see hill_zero_ratio), so the ETH derivatives reduce to linear decay.
+    Y_quiet: float
+    AC_quiet: float
+    th_quiet: float
+
+    @classmethod
+    def from_params(cls, params: Mapping[str, float]) -> ETHConstants:
+        aY = max(1.0, float(params["eth_aY"]))
+        aAC = max(1.0, float(params["eth_aAC"]))
+        ah = max(1.0, float(params["eth_ah"]))
+        n1 = max(1.0, float(params["eth_n1"]))
+        n2 = max(1.0, float(params["eth_n2"]))
+        tp = max(1e-6, float(params["eth_tp"]))
+        return cls(
+            inv_tau_AC=1.0 / max(1.0, float(params["eth_tau_AC"])),
+            b=max(0.0, float(params["eth_b"])),
+            tau_Z=max(1.0, float(params["eth_tau_Z"])),
+            Z_max=max(1e-3, float(params.get("eth_Z_max", float("inf")))),
+            q1=max(0.0, float(params["eth_q1"])),
+            q2=max(0.0, float(params["eth_q2"])),
+            q3l=max(0.0, float(params["eth_q3l"])),
+            q4l=max(0.0, float(params["eth_q4l"])),
+            q3h=max(0.0, float(params["eth_q3h"])),
+            q4h=max(0.0, float(params["eth_q4h"])),
+            q5=max(0.0, float(params["eth_q5"])),
+            q6=max(0.0, float(params["eth_q6"])),
+            adepl=float(params["eth_adepl"]),
+            bdepl=max(1.0, float(params["eth_bdepl"])),
+            aY=aY,
+            aAC=aAC,
+            ah=ah,
+            n1=n1,
+            n2=n2,
+            tp=tp,
+            Y_quiet=aY * hill_zero_ratio(n1),
+            AC_quiet=min(aAC, ah) * hill_zero_ratio(n2),
+            th_quiet=tp * hill_zero_ratio(n2),
+        )
+
+    def is_quiescent(self, Y_s: float, AC: float, th_s: float, tPA_s: float, PAint_s: float) -> bool:
+        """True when fY, fAC, fHI, fp and ft are all exactly 0.0 for these clamped states/input."""
+        return (
+            Y_s < self.Y_quiet and AC < self.AC_quiet and th_s < self.th_quiet
+            and not (tPA_s > 1e-6 and PAint_s > 1e-6)
+        )
+
+
+def hill_zero_ratio(n: float) -> float:
+    """Ratio r below which r ** n is exactly 0.0 in float64.
+
+    r ** n < 2^-1100 is far below half the smallest subnormal (2^-1075), so pow
+    rounds it to zero; the 2^25 margin absorbs the rounding of r and of the
+    threshold products built from it.
+    """
+    return 2.0 ** (-1100.0 / n)
+
+
+_QUIESCENT_ETH_TERMS: dict[str, float] = {
+    "dY": 0.0,
+    "dZ": 0.0,
+    "drGU": 0.0,
+    "drGP": 0.0,
+    "dtPA": 0.0,
+    "dPAint": 0.0,
+    "drdepl": 0.0,
+    "dth": 0.0,
+    "exercise_uptake": 0.0,
+    "exercise_prod": 0.0,
+    "exercise_si": 0.0,
+}
+
+
 def compute_eth_exercise_terms(
     Y: float,
     Z: float,
@@ -67,6 +172,13 @@ def compute_eth_exercise_terms(
     EXPERIMENTAL — they are not validated on T1D patients and use population-level
     values from params_standard.csv as a physiologically plausible starting point.
     """
+    # --- Quiescent rest state ---
+    # All eight ETH states and AC at (or clamped to) zero: every Hill term is 0.0 and
+    # every derivative/interaction term below evaluates to exactly 0.0, so skip the
+    # parameter extraction and the Hill powers (e.g. every steady-state residual).
+    if max(Y, Z, rGU, rGP, tPA, PAint, rdepl, th, ac_t) <= 0.0:
+        return dict(_QUIESCENT_ETH_TERMS)  # type: ignore[return-value]
+
     # --- Extract parameters ---
     tau_AC = max(1.0, float(params["eth_tau_AC"]))   # [min] AC → Y time constant (≈5 min)
     b      = max(0.0, float(params["eth_b"]))         # [1/(count·min)] Z drive coefficient
@@ -220,3 +332,95 @@ def compute_eth_exercise_terms(
         "exercise_prod": exercise_prod,
         "exercise_si": exercise_si,
     }
+
+
+def _hill_batch(ratio: np.ndarray, n: float) -> np.ndarray:
+    """Vectorized Hill activation r^n / (1 + r^n), saturating at 1 like the scalar path."""
+    with np.errstate(over="ignore", invalid="ignore"):
+        num = ratio ** n
+        return np.where(num < 1e15, num / (1.0 + num), 1.0)
+
+
+def compute_eth_exercise_terms_batch(
+    Y: np.ndarray,
+    Z: np.ndarray,
+    rGU: np.ndarray,
+    rGP: np.ndarray,
+    tPA: np.ndarray,
+    PAint: np.ndarray,
+    rdepl: np.ndarray,
+    th: np.ndarray,
+    ac_t: np.ndarray,
+    x1: np.ndarray,
+    Q1: np.ndarray,
+    params: Mapping[str, np.ndarray],
+) -> ETHExerciseTerms:
+    """Vectorized compute_eth_exercise_terms for a block of patients.
+
+    Every state/input argument is an (N,) array and every "eth_*" entry of
+    `params` is either a scalar or an (N,) array. The returned dict has the same
+    keys as the scalar version with (N,) array values; clamps, caps and Hill
+    saturation guards mirror the scalar implementation term by term.
+    """
+    tau_AC = np.maximum(1.0, params["eth_tau_AC"])
+    b      = np.maximum(0.0, params["eth_b"])
+    tau_Z  = np.maximum(1.0, params["eth_tau_Z"])
+    Z_max  = np.maximum(1e-3, params["eth_Z_max"]) if "eth_Z_max" in params else np.inf
+    q1     = np.maximum(0.0, params["eth_q1"])
+    q2     = np.maximum(0.0, params["eth_q2"])
+    q3l    = np.maximum(0.0, params["eth_q3l"])
+    q4l    = np.maximum(0.0, params["eth_q4l"])
+    q3h    = np.maximum(0.0, params["eth_q3h"])
+    q4h    = np.maximum(0.0, params["eth_q4h"])
+    q5     = np.maximum(0.0, params["eth_q5"])
+    q6     = np.maximum(0.0, params["eth_q6"])
+    adepl  = params["eth_adepl"]
+    bdepl  = np.maximum(1.0, params["eth_bdepl"])
+    aY     = np.maximum(1.0, params["eth_aY"])
+    aAC    = np.maximum(1.0, params["eth_aAC"])
+    ah     = np.maximum(1.0, params["eth_ah"])
+    n1     = np.maximum(1.0, params["eth_n1"])
+    n2     = np.maximum(1.0, params["eth_n2"])
+    tp     = np.maximum(1e-6, params["eth_tp"])
+
+    AC      = np.maximum(0.0, ac_t)
+    Y_s     = np.maximum(0.0, Y)
+    Z_s     = np.maximum(0.0, Z)
+    rGU_s   = np.maximum(0.0, rGU)
+    rGP_s   = np.minimum(np.maximum(0.0, rGP), 0.025)  # same 0.025 ceiling as the scalar path
+    tPA_s   = np.maximum(0.0, tPA)
+    PAint_s = np.maximum(0.0, PAint)
+    rdepl_s = np.maximum(0.0, rdepl)
+    th_s    = np.maximum(0.0, th)
+    Q1_s    = np.maximum(0.0, Q1)
+    x1_s    = np.maximum(0.0, x1)
+
+    fY  = _hill_batch(Y_s / aY, n1)
+    fAC = _hill_batch(AC / aAC, n2)
+    fHI = _hill_batch(AC / ah, n2)
+    fp  = _hill_batch(th_s / tp, n2)
+
+    q3 = (1.0 - fp) * q3l + fp * q3h
+    q4 = (1.0 - fp) * q4l + fp * q4h
+
+    depl_active = (tPA_s > 1e-6) & (PAint_s > 1e-6)
+    safe_tPA = np.where(depl_active, tPA_s, 1.0)
+    avg_intensity = np.where(depl_active, PAint_s / safe_tPA, 0.0)
+    t_depl = np.maximum(1e-3, -adepl * avg_intensity + bdepl)
+    ft = np.where(depl_active, _hill_batch(tPA_s / t_depl, n1), 0.0)
+
+    Z_sat_factor = np.maximum(0.0, 1.0 - Z_s / Z_max)
+
+    return {
+        "dY": (-1.0 / tau_AC) * Y_s + (1.0 / tau_AC) * AC,
+        "dZ": b * fY * Y_s * Z_sat_factor - (1.0 - fY) / tau_Z * Z_s,
+        "drGU": q1 * fY * Y_s - q2 * rGU_s,
+        "drGP": q3 * fY * Y_s - q4 * rGP_s,
+        "dtPA": fAC - (1.0 - fAC) * tPA_s,
+        "dPAint": fAC * AC - (1.0 - fAC) * PAint_s,
+        "drdepl": q6 * (ft * rGP_s - rdepl_s),
+        "dth": fHI - (1.0 - fHI) * q5 * th_s,
+        "exercise_uptake": np.minimum(rGU_s * Q1_s, 2.0),
+        "exercise_prod": np.minimum(np.maximum(0.0, rGP_s - rdepl_s) * Q1_s, 3.0),
+        "exercise_si": Z_s * x1_s * Q1_s,
+    }
@@ -910,6 +910,83 @@ def _day_plan_inputs_at_minute(
     return u, d, baseline_ac + session_ac
 
 
+# ============================================================================
+# Per-Day Input Tape
+# ============================================================================
+
+TAPE_MINUTES: int = 1441  # minutes 0..1440 of one simulated day (t_eval grid)
+
+
+@dataclass(frozen=True)
+class DayInputTape:
+    """A DayPlan rendered once into contiguous per-minute arrays (index = minute 0..1440).
+
+    The controller-dependent parts stay out of the tape: basal delivery and the
+    ICR division are applied on top by inputs_at(), so the effective basal/ICR
+    chosen by apply_guard_iob_isf still act minute by minute. inputs_at()
+    reproduces _day_plan_inputs_at_minute exactly, except that two meals whose
+    bolus windows overlap (never the case for generated plans) are summed before the ICR division.
+    """
+    cho_mg_min: np.ndarray     # meal CHO appearance [mg/min]
+    bolus_carbs_g: np.ndarray  # carbs bolused at this minute [g]; bolus [U] = carbs / ICR over BOLUS_DURATION
+    ac: np.ndarray             # accelerometer counts: incidental baseline + exercise session (bursts included)
+
+    def inputs_at(self, t: int, basal_hourly: float, insulin_carbo_ratio: float) -> tuple[float, float, float]:
+        """(u [mU/min], d [mg/min], activity [AC]) at minute t, as _day_plan_inputs_at_minute."""
+        u = basal_hourly * 1000.0 / 60.0
+        # item() returns Python floats, so the arithmetic stays scalar.
+        carbs = self.bolus_carbs_g.item(t)
+        if carbs != 0.0:
+            u += (carbs / insulin_carbo_ratio) * 1000.0 / BOLUS_DURATION
+        return u, self.cho_mg_min.item(t), self.ac.item(t)
+
+    def inputs_at_batch(
+        self,
+        t: int,
+        basal_hourly: np.ndarray,
+        insulin_carbo_ratio: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """inputs_at for every row of a stacked (N, TAPE_MINUTES) tape (see stack_day_input_tapes)."""
+        u = basal_hourly * 1000.0 / 60.0
+        carbs = self.bolus_carbs_g[:, t]
+        bolused = carbs != 0.0
+        if np.any(bolused):
+            u = np.where(bolused, u + (carbs / insulin_carbo_ratio) * 1000.0 / BOLUS_DURATION, u)
+        return u, self.cho_mg_min[:, t], self.ac[:, t]
+
+
+def render_day_input_tape(day_plan: DayPlan, n_minutes: int = TAPE_MINUTES) -> DayInputTape:
+    """Render the basal-independent per-minute inputs of a DayPlan into a DayInputTape."""
+    minutes = np.arange(n_minutes)
+    cho = np.zeros(n_minutes, dtype=np.float64)
+    bolus_carbs = np.zeros(n_minutes, dtype=np.float64)
+    # Same accumulation order as _day_plan_inputs_at_minute (meals in plan order).
+    for meal in day_plan.meals:
+        eating = (minutes >= meal.time_min) & (minutes < meal.time_min + meal.duration)
+        cho[eating] += float(meal.carbs) * 1000.0 / float(meal.duration)
+        if meal.bolus_status == 'missed':
+            continue
+        if meal.bolus_status == 'late':
+            bolus_start = meal.time_min + meal.late_bolus_delay_min
+        else:
+            bolus_start = meal.time_min - meal.bolus_lead_min
+        bolus_carbs[(minutes >= bolus_start) & (minutes < bolus_start + BOLUS_DURATION)] += meal.bolus_carbs
+
+    ac = np.array([_baseline_ac_at_minute(t, day_plan.base_scenario) for t in range(n_minutes)], dtype=np.float64)
+    if day_plan.exercise is not None:
+        ac += np.array([_exercise_ac_at_minute(day_plan.exercise, t) for t in range(n_minutes)], dtype=np.float64)
+    return DayInputTape(cho_mg_min=cho, bolus_carbs_g=bolus_carbs, ac=ac)
+
+
+def stack_day_input_tapes(tapes: list[DayInputTape]) -> DayInputTape:
+    """Stack N tapes into one with (N, TAPE_MINUTES) arrays (cohort engine)."""
+    return DayInputTape(
+        cho_mg_min=np.stack([tape.cho_mg_min for tape in tapes]),
+        bolus_carbs_g=np.stack([tape.bolus_carbs_g for tape in tapes]),
+        ac=np.stack([tape.ac for tape in tapes]),
+    )
+
+
 # ============================================================================
 # ML Label Computation
 # ============================================================================
@@ -1033,8 +1110,8 @@ def _get_or_create_day_plan(
 def get_cached_day_plan(patient_id: int, day: int) -> Optional[DayPlan]:
     """Return the cached DayPlan for (patient_id, day), or None if not yet generated.
 
-    Will be populated after scenario_with_cached_meals is first called for minute 0
-    of that day during ODE integration.
+    Will be populated after scenario_with_cached_meals or get_day_input_tape is
+    first called for that day during ODE integration.
     """
     return _day_plan_cache.get((patient_id, day))
 
@@ -1061,6 +1138,23 @@ def scenario_with_cached_meals(
     return _day_plan_inputs_at_minute(time, day_plan, basal_hourly, insulin_carbo_ratio)
 
 
+def get_day_input_tape(
+    patient_id: int,
+    day: int,
+    scenario: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> DayInputTape:
+    """DayInputTape of (patient_id, day) rendered from the cached DayPlan; same arguments as scenario_with_cached_meals.
+
+    Hot loops fetch the tape once per day and call tape.inputs_at(minute, basal, ICR)
+    instead of scenario_with_cached_meals on every RHS evaluation. Tapes are not
+    cached: the caller owns the tape for its day, so it is freed with the day
+    (~35 kB each, against ~3 kB for the cached plan).
+    """
+    base_sc_override = max(1, min(3, int(scenario))) if scenario is not None else None
+    return render_day_input_tape(_get_or_create_day_plan(patient_id, day, seed, base_sc_override))
+
+
 def clear_meal_cache() -> None:
     """Clear all per-run caches.  Must be called at the start of each run_simulation."""
     global _patient_profile_cache, _day_plan_cache
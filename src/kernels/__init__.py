@@ -0,0 +1,53 @@
+"""Optional Numba-compiled kernels for the scalar engine (SimulationConfig.backend="numba").
+
+hovorka.py holds the 18-state RHS and a frozen-input RK4 integrator on packed
+parameter vectors, sensor.py the lagged CGM recursion. Without Numba installed
+the kernels remain plain Python and resolve_backend() falls back to "numpy".
+"""
+
+from __future__ import annotations
+
+from src.kernels._jit import NUMBA_AVAILABLE
+from src.kernels.hovorka import (
+    PACKED_PARAMETER_COUNT,
+    CompiledPatientModel,
+    hovorka_rhs,
+    integrate_frozen_minutes,
+    pack_patient_model,
+)
+from src.kernels.sensor import lagged_cgm, lagged_cgm_day
+from src.model import PatientModel
+
+BACKEND_NUMPY = "numpy"
+BACKEND_NUMBA = "numba"
+
+
+def resolve_backend(backend: str) -> str:
+    """Backend actually used for `backend`: "numba" only when Numba is importable."""
+    if backend not in (BACKEND_NUMPY, BACKEND_NUMBA):
+        raise ValueError(f"Unsupported backend: {backend!r}. Use {BACKEND_NUMPY!r} or {BACKEND_NUMBA!r}.")
+    if backend == BACKEND_NUMBA and not NUMBA_AVAILABLE:
+        print("Warning: backend='numba' requested but Numba is not installed; using the NumPy path.")
+        return BACKEND_NUMPY
+    return backend
+
+
+def patient_model_class(backend: str) -> type[PatientModel]:
+    """PatientModel for "numpy", CompiledPatientModel for "numba"."""
+    return CompiledPatientModel if backend == BACKEND_NUMBA else PatientModel
+
+
+__all__ = [
+    "BACKEND_NUMBA",
+    "BACKEND_NUMPY",
+    "NUMBA_AVAILABLE",
+    "PACKED_PARAMETER_COUNT",
+    "CompiledPatientModel",
+    "hovorka_rhs",
+    "integrate_frozen_minutes",
+    "lagged_cgm",
+    "lagged_cgm_day",
+    "pack_patient_model",
+    "patient_model_class",
+    "resolve_backend",
+]
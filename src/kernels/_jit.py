@@ -0,0 +1,25 @@
+"""Optional Numba import shared by the kernel modules."""
+
+from __future__ import annotations
+
+from typing import Any, Callable, TypeVar
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+try:
+    from numba import njit  # type: ignore[import-untyped]
+except ImportError:  # pragma: no cover - depends on the environment
+    njit = None
+
+NUMBA_AVAILABLE: bool = njit is not None
+
+
+def jit(fn: _F) -> _F:
+    """Compile fn in nopython mode when Numba is installed, otherwise return it unchanged.
+
+    Without Numba the kernels stay importable (and testable) as plain Python;
+    the simulator then uses the NumPy path instead (see resolve_backend).
+    """
+    if njit is None:
+        return fn
+    return njit(cache=True)(fn)  # type: ignore[no-any-return]
@@ -0,0 +1,283 @@
+"""Compiled Hovorka + ETH right-hand side and frozen-input RK4 integrator.
+
+The kernels take the patient as a packed float64 vector (pack_patient_model)
+instead of a PatientModel, so Numba can compile them in nopython mode. They
+evaluate the same expressions, in the same order, as PatientModel.rhs and the
+guarded frozen RHS of the scalar engine; test/test_kernels.py checks that the
+results match the NumPy path.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from src.kernels._jit import jit
+from src.model import (
+    _CORTISOL_END,
+    _CORTISOL_PEAK,
+    _CORTISOL_START,
+    _DAWN_END,
+    _DAWN_PEAK,
+    _DAWN_START,
+    ParameterSet,
+    PatientModel,
+    StateArray,
+)
+
+# ── Packed parameter layout ───────────────────────────────────────────────────
+_P_VG_BW, _P_VG, _P_BW, _P_VI_BW, _P_INV_TAU_I, _P_INV_TAU_G, _P_AG, _P_MWG, _P_KE, _P_K12 = range(10)
+_P_KA1, _P_KA2, _P_KA3, _P_SI1_KA1, _P_SI2_KA2, _P_SI3_KA3, _P_F01_BW, _P_EGP0_BW = range(10, 18)
+_P_DAWN_AMP, _P_CORTISOL_AMP = 18, 19
+(
+    _P_INV_TAU_AC, _P_B, _P_TAU_Z, _P_Z_MAX, _P_Q1, _P_Q2, _P_Q3L, _P_Q4L, _P_Q3H, _P_Q4H,
+    _P_Q5, _P_Q6, _P_ADEPL, _P_BDEPL, _P_AY, _P_AAC, _P_AH, _P_N1, _P_N2, _P_TP,
+) = range(20, 40)
+_P_Y_QUIET, _P_AC_QUIET, _P_TH_QUIET = 40, 41, 42
+PACKED_PARAMETER_COUNT = 43
+
+_STATE_GUARD = 1e6  # state nan_to_num / clip bound of the ode functions
+
+
+def pack_patient_model(model: PatientModel) -> np.ndarray:
+    """Derived constants of a PatientModel as the contiguous vector the kernels read."""
+    eth = model.eth
+    return np.array(
+        [
+            model.vg_bw, model.vg, model.bw, model.vi_bw, model.inv_tau_i, model.inv_tau_g,
+            model.ag, model.mwg, model.ke, model.k12,
+            model.ka1, model.ka2, model.ka3, model.si1_ka1, model.si2_ka2, model.si3_ka3,
+            model.f01_bw, model.egp0_bw, model.dawn_amp, model.cortisol_amp,
+            eth.inv_tau_AC, eth.b, eth.tau_Z, eth.Z_max, eth.q1, eth.q2, eth.q3l, eth.q4l, eth.q3h, eth.q4h,
+            eth.q5, eth.q6, eth.adepl, eth.bdepl, eth.aY, eth.aAC, eth.ah, eth.n1, eth.n2, eth.tp,
+            eth.Y_quiet, eth.AC_quiet, eth.th_quiet,
+        ],
+        dtype=np.float64,
+    )
+
+
+@jit
+def _dawn_fraction(t: float) -> float:
+    if t <= _DAWN_START or t >= _DAWN_END:
+        return 0.0
+    if t <= _DAWN_PEAK:
+        return (t - _DAWN_START) / (_DAWN_PEAK - _DAWN_START)
+    return (_DAWN_END - t) / (_DAWN_END - _DAWN_PEAK)
+
+
+@jit
+def _cortisol_fraction(t: float) -> float:
+    if t <= _CORTISOL_START or t >= _CORTISOL_END:
+        return 0.0
+    if t <= _CORTISOL_PEAK:
+        return (t - _CORTISOL_START) / (_CORTISOL_PEAK - _CORTISOL_START)
+    return (_CORTISOL_END - t) / (_CORTISOL_END - _CORTISOL_PEAK)
+
+
+@jit
+def _hill(num: float) -> float:
+    return num / (1.0 + num) if num < 1e15 else 1.0
+
+
+@jit
+def hovorka_rhs(t: float, x: np.ndarray, p: np.ndarray, u: float, d: float, ac: float, dy: np.ndarray) -> None:
+    """PatientModel.rhs on packed parameters p; writes the 18 derivatives into dy."""
+    Q1 = x[0]
+    Q2 = x[1]
+    S1 = x[2]
+    S2 = x[3]
+    I = x[4]
+    x1 = x[5]
+    x2 = x[6]
+    x3 = x[7]
+    D1 = x[8]
+    D2 = x[9]
+
+    vg_bw = p[_P_VG_BW]
+    G = Q1 / vg_bw if vg_bw > 0.0 else 0.0
+    D = d / p[_P_MWG]
+
+    inv_tau_g = p[_P_INV_TAU_G]
+    dy[8] = (p[_P_AG] * D) - (inv_tau_g * D1)
+    dy[9] = inv_tau_g * (D1 - D2)
+    UG = inv_tau_g * D2
+
+    inv_tau_i = p[_P_INV_TAU_I]
+    dy[2] = u - (inv_tau_i * S1)
+    dy[3] = inv_tau_i * (S1 - S2)
+    dy[4] = ((inv_tau_i * S2) / p[_P_VI_BW]) - (p[_P_KE] * I)
+
+    if G >= 4.5:
+        F01c = p[_P_F01_BW]
+    else:
+        F01c = max(0.0, p[_P_F01_BW] * max(0.0, G) / 4.5)
+    fr = 0.003 * (G - 9.0) * p[_P_VG] * p[_P_BW] if G >= 9.0 else 0.0
+
+    cortisol = max(0.5, 1.0 - p[_P_CORTISOL_AMP] * _cortisol_fraction(t))
+    dy[5] = (p[_P_SI1_KA1] * cortisol) * I - p[_P_KA1] * x1
+    dy[6] = (p[_P_SI2_KA2] * cortisol) * I - p[_P_KA2] * x2
+    dy[7] = (p[_P_SI3_KA3] * cortisol) * I - p[_P_KA3] * x3
+
+    # --- ETH exercise states ---
+    AC = max(0.0, ac)
+    Y_s = max(0.0, x[10])
+    Z_s = max(0.0, x[11])
+    rGU_s = max(0.0, x[12])
+    rGP_s = min(max(0.0, x[13]), 0.025)
+    tPA_s = max(0.0, x[14])
+    PAint_s = max(0.0, x[15])
+    rdepl_s = max(0.0, x[16])
+    th_s = max(0.0, x[17])
+    Q1_s = max(0.0, Q1)
+    x1_s = max(0.0, x1)
+
+    inv_tau_ac = p[_P_INV_TAU_AC]
+    dy[10] = (-inv_tau_ac) * Y_s + inv_tau_ac * AC
+    quiescent = (
+        Y_s < p[_P_Y_QUIET] and AC < p[_P_AC_QUIET] and th_s < p[_P_TH_QUIET]
+        and not (tPA_s > 1e-6 and PAint_s > 1e-6)
+    )
+    if quiescent:
+        # ETHConstants.is_quiescent: all Hill terms are exactly 0.0 (see PatientModel.rhs).
+        dy[11] = 0.0 - (1.0 / p[_P_TAU_Z]) * Z_s
+        dy[12] = 0.0 - p[_P_Q2] * rGU_s
+        dy[13] = 0.0 - p[_P_Q4L] * rGP_s
+        dy[14] = 0.0 - tPA_s
+        dy[15] = 0.0 - PAint_s
+        dy[16] = p[_P_Q6] * (0.0 - rdepl_s)
+        dy[17] = 0.0 - p[_P_Q5] * th_s
+    else:
+        n1 = p[_P_N1]
+        n2 = p[_P_N2]
+        fY = _hill((Y_s / p[_P_AY]) ** n1)
+        fAC = _hill((AC / p[_P_AAC]) ** n2)
+        fHI = _hill((AC / p[_P_AH]) ** n2)
+        fp = _hill((th_s / p[_P_TP]) ** n2)
+
+        q3 = (1.0 - fp) * p[_P_Q3L] + fp * p[_P_Q3H]
+        q4 = (1.0 - fp) * p[_P_Q4L] + fp * p[_P_Q4H]
+
+        if tPA_s > 1e-6 and PAint_s > 1e-6:
+            t_depl = max(1e-3, -p[_P_ADEPL] * (PAint_s / tPA_s) + p[_P_BDEPL])
+            ft = _hill((tPA_s / t_depl) ** n1)
+        else:
+            ft = 0.0
+
+        dy[11] = p[_P_B] * fY * Y_s * max(0.0, 1.0 - Z_s / p[_P_Z_MAX]) - (1.0 - fY) / p[_P_TAU_Z] * Z_s
+        dy[12] = p[_P_Q1] * fY * Y_s - p[_P_Q2] * rGU_s
+        dy[13] = q3 * fY * Y_s - q4 * rGP_s
+        dy[14] = fAC - (1.0 - fAC) * tPA_s
+        dy[15] = fAC * AC - (1.0 - fAC) * PAint_s
+        dy[16] = p[_P_Q6] * (ft * rGP_s - rdepl_s)
+        dy[17] = fHI - (1.0 - fHI) * p[_P_Q5] * th_s
+
+    # --- Hovorka glucose compartments with ETH Q1 interaction terms ---
+    R12 = (x1 * Q1) - (p[_P_K12] * Q2)
+    EGPc = p[_P_EGP0_BW] * max(0.0, 1.0 - x3) * (1.0 + p[_P_DAWN_AMP] * _dawn_fraction(t))
+    dy[0] = UG + EGPc - R12 - F01c - fr \
+        - min(rGU_s * Q1_s, 2.0) \
+        + min(max(0.0, rGP_s - rdepl_s) * Q1_s, 3.0) \
+        - Z_s * x1_s * Q1_s
+    dy[1] = R12 - x2 * Q2
+
+
+@jit
+def _guarded_rhs(
+    minute: float,
+    x: np.ndarray,
+    p: np.ndarray,
+    held: np.ndarray,
+    clip: float,
+    x_safe: np.ndarray,
+    dy: np.ndarray,
+) -> None:
+    """Frozen-input RHS with the ode-function guards (state nan_to_num/clip, rescue, derivative clip)."""
+    for i in range(x.size):
+        v = x[i]
+        if np.isnan(v):
+            v = 0.0
+        x_safe[i] = min(max(v, -_STATE_GUARD), _STATE_GUARD)
+    hovorka_rhs(minute, x_safe, p, held[0], held[1], held[2], dy)
+    dy[8] += held[3]
+    for i in range(dy.size):
+        v = dy[i]
+        if np.isnan(v):
+            v = 0.0
+        dy[i] = min(max(v, -clip), clip)
+
+
+@jit
+def integrate_frozen_minutes(
+    minute0: int,
+    x0: np.ndarray,
+    p: np.ndarray,
+    inputs: np.ndarray,
+    clip: float,
+    out: np.ndarray,
+) -> None:
+    """One classical RK4 step per minute with inputs held over each minute.
+
+    inputs[k] = (u, d, ac, rescue D1 rate) of minute minute0 + k; out is an
+    (18, len(inputs) + 1) buffer receiving x0 and the state after every minute.
+    Same arithmetic as integrate_minute_hybrid(..., "minute_rk4") with the
+    scalar engine's frozen_rhs.
+    """
+    n = x0.size
+    x = x0.copy()
+    k1 = np.empty(n)
+    k2 = np.empty(n)
+    k3 = np.empty(n)
+    k4 = np.empty(n)
+    stage = np.empty(n)
+    x_safe = np.empty(n)
+    out[:, 0] = x
+    for k in range(inputs.shape[0]):
+        minute = float(minute0 + k)
+        held = inputs[k]
+        _guarded_rhs(minute, x, p, held, clip, x_safe, k1)
+        for i in range(n):
+            stage[i] = x[i] + 0.5 * k1[i]
+        _guarded_rhs(minute, stage, p, held, clip, x_safe, k2)
+        for i in range(n):
+            stage[i] = x[i] + 0.5 * k2[i]
+        _guarded_rhs(minute, stage, p, held, clip, x_safe, k3)
+        for i in range(n):
+            stage[i] = x[i] + k3[i]
+        _guarded_rhs(minute, stage, p, held, clip, x_safe, k4)
+        for i in range(n):
+            x[i] = x[i] + (k1[i] + 2.0 * (k2[i] + k3[i]) + k4[i]) / 6.0
+        out[:, k + 1] = x
+
+
+class CompiledPatientModel(PatientModel):
+    """PatientModel whose rhs() runs the compiled hovorka_rhs kernel (backend="numba").
+
+    jac(), cortisol_factor() and the LinearChainPropagator inputs are inherited
+    unchanged; only the per-call arithmetic moves into the kernel.
+    """
+
+    __slots__ = ("packed", "_held", "_step_out")
+
+    def __init__(self, params: ParameterSet) -> None:
+        super().__init__(params)
+        self.packed = pack_patient_model(self)
+        self._held = np.empty((1, 4), dtype=np.float64)
+        self._step_out = np.empty((self._out.size, 2), dtype=np.float64)
+
+    def rhs(
+        self,
+        t: float,
+        x: StateArray,
+        u: float,
+        d: float,
+        ac: float,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        dy = self._out if out is None else out
+        hovorka_rhs(float(t), x, self.packed, float(u), float(d), float(ac), dy)
+        return dy
+
+    def rk4_minute(self, minute: int, x: np.ndarray, held: tuple[float, float, float, float], clip: float) -> np.ndarray:
+        """State after one frozen-input RK4 minute from x (fresh array)."""
+        self._held[0] = held
+        integrate_frozen_minutes(minute, np.ascontiguousarray(x, dtype=np.float64), self.packed, self._held, clip, self._step_out)
+        return self._step_out[:, 1].copy()
@@ -0,0 +1,77 @@
+"""Compiled lagged CGM recursion (measure_glycemia mode="lagged" over a whole day)."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from src.kernels._jit import jit
+
+
+@jit
+def lagged_cgm(
+    true_glucose: np.ndarray,
+    innovations: np.ndarray,
+    display: float,
+    error: float,
+    lag_alpha: float,
+    phi: float,
+    bias: float,
+    min_glucose: float,
+    noisy: bool,
+    out: np.ndarray,
+) -> tuple[float, float]:
+    """First-order lag + AR(1) error applied point by point; returns the final (display, error).
+
+    innovations[k] is the N(0, σ²(1-φ²)) draw of point k (drawn in one call,
+    which consumes the generator exactly like per-point draws). A NaN display
+    seeds the filter with the first true glucose, as an empty sensor_state does.
+    With noisy=False the reading is the clamped true glucose plus bias and the
+    filter state is left untouched, as in measure_glycemia.
+    """
+    for k in range(true_glucose.size):
+        g = true_glucose[k]
+        if not noisy:
+            out[k] = max(min_glucose, g + bias)
+            continue
+        if np.isnan(display):
+            display = g
+        lagged_true = display + lag_alpha * (g - display)
+        error = (phi * error) + innovations[k]
+        measured = max(min_glucose, lagged_true + bias + error)
+        out[k] = measured
+        display = measured
+    return display, error
+
+
+def lagged_cgm_day(
+    q1: np.ndarray,
+    vg_bw: float,
+    noise_std: float,
+    phi: float,
+    lag_alpha: float,
+    sensor_state: dict[str, float],
+    rng: np.random.Generator,
+    min_glucose: float = 0.0,
+) -> np.ndarray:
+    """measure_glycemia(mode="lagged", output_unit="mmol/L") for every point of q1, in one kernel call.
+
+    Draws the innovations from rng in one call and updates sensor_state like the
+    point-by-point loop, so readings and the generator state are unchanged.
+    """
+    true_glucose = np.ascontiguousarray(q1, dtype=np.float64) / vg_bw
+    noisy = noise_std != 0.0
+    if noisy:
+        innovation_std = float(noise_std * np.sqrt(max(0.0, 1.0 - phi * phi)))
+        innovations = rng.normal(loc=0.0, scale=innovation_std, size=true_glucose.size)
+    else:
+        innovations = np.zeros(true_glucose.size, dtype=np.float64)
+    out = np.empty(true_glucose.size, dtype=np.float64)
+    display, error = lagged_cgm(
+        true_glucose, innovations,
+        float(sensor_state.get("display", np.nan)), float(sensor_state.get("error", 0.0)),
+        lag_alpha, phi, 0.0, min_glucose, noisy, out,
+    )
+    if noisy and true_glucose.size > 0:
+        sensor_state["display"] = display
+        sensor_state["error"] = error
+    return out
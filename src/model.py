@@ -1,14 +1,16 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Callable
+from typing import Callable, Sequence
 
 import numpy as np
+from scipy.linalg import expm  # type: ignore[import-untyped]
 
-from src.hovorka_exercise import compute_eth_exercise_terms
+from src.hovorka_exercise import ETHConstants, compute_eth_exercise_terms, compute_eth_exercise_terms_batch
 from src.sensor import measure_glycemia
 
 ParameterSet = dict[str, float]
+CohortParameterSet = dict[str, np.ndarray]  # one (N,) array per parameter name, see stack_parameter_sets
 StateVector = list[float]
 StateArray = np.ndarray
 InputValues = tuple[float, float] | tuple[float, float, float]
@@ -22,6 +24,22 @@ ObservableCallback = Callable[[np.ndarray, ParameterSet], float]
 _HOVORKA_BASE_STATE_COUNT = 10
 _HOVORKA_STATE_COUNT = 18  # 10 base + 8 ETH exercise states (Y, Z, rGU, rGP, tPA, PAint, rdepl, th)
 
+# Dawn (GH → EGP) and cortisol (→ SI) windows [min after midnight]; see _dawn_egp_factor
+# and _cortisol_si_factor for the physiology.
+_DAWN_START = 180.0       # 03:00
+_DAWN_PEAK = 300.0        # 05:00
+_DAWN_END = 420.0         # 07:00
+_CORTISOL_START = 360.0   # 06:00
+_CORTISOL_PEAK = 480.0    # 08:00
+_CORTISOL_END = 600.0     # 10:00
+_CORTISOL_SI_SCALE = 0.6  # coupling: fraction of dawn_amp applied as SI reduction
+_DEFAULT_DAWN_AMP = 0.12
+
+# compute_optimal_steady_state_from_glucose methods: reduced 1-D basal-insulin solve
+# (Newton fallback) or the 19-variable multivariate Newton solver.
+STEADY_STATE_REDUCED = "reduced"
+STEADY_STATE_NEWTON = "newton"
+
 
 @dataclass(frozen=True)
 class _SteadyStateCallbacks:
@@ -117,7 +135,16 @@ def _get_input_values(
     )
 
 
-def _dawn_egp_factor(t_min: float, amp: float) -> float:
+def _dawn_egp_fraction(t_min: float) -> float:
+    """Triangular 0→1→0 profile of the GH dawn window used by _dawn_egp_factor (0 outside)."""
+    if t_min <= _DAWN_START or t_min >= _DAWN_END:
+        return 0.0
+    if t_min <= _DAWN_PEAK:
+        return (t_min - _DAWN_START) / (_DAWN_PEAK - _DAWN_START)
+    return (_DAWN_END - t_min) / (_DAWN_END - _DAWN_PEAK)
+
+
+def _dawn_egp_factor(t_min: float, amp: float | np.ndarray) -> float | np.ndarray:
     """GH-driven EGP0 elevation — the hepatic component of the dawn phenomenon.
 
     Growth hormone pulses at 01:00–03:00 during deep sleep; the downstream
@@ -130,19 +157,19 @@ def _dawn_egp_factor(t_min: float, amp: float) -> float:
 
     Window: 03:00–07:00, peak 05:00.  amp is per-patient (see parameters.py).
     """
-    DAWN_START = 180.0   # 03:00
-    DAWN_PEAK  = 300.0   # 05:00
-    DAWN_END   = 420.0   # 07:00
-    if t_min <= DAWN_START or t_min >= DAWN_END:
-        return 1.0
-    if t_min <= DAWN_PEAK:
-        frac = (t_min - DAWN_START) / (DAWN_PEAK - DAWN_START)
-    else:
-        frac = (DAWN_END - t_min) / (DAWN_END - DAWN_PEAK)
-    return 1.0 + amp * frac
+    return 1.0 + amp * _dawn_egp_fraction(t_min)
+
 
+def _cortisol_si_fraction(t_min: float) -> float:
+    """Triangular 0→1→0 profile of the cortisol window used by _cortisol_si_factor (0 outside)."""
+    if t_min <= _CORTISOL_START or t_min >= _CORTISOL_END:
+        return 0.0
+    if t_min <= _CORTISOL_PEAK:
+        return (t_min - _CORTISOL_START) / (_CORTISOL_PEAK - _CORTISOL_START)
+    return (_CORTISOL_END - t_min) / (_CORTISOL_END - _CORTISOL_PEAK)
 
-def _cortisol_si_factor(t_min: float, dawn_amp: float) -> float:
+
+def _cortisol_si_factor(t_min: float, dawn_amp: float | np.ndarray) -> float | np.ndarray:
     """Cortisol-driven morning insulin resistance — the peripheral SI component.
 
     Cortisol follows a circadian rhythm peaking at ~08:00 (480 min).  Unlike
@@ -170,17 +197,8 @@ def _cortisol_si_factor(t_min: float, dawn_amp: float) -> float:
 
     Window: 06:00–10:00, peak 08:00.
     """
-    CORTISOL_START    = 360.0   # 06:00
-    CORTISOL_PEAK     = 480.0   # 08:00
-    CORTISOL_END      = 600.0   # 10:00
-    CORTISOL_SI_SCALE = 0.6     # coupling: fraction of dawn_amp applied as SI reduction
-    if t_min <= CORTISOL_START or t_min >= CORTISOL_END:
-        return 1.0
-    if t_min <= CORTISOL_PEAK:
-        frac = (t_min - CORTISOL_START) / (CORTISOL_PEAK - CORTISOL_START)
-    else:
-        frac = (CORTISOL_END - t_min) / (CORTISOL_END - CORTISOL_PEAK)
-    return max(0.5, 1.0 - dawn_amp * CORTISOL_SI_SCALE * frac)  # hard floor at 0.5
+    frac = _cortisol_si_fraction(t_min)
+    return np.maximum(0.5, 1.0 - dawn_amp * _CORTISOL_SI_SCALE * frac)  # hard floor at 0.5
 
 
 def hovorka_equations(
@@ -257,7 +275,7 @@ def hovorka_equations(
     # GH effect (EGP) is handled separately in EGPc below; these two effects
     # share dawn_amp as a common per-patient parameter but act on different
     # physiological pathways and different time windows.
-    _cortisol = _cortisol_si_factor(float(t), float(params.get("dawn_amp", 0.12)))
+    _cortisol = _cortisol_si_factor(float(t), float(params.get("dawn_amp", _DEFAULT_DAWN_AMP)))
     kb1 = SI1 * ka1 * _cortisol  # [min^-2/(mU/L)] insulin transport drive
     kb2 = SI2 * ka2 * _cortisol  # [min^-2/(mU/L)] insulin disposal drive
     kb3 = SI3 * ka3 * _cortisol  # [min^-1/(mU/L)]  insulin EGP-suppression drive
@@ -289,7 +307,7 @@ def hovorka_equations(
     R2   = x2 * Q2
     # GH-driven EGP elevation (03:00–07:00): growth hormone raises hepatic glucose
     # production before breakfast.  Cortisol's SI effect is applied to kb above.
-    EGPc = EGP0 * BW * max(0.0, 1.0 - x3) * _dawn_egp_factor(float(t), float(params.get("dawn_amp", 0.12)))
+    EGPc = EGP0 * BW * max(0.0, 1.0 - x3) * _dawn_egp_factor(float(t), float(params.get("dawn_amp", _DEFAULT_DAWN_AMP)))
 
     # ETH exercise contributions grafted onto Q1:
     #   exercise_uptake — insulin-independent glucose disposal during exercise
@@ -305,23 +323,620 @@ def hovorka_equations(
             dY, dZ, drGU, drGP, dtPA, dPAint, drdepl, dth]
 
 
-def compute_fasting_steady_state_from_basal_insulin(u_mu: float, params: ParameterSet) -> StateVector:
+def hovorka_classic_equations_batch(
+    t: float,
+    x: np.ndarray,
+    params: CohortParameterSet,
+    u: np.ndarray,
+    d: np.ndarray,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Vectorized PatientModel.rhs_classic: the 10 classic Hovorka derivatives with the ETH states at rest.
+
+    x holds at least the 10 classic state rows (extra ETH rows are ignored);
+    params/u/d are as for hovorka_equations_batch. Returns the (10, N)
+    derivative matrix, written into `out` when given. hovorka_equations_batch
+    evaluates these rows first and then adds the ETH Q1 interaction terms.
+    """
+    Q1, Q2, S1, S2, I, x1, x2, x3, D1, D2 = x[:_HOVORKA_BASE_STATE_COUNT]
+
+    BW = params["BW"]
+    VG = params["VG"]
+    VI = params["VI"]
+    tauI = params["tauI"]
+    tauG = params["tauG"]
+    ka1 = params["ka1"]
+    ka2 = params["ka2"]
+    ka3 = params["ka3"]
+    k12 = params["k12"]
+    dawn_amp = params["dawn_amp"]
+
+    vg_bw = VG * BW
+    G = np.where(vg_bw > 0.0, Q1 / np.where(vg_bw > 0.0, vg_bw, 1.0), 0.0)
+    D = d / params["MwG"]
+
+    dy = np.empty((_HOVORKA_BASE_STATE_COUNT, x.shape[1]), dtype=np.float64) if out is None else out
+    dy[8] = (params["Ag"] * D) - ((1.0 / tauG) * D1)
+    dy[9] = (1.0 / tauG) * (D1 - D2)
+    UG = (1.0 / tauG) * D2
+
+    dy[2] = u - ((1.0 / tauI) * S1)
+    dy[3] = (1.0 / tauI) * (S1 - S2)
+    UI = (1.0 / tauI) * S2
+    dy[4] = (UI / (VI * BW)) - (params["ke"] * I)
+
+    F01 = params["F01"]
+    F01c = np.where(G >= 4.5, F01 * BW, np.maximum(0.0, F01 * BW * np.maximum(0.0, G) / 4.5))
+    fr = np.where(G >= 9.0, 0.003 * (G - 9.0) * vg_bw, 0.0)
+
+    cortisol = _cortisol_si_factor(float(t), dawn_amp)
+    dy[5] = (params["SI1"] * ka1 * cortisol) * I - ka1 * x1
+    dy[6] = (params["SI2"] * ka2 * cortisol) * I - ka2 * x2
+    dy[7] = (params["SI3"] * ka3 * cortisol) * I - ka3 * x3
+
+    R12 = (x1 * Q1) - (k12 * Q2)
+    R2 = x2 * Q2
+    EGPc = params["EGP0"] * BW * np.maximum(0.0, 1.0 - x3) * _dawn_egp_factor(float(t), dawn_amp)
+
+    dy[0] = UG + EGPc - R12 - F01c - fr
+    dy[1] = R12 - R2
+    return dy
+
+
+def hovorka_equations_batch(
+    t: float,
+    x: np.ndarray,
+    params: CohortParameterSet,
+    u: np.ndarray,
+    d: np.ndarray,
+    ac: np.ndarray,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Vectorized hovorka_equations for a block of N patients.
+
+    x is the (18, N) state matrix (one column per patient), params holds one
+    (N,) array per parameter name and u/d/ac are the (N,) insulin [mU/min],
+    carbohydrate [mg/min] and accelerometer inputs already resolved for
+    minute int(t). Returns the (18, N) derivative matrix, written into `out`
+    when given. Term-for-term identical to the scalar RHS.
+    """
+    Q1, Q2, S1, S2, I, x1, x2, x3, D1, D2, Y, Z, rGU, rGP, tPA, PAint, rdepl, th = x
+
+    dy = np.empty_like(x) if out is None else out
+    hovorka_classic_equations_batch(t, x, params, u, d, out=dy[:_HOVORKA_BASE_STATE_COUNT])
+
+    eth = compute_eth_exercise_terms_batch(
+        Y=Y, Z=Z, rGU=rGU, rGP=rGP,
+        tPA=tPA, PAint=PAint, rdepl=rdepl, th=th,
+        ac_t=ac,
+        x1=x1,
+        Q1=Q1,
+        params=params,
+    )
+    dy[10] = eth["dY"]
+    dy[11] = eth["dZ"]
+    dy[12] = eth["drGU"]
+    dy[13] = eth["drGP"]
+    dy[14] = eth["dtPA"]
+    dy[15] = eth["dPAint"]
+    dy[16] = eth["drdepl"]
+    dy[17] = eth["dth"]
+
+    dy[0] = dy[0] \
+        - eth["exercise_uptake"] \
+        + eth["exercise_prod"] \
+        - eth["exercise_si"]
+    return dy
+
+
+def _hill_with_slope(ratio: float, n: float) -> tuple[float, float]:
+    """Hill function r^n / (1 + r^n) as evaluated by the ETH model, and its derivative in r."""
+    num = ratio ** n
+    if num >= 1e15:
+        return 1.0, 0.0
+    f = num / (1.0 + num)
+    if ratio > 0.0:
+        return f, n * f * (1.0 - f) / ratio
+    return f, 1.0 if n == 1.0 else 0.0
+
+
+# Structural non-zeros of PatientModel.jac (rows: derivatives, columns: states).
+# Pass as solve_ivp(jac_sparsity=...) when the stiff solvers estimate the Jacobian
+# by finite differences instead of using the analytical one.
+_JAC_NONZEROS: dict[int, tuple[int, ...]] = {
+    0: (0, 1, 5, 7, 9, 11, 12, 13, 16),  # Q1
+    1: (0, 1, 5, 6),                     # Q2
+    2: (2,), 3: (2, 3), 4: (3, 4),       # S1, S2, I
+    5: (4, 5), 6: (4, 6), 7: (4, 7),     # x1, x2, x3
+    8: (8,), 9: (8, 9),                  # D1, D2
+    10: (10,), 11: (10, 11),             # Y, Z
+    12: (10, 12), 13: (10, 13, 17),      # rGU, rGP
+    14: (14,), 15: (15,),                # tPA, PAint
+    16: (13, 14, 15, 16), 17: (17,),     # rdepl, th
+}
+HOVORKA_JAC_SPARSITY = np.zeros((_HOVORKA_STATE_COUNT, _HOVORKA_STATE_COUNT), dtype=bool)
+for _row, _cols in _JAC_NONZEROS.items():
+    HOVORKA_JAC_SPARSITY[_row, list(_cols)] = True
+HOVORKA_JAC_SPARSITY.setflags(write=False)
+
+
+# Order of the contiguous PatientModel.theta vector.
+PATIENT_MODEL_PARAMETER_KEYS: tuple[str, ...] = (
+    "EGP0", "F01", "k12", "ka1", "ka2", "ka3", "SI1", "SI2", "SI3", "ke", "VI", "VG",
+    "tauI", "tauG", "Ag", "BW", "MwG", "dawn_amp",
+    "eth_tau_AC", "eth_b", "eth_tau_Z", "eth_Z_max", "eth_q1", "eth_q2", "eth_q3l", "eth_q4l",
+    "eth_q3h", "eth_q4h", "eth_q5", "eth_q6", "eth_adepl", "eth_bdepl", "eth_aY", "eth_aAC",
+    "eth_ah", "eth_n1", "eth_n2", "eth_tp",
+)
+
+
+class PatientModel:
+    """Hovorka + ETH right-hand side compiled once from a ParameterSet.
+
+    Holds the parameters as a contiguous float64 vector (theta, ordered as
+    PATIENT_MODEL_PARAMETER_KEYS) plus the derived constants the RHS needs
+    (VG·BW, VI·BW, 1/tauI, 1/tauG, SI_j·ka_j, clamped ETH constants), so rhs()
+    does no dict lookups. rhs() writes into a preallocated buffer and evaluates
+    the same expressions, in the same order, as hovorka_equations +
+    compute_eth_exercise_terms, so results are bit-identical to the reference
+    functions. Rebuild the model after mutating the ParameterSet (e.g. the
+    per-day SI perturbation in the simulation loop).
+    """
+
+    __slots__ = (
+        "theta", "vg", "bw", "vg_bw", "vi_bw", "inv_tau_i", "inv_tau_g", "ag", "mwg", "ke",
+        "k12", "ka1", "ka2", "ka3", "si1_ka1", "si2_ka2", "si3_ka3", "f01_bw", "egp0_bw",
+        "dawn_amp", "cortisol_amp", "eth", "_out", "_out_classic",
+    )
+
+    def __init__(self, params: ParameterSet) -> None:
+        self.theta = np.array(
+            [float(params.get(key, _DEFAULT_DAWN_AMP if key == "dawn_amp" else float("inf") if key == "eth_Z_max" else float("nan")))
+             for key in PATIENT_MODEL_PARAMETER_KEYS],
+            dtype=np.float64,
+        )
+        BW = float(params["BW"])
+        self.vg = float(params["VG"])
+        self.bw = BW
+        self.vg_bw = self.vg * BW
+        self.vi_bw = float(params["VI"]) * BW
+        self.inv_tau_i = 1.0 / float(params["tauI"])
+        self.inv_tau_g = 1.0 / float(params["tauG"])
+        self.ag = float(params["Ag"])
+        self.mwg = float(params["MwG"])
+        self.ke = float(params["ke"])
+        self.k12 = float(params["k12"])
+        self.ka1 = float(params["ka1"])
+        self.ka2 = float(params["ka2"])
+        self.ka3 = float(params["ka3"])
+        self.si1_ka1 = float(params["SI1"]) * self.ka1
+        self.si2_ka2 = float(params["SI2"]) * self.ka2
+        self.si3_ka3 = float(params["SI3"]) * self.ka3
+        self.f01_bw = float(params["F01"]) * BW
+        self.egp0_bw = float(params["EGP0"]) * BW
+        self.dawn_amp = float(params.get("dawn_amp", _DEFAULT_DAWN_AMP))
+        self.cortisol_amp = self.dawn_amp * _CORTISOL_SI_SCALE
+        self.eth = ETHConstants.from_params(params)
+        self._out = np.empty(_HOVORKA_STATE_COUNT, dtype=np.float64)
+        self._out_classic = np.empty(_HOVORKA_BASE_STATE_COUNT, dtype=np.float64)
+
+    def glucose(self, x: StateVector | StateArray) -> float:
+        """Plasma glucose Q1 / (VG·BW) [mmol/L]."""
+        return float(x[0]) / self.vg_bw if self.vg_bw > 0.0 else 0.0
+
+    def cortisol_factor(self, t: float) -> float:
+        """Cortisol SI factor applied to SI_j·ka_j at minute t (see _cortisol_si_factor)."""
+        return max(0.5, 1.0 - self.cortisol_amp * _cortisol_si_fraction(t))
+
+    def rhs(
+        self,
+        t: float,
+        x: StateArray,
+        u: float,
+        d: float,
+        ac: float,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Evaluate the 18-state derivative at minute t for inputs u [mU/min], d [mg/min], ac [counts].
+
+        Writes into `out` (or the model's own buffer when omitted) and returns it;
+        callers that keep the result across calls must copy it.
+        """
+        dy = self._out if out is None else out
+        Q1, Q2, S1, S2, I, x1, x2, x3, D1, D2, Y, Z, rGU, rGP, tPA, PAint, rdepl, th = x.tolist()
+        eth = self.eth
+
+        G = Q1 / self.vg_bw if self.vg_bw > 0.0 else 0.0
+        D = d / self.mwg
+
+        inv_tau_g = self.inv_tau_g
+        dy[8] = (self.ag * D) - (inv_tau_g * D1)
+        dy[9] = inv_tau_g * (D1 - D2)
+        UG = inv_tau_g * D2
+
+        inv_tau_i = self.inv_tau_i
+        dy[2] = u - (inv_tau_i * S1)
+        dy[3] = inv_tau_i * (S1 - S2)
+        dy[4] = ((inv_tau_i * S2) / self.vi_bw) - (self.ke * I)
+
+        if G >= 4.5:
+            F01c = self.f01_bw
+        else:
+            F01c = max(0.0, self.f01_bw * max(0.0, G) / 4.5)
+        fr = 0.003 * (G - 9.0) * self.vg * self.bw if G >= 9.0 else 0.0
+
+        cortisol = max(0.5, 1.0 - self.cortisol_amp * _cortisol_si_fraction(t))
+        dy[5] = (self.si1_ka1 * cortisol) * I - self.ka1 * x1
+        dy[6] = (self.si2_ka2 * cortisol) * I - self.ka2 * x2
+        dy[7] = (self.si3_ka3 * cortisol) * I - self.ka3 * x3
+
+        # --- ETH exercise states (compute_eth_exercise_terms with precomputed clamps) ---
+        AC = max(0.0, ac)
+        Y_s = max(0.0, Y)
+        Z_s = max(0.0, Z)
+        rGU_s = max(0.0, rGU)
+        rGP_s = min(max(0.0, rGP), 0.025)
+        tPA_s = max(0.0, tPA)
+        PAint_s = max(0.0, PAint)
+        rdepl_s = max(0.0, rdepl)
+        th_s = max(0.0, th)
+        Q1_s = max(0.0, Q1)
+        x1_s = max(0.0, x1)
+
+        dy[10] = (-eth.inv_tau_AC) * Y_s + eth.inv_tau_AC * AC
+        if eth.is_quiescent(Y_s, AC, th_s, tPA_s, PAint_s):
+            # Quiescent fast path: fY = fAC = fHI = fp = ft = 0.0 exactly, so the
+            # expressions below reduce to linear decay (bit-identical, no Hill powers).
+            dy[11] = 0.0 - (1.0 / eth.tau_Z) * Z_s
+            dy[12] = 0.0 - eth.q2 * rGU_s
+            dy[13] = 0.0 - eth.q4l * rGP_s
+            dy[14] = 0.0 - tPA_s
+            dy[15] = 0.0 - PAint_s
+            dy[16] = eth.q6 * (0.0 - rdepl_s)
+            dy[17] = 0.0 - eth.q5 * th_s
+        else:
+            fY_num = (Y_s / eth.aY) ** eth.n1
+            fY = fY_num / (1.0 + fY_num) if fY_num < 1e15 else 1.0
+            fAC_num = (AC / eth.aAC) ** eth.n2
+            fAC = fAC_num / (1.0 + fAC_num) if fAC_num < 1e15 else 1.0
+            fHI_num = (AC / eth.ah) ** eth.n2
+            fHI = fHI_num / (1.0 + fHI_num) if fHI_num < 1e15 else 1.0
+            fp_num = (th_s / eth.tp) ** eth.n2
+            fp = fp_num / (1.0 + fp_num) if fp_num < 1e15 else 1.0
+
+            q3 = (1.0 - fp) * eth.q3l + fp * eth.q3h
+            q4 = (1.0 - fp) * eth.q4l + fp * eth.q4h
+
+            if tPA_s > 1e-6 and PAint_s > 1e-6:
+                t_depl = max(1e-3, -eth.adepl * (PAint_s / tPA_s) + eth.bdepl)
+                ft_num = (tPA_s / t_depl) ** eth.n1
+                ft = ft_num / (1.0 + ft_num) if ft_num < 1e15 else 1.0
+            else:
+                ft = 0.0
+
+            dy[11] = eth.b * fY * Y_s * max(0.0, 1.0 - Z_s / eth.Z_max) - (1.0 - fY) / eth.tau_Z * Z_s
+            dy[12] = eth.q1 * fY * Y_s - eth.q2 * rGU_s
+            dy[13] = q3 * fY * Y_s - q4 * rGP_s
+            dy[14] = fAC - (1.0 - fAC) * tPA_s
+            dy[15] = fAC * AC - (1.0 - fAC) * PAint_s
+            dy[16] = eth.q6 * (ft * rGP_s - rdepl_s)
+            dy[17] = fHI - (1.0 - fHI) * eth.q5 * th_s
+
+        # --- Hovorka glucose compartments with ETH Q1 interaction terms ---
+        R12 = (x1 * Q1) - (self.k12 * Q2)
+        EGPc = self.egp0_bw * max(0.0, 1.0 - x3) * (1.0 + self.dawn_amp * _dawn_egp_fraction(t))
+        dy[0] = UG + EGPc - R12 - F01c - fr \
+            - min(rGU_s * Q1_s, 2.0) \
+            + min(max(0.0, rGP_s - rdepl_s) * Q1_s, 3.0) \
+            - Z_s * x1_s * Q1_s
+        dy[1] = R12 - x2 * Q2
+        return dy
+
+    def rhs_classic(
+        self,
+        t: float,
+        x: StateArray,
+        u: float,
+        d: float,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Derivative of the 10 classic Hovorka states with the ETH states at rest.
+
+        With Y = Z = ... = th = 0 and no accelerometer input the ETH derivatives
+        are exactly zero and the three ETH Q1 interaction terms are ±0.0, so this
+        equals rhs(t, [x, 0, ..., 0], u, d, 0.0)[:10] (used by the ICR/ISF
+        calibration, whose inputs carry no exercise).
+        """
+        dy = self._out_classic if out is None else out
+        Q1, Q2, S1, S2, I, x1, x2, x3, D1, D2 = x.tolist()
+
+        G = Q1 / self.vg_bw if self.vg_bw > 0.0 else 0.0
+        D = d / self.mwg
+
+        inv_tau_g = self.inv_tau_g
+        dy[8] = (self.ag * D) - (inv_tau_g * D1)
+        dy[9] = inv_tau_g * (D1 - D2)
+        UG = inv_tau_g * D2
+
+        inv_tau_i = self.inv_tau_i
+        dy[2] = u - (inv_tau_i * S1)
+        dy[3] = inv_tau_i * (S1 - S2)
+        dy[4] = ((inv_tau_i * S2) / self.vi_bw) - (self.ke * I)
+
+        if G >= 4.5:
+            F01c = self.f01_bw
+        else:
+            F01c = max(0.0, self.f01_bw * max(0.0, G) / 4.5)
+        fr = 0.003 * (G - 9.0) * self.vg * self.bw if G >= 9.0 else 0.0
+
+        cortisol = max(0.5, 1.0 - self.cortisol_amp * _cortisol_si_fraction(t))
+        dy[5] = (self.si1_ka1 * cortisol) * I - self.ka1 * x1
+        dy[6] = (self.si2_ka2 * cortisol) * I - self.ka2 * x2
+        dy[7] = (self.si3_ka3 * cortisol) * I - self.ka3 * x3
+
+        R12 = (x1 * Q1) - (self.k12 * Q2)
+        EGPc = self.egp0_bw * max(0.0, 1.0 - x3) * (1.0 + self.dawn_amp * _dawn_egp_fraction(t))
+        dy[0] = UG + EGPc - R12 - F01c - fr
+        dy[1] = R12 - x2 * Q2
+        return dy
+
+    def jac_classic(self, t: float, x: StateArray) -> np.ndarray:
+        """d(rhs_classic)/dx: the classic 10×10 block of jac() with the ETH states at rest.
+
+        Same branches as jac() with every ETH term dropped; returns a fresh array.
+        """
+        Q1, Q2, S1, S2, I, x1, x2, x3, D1, D2 = x.tolist()
+        J = np.zeros((_HOVORKA_BASE_STATE_COUNT, _HOVORKA_BASE_STATE_COUNT), dtype=np.float64)
+
+        G = Q1 / self.vg_bw if self.vg_bw > 0.0 else 0.0
+
+        inv_tau_g = self.inv_tau_g
+        J[8, 8] = -inv_tau_g
+        J[9, 8] = inv_tau_g
+        J[9, 9] = -inv_tau_g
+
+        inv_tau_i = self.inv_tau_i
+        J[2, 2] = -inv_tau_i
+        J[3, 2] = inv_tau_i
+        J[3, 3] = -inv_tau_i
+        J[4, 3] = inv_tau_i / self.vi_bw
+        J[4, 4] = -self.ke
+
+        cortisol = max(0.5, 1.0 - self.cortisol_amp * _cortisol_si_fraction(t))
+        J[5, 4] = self.si1_ka1 * cortisol
+        J[5, 5] = -self.ka1
+        J[6, 4] = self.si2_ka2 * cortisol
+        J[6, 6] = -self.ka2
+        J[7, 4] = self.si3_ka3 * cortisol
+        J[7, 7] = -self.ka3
+
+        dq1 = -x1
+        if G < 4.5 and G > 0.0 and self.f01_bw > 0.0:
+            dq1 -= self.f01_bw / (4.5 * self.vg_bw)
+        if G >= 9.0:
+            dq1 -= 0.003 * self.vg * self.bw / self.vg_bw
+        J[0, 0] = dq1
+        J[0, 1] = self.k12
+        J[0, 5] = -Q1
+        if x3 < 1.0:
+            J[0, 7] = -self.egp0_bw * (1.0 + self.dawn_amp * _dawn_egp_fraction(t))
+        J[0, 9] = inv_tau_g
+        J[1, 0] = x1
+        J[1, 1] = -self.k12 - x2
+        J[1, 5] = Q1
+        J[1, 6] = -Q2
+        return J
+
+    def jac(self, t: float, x: StateArray, ac: float) -> np.ndarray:
+        """Analytical Jacobian d(rhs)/dx at minute t for accelerometer input ac [counts].
+
+        Valid over the whole trajectory (meals, insulin and active exercise): it
+        differentiates the same piecewise expressions as rhs(), taking the one-sided
+        derivative of every clamp (max/min) on the branch rhs() evaluates, and the
+        Hill slopes of fY, fp and ft (fAC/fHI depend on the input only). Insulin and
+        CHO inputs enter rhs() additively, so only ac is needed. Returns a fresh dense
+        (18, 18) array whose structural non-zeros are HOVORKA_JAC_SPARSITY.
+        """
+        Q1, Q2, S1, S2, I, x1, x2, x3, D1, D2, Y, Z, rGU, rGP, tPA, PAint, rdepl, th = x.tolist()
+        eth = self.eth
+        J = np.zeros((_HOVORKA_STATE_COUNT, _HOVORKA_STATE_COUNT), dtype=np.float64)
+
+        G = Q1 / self.vg_bw if self.vg_bw > 0.0 else 0.0
+
+        inv_tau_g = self.inv_tau_g
+        J[8, 8] = -inv_tau_g
+        J[9, 8] = inv_tau_g
+        J[9, 9] = -inv_tau_g
+
+        inv_tau_i = self.inv_tau_i
+        J[2, 2] = -inv_tau_i
+        J[3, 2] = inv_tau_i
+        J[3, 3] = -inv_tau_i
+        J[4, 3] = inv_tau_i / self.vi_bw
+        J[4, 4] = -self.ke
+
+        cortisol = max(0.5, 1.0 - self.cortisol_amp * _cortisol_si_fraction(t))
+        J[5, 4] = self.si1_ka1 * cortisol
+        J[5, 5] = -self.ka1
+        J[6, 4] = self.si2_ka2 * cortisol
+        J[6, 6] = -self.ka2
+        J[7, 4] = self.si3_ka3 * cortisol
+        J[7, 7] = -self.ka3
+
+        # --- ETH exercise states ---
+        AC = max(0.0, ac)
+        Y_s = max(0.0, Y)
+        Z_s = max(0.0, Z)
+        rGU_s = max(0.0, rGU)
+        rGP_s = min(max(0.0, rGP), 0.025)
+        tPA_s = max(0.0, tPA)
+        PAint_s = max(0.0, PAint)
+        rdepl_s = max(0.0, rdepl)
+        th_s = max(0.0, th)
+        Q1_s = max(0.0, Q1)
+        x1_s = max(0.0, x1)
+        # d(clamped)/d(state): 1 on the pass-through branch, 0 where the clamp is active
+        dY_s = 1.0 if Y > 0.0 else 0.0
+        dZ_s = 1.0 if Z > 0.0 else 0.0
+        drGP_s = 1.0 if 0.0 < rGP < 0.025 else 0.0
+        dQ1_s = 1.0 if Q1 > 0.0 else 0.0
+
+        fY_ratio = Y_s / eth.aY
+        fY, dfY = _hill_with_slope(fY_ratio, eth.n1)
+        dfY *= dY_s / eth.aY
+        fAC = _hill_with_slope(AC / eth.aAC, eth.n2)[0]
+        fHI = _hill_with_slope(AC / eth.ah, eth.n2)[0]
+        fp, dfp = _hill_with_slope(th_s / eth.tp, eth.n2)
+        dfp *= (1.0 if th > 0.0 else 0.0) / eth.tp
+
+        q3 = (1.0 - fp) * eth.q3l + fp * eth.q3h
+        q4 = (1.0 - fp) * eth.q4l + fp * eth.q4h
+
+        ft = dft_dtPA = dft_dPAint = 0.0
+        if tPA_s > 1e-6 and PAint_s > 1e-6:
+            t_depl_raw = -eth.adepl * (PAint_s / tPA_s) + eth.bdepl
+            t_depl = max(1e-3, t_depl_raw)
+            ratio = tPA_s / t_depl
+            ft, dft = _hill_with_slope(ratio, eth.n1)
+            if t_depl_raw > 1e-3:
+                # ratio = tPA / (bdepl - adepl·PAint/tPA)
+                dratio_dtPA = 1.0 / t_depl - ratio / t_depl * (eth.adepl * PAint_s / (tPA_s * tPA_s))
+                dratio_dPAint = ratio / t_depl * (eth.adepl / tPA_s)
+            else:
+                dratio_dtPA = 1.0 / t_depl
+                dratio_dPAint = 0.0
+            dft_dtPA = dft * dratio_dtPA
+            dft_dPAint = dft * dratio_dPAint
+
+        # d(fY·Y_s)/dY
+        dfYY = dfY * Y_s + fY * dY_s
+        z_sat = 1.0 - Z_s / eth.Z_max
+        J[10, 10] = -eth.inv_tau_AC * dY_s
+        J[11, 10] = eth.b * max(0.0, z_sat) * dfYY + dfY / eth.tau_Z * Z_s
+        J[11, 11] = (
+            eth.b * fY * Y_s * (-1.0 / eth.Z_max if z_sat > 0.0 else 0.0) - (1.0 - fY) / eth.tau_Z
+        ) * dZ_s
+        J[12, 10] = eth.q1 * dfYY
+        J[12, 12] = -eth.q2 if rGU > 0.0 else 0.0
+        J[13, 10] = q3 * dfYY
+        J[13, 13] = -q4 * drGP_s
+        J[13, 17] = dfp * ((eth.q3h - eth.q3l) * fY * Y_s - (eth.q4h - eth.q4l) * rGP_s)
+        J[14, 14] = -(1.0 - fAC) if tPA > 0.0 else 0.0
+        J[15, 15] = -(1.0 - fAC) if PAint > 0.0 else 0.0
+        J[16, 13] = eth.q6 * ft * drGP_s
+        J[16, 14] = eth.q6 * dft_dtPA * rGP_s
+        J[16, 15] = eth.q6 * dft_dPAint * rGP_s
+        J[16, 16] = -eth.q6 if rdepl > 0.0 else 0.0
+        J[17, 17] = -(1.0 - fHI) * eth.q5 if th > 0.0 else 0.0
+
+        # --- Hovorka glucose compartments with ETH Q1 interaction terms ---
+        dq1 = -x1
+        if G < 4.5 and G > 0.0 and self.f01_bw > 0.0:
+            dq1 -= self.f01_bw / (4.5 * self.vg_bw)
+        if G >= 9.0:
+            dq1 -= 0.003 * self.vg * self.bw / self.vg_bw
+        if rGU_s * Q1_s < 2.0:
+            dq1 -= rGU_s * dQ1_s
+            J[0, 12] = -(Q1_s if rGU > 0.0 else 0.0)
+        net_prod = rGP_s - rdepl_s
+        if net_prod > 0.0 and net_prod * Q1_s < 3.0:
+            dq1 += net_prod * dQ1_s
+            J[0, 13] = drGP_s * Q1_s
+            J[0, 16] = -(Q1_s if rdepl > 0.0 else 0.0)
+        dq1 -= Z_s * x1_s * dQ1_s
+        J[0, 0] = dq1
+        J[0, 1] = self.k12
+        J[0, 5] = -Q1 - (Z_s * Q1_s if x1 > 0.0 else 0.0)
+        if x3 < 1.0:
+            J[0, 7] = -self.egp0_bw * (1.0 + self.dawn_amp * _dawn_egp_fraction(t))
+        J[0, 9] = inv_tau_g
+        J[0, 11] = -x1_s * Q1_s * dZ_s
+        J[1, 0] = x1
+        J[1, 1] = -self.k12 - x2
+        J[1, 5] = Q1
+        J[1, 6] = -Q2
+        return J
+
+
+# Linear sub-chains advanced exactly by LinearChainPropagator: insulin (S1, S2, I,
+# x1, x2, x3) and gut (D1, D2). The remaining states (Q1, Q2 and the 8 ETH states)
+# are nonlinear and left to a numerical stepper.
+LINEAR_STATE_INDICES = np.array([2, 3, 4, 5, 6, 7, 8, 9])
+NONLINEAR_STATE_INDICES = np.array([0, 1, 10, 11, 12, 13, 14, 15, 16, 17])
+
+
+class LinearChainPropagator:
+    """Exact propagator of the linear insulin and gut chains over frozen inputs.
+
+    With the insulin rate u [mU/min], the D1 appearance rate r [mmol/min] and the
+    cortisol factor c held constant, z = (S1, S2, I, x1, x2, x3, D1, D2) obeys
+    z' = A(c) z + B (u, r), so z(t + h) = M_h(c) @ (z, u, r) with M_h the top rows
+    of expm(h·[[A, B], [0, 0]]). Only the x_j rows depend on c, and they are
+    affine in it (the insulin trajectory driving them does not), so
+    M_h(c) = M_h(0) + c·(M_h(1) - M_h(0)) is exact and two matrix exponentials per
+    step size cover the whole cortisol window.
+    """
+
+    __slots__ = ("_base", "_slope")
+
+    def __init__(self, model: PatientModel, step_sizes: tuple[float, ...] = (0.5, 1.0)) -> None:
+        self._base: dict[float, np.ndarray] = {}
+        self._slope: dict[float, np.ndarray] = {}
+        matrices = [self._augmented_matrix(model, c) for c in (0.0, 1.0)]
+        for h in step_sizes:
+            m0, m1 = (expm(h * a)[: LINEAR_STATE_INDICES.size] for a in matrices)
+            self._base[h] = m0
+            self._slope[h] = m1 - m0
+
+    @staticmethod
+    def _augmented_matrix(model: PatientModel, cortisol: float) -> np.ndarray:
+        # Columns: S1, S2, I, x1, x2, x3, D1, D2, u, r
+        a = np.zeros((10, 10), dtype=np.float64)
+        a[0, 0] = -model.inv_tau_i
+        a[0, 8] = 1.0
+        a[1, 0] = model.inv_tau_i
+        a[1, 1] = -model.inv_tau_i
+        a[2, 1] = model.inv_tau_i / model.vi_bw
+        a[2, 2] = -model.ke
+        for row, (si_ka, ka) in enumerate(
+            ((model.si1_ka1, model.ka1), (model.si2_ka2, model.ka2), (model.si3_ka3, model.ka3)), start=3
+        ):
+            a[row, 2] = si_ka * cortisol
+            a[row, row] = -ka
+        a[6, 6] = -model.inv_tau_g
+        a[6, 9] = 1.0
+        a[7, 6] = model.inv_tau_g
+        a[7, 7] = -model.inv_tau_g
+        return a
+
+    def advance(self, z: np.ndarray, u: float, r: float, cortisol: float, h: float = 1.0) -> np.ndarray:
+        """Linear states after h minutes (h must be one of the precomputed step sizes)."""
+        aug = np.empty(LINEAR_STATE_INDICES.size + 2, dtype=np.float64)
+        aug[:-2] = z
+        aug[-2] = u
+        aug[-1] = r
+        return (self._base[h] + cortisol * self._slope[h]) @ aug
+
+
+def _fasting_insulin_chain(u_mu: float, params: ParameterSet) -> tuple[float, float, float, float, float]:
+    """(S1 = S2, I, x1, x2, x3) at steady state under constant basal insulin u_mu [mU/min]."""
     BW = params["BW"]
     tauI = params["tauI"]
     ke = params["ke"]
     VI = params["VI"]
-    SI1 = params["SI1"]
-    SI2 = params["SI2"]
-    SI3 = params["SI3"]
+
+    Seq = tauI * u_mu
+    Ieq = Seq / (ke * tauI * VI * BW)
+    return Seq, Ieq, params["SI1"] * Ieq, params["SI2"] * Ieq, params["SI3"] * Ieq
+
+
+def compute_fasting_steady_state_from_basal_insulin(u_mu: float, params: ParameterSet) -> StateVector:
+    BW = params["BW"]
     EGP0 = params["EGP0"]
     F01 = params["F01"]
     k12 = params["k12"]
 
-    Seq = tauI * u_mu
-    Ieq = Seq / (ke * tauI * VI * BW)
-    x1eq = SI1 * Ieq
-    x2eq = SI2 * Ieq
-    x3eq = SI3 * Ieq
+    Seq, Ieq, x1eq, x2eq, x3eq = _fasting_insulin_chain(u_mu, params)
 
     F01c = F01 * BW
     EGPc = EGP0 * BW * max(0.0, 1.0 - x3eq)
@@ -364,6 +979,11 @@ def _convert_target_glucose_to_mmol(
     return target_mmol / (params["MwG"] / 10.0), 0.1
 
 
+# Box for the basal insulin unknown [mU/min], shared by the Newton projection and the reduced bracket.
+_STEADY_STATE_INSULIN_BOUNDS = (1e-6, 200.0)
+_STEADY_STATE_RESIDUAL_TOLERANCE = 1e-6  # max |dX/dt| accepted at a steady state
+
+
 def _steady_state_input_stub(*_: object, **__: object) -> InputValues:
     return 0.0, 0.0, 0.0
 
@@ -378,7 +998,7 @@ def _project_state_and_insulin(state: np.ndarray, insulin_amount: float) -> tupl
     nonnegative_indices = get_non_negative_state_indices()
     valid_indices = nonnegative_indices[nonnegative_indices < projected_state.size]
     projected_state[valid_indices] = np.maximum(projected_state[valid_indices], 0.0)
-    projected_insulin = float(np.clip(insulin_amount, 1e-6, 200.0))
+    projected_insulin = float(np.clip(insulin_amount, *_STEADY_STATE_INSULIN_BOUNDS))
     return projected_state, projected_insulin
 
 
@@ -602,7 +1222,7 @@ def _solve_multivariate_steady_state_newton(
     z = callbacks.project(np.asarray(warm_start_z, dtype=np.float64))
     best_z = z.copy()
     best_score = float("inf")
-    state_residual_tolerance = 1e-6
+    state_residual_tolerance = _STEADY_STATE_RESIDUAL_TOLERANCE
     eval_count = 0
 
     if print_progress:
@@ -670,17 +1290,11 @@ def _solve_multivariate_steady_state_newton(
 
 def _compute_hovorka_steady_state_multivariate_newton(
     params: ParameterSet,
-    desired_glycemia: float | tuple[float, float],
-    international_units: bool = True,
+    target_mmol: float,
+    glucose_tolerance_mmol: float,
     max_iterations: int = 100,
     print_progress: bool = True,
 ) -> StateVector:
-    target_mmol, glucose_tolerance_mmol = _convert_target_glucose_to_mmol(
-        params,
-        desired_glycemia,
-        international_units,
-    )
-
     warm_start_insulin = 10.0
     warm_start_state = compute_fasting_steady_state_from_basal_insulin(warm_start_insulin, params)
     warm_start_state[0] = max(0.0, target_mmol * float(params["VG"]) * float(params["BW"]))
@@ -700,20 +1314,215 @@ def _compute_hovorka_steady_state_multivariate_newton(
     return [float(v) for v in solved_z[:-1]]
 
 
+def _fasting_glucose_losses(G: float | np.ndarray, params: ParameterSet | CohortParameterSet) -> tuple[np.ndarray, np.ndarray]:
+    """(F01c, fr) of hovorka_equations at glucose G [mmol/L], elementwise."""
+    F01_bw = params["F01"] * params["BW"]
+    F01c = np.where(G >= 4.5, F01_bw, np.maximum(0.0, F01_bw * np.maximum(0.0, G) / 4.5))
+    fr = np.where(G >= 9.0, 0.003 * (G - 9.0) * params["VG"] * params["BW"], 0.0)
+    return F01c, fr
+
+
+def _reduced_steady_state_columns(
+    u_mu: float | np.ndarray,
+    params: ParameterSet | CohortParameterSet,
+    target_mmol: float | np.ndarray,
+) -> tuple[np.ndarray, ...]:
+    """(Q1, Q2, S1 = S2, I, x1, x2, x3) of the fasting steady state at basal insulin u_mu.
+
+    The insulin chain is the one of compute_fasting_steady_state_from_basal_insulin;
+    Q1 is pinned by target_mmol and Q2 by dQ2/dt = 0. Elementwise, so params may be
+    a ParameterSet or a CohortParameterSet.
+    """
+    Seq, Ieq, x1eq, x2eq, x3eq = _fasting_insulin_chain(u_mu, params)  # type: ignore[arg-type]
+    q1 = np.maximum(0.0, target_mmol * params["VG"] * params["BW"])
+    q2 = x1eq * q1 / (params["k12"] + x2eq)
+    return q1, q2, Seq, Ieq, x1eq, x2eq, x3eq
+
+
+def _reduced_q1_balance(
+    u_mu: float | np.ndarray,
+    params: ParameterSet | CohortParameterSet,
+    target_mmol: float | np.ndarray,
+) -> np.ndarray:
+    """dQ1/dt at t = 0 of the _reduced_steady_state_columns(u_mu) state.
+
+    Every other derivative is zero by construction, so its root in u_mu is the
+    steady state. Strictly decreasing in u_mu (more insulin, less EGP and more
+    disposal), so the target is reachable inside the insulin box exactly when
+    the balance changes sign on it.
+    """
+    q1, q2, _, _, x1eq, _, x3eq = _reduced_steady_state_columns(u_mu, params, target_mmol)
+    F01c, fr = _fasting_glucose_losses(target_mmol, params)
+    EGPc = params["EGP0"] * params["BW"] * np.maximum(0.0, 1.0 - x3eq)
+    return EGPc - ((x1eq * q1) - (params["k12"] * q2)) - F01c - fr
+
+
+def _reduced_target_reachable(params: ParameterSet | CohortParameterSet, target_mmol: float | np.ndarray) -> np.ndarray:
+    lo, hi = _STEADY_STATE_INSULIN_BOUNDS
+    return (_reduced_q1_balance(lo, params, target_mmol) >= 0.0) & (_reduced_q1_balance(hi, params, target_mmol) <= 0.0)
+
+
+def _reduced_basal_insulin(params: ParameterSet | CohortParameterSet, target_mmol: float | np.ndarray) -> np.ndarray:
+    """Root in u of _reduced_q1_balance, in closed form (meaningful where the target is reachable).
+
+    With plasma insulin I and x_i = SI_i * I, the balance times (k12 + x2) is, while
+    x3 < 1, the quadratic -SI2 (B + SI1 Q1) I^2 + (A SI2 - B k12) I + A k12 with
+    A = EGP0 BW - F01c - fr and B = EGP0 BW SI3. For A > 0 it has one positive root;
+    the two equal forms below avoid cancellation for either sign of the linear term.
+    """
+    egp_bw = params["EGP0"] * params["BW"]
+    q1 = np.maximum(0.0, target_mmol * params["VG"] * params["BW"])
+    F01c, fr = _fasting_glucose_losses(target_mmol, params)
+    A = egp_bw - F01c - fr
+    B = egp_bw * params["SI3"]
+    a = -params["SI2"] * (B + params["SI1"] * q1)
+    b = A * params["SI2"] - B * params["k12"]
+    c = A * params["k12"]
+    sqrt_disc = np.sqrt(np.maximum(0.0, b * b - 4.0 * a * c))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plasma_insulin = np.where(b <= 0.0, 2.0 * c / (sqrt_disc - b), (b + sqrt_disc) / (-2.0 * a))
+    return plasma_insulin * (params["ke"] * params["VI"] * params["BW"])
+
+
+def _compute_hovorka_steady_state_reduced(
+    params: ParameterSet,
+    target_mmol: float,
+    glucose_tolerance_mmol: float,
+    print_progress: bool,
+) -> StateVector | None:
+    """Basal insulin from the 1-D Q1 balance (_reduced_basal_insulin), state reconstructed analytically.
+
+    Returns None when the target is not reachable inside the insulin box or the
+    reconstructed state fails the full 18-state residual check; the caller then
+    falls back to the multivariate Newton solver.
+    """
+    if not bool(_reduced_target_reachable(params, target_mmol)):
+        if print_progress:
+            lo, hi = _STEADY_STATE_INSULIN_BOUNDS
+            print(f"Reduced steady state: no basal insulin in [{lo}, {hi}] mU/min reaches {target_mmol} [mmol/L]")
+        return None
+
+    insulin = float(_reduced_basal_insulin(params, target_mmol))
+    q1, q2, seq, ieq, x1eq, x2eq, x3eq = (float(v) for v in _reduced_steady_state_columns(insulin, params, target_mmol))
+    state = state_listify(Q1=q1, Q2=q2, S1=seq, S2=seq, I=ieq, x1=x1eq, x2=x2eq, x3=x3eq, D1=0.0, D2=0.0)
+    residual = _evaluate_hovorka_steady_state_residual(
+        np.asarray([*state, insulin], dtype=np.float64), params, target_mmol
+    )
+    state_residual_inf = float(np.linalg.norm(residual[:-1], ord=np.inf))
+    glucose_residual_abs = abs(float(residual[-1]))
+    if print_progress:
+        print(
+            f"Reduced steady state for glucose {target_mmol} [mmol/L]: I= {insulin:.6f} [mU/min], "
+            f"||F_state||_inf= {state_residual_inf:.3e}, |F_glucose|= {glucose_residual_abs:.3e}"
+        )
+    if state_residual_inf > _STEADY_STATE_RESIDUAL_TOLERANCE or glucose_residual_abs > glucose_tolerance_mmol:
+        return None
+    return state
+
+
+def compute_fasting_steady_states_batch(
+    params: CohortParameterSet,
+    desired_glycemia: float | tuple[float, float],
+    international_units: bool = True,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Reduced fasting steady states of N patients at once (see stack_parameter_sets).
+
+    Returns the (18, N) state matrix and an (N,) mask of the columns that are
+    reachable and pass the residual check (hovorka_equations_batch). Those
+    columns equal compute_optimal_steady_state_from_glucose bit-for-bit; the
+    others are NaN and need the scalar solver and its Newton fallback.
+    """
+    target_mmol, glucose_tolerance_mmol = _convert_target_glucose_to_mmol(
+        params,  # type: ignore[arg-type]
+        desired_glycemia,
+        international_units,
+    )
+    n = int(np.asarray(params["BW"]).size)
+    target = np.broadcast_to(np.asarray(target_mmol, dtype=np.float64), (n,))
+    reachable = _reduced_target_reachable(params, target)
+    insulin = np.where(reachable, _reduced_basal_insulin(params, target), 1.0)
+    q1, q2, seq, ieq, x1eq, x2eq, x3eq = _reduced_steady_state_columns(insulin, params, target)
+
+    states = np.zeros((_HOVORKA_STATE_COUNT, n), dtype=np.float64)
+    states[0], states[1], states[2], states[3], states[4] = q1, q2, seq, seq, ieq
+    states[5], states[6], states[7] = x1eq, x2eq, x3eq
+    zeros = np.zeros(n, dtype=np.float64)
+    residual = hovorka_equations_batch(0.0, states, params, insulin, zeros, zeros)
+    glucose = states[0] / (params["VG"] * params["BW"])
+    solved = (
+        reachable
+        & (np.max(np.abs(residual), axis=0) <= _STEADY_STATE_RESIDUAL_TOLERANCE)
+        & (np.abs(glucose - target) <= glucose_tolerance_mmol)
+    )
+    states[:, ~solved] = np.nan
+    return states, solved
+
+
+def compute_optimal_steady_states(
+    params: ParameterSet,
+    desired_glycemias: Sequence[float | tuple[float, float]],
+    international_units: bool = True,
+    max_iterations: int = 100,
+    print_progress: bool = True,
+    method: str = STEADY_STATE_REDUCED,
+) -> list[StateVector]:
+    """Fasting steady states of one patient for several glucose targets, in order.
+
+    Each target is solved exactly like compute_optimal_steady_state_from_glucose;
+    _prepare_patient_run solves a candidate's ICR and ISF calibration starts
+    (5.5 and 13.0 mmol/L) in one call and hands them to find_icr/find_isf.
+
+    There is no continuation between targets: reachable targets are solved in
+    closed form, and a Newton fallback means the target has no steady state, so
+    its result depends on the start. The fallback always cold-starts, which
+    keeps every state independent of the other targets and their order.
+    """
+    if method not in (STEADY_STATE_REDUCED, STEADY_STATE_NEWTON):
+        raise ValueError(f"Unknown steady-state method {method!r}; expected {STEADY_STATE_REDUCED!r} or {STEADY_STATE_NEWTON!r}")
+    states: list[StateVector] = []
+    for desired_glycemia in desired_glycemias:
+        target_mmol, glucose_tolerance_mmol = _convert_target_glucose_to_mmol(
+            params,
+            desired_glycemia,
+            international_units,
+        )
+        state = None
+        if method == STEADY_STATE_REDUCED:
+            state = _compute_hovorka_steady_state_reduced(params, target_mmol, glucose_tolerance_mmol, print_progress)
+        if state is None:
+            state = _compute_hovorka_steady_state_multivariate_newton(
+                params,
+                target_mmol,
+                glucose_tolerance_mmol,
+                max_iterations=max_iterations,
+                print_progress=print_progress,
+            )
+        states.append(state)
+    return states
+
+
 def compute_optimal_steady_state_from_glucose(
     params: ParameterSet,
     desired_glycemia: float | tuple[float, float],
     international_units: bool = True,
     max_iterations: int = 100,
     print_progress: bool = True,
+    method: str = STEADY_STATE_REDUCED,
 ) -> StateVector:
-    return _compute_hovorka_steady_state_multivariate_newton(
-        params=params,
-        desired_glycemia=desired_glycemia,
+    """Fasting steady state whose glucose matches desired_glycemia.
+
+    method="reduced" (default) solves the 1-D basal-insulin problem and falls
+    back to the multivariate Newton solver when it cannot verify a solution;
+    method="newton" always uses the Newton solver.
+    """
+    return compute_optimal_steady_states(
+        params,
+        [desired_glycemia],
         international_units=international_units,
         max_iterations=max_iterations,
         print_progress=print_progress,
-    )
+        method=method,
+    )[0]
 
 
 def get_glucose_from_state(state: StateVector | StateArray, params: ParameterSet) -> float:
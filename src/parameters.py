@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Optional
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Optional, overload
 
 import numpy as np
 
@@ -88,7 +89,7 @@ def _get_hovorka_base_params() -> ParameterSet:
         "eth_Z_max":   0.2,       # [count·min] soft ceiling on Z accumulation (EXPERIMENTAL)
         # Dawn phenomenon amplitude: fractional EGP0 elevation at peak (05:00).
         # Reference patient uses population mean; individual values sampled in
-        # _sample_single_patient(). See _dawn_egp_factor() in model.py.
+        # _sample_patient_columns(). See _dawn_egp_factor() in model.py.
         "dawn_amp":    0.12,      # [fraction] peak EGP0 elevation (12% = population mean)
     }
 
@@ -100,96 +101,106 @@ def get_base_params() -> ParameterSet:
 
 def _sample_truncated_normal(
     rng: np.random.Generator,
+    size: int,
     mean: float,
     std: float,
     lower: float = _MIN_POSITIVE,
     upper: float = float("inf"),
     max_attempts: int = _MAX_RESAMPLE_ATTEMPTS,
-) -> float:
-    """Sample from Normal(mean, std) truncated to (lower, upper) by rejection."""
-    for _ in range(max_attempts):
-        sample = float(rng.normal(mean, std))
-        if np.isfinite(sample) and sample > lower and sample < upper:
-            return sample
-    return float(np.clip(mean, lower, upper))
-
-
-def _is_plausible_patient(p: ParameterSet) -> bool:
-    """Loose physiological plausibility checks for sampled parameter sets."""
-    positive_keys = (
-        "EGP0",
-        "F01",
-        "k12",
-        "ka1",
-        "ka2",
-        "ka3",
-        "SI1",
-        "SI2",
-        "SI3",
-        "kb1",
-        "kb2",
-        "kb3",
-        "ke",
-        "VI",
-        "VG",
-        "tauI",
-        "tauG",
-        "Ag",
-        "BW",
-    )
-    if any(p[k] <= 0.0 or not np.isfinite(p[k]) for k in positive_keys):
-        return False
-
-    if not (40.0 <= p["BW"] <= 180.0):
-        return False
-    if not (_AGE_YEARS_MIN <= p["age_years"] <= _AGE_YEARS_MAX):
-        return False
-    if not (0.03 <= p["VI"] <= 0.5):
-        return False
+) -> np.ndarray:
+    """Sample size values from Normal(mean, std) truncated to (lower, upper) by rejection.
+
+    Out-of-range entries are redrawn together; entries still out of range after
+    max_attempts draws fall back to mean clipped into the range.
+    """
+    samples = rng.normal(mean, std, size=size)
+    # NaN and inf fail the comparisons, as np.isfinite would reject them.
+    bad = ~((samples > lower) & (samples < upper))
+    for _ in range(max_attempts - 1):
+        n_bad = int(np.count_nonzero(bad))
+        if n_bad == 0:
+            break
+        samples[bad] = rng.normal(mean, std, size=n_bad)
+        bad = ~((samples > lower) & (samples < upper))
+    samples[bad] = np.clip(mean, lower, upper)
+    return samples
+
+
+_POSITIVE_KEYS = (
+    "EGP0",
+    "F01",
+    "k12",
+    "ka1",
+    "ka2",
+    "ka3",
+    "SI1",
+    "SI2",
+    "SI3",
+    "kb1",
+    "kb2",
+    "kb3",
+    "ke",
+    "VI",
+    "VG",
+    "tauI",
+    "tauG",
+    "Ag",
+    "BW",
+)
+
+
+def _plausible_patients(columns: dict[str, np.ndarray]) -> np.ndarray:
+    """Loose physiological plausibility checks, as a boolean mask over stacked patients."""
+    ok = np.ones(len(columns["BW"]), dtype=bool)
+    for k in _POSITIVE_KEYS:
+        ok &= (columns[k] > 0.0) & np.isfinite(columns[k])
+
+    def within(key: str, low: float, high: float) -> None:
+        nonlocal ok
+        ok &= (low <= columns[key]) & (columns[key] <= high)
+
+    within("BW", 40.0, 180.0)
+    within("age_years", _AGE_YEARS_MIN, _AGE_YEARS_MAX)
+    within("VI", 0.03, 0.5)
     # Tightened VG lower bound to reduce unstable low-distribution outliers.
-    if not (0.10 <= p["VG"] <= 0.62):
-        return False
-    if not (5.0 <= p["tauI"] <= 400.0):
-        return False
-    if not (5.0 <= p["tauG"] <= 240.0):
-        return False
+    within("VG", 0.10, 0.62)
+    within("tauI", 5.0, 400.0)
+    within("tauG", 5.0, 240.0)
 
     # Keep insulin sensitivities within physiological ranges based on published
     # Hovorka distributions (Boiroux-Cap2 thesis, Table 2.1)
     # SI1 ~ N(32e-4, 20e-4²), allow ±3σ → [0, 92e-4]; clamp at 1e-4
-    if not (1.0e-4 <= p["SI1"] <= 1.0e-2):
-        return False
+    within("SI1", 1.0e-4, 1.0e-2)
     # SI2 ~ N(5.1e-4, 4.9e-4²), allow ±3σ → [0, 19.8e-4]; clamp at 1e-5
-    if not (1e-5 <= p["SI2"] <= 2.0e-3):
-        return False
+    within("SI2", 1e-5, 2.0e-3)
     # SI3 ~ N(325e-4, 191e-4²), allow ±3σ → [0, 898e-4]; clamp at 1e-3
-    if not (1e-3 <= p["SI3"] <= 9.0e-2):
-        return False
+    within("SI3", 1e-3, 9.0e-2)
 
     # Endogenous glucose production: N(0.0161, 0.0039²)
     # Allow ±3σ: 0.0161 ± 0.0117 = -0.0 to 0.028, clamp at 0.001
-    if not (0.001 <= p["EGP0"] <= 0.030):
-        return False
+    within("EGP0", 0.001, 0.030)
 
     # F01 (non-insulin dependent glucose): N(0.0097, 0.0022²)
     # Allow ±3σ: 0.0097 ± 0.0066 = 0.003 to 0.016
-    if not (0.001 <= p["F01"] <= 0.020):
-        return False
+    within("F01", 0.001, 0.020)
+    return ok
 
-    return True
 
+def _sample_patient_columns(rng: np.random.Generator, base: ParameterSet, n: int) -> dict[str, np.ndarray]:
+    """Sample n patients with guarded distributions, one float64 (n,) array per key.
 
-def _sample_single_patient(rng: np.random.Generator, base: ParameterSet) -> ParameterSet:
-    """Sample one patient parameter set with guarded distributions."""
-    p = base.copy()
+    Each parameter is drawn for all n patients before the next one. Unsampled
+    keys keep their base value.
+    """
+    p = {key: np.full(n, value, dtype=np.float64) for key, value in base.items()}
 
     # NOTE: kb1/kb2/kb3 are NOT sampled here — the ODE always recomputes them
     # as kb = SI × ka at runtime (model.py). Sampling them here would have no effect.
 
     # Glucose parameters (truncated normal, no abs-folding)
-    p["EGP0"] = _sample_truncated_normal(rng, 0.0161, 0.0039)
-    p["F01"] = _sample_truncated_normal(rng, 0.0097, 0.0022)
-    p["k12"] = _sample_truncated_normal(rng, 0.0649, 0.0282)
+    p["EGP0"] = _sample_truncated_normal(rng, n, 0.0161, 0.0039)
+    p["F01"] = _sample_truncated_normal(rng, n, 0.0097, 0.0022)
+    p["k12"] = _sample_truncated_normal(rng, n, 0.0649, 0.0282)
 
     # Activation/deactivation rates (ka1, ka2, ka3)
     # The Boiroux thesis reports CVs of ~100%, 74%, and 77% respectively, but those
@@ -199,50 +210,50 @@ def _sample_single_patient(rng: np.random.Generator, base: ParameterSet) -> Para
     # Holding ka near their nominal values and concentrating variability in SI (which
     # is the clinically meaningful parameter) better matches published ICR/ISF distributions
     # (Dalla Man et al. 2007). CV reduced to ~10% here.
-    p["ka1"] = _sample_truncated_normal(rng, 0.0055, 0.0006)   # was std=0.0056 (CV≈102%)
-    p["ka2"] = _sample_truncated_normal(rng, 0.0683, 0.0068)   # was std=0.0507 (CV≈74%)
-    p["ka3"] = _sample_truncated_normal(rng, 0.0304, 0.0030)   # was std=0.0235 (CV≈77%)
+    p["ka1"] = _sample_truncated_normal(rng, n, 0.0055, 0.0006)   # was std=0.0056 (CV≈102%)
+    p["ka2"] = _sample_truncated_normal(rng, n, 0.0683, 0.0068)   # was std=0.0507 (CV≈74%)
+    p["ka3"] = _sample_truncated_normal(rng, n, 0.0304, 0.0030)   # was std=0.0235 (CV≈77%)
 
     # Insulin sensitivities (cannot be negative)
     # Means scaled ~38% down from Hovorka 2004 (7-patient cohort) to represent a broader
     # T1D adult population targeting ICR ~12 g/U (Dalla Man et al. 2007, IEEE TBME).
     # Stds scaled proportionally to preserve published CVs (Boiroux thesis Table 2.1).
-    p["SI1"] = _sample_truncated_normal(rng, 32.0e-4, 20.0e-4, lower=1e-6)
-    p["SI2"] = _sample_truncated_normal(rng, 5.1e-4, 4.9e-4, lower=1e-6)
-    p["SI3"] = _sample_truncated_normal(rng, 325.0e-4, 191.0e-4, lower=1e-6)
+    p["SI1"] = _sample_truncated_normal(rng, n, 32.0e-4, 20.0e-4, lower=1e-6)
+    p["SI2"] = _sample_truncated_normal(rng, n, 5.1e-4, 4.9e-4, lower=1e-6)
+    p["SI3"] = _sample_truncated_normal(rng, n, 325.0e-4, 191.0e-4, lower=1e-6)
 
     # Elimination and volumes
-    p["ke"] = _sample_truncated_normal(rng, 0.14, 0.035)
-    p["VI"] = _sample_truncated_normal(rng, 0.12, 0.012)
+    p["ke"] = _sample_truncated_normal(rng, n, 0.14, 0.035)
+    p["VI"] = _sample_truncated_normal(rng, n, 0.12, 0.012)
 
     # VG derivation per spec: exp(VG) ~ N(1.16, 0.23^2)
     # Use truncated normal (>1.01) to avoid non-physical VG <= 0 and avoid clipping spikes.
     vg_exp = _sample_truncated_normal(
         rng,
+        n,
         _VG_EXP_NORMAL_MEAN,
         _VG_EXP_NORMAL_STD,
         lower=_VG_EXP_MIN_FOR_POSITIVE_VG,
     )
-    p["VG"] = float(np.log(vg_exp))
+    p["VG"] = np.log(vg_exp)
 
     # tauI derivation: 1/tauI ~ N(0.018, 0.0045^2), guarded away from ~0
-    tau_i_rate = _sample_truncated_normal(rng, 0.018, 0.0045, lower=_TAUI_RATE_MIN)
+    tau_i_rate = _sample_truncated_normal(rng, n, 0.018, 0.0045, lower=_TAUI_RATE_MIN)
     p["tauI"] = 1.0 / tau_i_rate
 
     # tauG derivation: ln(tauG) ~ N(3.689, 0.25^2)
-    p["tauG"] = float(np.exp(rng.normal(3.689, 0.25)))
+    p["tauG"] = np.exp(rng.normal(3.689, 0.25, size=n))
 
     # Carbohydrate bioavailability: physiological range 0.7–0.9 for T1D adults
     # (upper bound was incorrectly 1.2 = 120% absorption, which is physically impossible)
-    p["Ag"] = float(rng.uniform(0.7, 0.9))
+    p["Ag"] = rng.uniform(0.7, 0.9, size=n)
     # Adult T1D cohort assumption: broad outpatient population, not pediatric.
     # Keep age integer at generation time, but store as float for consistency
     # with the model parameter container type.
-    sampled_age = int(np.rint(rng.normal(_AGE_YEARS_MEAN, _AGE_YEARS_STD)))
-    clamped_age = max(int(_AGE_YEARS_MIN), min(int(_AGE_YEARS_MAX), sampled_age))
-    p["age_years"] = float(clamped_age)
+    sampled_age = np.rint(rng.normal(_AGE_YEARS_MEAN, _AGE_YEARS_STD, size=n))
+    p["age_years"] = np.clip(sampled_age, _AGE_YEARS_MIN, _AGE_YEARS_MAX)
     # Body weight: constrained male cohort range for this simulation setup.
-    p["BW"] = float(rng.uniform(65.0, 95.0))
+    p["BW"] = rng.uniform(65.0, 95.0, size=n)
 
     # ETH exercise parameter sampling — distributions from params_T1D-V1_pred.csv
     # (261-sample V1 posterior, Deichmann et al. 2023). The 5 individual patient
@@ -251,12 +262,12 @@ def _sample_single_patient(rng: np.random.Generator, base: ParameterSet) -> Para
     # Fixed structural parameters (tau_AC, tau_Z, adepl, bdepl, aY, aAC, ah, n1, n2, tp, alpha)
     # are not sampled — they are consistent across all T1D patient files.
     # eth_b: V1 nominal 3.64e-6; std reflects V1/V2/V3 spread (1.55–3.64e-6).
-    p["eth_b"]   = _sample_truncated_normal(rng, 3.64e-6, 1.05e-6, lower=1e-9)  # Z drive
+    p["eth_b"]   = _sample_truncated_normal(rng, n, 3.64e-6, 1.05e-6, lower=1e-9)  # Z drive
     # eth_q1/q2: posterior mean/std; observed range [4.4e-7, 1.2e-6] / [0.032, 0.134].
-    p["eth_q1"]  = _sample_truncated_normal(rng, 7.33e-7, 1.60e-7, lower=1e-9, upper=1.3e-6)  # rGU drive
-    p["eth_q2"]  = _sample_truncated_normal(rng, 0.0707,  0.0219,  lower=0.032)               # rGU decay
-    p["eth_q3l"] = _sample_truncated_normal(rng, 5.79e-7, 1.83e-7, lower=1e-10)  # rGP aerobic drive
-    p["eth_q4l"] = _sample_truncated_normal(rng, 0.0993,  0.0378,  lower=1e-4)   # rGP aerobic decay
+    p["eth_q1"]  = _sample_truncated_normal(rng, n, 7.33e-7, 1.60e-7, lower=1e-9, upper=1.3e-6)  # rGU drive
+    p["eth_q2"]  = _sample_truncated_normal(rng, n, 0.0707,  0.0219,  lower=0.032)               # rGU decay
+    p["eth_q3l"] = _sample_truncated_normal(rng, n, 5.79e-7, 1.83e-7, lower=1e-10)  # rGP aerobic drive
+    p["eth_q4l"] = _sample_truncated_normal(rng, n, 0.0993,  0.0378,  lower=1e-4)   # rGP aerobic decay
     # Anaerobic params are fixed (EXPERIMENTAL) — not sampled per patient.
 
     # Dawn phenomenon amplitude: truncated normal calibrated so ~30% of patients
@@ -264,11 +275,84 @@ def _sample_single_patient(rng: np.random.Generator, base: ParameterSet) -> Para
     # Bounds [0.0, 0.22] anchored to Perriello et al. (1991): 20–25% peak EGP
     # elevation in T1D; mean 0.12 reflects ~60–70% prevalence of clinically
     # significant dawn phenomenon (Monnier et al. 2012; Carroll & Schade 2005).
-    p["dawn_amp"] = float(np.clip(rng.normal(0.12, 0.07), 0.0, 0.22))
+    p["dawn_amp"] = np.clip(rng.normal(0.12, 0.07, size=n), 0.0, 0.22)
 
     return p
 
 
+class PatientPool(Sequence[ParameterSet]):
+    """Monte Carlo patients stored column-wise: one float64 (N,) array per parameter key.
+
+    Indexing builds one patient's ParameterSet on demand (a fresh dict each time,
+    so callers may add ICR/ISF to it); slicing returns a PatientPool over the same
+    arrays, and stack_parameter_sets hands the columns out without rebuilding them.
+    """
+
+    def __init__(self, columns: dict[str, np.ndarray]) -> None:
+        self.columns = columns
+        self._n = len(next(iter(columns.values()))) if columns else 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    @overload
+    def __getitem__(self, index: int) -> ParameterSet: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> PatientPool: ...
+
+    def __getitem__(self, index: int | slice) -> ParameterSet | PatientPool:
+        if isinstance(index, slice):
+            return PatientPool({key: values[index] for key, values in self.columns.items()})
+        k = index + self._n if index < 0 else index
+        if not 0 <= k < self._n:
+            raise IndexError(f"patient index {index} out of range for a pool of {self._n}")
+        return {key: float(values[k]) for key, values in self.columns.items()}
+
+    def __iter__(self) -> Iterator[ParameterSet]:
+        keys = list(self.columns)
+        rows = zip(*(values.tolist() for values in self.columns.values()))
+        return (dict(zip(keys, row)) for row in rows)
+
+
+def sample_patient_pool(
+    n: int = 10,
+    standard_patient: bool = False,
+    seed: Optional[int | np.random.SeedSequence] = None,
+) -> PatientPool:
+    """
+    Sample N patients column-wise (see PatientPool).
+
+    - `standard_patient=True` returns base parameters duplicated N times.
+    - Otherwise every parameter is drawn for the whole pool at once
+      (_sample_patient_columns). Patients failing the plausibility checks are
+      redrawn together, up to _MAX_RESAMPLE_ATTEMPTS times, then fall back to
+      the base parameters.
+    """
+    n = max(0, n)
+    base = get_base_params()
+    if standard_patient or n == 0:
+        columns = {key: np.full(n, value, dtype=np.float64) for key, value in base.items()}
+    else:
+        rng = np.random.default_rng(seed)
+        columns = _sample_patient_columns(rng, base, n)
+        bad = ~_plausible_patients(columns)
+        for _ in range(_MAX_RESAMPLE_ATTEMPTS - 1):
+            idx = np.flatnonzero(bad)
+            if idx.size == 0:
+                break
+            redrawn = _sample_patient_columns(rng, base, idx.size)
+            for key, values in redrawn.items():
+                columns[key][idx] = values
+            bad[idx] = ~_plausible_patients(redrawn)
+        idx = np.flatnonzero(bad)
+        for key, value in base.items():
+            columns[key][idx] = value
+    for values in columns.values():
+        values.setflags(write=False)
+    return PatientPool(columns)
+
+
 def generate_monte_carlo_patients(
     n: int = 10,
     standard_patient: bool = False,
@@ -279,28 +363,210 @@ def generate_monte_carlo_patients(
 
     - `standard_patient=True` returns base parameters duplicated N times.
     - Otherwise, sampled parameters are resampled until plausibility checks pass.
+
+    The dicts of sample_patient_pool, all materialized; prefer the pool for
+    large candidate pools.
     """
-    if n <= 0:
-        return []
+    return list(sample_patient_pool(n, standard_patient=standard_patient, seed=seed))
 
-    rng = np.random.default_rng(seed)
-    base = get_base_params()
 
-    patients: list[ParameterSet] = []
+# Candidates of a CandidateStream are drawn in chunks of this size, each from its own seed.
+CANDIDATE_CHUNK_SIZE = 256
 
-    for _ in range(n):
-        if standard_patient:
-            patients.append(base.copy())
-            continue
 
-        sampled = base.copy()
-        for _ in range(_MAX_RESAMPLE_ATTEMPTS):
-            sampled = _sample_single_patient(rng, base)
-            if _is_plausible_patient(sampled):
-                break
-        else:
-            sampled = base.copy()
+class CandidateStream:
+    """Lazy Monte Carlo candidate stream for a target number of accepted patients.
+
+    Candidates are drawn with sample_patient_pool in chunks of chunk_size; chunk k
+    is seeded with the k-th child of SeedSequence(seed), so a seed fixes the
+    candidate sequence however the consumer batches it. The consumer reports every
+    evaluated candidate with record(); next_batch() sizes the next batch from the
+    running acceptance rate to be expected to reach n_target, and the stream stops
+    once the target is met or max_candidates have been drawn.
+    """
+
+    def __init__(
+        self,
+        n_target: int,
+        standard_patient: bool = False,
+        seed: Optional[int] = None,
+        max_candidates: Optional[int] = None,
+        chunk_size: int = CANDIDATE_CHUNK_SIZE,
+    ) -> None:
+        self.n_target = max(0, n_target)
+        self.standard_patient = standard_patient
+        self.max_candidates = max_candidates
+        self.chunk_size = max(1, chunk_size)
+        self.n_drawn = 0
+        self.n_evaluated = 0
+        self.n_accepted = 0
+        self._seed_sequence = np.random.SeedSequence(seed)
+        self._chunk = PatientPool({})
+        self._chunk_offset = 0
+
+    @property
+    def acceptance_rate(self) -> float:
+        """Running acceptance estimate (accepted + 1) / (evaluated + 2); 0.5 before any candidate."""
+        return (self.n_accepted + 1) / (self.n_evaluated + 2)
+
+    @property
+    def exhausted(self) -> bool:
+        """True once the target is met or the candidate budget is spent."""
+        budget_spent = self.max_candidates is not None and self.n_drawn >= self.max_candidates
+        return self.n_accepted >= self.n_target or budget_spent
+
+    def record(self, accepted: bool) -> None:
+        """Report the outcome of one drawn candidate."""
+        self.n_evaluated += 1
+        self.n_accepted += bool(accepted)
+
+    def batch_size(self) -> int:
+        """Candidates still expected to be needed, net of drawn but unevaluated ones."""
+        if self.exhausted:
+            return 0
+        rate = self.acceptance_rate
+        pending = self.n_drawn - self.n_evaluated
+        needed = int(np.ceil((self.n_target - self.n_accepted) / rate - pending))
+        if self.max_candidates is not None:
+            needed = min(needed, self.max_candidates - self.n_drawn)
+        return max(1, needed)
+
+    def next_batch(self, limit: Optional[int] = None) -> PatientPool:
+        """The next batch_size() candidates (at most limit); empty once exhausted."""
+        n = self.batch_size() if limit is None else min(self.batch_size(), max(0, limit))
+        return self.take(n)
+
+    def take(self, n: int) -> PatientPool:
+        """The next n candidates of the stream (fewer if the budget runs out)."""
+        if self.max_candidates is not None:
+            n = min(n, self.max_candidates - self.n_drawn)
+        pieces: list[PatientPool] = []
+        remaining = max(0, n)
+        while remaining > 0:
+            if self._chunk_offset == len(self._chunk):
+                self._chunk = sample_patient_pool(
+                    self.chunk_size,
+                    standard_patient=self.standard_patient,
+                    seed=self._seed_sequence.spawn(1)[0],
+                )
+                self._chunk_offset = 0
+            stop = min(len(self._chunk), self._chunk_offset + remaining)
+            pieces.append(self._chunk[self._chunk_offset:stop])
+            remaining -= stop - self._chunk_offset
+            self._chunk_offset = stop
+        self.n_drawn += max(0, n)
+        if len(pieces) == 1:
+            return pieces[0]
+        if not pieces:
+            return sample_patient_pool(0)
+        columns = {key: np.concatenate([piece.columns[key] for piece in pieces]) for key in pieces[0].columns}
+        for values in columns.values():
+            values.setflags(write=False)
+        return PatientPool(columns)
+
+
+# Defaults for optional keys that the scalar RHS reads with params.get(...), so a
+# stacked cohort behaves exactly like the per-patient dicts it was built from.
+_STACK_DEFAULTS: dict[str, float] = {
+    "dawn_amp": 0.12,
+    "eth_Z_max": float("inf"),
+}
+
+
+def stack_parameter_sets(patients: Sequence[ParameterSet]) -> dict[str, np.ndarray]:
+    """Stack N patient ParameterSets into one contiguous float64 (N,) array per key.
+
+    Used by the cohort engine (src/cohort.py). Keys missing from a patient fall
+    back to _STACK_DEFAULTS, or NaN when no default exists. A PatientPool returns
+    its (read-only) columns directly.
+    """
+    if isinstance(patients, PatientPool):
+        stacked = {key: np.full(len(patients), value) for key, value in _STACK_DEFAULTS.items()}
+        stacked.update(patients.columns)
+        return stacked
+    keys: dict[str, None] = dict.fromkeys(_STACK_DEFAULTS)
+    for p in patients:
+        keys.update(dict.fromkeys(p))
+    return {
+        key: np.array(
+            [float(p.get(key, _STACK_DEFAULTS.get(key, float("nan")))) for p in patients],
+            dtype=np.float64,
+        )
+        for key in keys
+    }
+
+
+# --- Patient-level parameter table ---
+
+# Calibrated ratios stored next to the sampled parameters of every accepted patient.
+CALIBRATED_PARAMETER_KEYS = ("ICR", "ISF")
+PATIENT_PARAMETER_DTYPE = np.dtype(
+    [(key, np.float64) for key in (*_get_hovorka_base_params(), *CALIBRATED_PARAMETER_KEYS)]
+)
+
+
+class ParameterRecord(Mapping[str, float]):
+    """Read-only ParameterSet view of one row of a structured parameter table.
+
+    Reads go straight to the table (no copy). Pickling keeps only the row, so a
+    record sent back from a worker costs one packed float64 row instead of a dict.
+    Use dict(record) for a mutable ParameterSet.
+    """
 
-        patients.append(sampled)
+    __slots__ = ("_table", "_index")
 
-    return patients
+    def __init__(self, table: np.ndarray, index: int) -> None:
+        self._table = table
+        self._index = index
+
+    @property
+    def record(self) -> np.void:
+        """The structured row itself (a view into the table)."""
+        return self._table[self._index]
+
+    def __getitem__(self, key: str) -> float:
+        if key not in self._table.dtype.fields:
+            raise KeyError(key)
+        return float(self._table[key][self._index])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.dtype.names)
+
+    def __len__(self) -> int:
+        return len(self._table.dtype.names)
+
+    def __repr__(self) -> str:
+        return f"ParameterRecord({dict(self)!r})"
+
+    def __reduce__(self) -> tuple[object, tuple[object, ...]]:
+        row = self._table[self._index:self._index + 1]
+        if row.dtype == PATIENT_PARAMETER_DTYPE:
+            return _parameter_record_from_bytes, (row.tobytes(),)
+        return ParameterRecord, (row.copy(), 0)
+
+
+def _parameter_record_from_bytes(raw: bytes) -> ParameterRecord:
+    """Unpickle a PATIENT_PARAMETER_DTYPE record from its packed row."""
+    return ParameterRecord(np.frombuffer(raw, dtype=PATIENT_PARAMETER_DTYPE), 0)
+
+
+def store_parameter_set(table: np.ndarray, index: int, params: Mapping[str, float]) -> ParameterRecord:
+    """Write params into row index of a PATIENT_PARAMETER_DTYPE-like table and return its view.
+
+    Fields missing from params are NaN; keys without a field are not stored.
+    """
+    row = table[index]
+    for key in table.dtype.names:
+        row[key] = float(params.get(key, float("nan")))
+    return ParameterRecord(table, index)
+
+
+def parameter_table(patients: Sequence[Mapping[str, float]]) -> np.ndarray:
+    """Structured (N,) PATIENT_PARAMETER_DTYPE table of N ParameterSets or ParameterRecords."""
+    table = np.empty(len(patients), dtype=PATIENT_PARAMETER_DTYPE)
+    for k, p in enumerate(patients):
+        if isinstance(p, ParameterRecord) and p.record.dtype == PATIENT_PARAMETER_DTYPE:
+            table[k] = p.record
+        else:
+            store_parameter_set(table, k, p)
+    return table
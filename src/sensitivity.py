@@ -1,9 +1,273 @@
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Generator
+
 import numpy as np
 from scipy.integrate import solve_ivp  # type: ignore[import-untyped]
 
-from src.parameters import get_base_params
-from src.model import ParameterSet, hovorka_equations, compute_optimal_steady_state_from_glucose
-from src.simulation_utils import clip_state_trajectory
+from src.parameters import generate_monte_carlo_patients, get_base_params, stack_parameter_sets
+from src.model import (
+    CohortParameterSet,
+    ParameterSet,
+    PatientModel,
+    StateVector,
+    compute_fasting_steady_states_batch,
+    compute_optimal_steady_state_from_glucose,
+    hovorka_classic_equations_batch,
+)
+from src.simulation_utils import JACOBIAN_SOLVER_METHODS, clip_state_trajectory, jacobian_solver_options
+
+# Calibration root finders for the bolus that brings glucose to target.
+CALIBRATION_SECANT = "secant"
+CALIBRATION_BISECTION = "bisection"
+CALIBRATION_NEWTON = "newton"
+
+# Fasting glycemia the ICR and ISF experiments start from [mmol/L].
+ICR_INITIAL_GLUCOSE_MMOL = 5.5
+ISF_INITIAL_GLUCOSE_MMOL = 13.0
+
+_BOLUS_BOUNDS_MU = (0.0, 30_000.0)  # search range for the calibration bolus: 0 to 30 U
+_MAX_STEP_FACTOR = 4.0  # unbracketed secant/Newton steps grow or shrink the bolus at most 4x
+_MIN_TRIAL_BOLUS_MU = 250.0  # below this the lower bracket end drops to a zero bolus
+# Glucose drop per unit used for the first secant step of the ICR search [mmol/L/U]
+# (the default ISF guess); the ISF search uses its own initial_isf.
+_SECANT_SLOPE_ISF_MMOL_PER_U = 3.1
+
+BolusReport = Callable[[int, float, float, float], None]
+GlycemiaWithSlope = Callable[[float], tuple[float, float]]
+BolusSearch = Generator[float, tuple[float, float], tuple[float, float, int]]
+
+
+def _bolus_search(
+    target_glycemia_mmol: float,
+    seed_bolus_mU: float,
+    isf_estimate: float,
+    tolerance_mmol: float,
+    max_iterations: int,
+    method: str = CALIBRATION_SECANT,
+) -> BolusSearch:
+    """
+    Search the bolus [mU] whose final glycemia is within tolerance of the target.
+
+    A generator: it yields each trial bolus and is sent back (final glycemia,
+    d glycemia / d bolus) for it (the slope is only read by CALIBRATION_NEWTON),
+    so the scalar and the batched calibration drive the same search.
+
+    The residual final glycemia - target decreases with the bolus.
+    CALIBRATION_SECANT starts at seed_bolus_mU and takes a first step of
+    residual / isf_estimate. Secant steps, limited to a 4x change, continue
+    until the residual changes sign. Illinois false position inside the
+    bracket follows, with a bisection fallback. CALIBRATION_NEWTON takes Newton
+    steps from the seed with the exact slope. Steps are limited to a 4x change,
+    and a step that leaves the known bracket bisects instead.
+    CALIBRATION_BISECTION halves the whole bolus range and ignores the seed.
+
+    Returns (best bolus [mU], its final glycemia [mmol/L], simulations used).
+    Once the bolus range is exhausted, the best trial so far is returned.
+    """
+    bolus_min, bolus_max = _BOLUS_BOUNDS_MU
+    best = [seed_bolus_mU, float('inf'), float('inf')]  # bolus, glycemia, |error|
+    n_simulations = 0
+
+    def record(bolus_mU: float, final_g: float) -> float:
+        nonlocal n_simulations
+        n_simulations += 1
+        err = abs(final_g - target_glycemia_mmol)
+        if err < best[2]:
+            best[:] = [bolus_mU, final_g, err]
+        return final_g - target_glycemia_mmol
+
+    def result() -> tuple[float, float, int]:
+        return best[0], best[1], n_simulations
+
+    if method == CALIBRATION_BISECTION:
+        low, high = bolus_min, bolus_max
+        for _ in range(max_iterations):
+            trial = 0.5 * (low + high)
+            final_g, _ = yield trial
+            r = record(trial, final_g)
+            if abs(r) < tolerance_mmol:
+                break
+            # Glucose too high → need more insulin → raise lower bound
+            if r > 0:
+                low = trial
+            else:
+                high = trial
+        return result()
+
+    if method == CALIBRATION_NEWTON:
+        lo, hi = bolus_min, bolus_max  # residual > 0 is known at lo, < 0 at hi, once seen
+        lo_seen = hi_seen = False
+        b = min(bolus_max, max(bolus_min, seed_bolus_mU))
+        while n_simulations < max_iterations:
+            final_g, slope = yield b
+            rb = record(b, final_g)
+            if abs(rb) < tolerance_mmol:
+                break
+            if rb > 0:
+                if b >= bolus_max:
+                    break
+                lo, lo_seen = b, True
+            else:
+                if b <= bolus_min:
+                    break
+                hi, hi_seen = b, True
+            if slope < 0.0:
+                c = b - rb / slope
+            else:  # flat or wrong-signed derivative: step with the physiological slope
+                c = b + rb / isf_estimate * 1000.0
+            c = min(c, b * _MAX_STEP_FACTOR) if b > 0.0 else c
+            c = max(c, b / _MAX_STEP_FACTOR)
+            if c < _MIN_TRIAL_BOLUS_MU:
+                c = bolus_min
+            c = min(bolus_max, c)
+            at_open_end = (c == bolus_min and not lo_seen) or (c == bolus_max and not hi_seen)
+            if not (lo < c < hi or at_open_end):
+                c = 0.5 * (lo + hi)
+            b = c
+        return result()
+
+    # 1. Secant steps from the seed until the residual changes sign.
+    b = min(bolus_max, max(bolus_min, seed_bolus_mU))
+    final_g, _ = yield b
+    rb = record(b, final_g)
+    if abs(rb) < tolerance_mmol:
+        return result()
+    slope = -isf_estimate / 1000.0  # residual per mU
+    a, ra = b, rb
+    while n_simulations < max_iterations:
+        step = -ra / slope
+        if ra > 0:
+            if a >= bolus_max:
+                return result()
+            upper = a * _MAX_STEP_FACTOR if a > 0.0 else bolus_max
+            c = min(bolus_max, upper, max(a + step, _MIN_TRIAL_BOLUS_MU))
+        else:
+            if a <= bolus_min:
+                return result()
+            c = max(a + step, a / _MAX_STEP_FACTOR)
+            if c < _MIN_TRIAL_BOLUS_MU:
+                c = bolus_min
+        final_g, _ = yield c
+        rc = record(c, final_g)
+        if abs(rc) < tolerance_mmol:
+            return result()
+        if (rc > 0) != (ra > 0):
+            break
+        if rc != ra:
+            slope = (rc - ra) / (c - a)
+            if slope >= 0.0:  # flat or wrong-signed: fall back to the physiological slope
+                slope = -isf_estimate / 1000.0
+        a, ra = c, rc
+    else:
+        return result()
+
+    # 2. Illinois false position inside the bracket [a, c].
+    b, rb = c, rc
+    while n_simulations < max_iterations:
+        c = b - rb * (b - a) / (rb - ra)
+        lo, hi = min(a, b), max(a, b)
+        if not lo < c < hi:
+            c = 0.5 * (a + b)
+        final_g, _ = yield c
+        rc = record(c, final_g)
+        if abs(rc) < tolerance_mmol:
+            break
+        if (rc > 0) != (rb > 0):
+            a, ra = b, rb
+        else:
+            ra *= 0.5
+        b, rb = c, rc
+    return result()
+
+
+def _check_calibration_method(method: str) -> None:
+    if method not in (CALIBRATION_SECANT, CALIBRATION_NEWTON, CALIBRATION_BISECTION):
+        raise ValueError(
+            f"Unknown calibration method {method!r}; expected "
+            f"{CALIBRATION_SECANT!r}, {CALIBRATION_NEWTON!r} or {CALIBRATION_BISECTION!r}"
+        )
+
+
+def _calibrate_bolus(
+    final_glycemia: Callable[[float], float],
+    target_glycemia_mmol: float,
+    seed_bolus_mU: float,
+    isf_estimate: float,
+    tolerance_mmol: float,
+    max_iterations: int,
+    method: str = CALIBRATION_SECANT,
+    report: BolusReport | None = None,
+    glycemia_with_slope: GlycemiaWithSlope | None = None,
+) -> tuple[float, float, int]:
+    """
+    Run _bolus_search for one patient: final_glycemia(bolus) simulates a trial,
+    glycemia_with_slope(bolus) also returns its bolus derivative (needed by
+    CALIBRATION_NEWTON). Returns (best bolus [mU], its final glycemia, simulations used).
+    """
+    _check_calibration_method(method)
+    if method == CALIBRATION_NEWTON and glycemia_with_slope is None:
+        raise ValueError("CALIBRATION_NEWTON needs glycemia_with_slope")
+    search = _bolus_search(target_glycemia_mmol, seed_bolus_mU, isf_estimate, tolerance_mmol, max_iterations, method)
+    try:
+        bolus_mU = next(search)
+        i = 0
+        while True:
+            if method == CALIBRATION_NEWTON:
+                assert glycemia_with_slope is not None
+                final_g, slope = glycemia_with_slope(bolus_mU)
+            else:
+                final_g, slope = final_glycemia(bolus_mU), math.nan
+            i += 1
+            if report is not None:
+                report(i, bolus_mU, final_g, abs(final_g - target_glycemia_mmol))
+            bolus_mU = search.send((final_g, slope))
+    except StopIteration as stop:
+        return stop.value
+
+
+def _inline_input_func(
+    basal_hourly: float,
+    bolus_mU: float,
+    bolus_duration_min: int,
+    cho_mg: float,
+    cho_duration_min: int,
+    cho_start_min: int,
+) -> Callable[[int], tuple[float, float]]:
+    """Inline input for simulate_duration: basal + optional bolus + optional CHO."""
+    basal_mU_min = basal_hourly * 1000.0 / 60.0
+    bolus_rate = bolus_mU / max(1, bolus_duration_min)  # [mU/min]
+    cho_rate = cho_mg / max(1, cho_duration_min)  # [mg/min]
+
+    def input_func(t: int) -> tuple[float, float]:
+        u = basal_mU_min
+        d = 0.0
+        # Bolus: delivered during [0, bolus_duration_min)
+        if 0 <= t < bolus_duration_min:
+            u += bolus_rate
+        # CHO: delivered during [cho_start_min, cho_start_min + cho_duration_min)
+        if cho_start_min <= t < cho_start_min + cho_duration_min:
+            d = cho_rate
+        return u, d
+
+    return input_func
+
+
+def _final_glycemia(q1: float, vg_bw: float, clip_states: bool) -> tuple[float, bool]:
+    """Glucose [mmol/L] simulate_duration reports for a final Q1, and whether Q1 was used as is.
+
+    Applies the nan_to_num / non-negative clip of simulate_duration's final state, so
+    simulate_duration_with_sensitivity reports the same function of the bolus.
+    """
+    q = float(np.nan_to_num(q1, nan=0.0, posinf=1e6, neginf=0.0))
+    if clip_states:
+        q = max(0.0, q)
+    if vg_bw <= 0.0:
+        return 0.0, False
+    return q / vg_bw, q == q1
+
 
 def simulate_duration(
     initial_state: np.ndarray,
@@ -18,6 +282,7 @@ def simulate_duration(
     solver_method: str = "RK45",
     solver_max_step: float = 1.0,
     clip_states: bool = True,
+    reduced_model: bool = True,
 ) -> tuple[np.ndarray, float]:
     """
     Simulate the Hovorka model for a short duration with explicit inputs.
@@ -27,7 +292,7 @@ def simulate_duration(
 
     Parameters:
     -----------
-    initial_state: 10-element state vector [Q1, Q2, S1, S2, I, x1, x2, x3, D1, D2]
+    initial_state: 18-element state vector [Q1, Q2, S1, S2, I, x1, x2, x3, D1, D2, Y, Z, rGU, rGP, tPA, PAint, rdepl, th]
     params: patient ParameterSet
     duration_minutes: simulation length [min]
     basal_hourly: basal insulin rate [U/hr]
@@ -39,57 +304,79 @@ def simulate_duration(
     solver_method: ODE solver method (default RK45)
     solver_max_step: max ODE step [min] (default 1.0)
     clip_states: clip non-negative states to >= 0
+    reduced_model: when the ETH states of initial_state are all zero, integrate only the
+        10 classic Hovorka states (PatientModel.rhs_classic). No input here drives
+        exercise, so the ETH states stay exactly zero and the final state is the same up to
+        the solver's step control. The reduced RHS has no Hill powers and only bounded
+        inputs, so it skips the nan_to_num/clip guards of the full RHS.
 
     Returns:
     --------
     (final_state, final_glycemia_mmol): state at end, noise-free glucose in mmol/L
     """
-    basal_mU_min = basal_hourly * 1000.0 / 60.0
-    bolus_rate = bolus_mU / max(1, bolus_duration_min)  # [mU/min]
-    cho_rate = cho_mg / max(1, cho_duration_min)  # [mg/min]
     vg_bw = float(params["VG"]) * float(params["BW"])
+    input_func = _inline_input_func(
+        basal_hourly, bolus_mU, bolus_duration_min, cho_mg, cho_duration_min, cho_start_min,
+    )
 
-    def input_func(
-        t: int,
-        **_kwargs: object,
-    ) -> tuple[float, float]:
-        """Inline input: basal + optional bolus + optional CHO."""
-        u = basal_mU_min
-        d = 0.0
-        # Bolus: delivered during [0, bolus_duration_min)
-        if 0 <= t < bolus_duration_min:
-            u += bolus_rate
-        # CHO: delivered during [cho_start_min, cho_start_min + cho_duration_min)
-        if cho_start_min <= t < cho_start_min + cho_duration_min:
-            d = cho_rate
-        return u, d
+    model = PatientModel(params)
+    x0 = np.asarray(initial_state, dtype=np.float64)
+    n_classic = 10
+
+    if reduced_model and not np.any(x0[n_classic:]):
+
+        def classic_func(t: float, x: np.ndarray) -> np.ndarray:
+            minute = int(t)
+            u, d = input_func(minute)
+            # Fresh array: solve_ivp keeps a reference to the last derivative between steps.
+            return model.rhs_classic(minute, x, u, d).copy()
+
+        jac_options = (
+            {"jac": lambda t, x: model.jac_classic(int(t), x)}
+            if solver_method in JACOBIAN_SOLVER_METHODS
+            else {}
+        )
+        sol = solve_ivp(  # type: ignore[unknown-variable-type]
+            classic_func,
+            (0, duration_minutes),
+            x0[:n_classic],
+            method=solver_method,
+            t_eval=[duration_minutes],
+            rtol=1e-6,
+            atol=1e-8,
+            max_step=solver_max_step,
+            **jac_options,
+        )
+        final_state = np.zeros_like(x0)
+        final_state[:n_classic] = np.asarray(sol.y, dtype=np.float64)[:, -1]  # type: ignore[union-attr]
+        final_state = np.nan_to_num(final_state, nan=0.0, posinf=1e6, neginf=0.0)
+        if clip_states:
+            final_state = clip_state_trajectory(final_state[:, None])[:, 0]
+        final_glycemia, _ = _final_glycemia(float(final_state[0]), vg_bw, clip_states)
+        return final_state, final_glycemia
 
     t_eval = np.arange(0, duration_minutes + 1)
 
     def ode_func(t: float, x: np.ndarray) -> np.ndarray:
         x_safe = np.nan_to_num(np.asarray(x, dtype=np.float64), copy=True, nan=0.0, posinf=1e6, neginf=-1e6)
         np.clip(x_safe, -1e6, 1e6, out=x_safe)
-        result = hovorka_equations(
-            int(t),
-            x_safe,
-            params,
-            input_func,
-            scenario=0,
-        )
-        dy = np.asarray(result, dtype=np.float64)
-        dy = np.nan_to_num(dy, copy=False, nan=0.0, posinf=1e5, neginf=-1e5)
-        np.clip(dy, -1e5, 1e5, out=dy)
-        return dy
+        minute = int(t)
+        u, d = input_func(minute)
+        dy = model.rhs(minute, x_safe, u, d, 0.0)
+        np.nan_to_num(dy, copy=False, nan=0.0, posinf=1e5, neginf=-1e5)
+        # Fresh array: implicit solvers keep references to returned derivatives.
+        return np.clip(dy, -1e5, 1e5)
 
     sol = solve_ivp(  # type: ignore[unknown-variable-type]
         ode_func,
         (0, duration_minutes),
-        np.asarray(initial_state, dtype=np.float64),
+        x0,
         method=solver_method,
         t_eval=t_eval,
         rtol=1e-6,
         atol=1e-8,
         max_step=solver_max_step,
+        **jacobian_solver_options(model, solver_method),
     )
 
     state_traj = np.asarray(sol.y, dtype=np.float64)  # type: ignore[union-attr]
@@ -98,29 +385,251 @@ def simulate_duration(
         state_traj = clip_state_trajectory(state_traj)
 
     final_state = state_traj[:, -1]
-    final_glycemia = float(final_state[0]) / vg_bw if vg_bw > 0.0 else 0.0
+    final_glycemia, _ = _final_glycemia(float(final_state[0]), vg_bw, clip_states)
 
     return final_state, final_glycemia
 
+def simulate_duration_with_sensitivity(
+    initial_state: np.ndarray,
+    params: ParameterSet,
+    duration_minutes: int,
+    basal_hourly: float,
+    bolus_mU: float = 0.0,
+    bolus_duration_min: int = 1,
+    cho_mg: float = 0.0,
+    cho_duration_min: int = 15,
+    cho_start_min: int = 0,
+    solver_max_step: float = 1.0,
+    clip_states: bool = True,
+) -> tuple[float, float]:
+    """
+    Final glycemia of simulate_duration and its derivative with respect to the bolus.
+
+    Integrates the 10 classic Hovorka states together with their forward
+    sensitivities s = dx/d(bolus_mU): s' = J(t, x)·s + du/d(bolus)·e_S1, where
+    the bolus enters the insulin input u linearly at rate 1/bolus_duration_min
+    during [0, bolus_duration_min). One RK45 integration therefore gives the
+    exact slope used by the Newton calibration step.
+
+    Parameters are those of simulate_duration; the ETH states of initial_state
+    must be zero (no exercise input, as for the reduced model). The glycemia is
+    simulate_duration's (same nan / non-negative clamp of Q1); where the clamp
+    applies the slope is 0, the derivative of the clamped value.
+
+    Returns:
+    --------
+    (final_glycemia_mmol, d final_glycemia / d bolus [mmol/L per mU])
+    """
+    x0 = np.asarray(initial_state, dtype=np.float64)
+    n_classic = 10
+    if np.any(x0[n_classic:]):
+        raise ValueError("simulate_duration_with_sensitivity needs the ETH exercise states at rest")
+    vg_bw = float(params["VG"]) * float(params["BW"])
+    model = PatientModel(params)
+    input_func = _inline_input_func(
+        basal_hourly, bolus_mU, bolus_duration_min, cho_mg, cho_duration_min, cho_start_min,
+    )
+    bolus_gain = 1.0 / max(1, bolus_duration_min)  # du/d(bolus_mU) while the bolus runs
+
+    def augmented_func(t: float, y: np.ndarray) -> np.ndarray:
+        minute = int(t)
+        u, d = input_func(minute)
+        x = y[:n_classic]
+        dy = np.empty(2 * n_classic, dtype=np.float64)
+        dy[:n_classic] = model.rhs_classic(minute, x, u, d)
+        dy[n_classic:] = model.jac_classic(minute, x) @ y[n_classic:]
+        if 0 <= minute < bolus_duration_min:
+            dy[n_classic + 2] += bolus_gain
+        return dy
+
+    sol = solve_ivp(  # type: ignore[unknown-variable-type]
+        augmented_func,
+        (0, duration_minutes),
+        np.concatenate([x0[:n_classic], np.zeros(n_classic)]),
+        method="RK45",
+        t_eval=[duration_minutes],
+        rtol=1e-6,
+        atol=1e-8,
+        max_step=solver_max_step,
+    )
+    y_final = np.asarray(sol.y, dtype=np.float64)[:, -1]  # type: ignore[union-attr]
+    final_glycemia, unclamped = _final_glycemia(float(y_final[0]), vg_bw, clip_states)
+    return final_glycemia, float(y_final[n_classic]) / vg_bw if unclamped else 0.0
+
+
+# --- Calibration surrogate ---
+
+# Format version of the coefficient file; load_calibration_surrogate rejects other versions.
+CALIBRATION_SURROGATE_VERSION = 1
+CALIBRATION_SURROGATE_PATH = Path(__file__).resolve().parent / "calibration_surrogate.json"
+
+# Sampled parameters entering the surrogate through their logarithm
+# (dawn_amp, which can be 0, enters linearly; see _surrogate_features).
+_SURROGATE_LOG_PARAMETERS = (
+    "SI1", "SI2", "SI3", "EGP0", "F01", "k12", "ka1", "ka2", "ka3",
+    "ke", "VI", "VG", "tauI", "tauG", "Ag", "BW",
+)
+_SURROGATE_FEATURES = (*_SURROGATE_LOG_PARAMETERS, "dawn_amp", "basal_hourly")
+_SURROGATE_MIN_BASAL_U_PER_H = 1e-3  # floor before log(basal): some patients need no basal at 5.5 mmol/L
+
+
+def _surrogate_features(params: CohortParameterSet, basal_hourly: np.ndarray) -> np.ndarray:
+    """
+    (N, 190) design matrix of the calibration surrogate: a constant, the 18 base
+    features and all their pairwise products. The base features are the log of
+    _SURROGATE_LOG_PARAMETERS, dawn_amp and the log of the calibrated basal of
+    the experiment's steady state.
+    """
+    basal = np.maximum(np.asarray(basal_hourly, dtype=np.float64), _SURROGATE_MIN_BASAL_U_PER_H)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        base = np.column_stack(
+            [np.log(params[key]) for key in _SURROGATE_LOG_PARAMETERS] + [params["dawn_amp"], np.log(basal)]
+        )
+    rows, cols = np.triu_indices(base.shape[1])
+    return np.column_stack([np.ones(base.shape[0]), base, base[:, rows] * base[:, cols]])
+
+
+@dataclass(frozen=True)
+class CalibrationSurrogate:
+    """Regression from patient parameters to ICR and ISF, fitted by fit_calibration_surrogate.
+
+    log(ICR) and log(ISF) are quadratic in _surrogate_features. A prediction is
+    only a seed: find_insulin_carbo_ratio / find_insulin_sensitivity_factor
+    simulate it once and continue the secant search from it when its final
+    glycemia misses the tolerance band. The experiment fields record the
+    calibration settings the coefficients were fitted for.
+    """
+
+    icr_coefficients: np.ndarray
+    isf_coefficients: np.ndarray
+    cho_grams: float
+    target_glycemia_mmol: float
+    measurement_time_min: int
+    icr_initial_glucose_mmol: float
+    isf_initial_glucose_mmol: float
+    n_patients: int
+    seed: int
+
+    def predict_icr(self, params: CohortParameterSet, basal_hourly: np.ndarray) -> np.ndarray:
+        """ICR [g/U] for the stacked params and the basal [U/h] of their ICR steady state."""
+        with np.errstate(over="ignore", invalid="ignore"):
+            return np.exp(_surrogate_features(params, basal_hourly) @ self.icr_coefficients)
+
+    def predict_isf(self, params: CohortParameterSet, basal_hourly: np.ndarray) -> np.ndarray:
+        """ISF [mmol/L/U] for the stacked params and the basal [U/h] of their ISF steady state."""
+        with np.errstate(over="ignore", invalid="ignore"):
+            return np.exp(_surrogate_features(params, basal_hourly) @ self.isf_coefficients)
+
+    def check_experiment(
+        self,
+        target_glycemia_mmol: float,
+        measurement_time_min: int,
+        initial_glucose_mmol: float,
+        cho_grams: float | None = None,
+    ) -> None:
+        """Raise ValueError unless the calibration settings are those the surrogate was fitted for.
+
+        cho_grams is given for the ICR experiment and None for the ISF experiment.
+        """
+        fitted_initial = self.isf_initial_glucose_mmol if cho_grams is None else self.icr_initial_glucose_mmol
+        requested = (target_glycemia_mmol, measurement_time_min, initial_glucose_mmol, cho_grams)
+        fitted = (self.target_glycemia_mmol, self.measurement_time_min, fitted_initial,
+                  None if cho_grams is None else self.cho_grams)
+        if requested != fitted:
+            raise ValueError(
+                f"Calibration surrogate was fitted for (target, duration, initial glucose, CHO) = {fitted}, "
+                f"not {requested}; refit it with fit_calibration_surrogate"
+            )
+
+
+_calibration_surrogate_cache: dict[Path, CalibrationSurrogate] = {}
+
+
+def save_calibration_surrogate(
+    surrogate: CalibrationSurrogate,
+    path: str | Path = CALIBRATION_SURROGATE_PATH,
+) -> None:
+    """Write the surrogate coefficients as versioned JSON."""
+    path = Path(path).resolve()
+    payload = {
+        "version": CALIBRATION_SURROGATE_VERSION,
+        "features": list(_SURROGATE_FEATURES),
+        "experiment": {
+            "cho_grams": surrogate.cho_grams,
+            "target_glycemia_mmol": surrogate.target_glycemia_mmol,
+            "measurement_time_min": surrogate.measurement_time_min,
+            "icr_initial_glucose_mmol": surrogate.icr_initial_glucose_mmol,
+            "isf_initial_glucose_mmol": surrogate.isf_initial_glucose_mmol,
+        },
+        "fit": {"n_patients": surrogate.n_patients, "seed": surrogate.seed},
+        "icr_log_coefficients": surrogate.icr_coefficients.tolist(),
+        "isf_log_coefficients": surrogate.isf_coefficients.tolist(),
+    }
+    path.write_text(json.dumps(payload, indent=1) + "\n")
+    _calibration_surrogate_cache.pop(path, None)
+
+
+def load_calibration_surrogate(path: str | Path = CALIBRATION_SURROGATE_PATH) -> CalibrationSurrogate:
+    """Read (and cache per path) a surrogate written by save_calibration_surrogate.
+
+    Raises ValueError when the file's format version or feature list differs
+    from this module's.
+    """
+    path = Path(path).resolve()
+    cached = _calibration_surrogate_cache.get(path)
+    if cached is not None:
+        return cached
+    payload = json.loads(path.read_text())
+    if payload.get("version") != CALIBRATION_SURROGATE_VERSION:
+        raise ValueError(
+            f"{path} has calibration surrogate version {payload.get('version')!r}, "
+            f"expected {CALIBRATION_SURROGATE_VERSION}"
+        )
+    if tuple(payload["features"]) != _SURROGATE_FEATURES:
+        raise ValueError(f"{path} was fitted on different surrogate features; refit it with fit_calibration_surrogate")
+    experiment = payload["experiment"]
+    surrogate = CalibrationSurrogate(
+        icr_coefficients=np.array(payload["icr_log_coefficients"], dtype=np.float64),
+        isf_coefficients=np.array(payload["isf_log_coefficients"], dtype=np.float64),
+        cho_grams=float(experiment["cho_grams"]),
+        target_glycemia_mmol=float(experiment["target_glycemia_mmol"]),
+        measurement_time_min=int(experiment["measurement_time_min"]),
+        icr_initial_glucose_mmol=float(experiment["icr_initial_glucose_mmol"]),
+        isf_initial_glucose_mmol=float(experiment["isf_initial_glucose_mmol"]),
+        n_patients=int(payload["fit"]["n_patients"]),
+        seed=int(payload["fit"]["seed"]),
+    )
+    _calibration_surrogate_cache[path] = surrogate
+    return surrogate
+
+
+def _surrogate_seed(prediction: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    """Surrogate predictions, with fallback where a prediction is not a positive finite ratio."""
+    return np.where(np.isfinite(prediction) & (prediction > 0.0), prediction, fallback)
+
+
 def find_insulin_carbo_ratio(
     params: ParameterSet,
     initial_icr: float = 19.3,
     cho_grams: float = 50.0,
     target_glycemia_mmol: float = 5.5,
     measurement_time_min: int = 180,
-    initial_glucose_mmol: float = 5.5,
+    initial_glucose_mmol: float = ICR_INITIAL_GLUCOSE_MMOL,
     tolerance_mmol: float = 0.6,  # loosened from 0.3: real patients use round-number ICRs, not ±0.3 mmol/L precision
     max_iterations: int = 40,
     print_progress: bool = False,
+    method: str = CALIBRATION_SECANT,
+    surrogate: CalibrationSurrogate | None = None,
+    initial_state: StateVector | np.ndarray | None = None,
 ) -> dict[str, float]:
     """
-    Find the insulin-to-carb ratio (ICR) for a patient via bisection.
+    Find the insulin-to-carb ratio (ICR) for a patient via a safeguarded secant search.
 
     Procedure:
       1. Initialize at steady-state for initial_glucose_mmol
       2. Give a fixed CHO meal (cho_grams) and a trial bolus
       3. Simulate for measurement_time_min (default 3h)
-      4. Adjust bolus via bisection until final glycemia ≈ target_glycemia_mmol
+      4. Adjust bolus, starting from cho_grams / initial_icr, until final glycemia ≈ target_glycemia_mmol
 
     Parameters:
     -----------
@@ -131,22 +640,30 @@ def find_insulin_carbo_ratio(
     measurement_time_min: time after meal to measure glucose [min] (default 180)
     initial_glucose_mmol: starting glycemia [mmol/L] (default 5.5)
     tolerance_mmol: convergence tolerance [mmol/L]
-    max_iterations: max bisection iterations
+    max_iterations: max trial simulations
     print_progress: print each iteration
+    method: CALIBRATION_SECANT (default), CALIBRATION_NEWTON (forward sensitivities, see
+        simulate_duration_with_sensitivity) or CALIBRATION_BISECTION over [0, 30] U
+    surrogate: CalibrationSurrogate whose predicted ICR replaces initial_icr. The first
+        simulation verifies it: within tolerance_mmol the search stops there, otherwise
+        it continues from the prediction. Raises ValueError for settings it was not fitted for.
+    initial_state: steady state at initial_glucose_mmol, when the caller already solved it
+        (see compute_optimal_steady_states); skips the solve
 
     Returns:
     --------
-    dict with keys: icr_g_per_U, bolus_U, final_glycemia_mmol, basal_hourly_U
+    dict with keys: icr_g_per_U, bolus_U, final_glycemia_mmol, basal_hourly_U, n_simulations
     """
     # 1. Compute steady state at initial_glucose_mmol
-    x0 = compute_optimal_steady_state_from_glucose(
-        params,
-        initial_glucose_mmol,
-        international_units=True,
-        max_iterations=100,
-        print_progress=False,
-    )
-    x0_arr = np.array(x0, dtype=np.float64)
+    if initial_state is None:
+        initial_state = compute_optimal_steady_state_from_glucose(
+            params,
+            initial_glucose_mmol,
+            international_units=True,
+            max_iterations=100,
+            print_progress=False,
+        )
+    x0_arr = np.array(initial_state, dtype=np.float64)
 
     # Derive calibrated basal from steady state
     tau_i = float(params["tauI"])
@@ -154,48 +671,53 @@ def find_insulin_carbo_ratio(
     basal_hourly = us_calibrated_mU_min * 60.0 / 1000.0
 
     cho_mg = cho_grams * 1000.0  # g -> mg
+    icr_seed = initial_icr
+    if surrogate is not None:
+        surrogate.check_experiment(target_glycemia_mmol, measurement_time_min, initial_glucose_mmol, cho_grams)
+        predicted = surrogate.predict_icr(stack_parameter_sets([params]), np.array([basal_hourly]))
+        icr_seed = float(_surrogate_seed(predicted, np.array([initial_icr]))[0])
 
-    # Bisection bounds for bolus: 0 to 30 U (= 30_000 mU)
-    bolus_low_mU = 0.0
-    bolus_high_mU = 30_000.0
-
-    best_bolus_mU = cho_mg / initial_icr
-    best_glycemia = float('inf')
-    best_err = float('inf')
-
-    for i in range(max_iterations):
-        trial_bolus_mU = 0.5 * (bolus_low_mU + bolus_high_mU)
-
+    def final_glycemia(bolus_mU: float) -> float:
         _, final_g = simulate_duration(
             initial_state=x0_arr,
             params=params,
             duration_minutes=measurement_time_min,
             basal_hourly=basal_hourly,
-            bolus_mU=trial_bolus_mU,
+            bolus_mU=bolus_mU,
             bolus_duration_min=1,
             cho_mg=cho_mg,
             cho_duration_min=15,
             cho_start_min=0,
         )
+        return final_g
 
-        err = abs(final_g - target_glycemia_mmol)
-        if print_progress:
-            trial_U = trial_bolus_mU / 1000.0
-            print(f"  ICR iter {i+1}: bolus={trial_U:.3f} U, final_G={final_g:.2f} mmol/L, err={err:.3f}")
-
-        if err < best_err:
-            best_err = err
-            best_bolus_mU = trial_bolus_mU
-            best_glycemia = final_g
+    def glycemia_with_slope(bolus_mU: float) -> tuple[float, float]:
+        return simulate_duration_with_sensitivity(
+            initial_state=x0_arr,
+            params=params,
+            duration_minutes=measurement_time_min,
+            basal_hourly=basal_hourly,
+            bolus_mU=bolus_mU,
+            bolus_duration_min=1,
+            cho_mg=cho_mg,
+            cho_duration_min=15,
+            cho_start_min=0,
+        )
 
-        if err < tolerance_mmol:
-            break
+    def report(i: int, bolus_mU: float, final_g: float, err: float) -> None:
+        print(f"  ICR iter {i}: bolus={bolus_mU / 1000.0:.3f} U, final_G={final_g:.2f} mmol/L, err={err:.3f}")
 
-        # If final glucose is too high → need more insulin → raise lower bound
-        if final_g > target_glycemia_mmol:
-            bolus_low_mU = trial_bolus_mU
-        else:
-            bolus_high_mU = trial_bolus_mU
+    best_bolus_mU, best_glycemia, n_simulations = _calibrate_bolus(
+        final_glycemia,
+        target_glycemia_mmol,
+        seed_bolus_mU=cho_mg / icr_seed,
+        isf_estimate=_SECANT_SLOPE_ISF_MMOL_PER_U,
+        tolerance_mmol=tolerance_mmol,
+        max_iterations=max_iterations,
+        method=method,
+        report=report if print_progress else None,
+        glycemia_with_slope=glycemia_with_slope,
+    )
 
     bolus_U = best_bolus_mU / 1000.0
     icr = cho_grams / bolus_U if bolus_U > 0 else float('inf')
@@ -205,26 +727,30 @@ def find_insulin_carbo_ratio(
         "bolus_U": round(bolus_U, 4),
         "final_glycemia_mmol": round(best_glycemia, 3),
         "basal_hourly_U": round(basal_hourly, 4),
+        "n_simulations": n_simulations,
     }
 
 def find_insulin_sensitivity_factor(
     params: ParameterSet,
     initial_isf: float = 3.1,
-    initial_glucose_mmol: float = 13.0,
+    initial_glucose_mmol: float = ISF_INITIAL_GLUCOSE_MMOL,
     target_glycemia_mmol: float = 5.5,
     measurement_time_min: int = 180,
     tolerance_mmol: float = 0.6,  # loosened from 0.3: real ISF estimates carry ±1-2 mmol/L/U uncertainty
     max_iterations: int = 40,
     print_progress: bool = False,
+    method: str = CALIBRATION_SECANT,
+    surrogate: CalibrationSurrogate | None = None,
+    initial_state: StateVector | np.ndarray | None = None,
 ) -> dict[str, float]:
     """
-    Find the insulin sensitivity factor (ISF) for a patient via bisection.
+    Find the insulin sensitivity factor (ISF) for a patient via a safeguarded secant search.
 
     Procedure:
       1. Initialize at steady-state for initial_glucose_mmol (e.g. 13 mmol/L)
       2. Give a correction bolus (no carbs)
       3. Simulate for measurement_time_min (default 2h)
-      4. Adjust bolus via bisection until final glycemia ≈ target_glycemia_mmol
+      4. Adjust bolus, starting from the drop / initial_isf, until final glycemia ≈ target_glycemia_mmol
       5. ISF = glucose_drop / bolus_U
 
     Parameters:
@@ -235,22 +761,29 @@ def find_insulin_sensitivity_factor(
     target_glycemia_mmol: desired final glucose [mmol/L] (default 5.5)
     measurement_time_min: time after bolus to measure glucose [min] (default 120)
     tolerance_mmol: convergence tolerance [mmol/L]
-    max_iterations: max bisection iterations
+    max_iterations: max trial simulations
     print_progress: print each iteration
+    method: CALIBRATION_SECANT (default), CALIBRATION_NEWTON (forward sensitivities, see
+        simulate_duration_with_sensitivity) or CALIBRATION_BISECTION over [0, 30] U
+    surrogate: CalibrationSurrogate whose predicted ISF replaces initial_isf (see
+        find_insulin_carbo_ratio)
+    initial_state: steady state at initial_glucose_mmol, when the caller already solved it
+        (see find_insulin_carbo_ratio); skips the solve
 
     Returns:
     --------
-    dict with keys: isf_mmol_per_U, bolus_U, final_glycemia_mmol, glucose_drop_mmol, basal_hourly_U
+    dict with keys: isf_mmol_per_U, bolus_U, final_glycemia_mmol, glucose_drop_mmol, basal_hourly_U, n_simulations
     """
     # 1. Compute steady state at initial_glucose_mmol
-    x0 = compute_optimal_steady_state_from_glucose(
-        params,
-        initial_glucose_mmol,
-        international_units=True,
-        max_iterations=100,
-        print_progress=False,
-    )
-    x0_arr = np.array(x0, dtype=np.float64)
+    if initial_state is None:
+        initial_state = compute_optimal_steady_state_from_glucose(
+            params,
+            initial_glucose_mmol,
+            international_units=True,
+            max_iterations=100,
+            print_progress=False,
+        )
+    x0_arr = np.array(initial_state, dtype=np.float64)
 
     # Measure actual initial glycemia (may differ slightly from desired due to bisection tolerance)
     vg_bw = float(params["VG"]) * float(params["BW"])
@@ -260,49 +793,54 @@ def find_insulin_sensitivity_factor(
     tau_i = float(params["tauI"])
     us_calibrated_mU_min = float(x0_arr[2]) / tau_i if tau_i > 0 else 0.5 * 1000.0 / 60.0
     basal_hourly = us_calibrated_mU_min * 60.0 / 1000.0
+    isf_seed = initial_isf
+    if surrogate is not None:
+        surrogate.check_experiment(target_glycemia_mmol, measurement_time_min, initial_glucose_mmol)
+        predicted = surrogate.predict_isf(stack_parameter_sets([params]), np.array([basal_hourly]))
+        isf_seed = float(_surrogate_seed(predicted, np.array([initial_isf]))[0])
 
-    # Bisection bounds for correction bolus: 0 to 30 U (= 30_000 mU)
-    bolus_low_mU = 0.0
-    bolus_high_mU = 30_000.0
-
-    best_bolus_mU = (initial_glucose_mmol - target_glycemia_mmol) / initial_isf * 1000
-    best_glycemia = float('inf')
-    best_err = float('inf')
-
-    for i in range(max_iterations):
-        trial_bolus_mU = 0.5 * (bolus_low_mU + bolus_high_mU)
-
+    def final_glycemia(bolus_mU: float) -> float:
         _, final_g = simulate_duration(
             initial_state=x0_arr,
             params=params,
             duration_minutes=measurement_time_min,
             basal_hourly=basal_hourly,
-            bolus_mU=trial_bolus_mU,
+            bolus_mU=bolus_mU,
             bolus_duration_min=1,
             cho_mg=0.0,  # No carbs — pure correction
             cho_duration_min=1,
             cho_start_min=0,
         )
+        return final_g
 
-        err = abs(final_g - target_glycemia_mmol)
-        if print_progress:
-            trial_U = trial_bolus_mU / 1000.0
-            drop = actual_initial_g - final_g
-            print(f"  ISF iter {i+1}: bolus={trial_U:.3f} U, final_G={final_g:.2f} mmol/L, drop={drop:.2f}, err={err:.3f}")
-
-        if err < best_err:
-            best_err = err
-            best_bolus_mU = trial_bolus_mU
-            best_glycemia = final_g
+    def glycemia_with_slope(bolus_mU: float) -> tuple[float, float]:
+        return simulate_duration_with_sensitivity(
+            initial_state=x0_arr,
+            params=params,
+            duration_minutes=measurement_time_min,
+            basal_hourly=basal_hourly,
+            bolus_mU=bolus_mU,
+            bolus_duration_min=1,
+            cho_mg=0.0,
+            cho_duration_min=1,
+            cho_start_min=0,
+        )
 
-        if err < tolerance_mmol:
-            break
+    def report(i: int, bolus_mU: float, final_g: float, err: float) -> None:
+        drop = actual_initial_g - final_g
+        print(f"  ISF iter {i}: bolus={bolus_mU / 1000.0:.3f} U, final_G={final_g:.2f} mmol/L, drop={drop:.2f}, err={err:.3f}")
 
-        # If final glucose is still too high → need more insulin
-        if final_g > target_glycemia_mmol:
-            bolus_low_mU = trial_bolus_mU
-        else:
-            bolus_high_mU = trial_bolus_mU
+    best_bolus_mU, best_glycemia, n_simulations = _calibrate_bolus(
+        final_glycemia,
+        target_glycemia_mmol,
+        seed_bolus_mU=(actual_initial_g - target_glycemia_mmol) / isf_seed * 1000.0,
+        isf_estimate=isf_seed,
+        tolerance_mmol=tolerance_mmol,
+        max_iterations=max_iterations,
+        method=method,
+        report=report if print_progress else None,
+        glycemia_with_slope=glycemia_with_slope,
+    )
 
     bolus_U = best_bolus_mU / 1000.0
     glucose_drop = actual_initial_g - best_glycemia
@@ -314,6 +852,7 @@ def find_insulin_sensitivity_factor(
         "final_glycemia_mmol": round(best_glycemia, 3),
         "glucose_drop_mmol": round(glucose_drop, 3),
         "basal_hourly_U": round(basal_hourly, 4),
+        "n_simulations": n_simulations,
     }
 
 
@@ -359,10 +898,13 @@ def find_icr(
     cho_grams: float = 50.0,
     target_glycemia_mmol: float = 5.5,
     measurement_time_min: int = 180,
-    initial_glucose_mmol: float = 5.5,
+    initial_glucose_mmol: float = ICR_INITIAL_GLUCOSE_MMOL,
     tolerance_mmol: float = 0.6,
     max_iterations: int = 40,
     print_progress: bool = False,
+    method: str = CALIBRATION_SECANT,
+    surrogate: CalibrationSurrogate | None = None,
+    initial_state: StateVector | np.ndarray | None = None,
 ) -> float:
     
     # Find ICR dictionary
@@ -376,6 +918,9 @@ def find_icr(
         tolerance_mmol=tolerance_mmol,
         max_iterations=max_iterations,
         print_progress=print_progress,
+        method=method,
+        surrogate=surrogate,
+        initial_state=initial_state,
     )
 
     # Return the value
@@ -384,12 +929,15 @@ def find_icr(
 def find_isf(
     params: ParameterSet,
     initial_isf: float = 3.1,
-    initial_glucose_mmol: float = 13.0,
+    initial_glucose_mmol: float = ISF_INITIAL_GLUCOSE_MMOL,
     target_glycemia_mmol: float = 5.5,
     measurement_time_min: int = 180,
     tolerance_mmol: float = 0.6,
     max_iterations: int = 40,
     print_progress: bool = False,
+    method: str = CALIBRATION_SECANT,
+    surrogate: CalibrationSurrogate | None = None,
+    initial_state: StateVector | np.ndarray | None = None,
 ) -> float:
     
     # Find ISF dictionary
@@ -402,7 +950,379 @@ def find_isf(
         tolerance_mmol=tolerance_mmol,
         max_iterations=max_iterations,
         print_progress=print_progress,
+        method=method,
+        surrogate=surrogate,
+        initial_state=initial_state,
     )
 
     # Return the value
     return isf_dict["isf_mmol_per_U"]
+
+
+# --- Batched calibration (many patients at once) ---
+
+def simulate_duration_batch(
+    initial_states: np.ndarray,
+    params: CohortParameterSet,
+    duration_minutes: int,
+    basal_hourly: np.ndarray,
+    bolus_mU: np.ndarray,
+    bolus_duration_min: int = 1,
+    cho_mg: float | np.ndarray = 0.0,
+    cho_duration_min: int = 15,
+    cho_start_min: int = 0,
+    substeps_per_min: int = 2,
+    clip_states: bool = True,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    simulate_duration for a block of N patients, on the 10 classic states.
+
+    initial_states is (18, N) with the ETH rows at zero (they stay zero, as in
+    simulate_duration's reduced model, and only hovorka_classic_equations_batch
+    is integrated), params holds one (N,) array per key
+    (stack_parameter_sets) and basal_hourly / bolus_mU / cho_mg are per patient.
+    Inputs are constant within each minute, so every minute is integrated with
+    substeps_per_min classical RK4 steps, as in the cohort engine. There is no
+    exercise input and the inputs are bounded, so no state/derivative guards
+    are applied.
+
+    Returns:
+    --------
+    (final_states (18, N), final_glycemia_mmol (N,))
+    """
+    x0 = np.asarray(initial_states, dtype=np.float64)
+    n_classic = 10
+    if np.any(x0[n_classic:]):
+        raise ValueError("simulate_duration_batch needs the ETH exercise states at rest")
+    x = x0[:n_classic].copy()
+    n = x.shape[1]
+    basal_mU_min = np.asarray(basal_hourly, dtype=np.float64) * 1000.0 / 60.0
+    bolus_rate = np.asarray(bolus_mU, dtype=np.float64) / max(1, bolus_duration_min)  # [mU/min]
+    cho_rate = np.broadcast_to(np.asarray(cho_mg, dtype=np.float64) / max(1, cho_duration_min), (n,))  # [mg/min]
+    no_cho = np.zeros(n, dtype=np.float64)
+    substeps = max(1, int(substeps_per_min))
+    h = 1.0 / substeps
+
+    for minute in range(duration_minutes):
+        u = basal_mU_min + bolus_rate if 0 <= minute < bolus_duration_min else basal_mU_min
+        d = cho_rate if cho_start_min <= minute < cho_start_min + cho_duration_min else no_cho
+        t = float(minute)
+        for _ in range(substeps):
+            k1 = hovorka_classic_equations_batch(t, x, params, u, d)
+            k2 = hovorka_classic_equations_batch(t, x + 0.5 * h * k1, params, u, d)
+            k3 = hovorka_classic_equations_batch(t, x + 0.5 * h * k2, params, u, d)
+            k4 = hovorka_classic_equations_batch(t, x + h * k3, params, u, d)
+            x = x + (h / 6.0) * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+
+    final_states = np.zeros_like(x0)
+    final_states[:n_classic] = np.nan_to_num(x, nan=0.0, posinf=1e6, neginf=0.0)
+    if clip_states:
+        final_states = clip_state_trajectory(final_states)
+    vg_bw = params["VG"] * params["BW"]
+    final_glycemia = np.where(vg_bw > 0.0, final_states[0] / np.where(vg_bw > 0.0, vg_bw, 1.0), 0.0)
+    return final_states, final_glycemia
+
+
+def _calibrate_bolus_batch(
+    experiment: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    target_glycemia_mmol: float,
+    seed_bolus_mU: np.ndarray,
+    isf_estimate: np.ndarray,
+    tolerance_mmol: float,
+    max_iterations: int,
+    method: str = CALIBRATION_SECANT,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run one _bolus_search per patient in lock step.
+
+    Each round, experiment(idx, bolus_mU) simulates the pending trial boluses
+    of the patients at positions idx in one batched integration and returns
+    their final glycemia. Patients leave the batch as their search finishes.
+    Returns (best bolus [mU], its final glycemia, simulations used) as (N,) arrays.
+    """
+    _check_calibration_method(method)
+    if method == CALIBRATION_NEWTON:
+        raise ValueError("The batched calibration supports CALIBRATION_SECANT and CALIBRATION_BISECTION")
+    n = len(seed_bolus_mU)
+    searches = [
+        _bolus_search(target_glycemia_mmol, float(seed_bolus_mU[j]), float(isf_estimate[j]), tolerance_mmol, max_iterations, method)
+        for j in range(n)
+    ]
+    results: list[tuple[float, float, int]] = [(float(seed_bolus_mU[j]), float('inf'), 0) for j in range(n)]
+    pending: dict[int, float] = {}
+    for j, search in enumerate(searches):
+        try:
+            pending[j] = next(search)
+        except StopIteration as stop:
+            results[j] = stop.value
+    while pending:
+        idx = np.fromiter(pending, dtype=np.int64, count=len(pending))
+        final_g = experiment(idx, np.array([pending[j] for j in idx], dtype=np.float64))
+        next_pending: dict[int, float] = {}
+        for j, g in zip(idx.tolist(), final_g.tolist()):
+            try:
+                next_pending[j] = searches[j].send((g, math.nan))
+            except StopIteration as stop:
+                results[j] = stop.value
+        pending = next_pending
+    bolus, glycemia, sims = zip(*results) if results else ((), (), ())
+    return np.array(bolus, dtype=np.float64), np.array(glycemia, dtype=np.float64), np.array(sims, dtype=np.int64)
+
+
+def _calibration_steady_states(
+    patients: list[ParameterSet],
+    params: CohortParameterSet,
+    glucose_mmol: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Steady states (18, N) at glucose_mmol and the calibrated basal [U/h] of each patient.
+
+    Columns the batch solver cannot certify are solved per patient, exactly as
+    the scalar calibrations do.
+    """
+    states, solved = compute_fasting_steady_states_batch(params, glucose_mmol, international_units=True)
+    for j in np.flatnonzero(~solved):
+        states[:, j] = compute_optimal_steady_state_from_glucose(
+            patients[j], glucose_mmol, international_units=True, max_iterations=100, print_progress=False,
+        )
+    tau_i = params["tauI"]
+    us_calibrated_mU_min = np.where(tau_i > 0, states[2] / np.where(tau_i > 0, tau_i, 1.0), 0.5 * 1000.0 / 60.0)
+    return states, us_calibrated_mU_min * 60.0 / 1000.0
+
+
+def find_insulin_carbo_ratio_batch(
+    patients: list[ParameterSet],
+    initial_icr: float | np.ndarray = 19.3,
+    cho_grams: float = 50.0,
+    target_glycemia_mmol: float = 5.5,
+    measurement_time_min: int = 180,
+    initial_glucose_mmol: float = ICR_INITIAL_GLUCOSE_MMOL,
+    tolerance_mmol: float = 0.6,
+    max_iterations: int = 40,
+    method: str = CALIBRATION_SECANT,
+    substeps_per_min: int = 2,
+    surrogate: CalibrationSurrogate | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    find_insulin_carbo_ratio for N patients at once.
+
+    Every round of the per-patient searches is one simulate_duration_batch call
+    over the patients still searching (fixed-step RK4 instead of RK45, so
+    results agree with the scalar calibration within the search tolerance).
+    A surrogate seeds each patient's search as in find_insulin_carbo_ratio.
+
+    Returns:
+    --------
+    dict of (N,) arrays with the keys of find_insulin_carbo_ratio
+    """
+    params = stack_parameter_sets(patients)
+    x0, basal_hourly = _calibration_steady_states(patients, params, initial_glucose_mmol)
+    cho_mg = cho_grams * 1000.0  # g -> mg
+    n = len(patients)
+    icr_seed = np.broadcast_to(np.asarray(initial_icr, dtype=np.float64), (n,))
+    if surrogate is not None:
+        surrogate.check_experiment(target_glycemia_mmol, measurement_time_min, initial_glucose_mmol, cho_grams)
+        icr_seed = _surrogate_seed(surrogate.predict_icr(params, basal_hourly), icr_seed)
+
+    def experiment(idx: np.ndarray, bolus_mU: np.ndarray) -> np.ndarray:
+        return simulate_duration_batch(
+            x0[:, idx],
+            {key: values[idx] for key, values in params.items()},
+            measurement_time_min,
+            basal_hourly[idx],
+            bolus_mU,
+            bolus_duration_min=1,
+            cho_mg=cho_mg,
+            cho_duration_min=15,
+            cho_start_min=0,
+            substeps_per_min=substeps_per_min,
+        )[1]
+
+    best_bolus_mU, best_glycemia, n_simulations = _calibrate_bolus_batch(
+        experiment,
+        target_glycemia_mmol,
+        seed_bolus_mU=cho_mg / icr_seed,
+        isf_estimate=np.full(n, _SECANT_SLOPE_ISF_MMOL_PER_U),
+        tolerance_mmol=tolerance_mmol,
+        max_iterations=max_iterations,
+        method=method,
+    )
+    bolus_U = best_bolus_mU / 1000.0
+    icr = np.divide(cho_grams, bolus_U, out=np.full(n, np.inf), where=bolus_U > 0)
+    return {
+        "icr_g_per_U": np.round(icr, 3),
+        "bolus_U": np.round(bolus_U, 4),
+        "final_glycemia_mmol": np.round(best_glycemia, 3),
+        "basal_hourly_U": np.round(basal_hourly, 4),
+        "n_simulations": n_simulations,
+    }
+
+
+def find_insulin_sensitivity_factor_batch(
+    patients: list[ParameterSet],
+    initial_isf: float | np.ndarray = 3.1,
+    initial_glucose_mmol: float = ISF_INITIAL_GLUCOSE_MMOL,
+    target_glycemia_mmol: float = 5.5,
+    measurement_time_min: int = 180,
+    tolerance_mmol: float = 0.6,
+    max_iterations: int = 40,
+    method: str = CALIBRATION_SECANT,
+    substeps_per_min: int = 2,
+    surrogate: CalibrationSurrogate | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    find_insulin_sensitivity_factor for N patients at once (see find_insulin_carbo_ratio_batch).
+
+    Returns:
+    --------
+    dict of (N,) arrays with the keys of find_insulin_sensitivity_factor
+    """
+    params = stack_parameter_sets(patients)
+    x0, basal_hourly = _calibration_steady_states(patients, params, initial_glucose_mmol)
+    vg_bw = params["VG"] * params["BW"]
+    actual_initial_g = np.where(vg_bw > 0.0, x0[0] / np.where(vg_bw > 0.0, vg_bw, 1.0), 0.0)
+
+    def experiment(idx: np.ndarray, bolus_mU: np.ndarray) -> np.ndarray:
+        return simulate_duration_batch(
+            x0[:, idx],
+            {key: values[idx] for key, values in params.items()},
+            measurement_time_min,
+            basal_hourly[idx],
+            bolus_mU,
+            bolus_duration_min=1,
+            cho_mg=0.0,  # No carbs — pure correction
+            cho_duration_min=1,
+            cho_start_min=0,
+            substeps_per_min=substeps_per_min,
+        )[1]
+
+    n = len(patients)
+    isf_guess = np.broadcast_to(np.asarray(initial_isf, dtype=np.float64), (n,))
+    if surrogate is not None:
+        surrogate.check_experiment(target_glycemia_mmol, measurement_time_min, initial_glucose_mmol)
+        isf_guess = _surrogate_seed(surrogate.predict_isf(params, basal_hourly), isf_guess)
+    best_bolus_mU, best_glycemia, n_simulations = _calibrate_bolus_batch(
+        experiment,
+        target_glycemia_mmol,
+        seed_bolus_mU=(actual_initial_g - target_glycemia_mmol) / isf_guess * 1000.0,
+        isf_estimate=isf_guess,
+        tolerance_mmol=tolerance_mmol,
+        max_iterations=max_iterations,
+        method=method,
+    )
+    bolus_U = best_bolus_mU / 1000.0
+    glucose_drop = actual_initial_g - best_glycemia
+    isf = np.divide(glucose_drop, bolus_U, out=np.full(n, np.inf), where=bolus_U > 0)
+    return {
+        "isf_mmol_per_U": np.round(isf, 3),
+        "bolus_U": np.round(bolus_U, 4),
+        "final_glycemia_mmol": np.round(best_glycemia, 3),
+        "glucose_drop_mmol": np.round(glucose_drop, 3),
+        "basal_hourly_U": np.round(basal_hourly, 4),
+        "n_simulations": n_simulations,
+    }
+
+
+def find_icr_batch(
+    patients: list[ParameterSet],
+    initial_icr: float | np.ndarray = 19.3,
+    cho_grams: float = 50.0,
+    target_glycemia_mmol: float = 5.5,
+    measurement_time_min: int = 180,
+    initial_glucose_mmol: float = ICR_INITIAL_GLUCOSE_MMOL,
+    tolerance_mmol: float = 0.6,
+    max_iterations: int = 40,
+    method: str = CALIBRATION_SECANT,
+    surrogate: CalibrationSurrogate | None = None,
+) -> np.ndarray:
+    """ICR [g/U] of every patient (find_insulin_carbo_ratio_batch)."""
+    return find_insulin_carbo_ratio_batch(
+        patients,
+        initial_icr=initial_icr,
+        cho_grams=cho_grams,
+        target_glycemia_mmol=target_glycemia_mmol,
+        measurement_time_min=measurement_time_min,
+        initial_glucose_mmol=initial_glucose_mmol,
+        tolerance_mmol=tolerance_mmol,
+        max_iterations=max_iterations,
+        method=method,
+        surrogate=surrogate,
+    )["icr_g_per_U"]
+
+
+def find_isf_batch(
+    patients: list[ParameterSet],
+    initial_isf: float | np.ndarray = 3.1,
+    initial_glucose_mmol: float = ISF_INITIAL_GLUCOSE_MMOL,
+    target_glycemia_mmol: float = 5.5,
+    measurement_time_min: int = 180,
+    tolerance_mmol: float = 0.6,
+    max_iterations: int = 40,
+    method: str = CALIBRATION_SECANT,
+    surrogate: CalibrationSurrogate | None = None,
+) -> np.ndarray:
+    """ISF [mmol/L/U] of every patient (find_insulin_sensitivity_factor_batch)."""
+    return find_insulin_sensitivity_factor_batch(
+        patients,
+        initial_isf=initial_isf,
+        initial_glucose_mmol=initial_glucose_mmol,
+        target_glycemia_mmol=target_glycemia_mmol,
+        measurement_time_min=measurement_time_min,
+        tolerance_mmol=tolerance_mmol,
+        max_iterations=max_iterations,
+        method=method,
+        surrogate=surrogate,
+    )["isf_mmol_per_U"]
+
+
+def fit_calibration_surrogate(
+    n_patients: int = 4000,
+    seed: int = 2024,
+    cho_grams: float = 50.0,
+    target_glycemia_mmol: float = 6.5,  # SimulationConfig.calibration_target_glycemia_mmol
+    measurement_time_min: int = 180,
+    icr_initial_glucose_mmol: float = ICR_INITIAL_GLUCOSE_MMOL,
+    isf_initial_glucose_mmol: float = ISF_INITIAL_GLUCOSE_MMOL,
+    fit_tolerance_mmol: float = 0.02,
+) -> CalibrationSurrogate:
+    """
+    Fit a CalibrationSurrogate on n_patients Monte Carlo patients.
+
+    The patients are calibrated with the batched searches at fit_tolerance_mmol,
+    so each ratio is the one that hits the target rather than any ratio inside
+    the ±0.6 mmol/L band. log(ICR) and log(ISF) are then least-squares fitted on
+    _surrogate_features. Patients whose search did not reach the fit tolerance
+    are left out.
+    """
+    patients = generate_monte_carlo_patients(n_patients, seed=seed)
+    params = stack_parameter_sets(patients)
+    icr = find_insulin_carbo_ratio_batch(
+        patients, cho_grams=cho_grams, target_glycemia_mmol=target_glycemia_mmol,
+        measurement_time_min=measurement_time_min, initial_glucose_mmol=icr_initial_glucose_mmol,
+        tolerance_mmol=fit_tolerance_mmol,
+    )
+    isf = find_insulin_sensitivity_factor_batch(
+        patients, initial_glucose_mmol=isf_initial_glucose_mmol, target_glycemia_mmol=target_glycemia_mmol,
+        measurement_time_min=measurement_time_min, tolerance_mmol=fit_tolerance_mmol,
+    )
+
+    def fit(ratio: np.ndarray, result: dict[str, np.ndarray]) -> np.ndarray:
+        features = _surrogate_features(params, result["basal_hourly_U"])
+        converged = (
+            np.isfinite(ratio) & (ratio > 0.0)
+            & (np.abs(result["final_glycemia_mmol"] - target_glycemia_mmol) <= 2.0 * fit_tolerance_mmol)
+            & np.all(np.isfinite(features), axis=1)
+        )
+        coefficients, *_ = np.linalg.lstsq(features[converged], np.log(ratio[converged]), rcond=None)
+        return coefficients
+
+    return CalibrationSurrogate(
+        icr_coefficients=fit(icr["icr_g_per_U"], icr),
+        isf_coefficients=fit(isf["isf_mmol_per_U"], isf),
+        cho_grams=cho_grams,
+        target_glycemia_mmol=target_glycemia_mmol,
+        measurement_time_min=measurement_time_min,
+        icr_initial_glucose_mmol=icr_initial_glucose_mmol,
+        isf_initial_glucose_mmol=isf_initial_glucose_mmol,
+        n_patients=n_patients,
+        seed=seed,
+    )
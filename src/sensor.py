@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import Mapping, MutableMapping, Optional, SupportsFloat
 
 import numpy as np
@@ -8,6 +9,31 @@ SensorMode = str
 SensorState = MutableMapping[str, float]
 
 
+@dataclass(frozen=True)
+class SensorProfile:
+    """Settings of one extra lagged CGM applied to the simulated trajectory (SimulationConfig.sensor_profiles).
+
+    noise_std and bias are in mmol/L, like SimulationConfig.noise_std; the readings
+    are exported as blood_glucose_<name>.
+    """
+
+    name: str
+    noise_std: float = 0.33
+    noise_autocorr: float = 0.7
+    cgm_lag_alpha: float = 0.25
+    bias: float = 0.0
+
+    def __post_init__(self) -> None:
+        if not self.name.isidentifier():
+            raise ValueError(f"SensorProfile name must be a valid identifier, got {self.name!r}")
+        if self.noise_std < 0:
+            raise ValueError(f"noise_std must be >= 0, got {self.noise_std}")
+        if not (0.0 <= self.noise_autocorr < 1.0):
+            raise ValueError(f"noise_autocorr must be in [0, 1), got {self.noise_autocorr}")
+        if not (0.0 < self.cgm_lag_alpha <= 1.0):
+            raise ValueError(f"cgm_lag_alpha must be in (0, 1], got {self.cgm_lag_alpha}")
+
+
 def _to_float(value: SupportsFloat, name: str) -> float:
     try:
         out = float(value)
@@ -33,6 +59,40 @@ def _convert_units(glucose_mmol_l: float, params: Mapping[str, SupportsFloat], o
     raise ValueError(f"Unsupported output_unit: {output_unit!r}. Use 'mmol/L' or 'mg/dL'.")
 
 
+def _validate_sensor_args(
+    params: Mapping[str, SupportsFloat],
+    noise_std: float,
+    mode: SensorMode,
+    phi: float,
+    lag_alpha: float,
+    min_glucose: float,
+) -> float:
+    """Check the sensor settings shared by measure_glycemia and measure_glycemia_trace; returns VG·BW."""
+    vg = _get_param(params, "VG")  # [L/kg]
+    bw = _get_param(params, "BW")  # [kg]
+
+    if vg <= 0.0:
+        raise ValueError(f"VG must be > 0, got {vg}")
+    if bw <= 0.0:
+        raise ValueError(f"BW must be > 0, got {bw}")
+
+    if noise_std < 0:
+        raise ValueError(f"noise_std must be >= 0, got {noise_std}")
+    if min_glucose < 0:
+        raise ValueError(f"min_glucose must be >= 0, got {min_glucose}")
+
+    if mode not in {"none", "gaussian", "bias_gaussian", "lagged"}:
+        raise ValueError(
+            f"Unsupported mode: {mode!r}. Use 'none', 'gaussian', 'bias_gaussian', or 'lagged'."
+        )
+
+    if not (0.0 <= phi < 1.0):
+        raise ValueError(f"phi must be in [0, 1), got {phi}")
+    if not (0.0 < lag_alpha <= 1.0):
+        raise ValueError(f"lag_alpha must be in (0, 1], got {lag_alpha}")
+    return vg * bw
+
+
 def measure_glycemia(
     x: np.ndarray | list[SupportsFloat] | tuple[SupportsFloat, ...],
     params: Mapping[str, SupportsFloat],
@@ -71,32 +131,11 @@ def measure_glycemia(
         raise ValueError("x must contain at least one state value (Q1 at index 0)")
 
     q1 = _to_float(x[0], "x[0]")  # [mmol]
-    vg = _get_param(params, "VG")  # [L/kg]
-    bw = _get_param(params, "BW")  # [kg]
-
-    if vg <= 0.0:
-        raise ValueError(f"VG must be > 0, got {vg}")
-    if bw <= 0.0:
-        raise ValueError(f"BW must be > 0, got {bw}")
-
-    if noise_std < 0:
-        raise ValueError(f"noise_std must be >= 0, got {noise_std}")
-    if min_glucose < 0:
-        raise ValueError(f"min_glucose must be >= 0, got {min_glucose}")
-
-    if mode not in {"none", "gaussian", "bias_gaussian", "lagged"}:
-        raise ValueError(
-            f"Unsupported mode: {mode!r}. Use 'none', 'gaussian', 'bias_gaussian', or 'lagged'."
-        )
-
-    if not (0.0 <= phi < 1.0):
-        raise ValueError(f"phi must be in [0, 1), got {phi}")
-    if not (0.0 < lag_alpha <= 1.0):
-        raise ValueError(f"lag_alpha must be in (0, 1], got {lag_alpha}")
+    vg_bw = _validate_sensor_args(params, noise_std, mode, phi, lag_alpha, min_glucose)
 
     local_rng = rng if rng is not None else np.random.default_rng()
 
-    true_glucose_mmol_l = q1 / (vg * bw)
+    true_glucose_mmol_l = q1 / vg_bw
     true_glucose = _convert_units(true_glucose_mmol_l, params, output_unit)
 
     if mode == "none" or noise_std == 0.0:
@@ -135,3 +174,88 @@ def measure_glycemia(
     sensor_state["display"] = measured
     sensor_state["error"] = correlated_error
     return measured
+
+
+def _lagged_recursion(
+    true_glucose: list[float],
+    innovations: list[float],
+    display: float,
+    error: float,
+    lag_alpha: float,
+    phi: float,
+    bias: float,
+    min_glucose: float,
+) -> tuple[list[float], float, float]:
+    """Lag + AR(1) + clamp of measure_glycemia(mode="lagged") over a trace of Python floats.
+
+    Returns the readings and the final (display, error). The operations and their
+    order match the per-point call, so every reading is bit-identical.
+    """
+    out = [0.0] * len(true_glucose)
+    for k, g in enumerate(true_glucose):
+        lagged_true = display + lag_alpha * (g - display)
+        error = (phi * error) + innovations[k]
+        display = max(min_glucose, lagged_true + bias + error)
+        out[k] = display
+    return out, display, error
+
+
+def measure_glycemia_trace(
+    q1: np.ndarray,
+    params: Mapping[str, SupportsFloat],
+    noise_std: float = 0.0,
+    *,
+    mode: SensorMode = "lagged",
+    bias: float = 0.0,
+    phi: float = 0.85,
+    lag_alpha: float = 0.25,
+    sensor_state: Optional[SensorState] = None,
+    rng: Optional[np.random.Generator] = None,
+    output_unit: str = "mmol/L",
+    min_glucose: float = 0.0,
+) -> tuple[np.ndarray, SensorState]:
+    """
+    measure_glycemia over a whole Q1 trace [mmol]; returns (readings, sensor_state).
+
+    Settings are validated once and the noise of all points is drawn from rng in
+    one call, which consumes the generator exactly like one draw per point. The
+    lagged recursion runs in _lagged_recursion, so readings, the final
+    sensor_state and the generator state equal those of calling measure_glycemia
+    point by point with the same arguments. sensor_state is updated in place
+    (a new dict when None) and carries display/error on to the next trace.
+    """
+    vg_bw = _validate_sensor_args(params, noise_std, mode, phi, lag_alpha, min_glucose)
+    if sensor_state is None:
+        sensor_state = {}
+    q1_arr = np.asarray(q1, dtype=np.float64)
+    if not np.all(np.isfinite(q1_arr)):
+        raise ValueError("q1 must be finite")
+    # Scaling by the unit factor (exactly 1.0 for mmol/L) matches _convert_units point by point.
+    true_glucose = (q1_arr / vg_bw) * _convert_units(1.0, params, output_unit)
+    n = true_glucose.size
+    if n == 0:
+        return np.empty(0, dtype=np.float64), sensor_state
+
+    local_rng = rng if rng is not None else np.random.default_rng()
+
+    if mode == "none" or noise_std == 0.0:
+        offset = bias if mode in {"bias_gaussian", "lagged"} else 0.0
+        return np.fmax(min_glucose, true_glucose + offset), sensor_state
+
+    if mode in {"gaussian", "bias_gaussian"}:
+        offset = bias if mode == "bias_gaussian" else 0.0
+        noise = local_rng.normal(0.0, noise_std, size=n)
+        return np.fmax(min_glucose, true_glucose + offset + noise), sensor_state
+
+    # An empty sensor_state seeds the lag filter with the first true glucose (see measure_glycemia).
+    display = float(sensor_state["display"]) if "display" in sensor_state else float(true_glucose[0])
+    innovation_std = float(noise_std * np.sqrt(max(0.0, 1.0 - phi * phi)))
+    innovations = local_rng.normal(loc=0.0, scale=innovation_std, size=n)
+    readings, display, error = _lagged_recursion(
+        true_glucose.tolist(), innovations.tolist(),
+        display, float(sensor_state.get("error", 0.0)),
+        lag_alpha, phi, bias, min_glucose,
+    )
+    sensor_state["display"] = display
+    sensor_state["error"] = error
+    return np.array(readings, dtype=np.float64), sensor_state
@@ -2,7 +2,8 @@
 
 # Library Imports
 from __future__ import annotations
-from typing import Protocol, TypedDict, cast
+from dataclasses import dataclass, field, replace
+from typing import Any, Iterator, Protocol, Sequence, TypedDict, cast
 import numpy as np  # type: ignore[import-untyped]
 import matplotlib.pyplot as plt  # type: ignore[import-untyped]
 from matplotlib.axes import Axes  # type: ignore[import-untyped]
@@ -10,25 +11,66 @@ from scipy.integrate import solve_ivp  # type: ignore[import-untyped]
 from tqdm import tqdm
 
 # --- Imports from src ---
-from src.model import hovorka_equations, compute_optimal_steady_state_from_glucose, ParameterSet
-from src.parameters import generate_monte_carlo_patients
-from src.input import scenario_with_cached_meals, get_cached_day_plan, compute_day_labels, clear_meal_cache
+from src.model import (
+    PatientModel,
+    ParameterSet,
+    StateVector,
+    compute_fasting_steady_states_batch,
+    compute_optimal_steady_states,
+)
+from src.parameters import (
+    PATIENT_PARAMETER_DTYPE,
+    CandidateStream,
+    ParameterRecord,
+    stack_parameter_sets,
+    store_parameter_set,
+)
+from src.cohort import simulate_cohort_day, take_cohort_parameters
+from src.kernels import BACKEND_NUMBA, CompiledPatientModel, lagged_cgm_day, patient_model_class, resolve_backend
+from src.input import (
+    TAPE_MINUTES,
+    DayInputTape,
+    scenario_with_cached_meals,
+    get_cached_day_plan,
+    get_day_input_tape,
+    compute_day_labels,
+    clear_meal_cache,
+)
 from src.export import export_to_formats, ExportConfig
-from src.sensitivity import find_icr, find_isf
+from src.sensitivity import (
+    ICR_INITIAL_GLUCOSE_MMOL,
+    ISF_INITIAL_GLUCOSE_MMOL,
+    find_icr,
+    find_insulin_carbo_ratio_batch,
+    find_insulin_sensitivity_factor_batch,
+    find_isf,
+    load_calibration_surrogate,
+)
 from src.simulation_config import SimulationConfig
 from src.simulation_control import (
+    CohortControllerState,
     ControllerState,
     apply_guard_iob_isf,
     apply_hypo_rescue_to_derivative,
     count_correction_active_points,
     estimate_iob_from_state,
 )
-from src.sensor import measure_glycemia
+from src.sensor import measure_glycemia_trace
 from src.simulation_utils import (
+    CONTROL_PER_MINUTE,
+    MINUTE_EXPONENTIAL,
+    MINUTE_RK4,
+    GlucoseStop,
+    MinuteInputs,
     clip_state_trajectory,
     create_export_directory,
     get_patient_color,
+    integrate_minute_exponential,
+    integrate_minute_hybrid,
+    integrate_minute_rk4,
+    jacobian_solver_options,
     measure_glycemia_day,
+    solve_ivp_until,
 )
 
 
@@ -46,6 +88,8 @@ class DayResult(TypedDict):
     bolus_status: list[str | None]   # 'normal' | 'missed' | 'late' | None
     meal_size: list[str | None]      # 'normal' | 'large' | None
     exercise_type: list[str]         # 'aerobic' | 'anaerobic' | 'prolonged' | 'none'
+    # Readings of config.sensor_profiles by profile name (same units as blood_glucose)
+    sensor_glucose: dict[str, np.ndarray]
     # Deprecated scalar labels — kept for backward compat with analysis scripts
     scenario_id: int | None     # = base_scenario
     missed_meal_id: int | None  # first missed-bolus meal slot, or None
@@ -55,7 +99,7 @@ class DayResult(TypedDict):
 
 class PatientResult(TypedDict):
     patient_id: int
-    params: ParameterSet
+    params: ParameterRecord          # row view of the run's structured parameter table
     days: dict[int, DayResult]
 
 
@@ -95,6 +139,1025 @@ class InputPlotAxes(Protocol):
     def twinx(self) -> InputPlotAxes: ...
 
 
+_MINUTES_PER_DAY = 1440
+
+
+@dataclass
+class _PatientRun:
+    """Per-candidate bookkeeping shared by the scalar and cohort engines.
+
+    Holds the calibrated inputs of one candidate, the DayResults recorded so far
+    and the running statistics used by the fail-fast and post-loop rejection
+    checks. reject_reason stays None while the candidate is still acceptable.
+    """
+
+    patient_id: int  # meal/exercise plan id used with scenario_with_cached_meals
+    params: ParameterSet
+    x0: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+    basal_hourly: float = 0.0
+    insulin_carbo_ratio: float = 0.0
+    insulin_sensitivity: float = 0.0
+    days: dict[int, DayResult] = field(default_factory=dict)
+    noisy_segments: list[np.ndarray] = field(default_factory=list)
+    physio_segments: list[np.ndarray] = field(default_factory=list)
+    total_points: int = 0
+    guard_active_points: int = 0
+    rescue_active_points: int = 0
+    iob_guard_active_points: int = 0
+    correction_isf_active_points: int = 0
+    correction_isf_events: int = 0
+    correction_isf_units: float = 0.0
+    # Lagged CGM sensor state: carries the previous display value and AR(1) error
+    # across day boundaries so the noise process is continuous over the full horizon.
+    sensor_state: dict[str, float] = field(default_factory=dict)
+    # Filter state and noise generator of each extra sensor profile, by profile name.
+    profile_sensors: dict[str, tuple[dict[str, float], np.random.Generator]] = field(default_factory=dict)
+    # Per-day quality tracking: list of (is_exercise_day, hypo_pct, hyper_pct, min_glucose).
+    # Exercise days (sc2 base or sc7/sc8 overlay) use the looser exercise hypo threshold.
+    per_day_quality: list[tuple[bool, float, float, float]] = field(default_factory=list)
+    # Fail-fast rejection: track running instability stats so we can abort
+    # the day loop as soon as any day exceeds a threshold, rather than
+    # simulating all N days before checking.
+    running_max_glucose: float = 0.0
+    # Chronic-hypo counter (non-exercise days only): counts days that exceed the soft
+    # threshold (quality_max_hypo_pct_soft_threshold). Rejection fires when the count
+    # exceeds quality_max_hypo_bad_nonex_days — see simulation_config.py for rationale.
+    hypo_bad_nonex_day_count: int = 0
+    reject_reason: str | None = None
+    noisy_concat: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+    physio_concat: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+
+
+def _base_scenario_override(config: SimulationConfig) -> int | None:
+    """Base scenario override for fixed-scenario runs (None = use patient profile)."""
+    return None if config.random_scenarios else max(1, min(3, int(config.fixed_scenario)))
+
+
+def _screen_candidate_pool(patients: Sequence[ParameterSet], config: SimulationConfig) -> list[np.ndarray | None]:
+    """Initial steady states of the whole candidate pool in one batched reduced solve.
+
+    Entry k is candidate k's steady state (identical to the per-candidate solve),
+    or None where the batch cannot certify one and _prepare_patient_run must run
+    the scalar solver with its Newton fallback.
+    """
+    if not patients:
+        return []
+    states, solved = compute_fasting_steady_states_batch(
+        stack_parameter_sets(patients),
+        config.initial_target_glucose_mgdl,
+        international_units=False,
+    )
+    return [states[:, k].copy() if solved[k] else None for k in range(len(patients))]
+
+
+def _prepare_patient_run(
+    patient_params: ParameterSet,
+    patient_id: int,
+    config: SimulationConfig,
+    x0_initial: StateVector | np.ndarray | None = None,
+    calibrate: bool = True,
+) -> _PatientRun:
+    """Steady state, initial-glucose screening and ICR/ISF calibration for one candidate.
+
+    x0_initial is the steady state from _screen_candidate_pool, if available.
+    With calibrate=False the ICR/ISF are left to _calibrate_runs_batch.
+
+    Every steady state a candidate needs is solved once, in one
+    compute_optimal_steady_states call: the calibration starts of a screened
+    candidate after it passes screening, otherwise together with its initial state.
+    """
+    run = _PatientRun(patient_id=patient_id, params=patient_params)
+    calibration_targets = [ICR_INITIAL_GLUCOSE_MMOL, ISF_INITIAL_GLUCOSE_MMOL] if calibrate else []
+    calibration_states: list[StateVector] | None = None
+
+    # Compute initial steady state
+    # TODO: put a range of good glycemias
+    if x0_initial is None:
+        # Same mg/dL -> mmol/L conversion as compute_optimal_steady_state_from_glucose(..., international_units=False)
+        initial_target_mmol = config.initial_target_glucose_mgdl / (patient_params["MwG"] / 10.0)
+        x0_initial, *calibration_states = compute_optimal_steady_states(
+            patient_params,
+            [initial_target_mmol, *calibration_targets],
+            international_units=True,
+            max_iterations=100,
+            print_progress=False
+        )
+
+    vg_bw = float(patient_params["VG"]) * float(patient_params["BW"])
+    initial_glucose_mmol = float(x0_initial[0]) / vg_bw if vg_bw > 0.0 else 0.0
+    lo, hi = config.initial_glucose_acceptance_min_mmol, config.initial_glucose_acceptance_max_mmol
+    if not (lo <= initial_glucose_mmol <= hi):
+        print(f"  [DEBUG] INIT_GLUCOSE pid=candidate g0={initial_glucose_mmol:.2f} mmol/L bounds=[{lo},{hi}]")
+        run.reject_reason = "initial_glucose"
+        return run
+
+    run.x0 = np.array(x0_initial, dtype=np.float64)
+    tau_i = float(patient_params["tauI"])
+    us_calibrated_mU_min = float(x0_initial[2]) / tau_i if tau_i > 0 else (config.basal_hourly * 1000.0 / 60.0)
+    run.basal_hourly = (us_calibrated_mU_min * 60.0 / 1000.0) if config.use_calibrated_basal else config.basal_hourly
+
+    if not calibrate:
+        return run
+
+    # Compute ICR and ISF (sensitivity factors) from their steady-state starts
+    if calibration_states is None:
+        calibration_states = compute_optimal_steady_states(
+            patient_params,
+            calibration_targets,
+            international_units=True,
+            max_iterations=100,
+            print_progress=False
+        )
+    icr_x0, isf_x0 = calibration_states
+    surrogate = load_calibration_surrogate() if config.calibration_surrogate else None
+    run.insulin_carbo_ratio = find_icr(params=patient_params, initial_icr=config.init_insulin_carbo_ratio, target_glycemia_mmol=config.calibration_target_glycemia_mmol, print_progress=False, surrogate=surrogate, initial_state=icr_x0)
+    run.insulin_sensitivity = find_isf(params=patient_params, initial_isf=config.init_insulin_sensitivity_factor, target_glycemia_mmol=config.calibration_target_glycemia_mmol, print_progress=False, surrogate=surrogate, initial_state=isf_x0)
+
+    # Store into patient params
+    patient_params["ICR"] = run.insulin_carbo_ratio
+    patient_params["ISF"] = run.insulin_sensitivity
+    return run
+
+
+def _calibrate_runs_batch(runs: list[_PatientRun], config: SimulationConfig) -> None:
+    """ICR/ISF calibration of screened candidates in one batched search (engine="cohort").
+
+    Same experiments and secant search as find_icr/find_isf, integrated with the
+    cohort engine's fixed-step RK4 (cohort_substeps_per_min).
+    """
+    if not runs:
+        return
+    patients = [run.params for run in runs]
+    surrogate = load_calibration_surrogate() if config.calibration_surrogate else None
+    icr = find_insulin_carbo_ratio_batch(
+        patients,
+        initial_icr=config.init_insulin_carbo_ratio,
+        target_glycemia_mmol=config.calibration_target_glycemia_mmol,
+        substeps_per_min=config.cohort_substeps_per_min,
+        surrogate=surrogate,
+    )["icr_g_per_U"]
+    isf = find_insulin_sensitivity_factor_batch(
+        patients,
+        initial_isf=config.init_insulin_sensitivity_factor,
+        target_glycemia_mmol=config.calibration_target_glycemia_mmol,
+        substeps_per_min=config.cohort_substeps_per_min,
+        surrogate=surrogate,
+    )["isf_mmol_per_U"]
+    for run, run_icr, run_isf in zip(runs, icr.tolist(), isf.tolist()):
+        run.insulin_carbo_ratio = run_icr
+        run.insulin_sensitivity = run_isf
+        run.params["ICR"] = run_icr
+        run.params["ISF"] = run_isf
+
+
+def _warmup_sample_minutes(config: SimulationConfig) -> np.ndarray:
+    """Warm-up t_eval: every warmup_check_interval_min minutes when warm-up checks are on, else the day's end."""
+    if not (config.warmup_rejection or config.warmup_quality_checks):
+        return np.array([_MINUTES_PER_DAY])
+    step = max(1, int(config.warmup_check_interval_min))
+    return np.append(np.arange(0, _MINUTES_PER_DAY, step), _MINUTES_PER_DAY)
+
+
+def _warmup_reject_reason(
+    patient_id: int,
+    cache_day: int,
+    glucose_mmol: np.ndarray,
+    config: SimulationConfig,
+) -> str | None:
+    """Fail-fast checks on one warm-up day's sampled glucose [mmol/L]; returns the reject reason or None.
+
+    Uses the recorded-day thresholds and reasons, so rejections land in the usual
+    counters. The hypo% threshold follows the day plan's exercise flag.
+    """
+    reason = None
+    detail = ""
+    if config.warmup_rejection:
+        if float(np.max(glucose_mmol)) > config.instability_max_glucose_mmol:
+            reason, detail = "instability", f"max_glucose={float(np.max(glucose_mmol)):.1f} mmol/L"
+        elif float(np.min(glucose_mmol)) < config.quality_min_glucose_mmol:
+            reason, detail = "quality_hypo", f"min={float(np.min(glucose_mmol)):.3f} mmol/L"
+    if reason is None and config.warmup_quality_checks:
+        day_plan = get_cached_day_plan(patient_id, cache_day)
+        is_exercise_day = day_plan.is_exercise_day if day_plan else False
+        hypo_thresh = (
+            config.quality_max_hypo_pct_exercise_threshold if is_exercise_day else config.quality_max_hypo_pct_threshold
+        )
+        hypo_pct = 100.0 * float(np.mean(glucose_mmol < 3.9))
+        hyper_pct = 100.0 * float(np.mean(glucose_mmol > 10.0))
+        if hypo_pct > hypo_thresh:
+            reason, detail = "quality_hypo", f"hypo={hypo_pct:.1f}% thresh={hypo_thresh:.1f}%"
+        elif hyper_pct > config.quality_max_hyper_pct_threshold:
+            reason, detail = "quality_hyper", f"hyper={hyper_pct:.1f}% thresh={config.quality_max_hyper_pct_threshold:.1f}%"
+    if reason is not None:
+        print(f"  [DEBUG] WARMUP_FAIL pid={patient_id} warmup_day={cache_day} reason={reason} {detail}")
+    return reason
+
+
+def _record_day(
+    run: _PatientRun,
+    day_idx: int,
+    state_trajectory: np.ndarray,
+    day_insulin: np.ndarray,
+    day_cho: np.ndarray,
+    config: SimulationConfig,
+    rng: np.random.Generator,
+) -> None:
+    """Apply the CGM sensor, store the DayResult and run the per-day fail-fast checks.
+
+    state_trajectory is the (18, n_points) minute-sampled, already clipped state
+    of one patient for day day_idx. Sets run.reject_reason when a check fails.
+    """
+    patient_params = run.params
+    n_measurements = int(day_insulin.size)
+
+    # Apply the lagged CGM sensor model to the whole day.
+    # measure_glycemia (mode="lagged") applies at every point:
+    #   1. First-order CGM physiological lag:
+    #      G_lag(t) = G_disp(t-1) + α_lag * (G_true(t) - G_disp(t-1))
+    #   2. AR(1) correlated noise:
+    #      e_t = φ * e_{t-1} + η_t,  η_t ~ N(0, σ²(1-φ²))
+    #      G_meas(t) = G_lag(t) + e_t
+    # measure_glycemia_trace runs it over the day with one block of draws.
+    # run.sensor_state carries display/error across day boundaries.
+    available_points = min(n_measurements, state_trajectory.shape[1])
+    glycemia_day_array = np.zeros(n_measurements, dtype=np.float64)
+    if config.backend == BACKEND_NUMBA:
+        # Same recursion and generator draws in one compiled call.
+        glycemia_day_array[:available_points] = lagged_cgm_day(
+            state_trajectory[0, :available_points],
+            float(patient_params["VG"]) * float(patient_params["BW"]),
+            noise_std=config.noise_std,
+            phi=config.noise_autocorr,
+            lag_alpha=config.cgm_lag_alpha,
+            sensor_state=run.sensor_state,
+            rng=rng,
+            min_glucose=config.cgm_min_glucose_mmol,
+        )
+    else:
+        glycemia_day_array[:available_points], _ = measure_glycemia_trace(
+            state_trajectory[0, :available_points],
+            patient_params,
+            noise_std=config.noise_std,
+            mode="lagged",
+            phi=config.noise_autocorr,
+            lag_alpha=config.cgm_lag_alpha,
+            sensor_state=run.sensor_state,
+            rng=rng,
+            output_unit="mmol/L",
+            min_glucose=config.cgm_min_glucose_mmol,
+        )
+    if available_points < n_measurements:
+        glycemia_day_array[available_points:] = glycemia_day_array[available_points - 1]
+
+    # Extra sensor profiles read the same trajectory. Each draws from its own generator
+    # (seeded from random_seed, the plan id and the profile index), so adding profiles
+    # leaves blood_glucose and the main generator untouched.
+    sensor_glucose: dict[str, np.ndarray] = {}
+    for profile_idx, profile in enumerate(config.sensor_profiles):
+        if profile.name not in run.profile_sensors:
+            seed_sequence = np.random.SeedSequence(config.random_seed, spawn_key=(run.patient_id, profile_idx))
+            run.profile_sensors[profile.name] = ({}, np.random.default_rng(seed_sequence))
+        profile_state, profile_rng = run.profile_sensors[profile.name]
+        profile_day_array = np.zeros(n_measurements, dtype=np.float64)
+        profile_day_array[:available_points], _ = measure_glycemia_trace(
+            state_trajectory[0, :available_points],
+            patient_params,
+            noise_std=profile.noise_std,
+            mode="lagged",
+            bias=profile.bias,
+            phi=profile.noise_autocorr,
+            lag_alpha=profile.cgm_lag_alpha,
+            sensor_state=profile_state,
+            rng=profile_rng,
+            output_unit="mmol/L",
+            min_glucose=config.cgm_min_glucose_mmol,
+        )
+        if 0 < available_points < n_measurements:
+            profile_day_array[available_points:] = profile_day_array[available_points - 1]
+        if not config.international_unit:
+            profile_day_array = profile_day_array * (float(patient_params['MwG']) / 10.0)  # mmol/L -> mg/dL
+        sensor_glucose[profile.name] = profile_day_array
+
+    glycemia_day_physio = measure_glycemia_day(
+        state_trajectory=state_trajectory,
+        patient_params=patient_params,
+        noise_sequence=np.zeros(n_measurements, dtype=np.float64),
+        n_measurements=n_measurements,
+    )
+    glycemia_day_physio_mmol = glycemia_day_physio.copy()
+
+    # Convert units if needed
+    if not config.international_unit:
+        glycemia_day_array = glycemia_day_array * (float(patient_params['MwG']) / 10.0)  # mmol/L -> mg/dL
+        glycemia_day_physio = glycemia_day_physio * (float(patient_params['MwG']) / 10.0)  # mmol/L -> mg/dL
+
+    # Retrieve the cached DayPlan to extract ground-truth labels.
+    # scenario_with_cached_meals always populates the day-plan cache before
+    # returning, so get_cached_day_plan is guaranteed to find the entry here.
+    day_plan = get_cached_day_plan(run.patient_id, day_idx)
+    # Per-minute windowed ML labels from the day plan
+    _bolus_status_arr, _meal_size_arr, _exercise_type_arr = (
+        compute_day_labels(day_plan, n_measurements)
+        if day_plan is not None
+        else ([None] * n_measurements, [None] * n_measurements, ['none'] * n_measurements)
+    )
+    # Deprecated scalar labels for backward compat with analysis scripts
+    _missed_slots: list[int] = sorted(
+        [m.slot for m in day_plan.meals if m.bolus_status == 'missed']
+    ) if day_plan else []
+    _late_slots: list[int] = sorted(
+        [m.slot for m in day_plan.meals if m.bolus_status == 'late']
+    ) if day_plan else []
+
+    # Store results for this day
+    run.days[day_idx] = {
+        "blood_glucose": glycemia_day_array,
+        "insulin_mU_min": day_insulin,
+        "cho_mg_min": day_cho,
+        "base_scenario": day_plan.base_scenario if day_plan else 1,
+        "had_large_meal": day_plan.had_large_meal if day_plan else False,
+        "had_missed_bolus": day_plan.had_missed_bolus if day_plan else False,
+        "n_late_boluses": day_plan.n_late_boluses if day_plan else 0,
+        "exercise_overlay": day_plan.exercise_overlay if day_plan else None,
+        "bolus_status": _bolus_status_arr,
+        "meal_size": _meal_size_arr,
+        "exercise_type": _exercise_type_arr,
+        "sensor_glucose": sensor_glucose,
+        "scenario_id": day_plan.base_scenario if day_plan else None,
+        "missed_meal_id": _missed_slots[0] if _missed_slots else None,
+        "late_bolus_ids": _late_slots,
+        "late_bolus_id": _late_slots[0] if _late_slots else None,
+    }
+    # Day 0 is kept in full (0..1440 = 1441 points).
+    # Subsequent days drop their first point (minute 0 = same physical
+    # timestamp as minute 1440 of the previous day) to avoid a duplicate
+    # in the concatenated trajectory that would create a visible "kink".
+    noisy_segment = glycemia_day_array if day_idx == 0 else glycemia_day_array[1:]
+    physio_segment = glycemia_day_physio if day_idx == 0 else glycemia_day_physio[1:]
+    physio_segment_mmol = glycemia_day_physio_mmol if day_idx == 0 else glycemia_day_physio_mmol[1:]
+    iob_day_u = estimate_iob_from_state(state_trajectory)
+    iob_segment_u = iob_day_u if day_idx == 0 else iob_day_u[1:]
+    run.noisy_segments.append(noisy_segment)
+    run.physio_segments.append(physio_segment)
+    run.total_points += int(physio_segment_mmol.size)
+    run.guard_active_points += int(np.sum(physio_segment_mmol <= config.hypo_guard_mmol))
+    run.rescue_active_points += int(np.sum(physio_segment_mmol < config.hypo_rescue_trigger_mmol))
+    if config.enable_iob_bolus_guard:
+        run.iob_guard_active_points += int(np.sum(iob_segment_u > config.iob_guard_units))
+
+    # Accumulate per-day quality stats for scenario-aware rejection.
+    day_n = int(physio_segment_mmol.size)
+    if day_n == 0:
+        return
+    sim_patient_id = run.patient_id
+    per_day_quality = run.per_day_quality
+    day_hypo_pct  = 100.0 * int(np.sum(physio_segment_mmol < 3.9))  / day_n
+    day_hyper_pct = 100.0 * int(np.sum(physio_segment_mmol > 10.0)) / day_n
+    day_min_glucose = float(np.min(physio_segment_mmol))
+    _is_exercise_day = day_plan.is_exercise_day if day_plan else False
+    per_day_quality.append((_is_exercise_day, day_hypo_pct, day_hyper_pct, day_min_glucose))
+
+    # --- Fail-fast checks for this day ---
+    # Hard absolute cap: max glucose > 30.53 mmol/L on any single day guarantees
+    # the global max will also exceed the threshold, so we can abort immediately.
+    # The cumulative total_hyper_pct instability check is NOT done here because
+    # it is a trajectory-wide average (60% threshold); a single bad day can average
+    # out over N days and would be wrongly rejected early.
+    _day_max_glucose = float(np.max(physio_segment_mmol))
+    run.running_max_glucose = max(run.running_max_glucose, _day_max_glucose)
+    _day_i = len(per_day_quality) - 1
+    if run.running_max_glucose > config.instability_max_glucose_mmol:
+        _base_sc = day_plan.base_scenario if day_plan else 0
+        print(f"  [DEBUG] INSTABILITY pid={sim_patient_id} day={_day_i} sc={_base_sc} ex={_is_exercise_day} max_glucose={run.running_max_glucose:.1f} mmol/L")
+        run.reject_reason = "instability"
+        return
+
+    # Quality: check this day immediately using the same spillover logic as the
+    # post-loop block.  per_day_quality[-1] is the entry just appended above.
+    _prev_was_exercise = _day_i > 0 and per_day_quality[_day_i - 1][0]
+    _two_days_ago_was_exercise = _day_i > 1 and per_day_quality[_day_i - 2][0]
+    _base_hypo_thresh = (
+        config.quality_max_hypo_pct_exercise_threshold
+        if _is_exercise_day
+        else config.quality_max_hypo_pct_threshold
+    )
+    _day_hypo_thresh = (
+        _base_hypo_thresh
+        + (config.quality_max_hypo_pct_spillover_bonus if _prev_was_exercise else 0.0)
+        + (config.quality_max_hypo_pct_spillover_bonus if _two_days_ago_was_exercise else 0.0)
+    )
+    if day_hypo_pct > _day_hypo_thresh:
+        print(f"  [DEBUG] HYPO_FAIL  pid={sim_patient_id} day={_day_i} ex={_is_exercise_day} hypo={day_hypo_pct:.1f}% thresh={_day_hypo_thresh:.1f}%")
+        run.reject_reason = "quality_hypo"
+        return
+    if day_min_glucose < config.quality_min_glucose_mmol:
+        print(f"  [DEBUG] FLOOR_FAIL pid={sim_patient_id} day={_day_i} ex={_is_exercise_day} min={day_min_glucose:.3f} mmol/L floor={config.quality_min_glucose_mmol}")
+        run.reject_reason = "quality_hypo"
+        return
+    # Tier-2 chronic-hypo check (non-exercise days only): accumulate bad days and
+    # reject when the count exceeds the allowed maximum. Exercise hypo is expected
+    # physiology and tracked separately via the exercise threshold above.
+    if not _is_exercise_day and day_hypo_pct > config.quality_max_hypo_pct_soft_threshold:
+        run.hypo_bad_nonex_day_count += 1
+        if run.hypo_bad_nonex_day_count > config.quality_max_hypo_bad_nonex_days:
+            print(f"  [DEBUG] CHRONIC_HYPO pid={sim_patient_id} bad_nonex_days={run.hypo_bad_nonex_day_count} on day={_day_i} ex={_is_exercise_day} hypo={day_hypo_pct:.1f}%")
+            run.reject_reason = "quality_hypo"
+            return
+    if day_hyper_pct > config.quality_max_hyper_pct_threshold:
+        print(f"  [DEBUG] HYPER_FAIL  pid={sim_patient_id} day={_day_i} ex={_is_exercise_day} hyper={day_hyper_pct:.1f}% thresh={config.quality_max_hyper_pct_threshold:.1f}%")
+        run.reject_reason = "quality_hyper"
+
+
+def _finalize_patient_run(run: _PatientRun, controller_state: ControllerState, config: SimulationConfig) -> None:
+    """Trajectory-wide instability and per-day quality checks after all days are simulated."""
+    sim_patient_id = run.patient_id
+
+    # Absolute-minute end of this simulated horizon, used to clip correction windows.
+    horizon_end_abs_min = config.n_days * _MINUTES_PER_DAY
+    run.correction_isf_active_points += count_correction_active_points(
+        windows_abs=controller_state.correction_isf_windows_abs,
+        horizon_end_abs_min=horizon_end_abs_min,
+    )
+    run.correction_isf_events = controller_state.correction_isf_events
+    run.correction_isf_units = controller_state.correction_isf_units
+
+    # Concatenate all days for this patient
+    run.noisy_concat = np.concatenate(run.noisy_segments, dtype=np.float64)  # type: ignore[arg-type]
+    run.physio_concat = np.concatenate(run.physio_segments, dtype=np.float64)  # type: ignore[arg-type]
+
+    total_count = int(run.physio_concat.size)
+    max_glucose = float(np.max(run.physio_concat)) if total_count > 0 else 0.0
+    # Instability: evaluated on total trajectory (catches any runaway day).
+    total_hyper_pct = (
+        100.0 * int(np.sum(run.physio_concat > 10.0)) / total_count
+        if total_count > 0 else 0.0
+    )
+    if total_hyper_pct > config.instability_hyper_pct_threshold or max_glucose > config.instability_max_glucose_mmol:
+        run.reject_reason = "instability"
+        return
+    # Quality: per-day exercise-aware rejection.
+    # Base threshold depends on whether the day had exercise (sc2 base or sc7/sc8 overlay).
+    # The spillover bonus is applied for each exercise day in the 2-day lookback window:
+    # the Z state (tau_Z≈600 min) retains ~40% after 1 day and ~9% after 2 days, so
+    # consecutive exercise days pre-load Z and each contributes independently.
+    # Also enforce a hard minimum glucose floor across all days.
+    per_day_quality = run.per_day_quality
+    _quality_hypo_fail  = False
+    _quality_hyper_fail = False
+    _quality_floor_fail = False
+    _postloop_bad_nonex_days: int = 0
+    for _day_i, (_day_is_ex, _day_hypo, _day_hyper, _day_min) in enumerate(per_day_quality):
+        _prev_was_exercise = _day_i > 0 and per_day_quality[_day_i - 1][0]
+        _two_days_ago_was_exercise = _day_i > 1 and per_day_quality[_day_i - 2][0]
+        _base_hypo_thresh = (
+            config.quality_max_hypo_pct_exercise_threshold
+            if _day_is_ex
+            else config.quality_max_hypo_pct_threshold
+        )
+        _day_hypo_thresh = (
+            _base_hypo_thresh
+            + (config.quality_max_hypo_pct_spillover_bonus if _prev_was_exercise else 0.0)
+            + (config.quality_max_hypo_pct_spillover_bonus if _two_days_ago_was_exercise else 0.0)
+        )
+        if _day_hypo > _day_hypo_thresh:
+            _quality_hypo_fail = True
+            print(f"  [DEBUG] HYPO_FAIL  pid={sim_patient_id} day={_day_i} ex={_day_is_ex} hypo={_day_hypo:.1f}% thresh={_day_hypo_thresh:.1f}%")
+        # Tier-2 chronic-hypo check (non-exercise days only, mirrors fail-fast block)
+        if not _day_is_ex and _day_hypo > config.quality_max_hypo_pct_soft_threshold:
+            _postloop_bad_nonex_days += 1
+        if _day_hyper > config.quality_max_hyper_pct_threshold:
+            _quality_hyper_fail = True
+        if _day_min < config.quality_min_glucose_mmol:
+            _quality_floor_fail = True
+            print(f"  [DEBUG] FLOOR_FAIL pid={sim_patient_id} day={_day_i} ex={_day_is_ex} min={_day_min:.3f} mmol/L floor={config.quality_min_glucose_mmol}")
+    # Tier-2: reject if chronic non-exercise hypo pattern persists across the simulation
+    if _postloop_bad_nonex_days > config.quality_max_hypo_bad_nonex_days:
+        _quality_hypo_fail = True
+        print(f"  [DEBUG] CHRONIC_HYPO(post) pid={sim_patient_id} bad_nonex_days={_postloop_bad_nonex_days}")
+    if _quality_floor_fail or _quality_hypo_fail:
+        run.reject_reason = "quality_hypo"
+    elif _quality_hyper_fail:
+        run.reject_reason = "quality_hyper"
+
+
+@dataclass
+class _ClosedLoopDay:
+    """Closed-loop per-minute functions of one scalar-engine day (warm-up or recorded).
+
+    rhs() runs the control stack and the model inside the ODE right-hand side
+    (solve_ivp and minute_rk4 with control_mode="rhs"); inputs() returns the same
+    decisions as inputs held over the minute, and frozen_rhs() integrates with
+    them (minute_exp, control_mode="minute"). Applied insulin / CHO are logged
+    per minute when insulin_log / cho_log are given.
+    """
+
+    model: PatientModel
+    patient_params: ParameterSet
+    config: SimulationConfig
+    controller: ControllerState
+    plan_id: int
+    cache_day: int
+    abs_minute_offset: int
+    basal_hourly: float
+    insulin_carbo_ratio: float
+    insulin_sensitivity: float
+    base_scenario: int | None
+    insulin_log: np.ndarray | None = None
+    cho_log: np.ndarray | None = None
+    tape: DayInputTape = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Render the day plan once; every RHS evaluation is then an index into the tape.
+        self.tape = get_day_input_tape(
+            patient_id=self.plan_id,
+            day=self.cache_day,
+            scenario=self.base_scenario,
+            seed=self.config.random_seed,
+        )
+
+    def _day_inputs(self, current_min: int, basal_hourly: float, insulin_carbo_ratio: float) -> tuple[float, float, float]:
+        if 0 <= current_min < TAPE_MINUTES:
+            return self.tape.inputs_at(current_min, basal_hourly, insulin_carbo_ratio)
+        return scenario_with_cached_meals(
+            time=current_min,
+            patient_id=self.plan_id,
+            day=self.cache_day,
+            basal_hourly=basal_hourly,
+            scenario=self.base_scenario,
+            insulin_carbo_ratio=insulin_carbo_ratio,
+            seed=self.config.random_seed,
+        )
+
+    def _controls(self, current_min: int, x_safe: np.ndarray) -> tuple[int, float, float, float, float]:
+        """Controller decision at current_min: (abs minute, g_est, u, d, ac)."""
+        vg_bw = self.model.vg_bw
+        # Use absolute simulation minute to keep latch timers consistent across days.
+        current_abs_min = self.abs_minute_offset + current_min
+        g_est = float(x_safe[0]) / vg_bw if vg_bw > 0.0 else 0.0
+
+        # Basic insulin-on-board (IOB) estimate from subcutaneous depots [U].
+        # S1 and S2 are insulin masses in mU, so divide by 1000 to get units.
+        iob_u = max(0.0, float(x_safe[2]) + float(x_safe[3])) / 1000.0
+        basal_hourly_effective, insulin_carbo_ratio_effective, _ = apply_guard_iob_isf(
+            current_abs_min=current_abs_min,
+            g_est=g_est,
+            iob_u=iob_u,
+            basal_hourly_patient=self.basal_hourly,
+            insulin_carbo_ratio_patient=self.insulin_carbo_ratio,
+            insulin_sensitivity_patient=self.insulin_sensitivity,
+            config=self.config,
+            state=self.controller,
+        )
+
+        # Cached day plan (deterministic meal scheduling) with the controller's basal/ICR on top.
+        u_applied, d_applied, activity_applied = self._day_inputs(
+            current_min, basal_hourly_effective, insulin_carbo_ratio_effective
+        )
+        # Capture applied exogenous inputs at this minute for export/debug.
+        if self.insulin_log is not None and self.cho_log is not None and 0 <= current_min < self.insulin_log.size:
+            self.insulin_log[current_min] = float(u_applied)
+            self.cho_log[current_min] = float(d_applied)
+        return current_abs_min, g_est, float(u_applied), float(d_applied), float(activity_applied)
+
+    def rhs(self, current_min: int, x: np.ndarray) -> np.ndarray:
+        x_safe = np.nan_to_num(np.asarray(x, dtype=np.float64), copy=True, nan=0.0, posinf=1e6, neginf=-1e6)
+        np.clip(x_safe, -1e6, 1e6, out=x_safe)
+        current_abs_min, g_est, u, d, ac = self._controls(current_min, x_safe)
+        dy = self.model.rhs(current_min, x_safe, u, d, ac)
+        apply_hypo_rescue_to_derivative(
+            dy=dy,
+            current_abs_min=current_abs_min,
+            g_est=g_est,
+            patient_params=self.patient_params,
+            config=self.config,
+            state=self.controller,
+        )
+        clip = self.config.derivative_clip
+        np.nan_to_num(dy, copy=False, nan=0.0, posinf=clip, neginf=-clip)
+        # Fresh array: implicit solvers keep references to returned derivatives.
+        return np.clip(dy, -clip, clip)
+
+    def inputs(self, current_min: int, x: np.ndarray) -> MinuteInputs:
+        x_safe = np.nan_to_num(np.asarray(x, dtype=np.float64), copy=True, nan=0.0, posinf=1e6, neginf=-1e6)
+        np.clip(x_safe, -1e6, 1e6, out=x_safe)
+        current_abs_min, g_est, u, d, ac = self._controls(current_min, x_safe)
+        rescue = np.zeros_like(x_safe)
+        apply_hypo_rescue_to_derivative(
+            dy=rescue,
+            current_abs_min=current_abs_min,
+            g_est=g_est,
+            patient_params=self.patient_params,
+            config=self.config,
+            state=self.controller,
+        )
+        return u, d, ac, float(rescue[8])
+
+    def frozen_rhs(self, current_min: int, x: np.ndarray, held: MinuteInputs) -> np.ndarray:
+        """Model RHS with the minute's inputs held (hybrid mode); no controller calls."""
+        u, d, ac, rescue = held
+        x_safe = np.nan_to_num(np.asarray(x, dtype=np.float64), copy=True, nan=0.0, posinf=1e6, neginf=-1e6)
+        np.clip(x_safe, -1e6, 1e6, out=x_safe)
+        dy = self.model.rhs(current_min, x_safe, u, d, ac)
+        dy[8] += rescue
+        clip = self.config.derivative_clip
+        np.nan_to_num(dy, copy=False, nan=0.0, posinf=clip, neginf=-clip)
+        return np.clip(dy, -clip, clip)
+
+    def compiled_minute(self, current_min: int, x: np.ndarray, held: MinuteInputs) -> np.ndarray:
+        """One frozen_rhs RK4 minute in a single kernel call (backend="numba")."""
+        return cast(CompiledPatientModel, self.model).rk4_minute(current_min, x, held, self.config.derivative_clip)
+
+    def activity(self, current_min: int) -> float:
+        # Activity does not depend on the controller, so the Jacobian can resolve it directly.
+        return self._day_inputs(current_min, self.basal_hourly, self.insulin_carbo_ratio)[2]
+
+    def integrate(
+        self,
+        x0: np.ndarray,
+        minutes_per_day: int,
+        t_eval: np.ndarray,
+        out: np.ndarray | None = None,
+        stop: GlucoseStop | None = None,
+    ) -> tuple[np.ndarray, object | None]:
+        """Integrate the day with config.solver_method; returns (states at t_eval, solve_ivp result or None).
+
+        The fixed-step integrators always fill a (18, minutes_per_day + 1) buffer
+        (`out` when given) and return the columns at t_eval from it. With `stop`
+        (t_eval must then be every minute) the integration ends at the first
+        sample crossing it and only the samples up to it are returned.
+        """
+        method = self.config.solver_method
+        if method != MINUTE_EXPONENTIAL and self.config.control_mode == CONTROL_PER_MINUTE:
+            trajectory = integrate_minute_hybrid(
+                self.model, self.inputs, self.frozen_rhs, x0, minutes_per_day, method, out=out,
+                max_step=self.config.solver_max_step,
+                minute_step=self.compiled_minute if isinstance(self.model, CompiledPatientModel) else None,
+                stop=stop,
+            )
+        elif method == MINUTE_RK4:
+            trajectory = integrate_minute_rk4(self.rhs, x0, minutes_per_day, out=out, stop=stop)
+        elif method == MINUTE_EXPONENTIAL:
+            trajectory = integrate_minute_exponential(
+                self.model, self.inputs, x0, minutes_per_day, out=out,
+                derivative_clip=self.config.derivative_clip, stop=stop,
+            )
+        else:
+            # Solve ODE once for entire day
+            # Much more efficient than 1440 separate solve_ivp calls
+            solver_options: dict[str, Any] = dict(
+                rtol=1e-6,
+                atol=1e-8,
+                max_step=self.config.solver_max_step,
+                **jacobian_solver_options(self.model, method, self.activity),
+            )
+            if stop is not None:
+                # Same steps and samples as solve_ivp, ending at the first crossing sample.
+                sol = solve_ivp_until(
+                    lambda t, x: self.rhs(int(np.floor(t)), x),
+                    (0, minutes_per_day), x0, method, t_eval, stop, **solver_options,
+                )
+            else:
+                sol = solve_ivp(  # type: ignore[misc]
+                    lambda t, x: self.rhs(int(np.floor(t)), x),
+                    (0, minutes_per_day),
+                    x0,
+                    method=method,
+                    t_eval=t_eval,
+                    dense_output=False,
+                    **solver_options,
+                )
+            return np.asarray(sol.y, dtype=np.float64), sol  # type: ignore[misc]
+        if stop is not None or t_eval.size == trajectory.shape[1]:
+            return trajectory, None
+        return trajectory[:, t_eval.astype(np.intp)], None
+
+
+def _simulate_patient_scalar(run: _PatientRun, config: SimulationConfig, rng: np.random.Generator) -> None:
+    """Warm-up and recorded days for one candidate (engine="scalar", integrator config.solver_method)."""
+    patient_params = run.params
+    sim_patient_id = run.patient_id
+    minutes_per_day = _MINUTES_PER_DAY
+    basal_hourly_patient = run.basal_hourly
+    insulin_carbo_ratio_patient = run.insulin_carbo_ratio
+    insulin_sensitivity_patient = run.insulin_sensitivity
+    # Base scenario override for fixed-scenario runs (None = use patient profile)
+    _base_sc_override = _base_scenario_override(config)
+    # CompiledPatientModel runs the RHS (and frozen-input minutes) in Numba kernels.
+    model_class = patient_model_class(config.backend)
+    per_minute_buffer = (
+        config.solver_method in (MINUTE_RK4, MINUTE_EXPONENTIAL) or config.control_mode == CONTROL_PER_MINUTE
+    )
+
+    # Save base SI values for per-day perturbation; restore after all days.
+    # SI1/SI2/SI3 are the insulin-action sensitivity coefficients in the ODE.
+    _base_SI1 = float(patient_params["SI1"])
+    _base_SI2 = float(patient_params["SI2"])
+    _base_SI3 = float(patient_params["SI3"])
+
+    # Track state across days
+    current_state: np.ndarray = np.array(run.x0, dtype=np.float64)
+
+    # ── Burn-in (warm-up) ──────────────────────────────────────────────────
+    # Run n_warmup_days before recording to let ETH exercise states (Y, Z)
+    # reach a cyclic steady state.  Negative day cache indices (-n, ..., -1)
+    # avoid collisions with recorded day keys (0, ..., n_days-1).
+    # The warmup controller state is thrown away afterwards so that latch
+    # timers do not bleed into the recorded horizon.
+    if config.n_warmup_days > 0:
+        warmup_controller = ControllerState()
+        warmup_model = model_class(patient_params)
+        # Minute-by-minute trajectory buffer, reused across warm-up days (only the final state is kept).
+        _wu_buffer = np.empty((current_state.size, minutes_per_day + 1), dtype=np.float64) if per_minute_buffer else None
+        # Sparse sample grid for the optional warm-up checks (only the day's end without them).
+        _wu_t_eval = _warmup_sample_minutes(config)
+        _wu_checks = config.warmup_rejection or config.warmup_quality_checks
+        _vg_bw = float(patient_params["VG"]) * float(patient_params["BW"])
+
+        for _wu_idx in range(config.n_warmup_days):
+            # _abs minutes are used only for the warmup controller's latch timers
+            # (which are discarded after warmup). They count from 0 regardless
+            # of the negative cache-day index used for meals, so the two time
+            # references intentionally differ here.
+            warmup_day = _ClosedLoopDay(
+                model=warmup_model,
+                patient_params=patient_params,
+                config=config,
+                controller=warmup_controller,
+                plan_id=sim_patient_id,
+                cache_day=_wu_idx - config.n_warmup_days,  # -n_warmup_days … -1
+                abs_minute_offset=_wu_idx * minutes_per_day,
+                basal_hourly=basal_hourly_patient,
+                insulin_carbo_ratio=insulin_carbo_ratio_patient,
+                insulin_sensitivity=insulin_sensitivity_patient,
+                base_scenario=_base_sc_override,
+            )
+            _wu_states, _ = warmup_day.integrate(current_state, minutes_per_day, _wu_t_eval, out=_wu_buffer)
+            if _wu_checks:
+                _wu_q1 = np.nan_to_num(_wu_states[0], nan=0.0, posinf=1e6, neginf=0.0)
+                if config.clip_states:
+                    _wu_q1 = np.maximum(_wu_q1, 0.0)
+                run.reject_reason = _warmup_reject_reason(
+                    sim_patient_id, _wu_idx - config.n_warmup_days, _wu_q1 / _vg_bw, config,
+                )
+                if run.reject_reason is not None:
+                    return
+            current_state = np.array(_wu_states[:, -1], dtype=np.float64)
+            current_state = np.nan_to_num(current_state, nan=0.0, posinf=1e6, neginf=0.0)
+            if config.clip_states:
+                current_state = clip_state_trajectory(current_state.reshape(-1, 1))[:, 0]
+
+    controller_state = ControllerState()
+
+    # Simulate each day
+    for day_idx in range(config.n_days):
+
+        # Per-day insulin sensitivity perturbation: ±15% CV, bounded ±35%.
+        # Mimics real T1D day-to-day variability (sleep, minor illness, stress).
+        # Scales SI1/SI2/SI3 in patient_params so the compiled model picks it up.
+        # ISF used in the correction guard is scaled inversely (ISF ∝ 1/SI).
+        si_day_factor = float(np.clip(rng.normal(1.0, 0.10), 0.78, 1.25))
+        patient_params["SI1"] = _base_SI1 * si_day_factor
+        patient_params["SI2"] = _base_SI2 * si_day_factor
+        patient_params["SI3"] = _base_SI3 * si_day_factor
+        insulin_sensitivity_day = insulin_sensitivity_patient / si_day_factor
+
+        t_eval_day = np.arange(0, minutes_per_day + 1)  # Every minute
+        n_measurements = len(t_eval_day)
+        day_insulin = np.full(n_measurements, np.nan, dtype=np.float64)
+        day_cho = np.full(n_measurements, np.nan, dtype=np.float64)
+
+        day = _ClosedLoopDay(
+            # Compiled RHS for today's perturbed SI values.
+            model=model_class(patient_params),
+            patient_params=patient_params,
+            config=config,
+            controller=controller_state,
+            plan_id=sim_patient_id,
+            cache_day=int(day_idx),
+            abs_minute_offset=int(day_idx) * minutes_per_day,
+            basal_hourly=basal_hourly_patient,
+            insulin_carbo_ratio=insulin_carbo_ratio_patient,
+            insulin_sensitivity=insulin_sensitivity_day,
+            base_scenario=_base_sc_override,
+            insulin_log=day_insulin,
+            cho_log=day_cho,
+        )
+        # A sample above the instability cap rejects the candidate, so the day's
+        # integration can stop there (config.stop_on_instability). The glucose floor is
+        # not a stop: a later same-day cap crossing would make the reason "instability".
+        day_stop = (
+            GlucoseStop(
+                vg_bw=float(patient_params["VG"]) * float(patient_params["BW"]),
+                max_mmol=config.instability_max_glucose_mmol,
+                clip=config.clip_states,
+            )
+            if config.stop_on_instability
+            else None
+        )
+        state_trajectory, sol = day.integrate(current_state, minutes_per_day, t_eval_day, stop=day_stop)
+        if 0 < state_trajectory.shape[1] < n_measurements:
+            # Stopped early: hold the crossing sample over the rest of the day so _record_day
+            # draws the same sensor noise and rejects as "instability", its first check.
+            state_trajectory = np.concatenate(
+                [state_trajectory, np.repeat(state_trajectory[:, -1:], n_measurements - state_trajectory.shape[1], axis=1)],
+                axis=1,
+            )
+
+        state_trajectory = np.nan_to_num(state_trajectory, copy=False, nan=0.0, posinf=1e6, neginf=0.0)
+        if state_trajectory.ndim != 2 or state_trajectory.shape[1] == 0:
+            print(
+                f"Warning: ODE solver returned no valid points for patient {sim_patient_id}, day {day_idx}. "
+                "Using previous state as fallback."
+            )
+            state_trajectory = np.asarray(current_state, dtype=np.float64).reshape(-1, 1)
+        solver_success = bool(getattr(sol, "success", True))  # type: ignore[misc]
+        solver_message = str(getattr(sol, "message", ""))  # type: ignore[misc]
+        if not solver_success:
+            print(
+                f"Warning: ODE solver ended early for patient {sim_patient_id}, day {day_idx}: {solver_message}"
+            )
+
+        # Clip states if requested (guard against negative masses)
+        if config.clip_states:
+            state_trajectory = clip_state_trajectory(state_trajectory)
+
+        # Update current state for next day (continuity)
+        current_state = np.asarray(state_trajectory[:, -1], dtype=np.float64)
+
+        # Fill occasional missing minute captures from solver internals.
+        basal_fallback = basal_hourly_patient * 1000.0 / 60.0
+        for idx in range(n_measurements):
+            if np.isnan(day_insulin[idx]):
+                day_insulin[idx] = day_insulin[idx - 1] if idx > 0 else basal_fallback
+            if np.isnan(day_cho[idx]):
+                day_cho[idx] = day_cho[idx - 1] if idx > 0 else 0.0
+
+        _record_day(run, day_idx, state_trajectory, day_insulin, day_cho, config, rng)
+        if run.reject_reason is not None:
+            break
+
+    # Restore base SI values so exported patient_params reflects the
+    # calibrated baseline, not the last day's perturbed values.
+    patient_params["SI1"] = _base_SI1
+    patient_params["SI2"] = _base_SI2
+    patient_params["SI3"] = _base_SI3
+
+
+    if run.reject_reason is None:
+        _finalize_patient_run(run, controller_state, config)
+
+
+def _iter_scalar_patient_runs(
+    candidates: CandidateStream,
+    config: SimulationConfig,
+    rng: np.random.Generator,
+) -> Iterator[_PatientRun]:
+    """Yield finished candidates one by one in stream order (engine="scalar").
+
+    Each batch of the stream is screened at once before its candidates are run.
+    The plan id of each candidate is the number of patients accepted before it,
+    so rejected candidates hand their meal plan on to the next one.
+    """
+    while not candidates.exhausted:
+        batch = candidates.next_batch()
+        initial_states = _screen_candidate_pool(batch, config)
+        for patient_params, x0_initial in zip(batch, initial_states):
+            run = _prepare_patient_run(patient_params, candidates.n_accepted, config, x0_initial)
+            if run.reject_reason is None:
+                _simulate_patient_scalar(run, config, rng)
+            candidates.record(run.reject_reason is None)
+            yield run
+
+
+def _simulate_cohort_block(runs: list[_PatientRun], config: SimulationConfig, rng: np.random.Generator) -> None:
+    """Warm-up and recorded days for a block of candidates on the cohort engine.
+
+    All runs advance together as one (18, N) state matrix; rows of candidates
+    rejected by the per-day fail-fast checks are dropped before the next day.
+    Per-day SI perturbation, warm-up and controller semantics mirror
+    _simulate_patient_scalar.
+    """
+    if not runs:
+        return
+    minutes_per_day = _MINUTES_PER_DAY
+    base_sc_override = _base_scenario_override(config)
+    params = stack_parameter_sets([run.params for run in runs])
+    base_si = {key: params[key].copy() for key in ("SI1", "SI2", "SI3")}
+    basal = np.array([run.basal_hourly for run in runs], dtype=np.float64)
+    icr = np.array([run.insulin_carbo_ratio for run in runs], dtype=np.float64)
+    isf = np.array([run.insulin_sensitivity for run in runs], dtype=np.float64)
+    plan_ids = [run.patient_id for run in runs]
+    state = np.column_stack([run.x0 for run in runs])
+    active = list(runs)
+
+    # Burn-in with a throw-away controller, as in the scalar engine.
+    if config.n_warmup_days > 0:
+        warmup_controller = CohortControllerState.create(len(runs))
+        warmup_minutes = _warmup_sample_minutes(config)
+        for wu_idx in range(config.n_warmup_days):
+            warm = simulate_cohort_day(
+                state, params,
+                plan_ids=plan_ids, day=wu_idx - config.n_warmup_days,
+                basal_hourly=basal, insulin_carbo_ratio=icr, insulin_sensitivity=isf,
+                config=config, controller=warmup_controller,
+                abs_minute_offset=wu_idx * minutes_per_day,
+                scenario=base_sc_override, keep_trajectory=False, sample_minutes=warmup_minutes,
+                minutes_per_day=minutes_per_day,
+            )
+            state = np.nan_to_num(warm.final_state, nan=0.0, posinf=1e6, neginf=0.0)
+            if config.clip_states:
+                state = clip_state_trajectory(state)
+            if not (config.warmup_rejection or config.warmup_quality_checks):
+                continue
+            q1 = np.nan_to_num(warm.states[0], nan=0.0, posinf=1e6, neginf=0.0)
+            if config.clip_states:
+                q1 = np.maximum(q1, 0.0)
+            glucose = q1 / (params["VG"] * params["BW"])[:, None]
+            for j, run in enumerate(active):
+                run.reject_reason = _warmup_reject_reason(
+                    run.patient_id, wu_idx - config.n_warmup_days, glucose[j], config,
+                )
+            keep = np.array([j for j, run in enumerate(active) if run.reject_reason is None], dtype=np.int64)
+            if keep.size < len(active):
+                active = [active[j] for j in keep]
+                if not active:
+                    return
+                state = state[:, keep]
+                params = take_cohort_parameters(params, keep)
+                base_si = {key: values[keep] for key, values in base_si.items()}
+                basal, icr, isf = basal[keep], icr[keep], isf[keep]
+                plan_ids = [plan_ids[j] for j in keep]
+                warmup_controller = warmup_controller.take(keep)
+
+    controller = CohortControllerState.create(len(active))
+    for day_idx in range(config.n_days):
+        # Per-day insulin sensitivity perturbation (see _simulate_patient_scalar).
+        si_day_factor = np.clip(rng.normal(1.0, 0.10, size=len(active)), 0.78, 1.25)
+        for key, base_values in base_si.items():
+            params[key] = base_values * si_day_factor
+
+        day = simulate_cohort_day(
+            state, params,
+            plan_ids=plan_ids, day=day_idx,
+            basal_hourly=basal, insulin_carbo_ratio=icr, insulin_sensitivity=isf / si_day_factor,
+            config=config, controller=controller,
+            abs_minute_offset=day_idx * minutes_per_day,
+            scenario=base_sc_override,
+            minutes_per_day=minutes_per_day,
+        )
+        trajectories = np.nan_to_num(day.states, nan=0.0, posinf=1e6, neginf=0.0)
+        for j, run in enumerate(active):
+            state_trajectory = trajectories[:, j, :]
+            if config.clip_states:
+                state_trajectory = clip_state_trajectory(state_trajectory)
+            trajectories[:, j, :] = state_trajectory
+            _record_day(run, day_idx, state_trajectory, day.insulin_mU_min[j], day.cho_mg_min[j], config, rng)
+        state = trajectories[:, :, -1]
+
+        keep = np.array([j for j, run in enumerate(active) if run.reject_reason is None], dtype=np.int64)
+        if keep.size < len(active):
+            active = [active[j] for j in keep]
+            if not active:
+                return
+            state = state[:, keep]
+            params = take_cohort_parameters(params, keep)
+            base_si = {key: values[keep] for key, values in base_si.items()}
+            basal, icr, isf = basal[keep], icr[keep], isf[keep]
+            plan_ids = [plan_ids[j] for j in keep]
+            controller = controller.take(keep)
+
+    for j, run in enumerate(active):
+        _finalize_patient_run(run, controller.patient_state(j), config)
+
+
+def _iter_cohort_patient_runs(
+    candidates: CandidateStream,
+    config: SimulationConfig,
+    rng: np.random.Generator,
+) -> Iterator[_PatientRun]:
+    """Yield finished candidates in stream order, simulating them in blocks (engine="cohort").
+
+    Blocks hold at most cohort_block_size candidates and the stream's estimate of
+    the candidates still needed at the running acceptance rate, so small runs do
+    not simulate a full block. The plan id of each candidate is its index in the stream.
+    """
+    block_limit = max(1, int(config.cohort_block_size))
+    while not candidates.exhausted:
+        first_candidate = candidates.n_drawn
+        block = candidates.next_batch(limit=block_limit)
+        initial_states = _screen_candidate_pool(block, config)
+        runs = [
+            _prepare_patient_run(patient_params, first_candidate + j, config, initial_states[j], calibrate=False)
+            for j, patient_params in enumerate(block)
+        ]
+        screened = [run for run in runs if run.reject_reason is None]
+        _calibrate_runs_batch(screened, config)
+        _simulate_cohort_block(screened, config, rng)
+        for run in runs:
+            candidates.record(run.reject_reason is None)
+            yield run
+
+
 # --- Main Simulation Loop ---
 def run_simulation(
     config: SimulationConfig,
@@ -118,27 +1181,48 @@ def run_simulation(
     
     # Clear any cached meal schedules from previous runs to ensure fresh state
     clear_meal_cache()
+
+    # backend="numba" without Numba installed runs the NumPy path (with a warning).
+    backend = resolve_backend(config.backend)
+    if backend != config.backend:
+        config = replace(config, backend=backend)
     
+    profile_names = [profile.name for profile in config.sensor_profiles]
+    if len(set(profile_names)) != len(profile_names):
+        raise ValueError(f"sensor_profiles names must be unique, got {profile_names}")
+    if config.calibration_surrogate:
+        # Same experiments as find_icr/find_isf in _prepare_patient_run and _calibrate_runs_batch.
+        surrogate = load_calibration_surrogate()
+        try:
+            surrogate.check_experiment(config.calibration_target_glycemia_mmol, 180, ICR_INITIAL_GLUCOSE_MMOL, 50.0)
+            surrogate.check_experiment(config.calibration_target_glycemia_mmol, 180, ISF_INITIAL_GLUCOSE_MMOL)
+        except ValueError as err:
+            raise ValueError(
+                f"SimulationConfig.calibration_target_glycemia_mmol={config.calibration_target_glycemia_mmol} "
+                f"does not match the calibration surrogate (calibration_surrogate=True): {err}"
+            ) from err
+
     # Setup export directory
     now_sim_folder_path = create_export_directory() if any(export_config.to_list()) else None
 
-    # Generate an oversized candidate pool; keep first N stable patients.
-    # 10× oversampling ensures the target count is met even at ~40% acceptance rates
-    # (typical for random-scenario runs). Increase further only if rejection rate
-    # consistently exceeds 90%, which indicates pathological threshold configuration.
-    candidate_multiplier = 10
-    candidate_pool_size = max(config.n_patients * candidate_multiplier, config.n_patients)
-    patients: list[ParameterSet] = generate_monte_carlo_patients(candidate_pool_size, standard_patient=config.std_patient, seed=config.random_seed)
+    # Candidates are sampled lazily in batches sized from the running acceptance rate
+    # until n_patients are accepted; max_candidate_multiplier × n_patients caps the
+    # search for pathological threshold configurations. A seed fixes the candidate sequence.
+    candidates = CandidateStream(
+        config.n_patients,
+        standard_patient=config.std_patient,
+        seed=config.random_seed,
+        max_candidates=max(config.n_patients * config.max_candidate_multiplier, config.n_patients),
+    )
 
-    # Time configuration
-    minutes_per_day = int(24 * 60)  # 1440 minutes
-    
     # Plotting setup
     if config.enable_plots:
         plt.figure(figsize=(14, 7))  # type: ignore[misc]
     
     # Storage for results
     results_tot: dict[int, PatientResult] = {}
+    # Accepted patients' parameters live in one structured table; results hold row views.
+    accepted_params = np.full(config.n_patients, np.nan, dtype=PATIENT_PARAMETER_DTYPE)
     all_patient_trajectories: list[np.ndarray] = []
     sampled_patients = 0
     accepted_patients = 0
@@ -176,555 +1260,51 @@ def run_simulation(
         colour="blue",
         disable=not show_progress,
     ) as pbar:
-        for patient_params in patients:
-            if accepted_patients >= config.n_patients:
-                break
+        if config.engine == "cohort":
+            patient_runs = _iter_cohort_patient_runs(candidates, config, rng)
+        else:
+            patient_runs = _iter_scalar_patient_runs(candidates, config, rng)
+        for run in patient_runs:
             sampled_patients += 1
 
-            # Compute initial steady state
-            # TODO: put a range of good glycemias
-            x0_initial = compute_optimal_steady_state_from_glucose(
-                patient_params, 
-                config.initial_target_glucose_mgdl,
-                international_units=False, 
-                max_iterations=100, 
-                print_progress=False
-            )
-
-            vg_bw = float(patient_params["VG"]) * float(patient_params["BW"])
-            initial_glucose_mmol = float(x0_initial[0]) / vg_bw if vg_bw > 0.0 else 0.0
-            if not (rejection_bounds_mmol[0] <= initial_glucose_mmol <= rejection_bounds_mmol[1]):
-                print(f"  [DEBUG] INIT_GLUCOSE pid=candidate g0={initial_glucose_mmol:.2f} mmol/L bounds=[{rejection_bounds_mmol[0]},{rejection_bounds_mmol[1]}]")
+            if run.reject_reason is not None:
                 rejected_patients += 1
-                rejected_initial_glucose += 1
-                continue
-
-            sim_patient_id = accepted_patients
-
-            # Initialize patient results
-            results_tot[sim_patient_id] = {
-                "patient_id": sim_patient_id,
-                "params": patient_params,
-                "days": {}
-            }
-
-
-            tau_i = float(patient_params["tauI"])
-            us_calibrated_mU_min = float(x0_initial[2]) / tau_i if tau_i > 0 else (config.basal_hourly * 1000.0 / 60.0)
-            basal_hourly_patient = (us_calibrated_mU_min * 60.0 / 1000.0) if config.use_calibrated_basal else config.basal_hourly
-
-            # Compute ICR and ISF (sensitivity factors)
-            insulin_carbo_ratio_patient = find_icr(params=patient_params, initial_icr=config.init_insulin_carbo_ratio, target_glycemia_mmol=config.calibration_target_glycemia_mmol, print_progress=False)
-            insulin_sensitivity_patient = find_isf(params=patient_params, initial_isf=config.init_insulin_sensitivity_factor, target_glycemia_mmol=config.calibration_target_glycemia_mmol, print_progress=False)
-
-            # Store into patient params
-            patient_params["ICR"] = insulin_carbo_ratio_patient
-            patient_params["ISF"] = insulin_sensitivity_patient
-
-            # Save base SI values for per-day perturbation; restore after all days.
-            # SI1/SI2/SI3 are the insulin-action sensitivity coefficients in the ODE.
-            _base_SI1 = float(patient_params["SI1"])
-            _base_SI2 = float(patient_params["SI2"])
-            _base_SI3 = float(patient_params["SI3"])
-
-            # Track state across days
-            current_state: np.ndarray = np.array(x0_initial, dtype=np.float64)
-
-            # ── Burn-in (warm-up) ──────────────────────────────────────────────────
-            # Run n_warmup_days before recording to let ETH exercise states (Y, Z)
-            # reach a cyclic steady state.  Negative day cache indices (-n, ..., -1)
-            # avoid collisions with recorded day keys (0, ..., n_days-1).
-            # The warmup controller state is thrown away afterwards so that latch
-            # timers do not bleed into the recorded horizon.
-            if config.n_warmup_days > 0:
-                warmup_controller = ControllerState()
-                _wu_day_insulin = np.full(minutes_per_day + 1, np.nan, dtype=np.float64)
-                _wu_day_cho     = np.full(minutes_per_day + 1, np.nan, dtype=np.float64)
-                # Base scenario override for fixed-scenario runs (None = use patient profile)
-                _base_sc_override = None if config.random_scenarios else max(1, min(3, int(config.fixed_scenario)))
-
-                for _wu_idx in range(config.n_warmup_days):
-                    _wu_cache_day = _wu_idx - config.n_warmup_days  # -n_warmup_days … -1
-                    _wu_day_insulin[:] = np.nan
-                    _wu_day_cho[:] = np.nan
-
-                    def _wu_ode(t: float, x: np.ndarray,
-                                _d: int = _wu_cache_day,
-                                _c: ControllerState = warmup_controller,
-                                _widx: int = _wu_idx) -> np.ndarray:
-                        x_s = np.nan_to_num(np.asarray(x, dtype=np.float64), copy=True, nan=0.0, posinf=1e6, neginf=-1e6)
-                        np.clip(x_s, -1e6, 1e6, out=x_s)
-                        _cm = int(np.floor(t))
-                        # _abs is used only for the warmup controller's latch timers
-                        # (which are discarded after warmup). It counts from 0 regardless
-                        # of the negative cache-day index (_wu_cache_day) used for meals,
-                        # so the two time references intentionally differ here.
-                        _abs = _widx * minutes_per_day + _cm
-                        _g = float(x_s[0]) / vg_bw if vg_bw > 0.0 else 0.0
-                        _iob = max(0.0, float(x_s[2]) + float(x_s[3])) / 1000.0
-                        _beff, _icr_eff, _ = apply_guard_iob_isf(
-                            current_abs_min=_abs, g_est=_g, iob_u=_iob,
-                            basal_hourly_patient=basal_hourly_patient,
-                            insulin_carbo_ratio_patient=insulin_carbo_ratio_patient,
-                            insulin_sensitivity_patient=insulin_sensitivity_patient,
-                            config=config, state=_c,
-                        )
-                        _u, _d_cho, _ac = scenario_with_cached_meals(
-                            time=_cm, patient_id=sim_patient_id, day=_d,
-                            basal_hourly=_beff, scenario=_base_sc_override,
-                            insulin_carbo_ratio=_icr_eff, seed=config.random_seed,
-                        )
-                        dy = np.asarray(hovorka_equations(
-                            _cm, x_s, patient_params,
-                            scenario_with_cached_meals,
-                            scenario=1,  # dead — precomputed_inputs always provided; scenario dispatch already done above
-                            patient_id=sim_patient_id, day=_d,
-                            basal_hourly=_beff,
-                            insulin_carbo_ratio=_icr_eff,
-                            seed=config.random_seed,
-                            precomputed_inputs=(float(_u), float(_d_cho), float(_ac)),
-                        ), dtype=np.float64)
-                        apply_hypo_rescue_to_derivative(
-                            dy=dy, current_abs_min=_abs, g_est=_g,
-                            patient_params=patient_params, config=config, state=_c,
-                        )
-                        dy = np.nan_to_num(dy, copy=False, nan=0.0,
-                                           posinf=config.derivative_clip, neginf=-config.derivative_clip)
-                        np.clip(dy, -config.derivative_clip, config.derivative_clip, out=dy)
-                        return dy
-
-                    _wu_sol = solve_ivp(  # type: ignore[misc]
-                        _wu_ode, (0, minutes_per_day), current_state,
-                        method=config.solver_method,
-                        t_eval=np.array([minutes_per_day]),
-                        dense_output=False, rtol=1e-6, atol=1e-8,
-                        max_step=config.solver_max_step,
-                    )
-                    current_state = np.asarray(_wu_sol.y[:, -1], dtype=np.float64)  # type: ignore[misc]
-                    current_state = np.nan_to_num(current_state, nan=0.0, posinf=1e6, neginf=0.0)
-                    if config.clip_states:
-                        current_state = clip_state_trajectory(current_state.reshape(-1, 1))[:, 0]
-
-            patient_full_trajectory_noisy: list[np.ndarray] = []
-            patient_full_trajectory_physio: list[np.ndarray] = []
-            patient_total_points = 0
-            patient_guard_active_points = 0
-            patient_rescue_active_points = 0
-            patient_iob_guard_active_points = 0
-            patient_correction_isf_active_points = 0
-            patient_correction_isf_events = 0
-            patient_correction_isf_units = 0.0
-            # Lagged CGM sensor state: carries the previous display value and AR(1) error
-            # across day boundaries so the noise process is continuous over the full horizon.
-            sensor_cgm_state: dict[str, float] = {}
-            controller_state = ControllerState()
-            # Per-day quality tracking: list of (is_exercise_day, hypo_pct, hyper_pct, min_glucose).
-            # Exercise days (sc2 base or sc7/sc8 overlay) use the looser exercise hypo threshold.
-            per_day_quality: list[tuple[bool, float, float, float]] = []
-            # Fail-fast rejection: track running instability stats so we can abort
-            # the day loop as soon as any day exceeds a threshold, rather than
-            # simulating all N days before checking.
-            _early_reject_reason: str | None = None
-            _running_max_glucose: float = 0.0
-            # Chronic-hypo counter (non-exercise days only): counts days that exceed the soft
-            # threshold (quality_max_hypo_pct_soft_threshold). Rejection fires when the count
-            # exceeds quality_max_hypo_bad_nonex_days — see simulation_config.py for rationale.
-            _hypo_bad_nonex_day_count: int = 0
-            # Base scenario override for fixed-scenario runs
-            _base_sc_override = None if config.random_scenarios else max(1, min(3, int(config.fixed_scenario)))
-
-            # Simulate each day
-            for day_idx in range(config.n_days):
-
-                # Per-day insulin sensitivity perturbation: ±15% CV, bounded ±35%.
-                # Mimics real T1D day-to-day variability (sleep, minor illness, stress).
-                # Scales SI1/SI2/SI3 in patient_params so the ODE closure picks it up.
-                # ISF used in the correction guard is scaled inversely (ISF ∝ 1/SI).
-                si_day_factor = float(np.clip(rng.normal(1.0, 0.10), 0.78, 1.25))
-                patient_params["SI1"] = _base_SI1 * si_day_factor
-                patient_params["SI2"] = _base_SI2 * si_day_factor
-                patient_params["SI3"] = _base_SI3 * si_day_factor
-                insulin_sensitivity_day = insulin_sensitivity_patient / si_day_factor
-
-                # Time span for this day
-                t_span = (0, minutes_per_day)
-                t_eval_day = np.arange(0, minutes_per_day + 1)  # Every minute
-                n_measurements = len(t_eval_day)
-                day_insulin = np.full(n_measurements, np.nan, dtype=np.float64)
-                day_cho = np.full(n_measurements, np.nan, dtype=np.float64)
-            
-                # Define ODE function with patient-specific parameters
-                # NOTE: Using scenario_with_cached_meals for deterministic meal scheduling
-                def ode_func(t: float, x: np.ndarray) -> np.ndarray:
-                    x_safe = np.nan_to_num(np.asarray(x, dtype=np.float64), copy=True, nan=0.0, posinf=1e6, neginf=-1e6)
-                    np.clip(x_safe, -1e6, 1e6, out=x_safe)
-                    current_min = int(np.floor(t))
-                    # Use absolute simulation minute to keep latch timers consistent across days.
-                    current_abs_min: int = int(day_idx) * minutes_per_day + current_min
-                    g_est = float(x_safe[0]) / vg_bw if vg_bw > 0.0 else 0.0
-
-                    # Basic insulin-on-board (IOB) estimate from subcutaneous depots [U].
-                    # S1 and S2 are insulin masses in mU, so divide by 1000 to get units.
-                    iob_u = max(0.0, float(x_safe[2]) + float(x_safe[3])) / 1000.0
-                    basal_hourly_effective, insulin_carbo_ratio_effective, _ = apply_guard_iob_isf(
-                        current_abs_min=current_abs_min,
-                        g_est=g_est,
-                        iob_u=iob_u,
-                        basal_hourly_patient=basal_hourly_patient,
-                        insulin_carbo_ratio_patient=insulin_carbo_ratio_patient,
-                        insulin_sensitivity_patient=insulin_sensitivity_day,
-                        config=config,
-                        state=controller_state,
-                    )
-
-                    # Capture applied exogenous inputs at this minute for export/debug.
-                    minute_idx = int(np.floor(t))
-                    u_applied, d_applied, activity_applied = scenario_with_cached_meals(
-                        time=minute_idx,
-                        patient_id=sim_patient_id,
-                        day=int(day_idx),
-                        basal_hourly=basal_hourly_effective,
-                        scenario=_base_sc_override,
-                        insulin_carbo_ratio=insulin_carbo_ratio_effective,
-                        seed=config.random_seed,
-                    )
-                    if 0 <= minute_idx < n_measurements:
-                        day_insulin[minute_idx] = float(u_applied)
-                        day_cho[minute_idx] = float(d_applied)
-
-                    result = hovorka_equations(
-                        int(t),
-                        x_safe,
-                        patient_params,
-                        scenario_with_cached_meals,
-                        scenario=1,  # dead — precomputed_inputs always provided; scenario dispatch done above
-                        patient_id=sim_patient_id,
-                        day=int(day_idx),
-                        basal_hourly=basal_hourly_effective,
-                        insulin_carbo_ratio=insulin_carbo_ratio_effective,
-                        meal_schedule=None,
-                        seed=config.random_seed,
-                        precomputed_inputs=(float(u_applied), float(d_applied), float(activity_applied)),
-                    )
-                    dy = np.asarray(result, dtype=np.float64)
-                    apply_hypo_rescue_to_derivative(
-                        dy=dy,
-                        current_abs_min=current_abs_min,
-                        g_est=g_est,
-                        patient_params=patient_params,
-                        config=config,
-                        state=controller_state,
-                    )
-
-                    dy = np.nan_to_num(dy, copy=False, nan=0.0, posinf=config.derivative_clip, neginf=-config.derivative_clip)
-                    np.clip(dy, -config.derivative_clip, config.derivative_clip, out=dy)
-                    return dy
-            
-                # Solve ODE once for entire day with dense output
-                # Much more efficient than 1440 separate solve_ivp calls
-                sol = solve_ivp(  # type: ignore[misc]
-                    ode_func,
-                    t_span,
-                    current_state,
-                    method=config.solver_method,
-                    t_eval=t_eval_day,
-                    dense_output=False,
-                    rtol=1e-6,
-                    atol=1e-8,
-                    max_step=config.solver_max_step,
-                )
-            
-                # Extract state trajectory
-                state_trajectory: np.ndarray = np.asarray(sol.y, dtype=np.float64)  # type: ignore[misc]
-                state_trajectory = np.nan_to_num(state_trajectory, nan=0.0, posinf=1e6, neginf=0.0)
-                if state_trajectory.ndim != 2 or state_trajectory.shape[1] == 0:
-                    print(
-                        f"Warning: ODE solver returned no valid points for patient {sim_patient_id}, day {day_idx}. "
-                        "Using previous state as fallback."
-                    )
-                    state_trajectory = np.asarray(current_state, dtype=np.float64).reshape(-1, 1)
-                solver_success = bool(getattr(sol, "success", True))  # type: ignore[misc]
-                solver_message = str(getattr(sol, "message", ""))  # type: ignore[misc]
-                if not solver_success:
-                    print(
-                        f"Warning: ODE solver ended early for patient {sim_patient_id}, day {day_idx}: {solver_message}"
-                    )
-            
-                # Clip states if requested (guard against negative masses)
-                if config.clip_states:
-                    state_trajectory = clip_state_trajectory(state_trajectory)
-            
-                # Update current state for next day (continuity)
-                current_state = np.asarray(state_trajectory[:, -1], dtype=np.float64)
-
-                # Fill occasional missing minute captures from solver internals.
-                basal_fallback = basal_hourly_patient * 1000.0 / 60.0
-                for idx in range(n_measurements):
-                    if np.isnan(day_insulin[idx]):
-                        day_insulin[idx] = day_insulin[idx - 1] if idx > 0 else basal_fallback
-                    if np.isnan(day_cho[idx]):
-                        day_cho[idx] = day_cho[idx - 1] if idx > 0 else 0.0
-            
-                # Apply lagged CGM sensor model point-by-point.
-                # Each call to measure_glycemia (mode="lagged") applies:
-                #   1. First-order CGM physiological lag:
-                #      G_lag(t) = G_disp(t-1) + α_lag * (G_true(t) - G_disp(t-1))
-                #   2. AR(1) correlated noise:
-                #      e_t = φ * e_{t-1} + η_t,  η_t ~ N(0, σ²(1-φ²))
-                #      G_meas(t) = G_lag(t) + e_t
-                # sensor_cgm_state carries display/error across day boundaries.
-                available_points = min(n_measurements, state_trajectory.shape[1])
-                glycemia_day_array = np.zeros(n_measurements, dtype=np.float64)
-                for _pt in range(available_points):
-                    glycemia_day_array[_pt] = measure_glycemia(
-                        state_trajectory[:, _pt],
-                        patient_params,
-                        noise_std=config.noise_std,
-                        mode="lagged",
-                        phi=config.noise_autocorr,
-                        lag_alpha=config.cgm_lag_alpha,
-                        sensor_state=sensor_cgm_state,
-                        rng=rng,
-                        output_unit="mmol/L",
-                        min_glucose=config.cgm_min_glucose_mmol,
-                    )
-                if available_points < n_measurements:
-                    glycemia_day_array[available_points:] = glycemia_day_array[available_points - 1]
-
-                glycemia_day_physio = measure_glycemia_day(
-                    state_trajectory=state_trajectory,
-                    patient_params=patient_params,
-                    noise_sequence=np.zeros(n_measurements, dtype=np.float64),
-                    n_measurements=n_measurements,
-                )
-                glycemia_day_physio_mmol = glycemia_day_physio.copy()
-            
-                # Convert units if needed
-                if not config.international_unit:
-                    glycemia_day_array = glycemia_day_array * (float(patient_params['MwG']) / 10.0)  # mmol/L -> mg/dL
-                    glycemia_day_physio = glycemia_day_physio * (float(patient_params['MwG']) / 10.0)  # mmol/L -> mg/dL
-            
-                # Retrieve the cached DayPlan to extract ground-truth labels.
-                # scenario_with_cached_meals always populates the day-plan cache before
-                # returning, so get_cached_day_plan is guaranteed to find the entry here.
-                day_plan = get_cached_day_plan(sim_patient_id, day_idx)
-                # Per-minute windowed ML labels from the day plan
-                _bolus_status_arr, _meal_size_arr, _exercise_type_arr = (
-                    compute_day_labels(day_plan, n_measurements)
-                    if day_plan is not None
-                    else ([None] * n_measurements, [None] * n_measurements, ['none'] * n_measurements)
-                )
-                # Deprecated scalar labels for backward compat with analysis scripts
-                _missed_slots: list[int] = sorted(
-                    [m.slot for m in day_plan.meals if m.bolus_status == 'missed']
-                ) if day_plan else []
-                _late_slots: list[int] = sorted(
-                    [m.slot for m in day_plan.meals if m.bolus_status == 'late']
-                ) if day_plan else []
-
-                # Store results for this day
-                results_tot[sim_patient_id]["days"][day_idx] = {  # type: ignore[typeddict-item]
-                    "blood_glucose": glycemia_day_array,
-                    "insulin_mU_min": day_insulin,
-                    "cho_mg_min": day_cho,
-                    "base_scenario": day_plan.base_scenario if day_plan else 1,
-                    "had_large_meal": day_plan.had_large_meal if day_plan else False,
-                    "had_missed_bolus": day_plan.had_missed_bolus if day_plan else False,
-                    "n_late_boluses": day_plan.n_late_boluses if day_plan else 0,
-                    "exercise_overlay": day_plan.exercise_overlay if day_plan else None,
-                    "bolus_status": _bolus_status_arr,
-                    "meal_size": _meal_size_arr,
-                    "exercise_type": _exercise_type_arr,
-                    "scenario_id": day_plan.base_scenario if day_plan else None,
-                    "missed_meal_id": _missed_slots[0] if _missed_slots else None,
-                    "late_bolus_ids": _late_slots,
-                    "late_bolus_id": _late_slots[0] if _late_slots else None,
-                }
-                # Day 0 is kept in full (0..1440 = 1441 points).
-                # Subsequent days drop their first point (minute 0 = same physical
-                # timestamp as minute 1440 of the previous day) to avoid a duplicate
-                # in the concatenated trajectory that would create a visible "kink".
-                noisy_segment = glycemia_day_array if day_idx == 0 else glycemia_day_array[1:]
-                physio_segment = glycemia_day_physio if day_idx == 0 else glycemia_day_physio[1:]
-                physio_segment_mmol = glycemia_day_physio_mmol if day_idx == 0 else glycemia_day_physio_mmol[1:]
-                iob_day_u = estimate_iob_from_state(state_trajectory)
-                iob_segment_u = iob_day_u if day_idx == 0 else iob_day_u[1:]
-                patient_full_trajectory_noisy.append(noisy_segment)
-                patient_full_trajectory_physio.append(physio_segment)
-                patient_total_points += int(physio_segment_mmol.size)
-                patient_guard_active_points += int(np.sum(physio_segment_mmol <= config.hypo_guard_mmol))
-                patient_rescue_active_points += int(np.sum(physio_segment_mmol < config.hypo_rescue_trigger_mmol))
-                if config.enable_iob_bolus_guard:
-                    patient_iob_guard_active_points += int(np.sum(iob_segment_u > config.iob_guard_units))
-
-                # Accumulate per-day quality stats for scenario-aware rejection.
-                day_n = int(physio_segment_mmol.size)
-                if day_n > 0:
-                    day_hypo_pct  = 100.0 * int(np.sum(physio_segment_mmol < 3.9))  / day_n
-                    day_hyper_pct = 100.0 * int(np.sum(physio_segment_mmol > 10.0)) / day_n
-                    day_min_glucose = float(np.min(physio_segment_mmol))
-                    _is_exercise_day = day_plan.is_exercise_day if day_plan else False
-                    per_day_quality.append((_is_exercise_day, day_hypo_pct, day_hyper_pct, day_min_glucose))
-
-                    # --- Fail-fast checks for this day ---
-                    # Hard absolute cap: max glucose > 30.53 mmol/L on any single day guarantees
-                    # the global max will also exceed the threshold, so we can abort immediately.
-                    # The cumulative total_hyper_pct instability check is NOT done here because
-                    # it is a trajectory-wide average (60% threshold); a single bad day can average
-                    # out over N days and would be wrongly rejected early.
-                    _day_max_glucose = float(np.max(physio_segment_mmol))
-                    _running_max_glucose = max(_running_max_glucose, _day_max_glucose)
-                    _day_i = len(per_day_quality) - 1
-                    if _running_max_glucose > instability_max_glucose_mmol:
-                        _base_sc = day_plan.base_scenario if day_plan else 0
-                        print(f"  [DEBUG] INSTABILITY pid={sim_patient_id} day={_day_i} sc={_base_sc} ex={_is_exercise_day} max_glucose={_running_max_glucose:.1f} mmol/L")
-                        _early_reject_reason = "instability"
-                        break
-
-                    # Quality: check this day immediately using the same spillover logic as the
-                    # post-loop block.  per_day_quality[-1] is the entry just appended above.
-                    _prev_was_exercise = _day_i > 0 and per_day_quality[_day_i - 1][0]
-                    _two_days_ago_was_exercise = _day_i > 1 and per_day_quality[_day_i - 2][0]
-                    _base_hypo_thresh = (
-                        config.quality_max_hypo_pct_exercise_threshold
-                        if _is_exercise_day
-                        else quality_max_hypo_pct
-                    )
-                    _day_hypo_thresh = (
-                        _base_hypo_thresh
-                        + (config.quality_max_hypo_pct_spillover_bonus if _prev_was_exercise else 0.0)
-                        + (config.quality_max_hypo_pct_spillover_bonus if _two_days_ago_was_exercise else 0.0)
-                    )
-                    if day_hypo_pct > _day_hypo_thresh:
-                        print(f"  [DEBUG] HYPO_FAIL  pid={sim_patient_id} day={_day_i} ex={_is_exercise_day} hypo={day_hypo_pct:.1f}% thresh={_day_hypo_thresh:.1f}%")
-                        _early_reject_reason = "quality_hypo"
-                        break
-                    if day_min_glucose < config.quality_min_glucose_mmol:
-                        print(f"  [DEBUG] FLOOR_FAIL pid={sim_patient_id} day={_day_i} ex={_is_exercise_day} min={day_min_glucose:.3f} mmol/L floor={config.quality_min_glucose_mmol}")
-                        _early_reject_reason = "quality_hypo"
-                        break
-                    # Tier-2 chronic-hypo check (non-exercise days only): accumulate bad days and
-                    # reject when the count exceeds the allowed maximum. Exercise hypo is expected
-                    # physiology and tracked separately via the exercise threshold above.
-                    if not _is_exercise_day and day_hypo_pct > config.quality_max_hypo_pct_soft_threshold:
-                        _hypo_bad_nonex_day_count += 1
-                        if _hypo_bad_nonex_day_count > config.quality_max_hypo_bad_nonex_days:
-                            print(f"  [DEBUG] CHRONIC_HYPO pid={sim_patient_id} bad_nonex_days={_hypo_bad_nonex_day_count} on day={_day_i} ex={_is_exercise_day} hypo={day_hypo_pct:.1f}%")
-                            _early_reject_reason = "quality_hypo"
-                            break
-                    if day_hyper_pct > quality_max_hyper_pct:
-                        print(f"  [DEBUG] HYPER_FAIL  pid={sim_patient_id} day={_day_i} ex={_is_exercise_day} hyper={day_hyper_pct:.1f}% thresh={quality_max_hyper_pct:.1f}%")
-                        _early_reject_reason = "quality_hyper"
-                        break
-
-            # Restore base SI values so exported patient_params reflects the
-            # calibrated baseline, not the last day's perturbed values.
-            patient_params["SI1"] = _base_SI1
-            patient_params["SI2"] = _base_SI2
-            patient_params["SI3"] = _base_SI3
-
-            # Handle early rejection from the day loop.
-            if _early_reject_reason is not None:
-                rejected_patients += 1
-                if _early_reject_reason == "instability":
+                if run.reject_reason == "initial_glucose":
+                    rejected_initial_glucose += 1
+                elif run.reject_reason == "instability":
                     rejected_instability += 1
-                elif _early_reject_reason == "quality_hypo":
+                elif run.reject_reason == "quality_hypo":
                     rejected_quality_hypo += 1
                 else:
                     rejected_quality_hyper += 1
-                del results_tot[sim_patient_id]
                 continue
 
-            # Absolute-minute end of this simulated horizon, used to clip correction windows.
-            horizon_end_abs_min = config.n_days * minutes_per_day
-            patient_correction_isf_active_points += count_correction_active_points(
-                windows_abs=controller_state.correction_isf_windows_abs,
-                horizon_end_abs_min=horizon_end_abs_min,
-            )
-            patient_correction_isf_events = controller_state.correction_isf_events
-            patient_correction_isf_units = controller_state.correction_isf_units
-        
-            # Concatenate all days for this patient
-            patient_full_trajectory_noisy_concat = np.concatenate(patient_full_trajectory_noisy, dtype=np.float64)  # type: ignore[arg-type]
-            patient_full_trajectory_physio_concat = np.concatenate(patient_full_trajectory_physio, dtype=np.float64)  # type: ignore[arg-type]
-
-            total_count = int(patient_full_trajectory_physio_concat.size)
-            max_glucose = float(np.max(patient_full_trajectory_physio_concat)) if total_count > 0 else 0.0
-            # Instability: evaluated on total trajectory (catches any runaway day).
-            total_hyper_pct = (
-                100.0 * int(np.sum(patient_full_trajectory_physio_concat > 10.0)) / total_count
-                if total_count > 0 else 0.0
-            )
-            if total_hyper_pct > instability_hyper_pct or max_glucose > instability_max_glucose_mmol:
-                rejected_patients += 1
-                rejected_instability += 1
-                del results_tot[sim_patient_id]
-                continue
-            # Quality: per-day exercise-aware rejection.
-            # Base threshold depends on whether the day had exercise (sc2 base or sc7/sc8 overlay).
-            # The spillover bonus is applied for each exercise day in the 2-day lookback window:
-            # the Z state (tau_Z≈600 min) retains ~40% after 1 day and ~9% after 2 days, so
-            # consecutive exercise days pre-load Z and each contributes independently.
-            # Also enforce a hard minimum glucose floor across all days.
-            _quality_hypo_fail  = False
-            _quality_hyper_fail = False
-            _quality_floor_fail = False
-            _postloop_bad_nonex_days: int = 0
-            for _day_i, (_day_is_ex, _day_hypo, _day_hyper, _day_min) in enumerate(per_day_quality):
-                _prev_was_exercise = _day_i > 0 and per_day_quality[_day_i - 1][0]
-                _two_days_ago_was_exercise = _day_i > 1 and per_day_quality[_day_i - 2][0]
-                _base_hypo_thresh = (
-                    config.quality_max_hypo_pct_exercise_threshold
-                    if _day_is_ex
-                    else quality_max_hypo_pct
-                )
-                _day_hypo_thresh = (
-                    _base_hypo_thresh
-                    + (config.quality_max_hypo_pct_spillover_bonus if _prev_was_exercise else 0.0)
-                    + (config.quality_max_hypo_pct_spillover_bonus if _two_days_ago_was_exercise else 0.0)
-                )
-                if _day_hypo > _day_hypo_thresh:
-                    _quality_hypo_fail = True
-                    print(f"  [DEBUG] HYPO_FAIL  pid={sim_patient_id} day={_day_i} ex={_day_is_ex} hypo={_day_hypo:.1f}% thresh={_day_hypo_thresh:.1f}%")
-                # Tier-2 chronic-hypo check (non-exercise days only, mirrors fail-fast block)
-                if not _day_is_ex and _day_hypo > config.quality_max_hypo_pct_soft_threshold:
-                    _postloop_bad_nonex_days += 1
-                if _day_hyper > quality_max_hyper_pct:
-                    _quality_hyper_fail = True
-                if _day_min < config.quality_min_glucose_mmol:
-                    _quality_floor_fail = True
-                    print(f"  [DEBUG] FLOOR_FAIL pid={sim_patient_id} day={_day_i} ex={_day_is_ex} min={_day_min:.3f} mmol/L floor={config.quality_min_glucose_mmol}")
-            # Tier-2: reject if chronic non-exercise hypo pattern persists across the simulation
-            if _postloop_bad_nonex_days > config.quality_max_hypo_bad_nonex_days:
-                _quality_hypo_fail = True
-                print(f"  [DEBUG] CHRONIC_HYPO(post) pid={sim_patient_id} bad_nonex_days={_postloop_bad_nonex_days}")
-            if _quality_floor_fail or _quality_hypo_fail:
-                rejected_patients += 1
-                rejected_quality_hypo += 1
-                del results_tot[sim_patient_id]
-                continue
-            if _quality_hyper_fail:
-                rejected_patients += 1
-                rejected_quality_hyper += 1
-                del results_tot[sim_patient_id]
-                continue
+            sim_patient_id = accepted_patients
+            results_tot[sim_patient_id] = {
+                "patient_id": sim_patient_id,
+                "params": store_parameter_set(accepted_params, sim_patient_id, run.params),
+                "days": run.days,
+            }
 
             accepted_patients += 1
-            all_patient_trajectories.append(patient_full_trajectory_physio_concat)
-            accepted_total_points += patient_total_points
-            accepted_guard_active_points += patient_guard_active_points
-            accepted_rescue_active_points += patient_rescue_active_points
-            accepted_iob_guard_active_points += patient_iob_guard_active_points
-            accepted_correction_isf_active_points += patient_correction_isf_active_points
-            accepted_correction_isf_events += patient_correction_isf_events
-            accepted_correction_isf_units += patient_correction_isf_units
+            all_patient_trajectories.append(run.physio_concat)
+            accepted_total_points += run.total_points
+            accepted_guard_active_points += run.guard_active_points
+            accepted_rescue_active_points += run.rescue_active_points
+            accepted_iob_guard_active_points += run.iob_guard_active_points
+            accepted_correction_isf_active_points += run.correction_isf_active_points
+            accepted_correction_isf_events += run.correction_isf_events
+            accepted_correction_isf_units += run.correction_isf_units
             pbar.update(1)
         
             # Plot patient trajectory with aesthetically pleasing colors
-            time_hours = np.arange(len(patient_full_trajectory_noisy_concat)) / 60.0
+            time_hours = np.arange(len(run.noisy_concat)) / 60.0
             patient_color = get_patient_color(sim_patient_id, max(1, config.n_patients))
             if config.enable_plots:
-                plt.plot(time_hours, patient_full_trajectory_noisy_concat, color=patient_color[:3], alpha=patient_color[3])  # type: ignore[misc]
+                plt.plot(time_hours, run.noisy_concat, color=patient_color[:3], alpha=patient_color[3])  # type: ignore[misc]
+
+            if accepted_patients >= config.n_patients:
+                break
 
     if show_summary and accepted_patients < config.n_patients:
         print(
@@ -802,13 +1382,19 @@ def run_simulation(
                 "international_unit": config.international_unit,
                 "noise_std_mmol_L": config.noise_std,
                 "noise_autocorr": config.noise_autocorr,
+                "sensor_profiles": [str(profile) for profile in config.sensor_profiles],
                 "random_scenarios": config.random_scenarios,
                 "fixed_scenario": config.fixed_scenario,
                 "random_seed": config.random_seed,
+                "max_candidate_multiplier": config.max_candidate_multiplier,
+                "stop_on_instability": config.stop_on_instability,
+                "warmup_rejection": config.warmup_rejection,
+                "warmup_quality_checks": config.warmup_quality_checks,
                 "basal_hourly_U_hr": config.basal_hourly,
                 "use_calibrated_basal": config.use_calibrated_basal,
                 "init_insulin_carbo_ratio_g_U": config.init_insulin_carbo_ratio,
                 "init_insulin_sensitivity_factor_mmol_U": config.init_insulin_sensitivity_factor,
+                "calibration_surrogate": config.calibration_surrogate,
                 "enable_iob_bolus_guard": config.enable_iob_bolus_guard,
                 "iob_guard_units": config.iob_guard_units,
                 "iob_full_attenuation_units": config.iob_full_attenuation_units,
@@ -833,6 +1419,8 @@ def run_simulation(
                 "hypo_rescue_duration_min": config.hypo_rescue_duration_min,
                 "hypo_rescue_retrigger_cooldown_min": config.hypo_rescue_retrigger_cooldown_min,
                 "solver_method": config.solver_method,
+                "control_mode": config.control_mode,
+                "backend": config.backend,
                 "solver_max_step": config.solver_max_step,
                 "effective_insulin_carbo_ratio_min_g_U": 10.0,
                 "effective_insulin_carbo_ratio_max_g_U": 14.0,
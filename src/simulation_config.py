@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional
 
+from src.sensor import SensorProfile
+
 
 @dataclass
 class SimulationConfig:
@@ -14,6 +16,9 @@ class SimulationConfig:
     noise_std: float = 0.33  # real Dexcom/Libre MARD 8-10% → ±0.56-0.70 mmol/L at 7 mmol/L mean; AR(1) stationary std = noise_std
     noise_autocorr: float = 0.7   # AR(1) φ coefficient for the lagged CGM noise model
     cgm_lag_alpha: float = 0.25   # first-order CGM lag blend factor (0 < α ≤ 1); 0.25 ≈ 4-min physiological lag
+    # Extra CGM sensors read from the same physiological trajectory (one blood_glucose_<name>
+    # column each). Each profile has its own noise stream, so blood_glucose is unchanged.
+    sensor_profiles: tuple[SensorProfile, ...] = ()
     random_scenarios: bool = False
     fixed_scenario: int = 1  # base scenario for all patients when random_scenarios=False: 1=normal, 2=active aerobic, 3=sedentary
     clip_states: bool = True
@@ -27,6 +32,10 @@ class SimulationConfig:
     instability_max_glucose_mmol: float = 33.3   # 600 mg/dL / 18.016 — raised from 550 to reduce
     # rejection from cortisol/dawn-driven single-day peaks while remaining within
     # physiologically possible T1D range (DKA onset >600 mg/dL)
+    # Engine "scalar" stops a recorded day's integration at the first minute above
+    # instability_max_glucose_mmol (the candidate is rejected as "instability" anyway)
+    # instead of integrating the rest of the day.
+    stop_on_instability: bool = True
     instability_hyper_pct_threshold: float = 60.0
     # Rejection thresholds applied on a worst-day basis (see simulation.py rejection logic).
     # Any day where an exercise session is scheduled (regardless of base_scenario) uses
@@ -88,6 +97,15 @@ class SimulationConfig:
     # states (Y, Z post-exercise insulin sensitivity) reach a cyclic steady state so that
     # Day 1 of the recorded horizon does not look artificially "clean" vs later days.
     n_warmup_days: int = 3
+    # Optional fail-fast checks on warm-up days, read from glucose sampled every
+    # warmup_check_interval_min minutes (the warm-up solve keeps only that grid):
+    # warmup_rejection applies the instability cap and the glucose floor,
+    # warmup_quality_checks also the per-day hypo% / hyper% thresholds. Candidates that
+    # fail are dropped before the recorded horizon. Off by default: warm-up days run
+    # without the per-day SI perturbation, so the checks change the accepted cohort.
+    warmup_rejection: bool = False
+    warmup_quality_checks: bool = False
+    warmup_check_interval_min: int = 5
 
     enable_hypo_guard: bool = True
     hypo_guard_mmol: float = 3.9           # ADA/Battelino 2019 Level 1 alert threshold
@@ -111,15 +129,41 @@ class SimulationConfig:
     hypo_rescue_l2_duration_min: int = 15
     hypo_rescue_l2_retrigger_cooldown_min: int = 60
 
+    # Scalar-engine integrator: any solve_ivp method (BDF/Radau/LSODA get the analytical
+    # Jacobian), "minute_rk4" — one fixed RK4 step per minute with inputs frozen at the
+    # minute, written straight into the (18, 1441) day trajectory — or "minute_exp" — exact
+    # matrix-exponential propagation of the linear insulin/gut chains plus a midpoint step
+    # for Q1/Q2/ETH, controller decided once per minute (solver_max_step unused by both).
     solver_method: str = "RK45"
     solver_max_step: float = 1.0
     derivative_clip: float = 1e5
+    # Where the control stack runs in the scalar engine. "rhs": inside the ODE right-hand
+    # side, on every solver stage (latches can be moved by rejected trial steps). "minute":
+    # hybrid simulation — one decision per minute boundary from the boundary state, then the
+    # ODE is integrated with those inputs frozen to the next boundary (solve_ivp restarted
+    # each minute), so decisions do not depend on solver_method. minute_exp is always "minute".
+    control_mode: str = "rhs"
+    # Scalar-engine arithmetic backend. "numpy": PatientModel and the Python sensor loop.
+    # "numba": Numba-compiled RHS, frozen-input RK4 minute (minute_rk4 with
+    # control_mode="minute") and lagged CGM recursion from src/kernels; falls back to
+    # "numpy" with a warning when Numba is not installed. The cohort engine ignores it.
+    backend: str = "numpy"
+    # Integration engine. "scalar" solves one candidate at a time with solve_ivp(solver_method).
+    # "cohort" advances up to cohort_block_size candidates together as one (18, N) state matrix
+    # with fixed-step RK4 (cohort_substeps_per_min steps per minute); controller decisions are
+    # taken once per minute boundary and held over the minute. See src/cohort.py.
+    engine: str = "scalar"
+    cohort_block_size: int = 64
+    cohort_substeps_per_min: int = 2
     std_patient: bool = False
+    # Candidates are sampled lazily until n_patients are accepted (CandidateStream);
+    # at most max_candidate_multiplier × n_patients are drawn before the run gives up.
+    max_candidate_multiplier: int = 50
 
     init_insulin_carbo_ratio: float = 11.8
     init_insulin_sensitivity_factor: float = 2.8
 
-    # Target glucose for ICR/ISF bisection calibration [mmol/L].
+    # Target glucose for ICR/ISF calibration [mmol/L].
     # At 5.5 mmol/L (euglycaemia), ICR/ISF are tuned to return glucose to near-normal after
     # every meal/correction — producing overly well-controlled virtual patients (TIR ~89%,
     # hyper ~7%). Raising to 6.5 mmol/L calibrates ICR to deliver less insulin per gram of
@@ -127,6 +171,10 @@ class SimulationConfig:
     # producing sustained post-meal excursions above 10 mmol/L consistent with HbA1c ~7.5–8%
     # and real-world T1D moderate control (T1D Exchange 2016 median HbA1c 8.4%).
     calibration_target_glycemia_mmol: float = 6.5
+    # Seed the ICR/ISF searches with the fitted surrogate (src/calibration_surrogate.json,
+    # see CalibrationSurrogate); each prediction is verified by one simulation. The surrogate
+    # was fitted at the default target above, other targets raise ValueError.
+    calibration_surrogate: bool = False
 
     enable_iob_bolus_guard: bool = True
     iob_guard_units: float = 4.0
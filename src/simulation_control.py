@@ -180,3 +180,202 @@ def count_correction_active_points(
 def estimate_iob_from_state(state_trajectory: np.ndarray) -> np.ndarray:
     """Compute minute-wise IOB estimate [U] from S1+S2 depot masses [mU]."""
     return np.maximum(np.asarray(state_trajectory[2, :] + state_trajectory[3, :], dtype=np.float64), 0.0) / 1000.0
+
+
+@dataclass
+class CohortControllerState:
+    """Vectorized ControllerState for a block of N patients (slot j = patient j).
+
+    Latch timers are int64 arrays and follow exactly the same trigger/cooldown
+    rules as the scalar ControllerState; correction windows stay as one Python
+    list per patient because they are only appended on (rare) correction events.
+    """
+
+    guard_suspend_until_min: np.ndarray
+    rescue_active_until_min: np.ndarray
+    guard_next_trigger_min: np.ndarray
+    rescue_next_trigger_min: np.ndarray
+    rescue_l2_active_until_min: np.ndarray
+    rescue_l2_next_trigger_min: np.ndarray
+    correction_isf_active_until_min: np.ndarray
+    correction_isf_next_trigger_min: np.ndarray
+    correction_isf_rate_mU_min: np.ndarray
+    correction_isf_windows_abs: list[list[tuple[int, int]]]
+    correction_isf_events: np.ndarray
+    correction_isf_units: np.ndarray
+
+    @classmethod
+    def create(cls, n: int) -> CohortControllerState:
+        """Return a fresh state for n patients, equal to n default ControllerState()s."""
+        return cls(
+            guard_suspend_until_min=np.full(n, -1, dtype=np.int64),
+            rescue_active_until_min=np.full(n, -1, dtype=np.int64),
+            guard_next_trigger_min=np.zeros(n, dtype=np.int64),
+            rescue_next_trigger_min=np.zeros(n, dtype=np.int64),
+            rescue_l2_active_until_min=np.full(n, -1, dtype=np.int64),
+            rescue_l2_next_trigger_min=np.zeros(n, dtype=np.int64),
+            correction_isf_active_until_min=np.full(n, -1, dtype=np.int64),
+            correction_isf_next_trigger_min=np.zeros(n, dtype=np.int64),
+            correction_isf_rate_mU_min=np.zeros(n, dtype=np.float64),
+            correction_isf_windows_abs=[[] for _ in range(n)],
+            correction_isf_events=np.zeros(n, dtype=np.int64),
+            correction_isf_units=np.zeros(n, dtype=np.float64),
+        )
+
+    def take(self, idx: np.ndarray) -> CohortControllerState:
+        """Return the sub-state for the patients at positions idx (used to drop rejected rows)."""
+        return CohortControllerState(
+            guard_suspend_until_min=self.guard_suspend_until_min[idx],
+            rescue_active_until_min=self.rescue_active_until_min[idx],
+            guard_next_trigger_min=self.guard_next_trigger_min[idx],
+            rescue_next_trigger_min=self.rescue_next_trigger_min[idx],
+            rescue_l2_active_until_min=self.rescue_l2_active_until_min[idx],
+            rescue_l2_next_trigger_min=self.rescue_l2_next_trigger_min[idx],
+            correction_isf_active_until_min=self.correction_isf_active_until_min[idx],
+            correction_isf_next_trigger_min=self.correction_isf_next_trigger_min[idx],
+            correction_isf_rate_mU_min=self.correction_isf_rate_mU_min[idx],
+            correction_isf_windows_abs=[self.correction_isf_windows_abs[int(j)] for j in idx],
+            correction_isf_events=self.correction_isf_events[idx],
+            correction_isf_units=self.correction_isf_units[idx],
+        )
+
+    def patient_state(self, j: int) -> ControllerState:
+        """Materialize the scalar ControllerState of patient j (for reporting)."""
+        return ControllerState(
+            guard_suspend_until_min=int(self.guard_suspend_until_min[j]),
+            rescue_active_until_min=int(self.rescue_active_until_min[j]),
+            guard_next_trigger_min=int(self.guard_next_trigger_min[j]),
+            rescue_next_trigger_min=int(self.rescue_next_trigger_min[j]),
+            rescue_l2_active_until_min=int(self.rescue_l2_active_until_min[j]),
+            rescue_l2_next_trigger_min=int(self.rescue_l2_next_trigger_min[j]),
+            correction_isf_active_until_min=int(self.correction_isf_active_until_min[j]),
+            correction_isf_next_trigger_min=int(self.correction_isf_next_trigger_min[j]),
+            correction_isf_rate_mU_min=float(self.correction_isf_rate_mU_min[j]),
+            correction_isf_windows_abs=list(self.correction_isf_windows_abs[j]),
+            correction_isf_events=int(self.correction_isf_events[j]),
+            correction_isf_units=float(self.correction_isf_units[j]),
+        )
+
+
+def apply_guard_iob_isf_batch(
+    current_abs_min: int,
+    g_est: np.ndarray,
+    iob_u: np.ndarray,
+    basal_hourly_patient: np.ndarray,
+    insulin_carbo_ratio_patient: np.ndarray,
+    insulin_sensitivity_patient: np.ndarray,
+    config: SimulationConfig,
+    state: CohortControllerState,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized apply_guard_iob_isf: (N,) effective basal/ICR and guard-latch mask."""
+    basal_hourly_effective = np.asarray(basal_hourly_patient, dtype=np.float64).copy()
+    insulin_carbo_ratio_effective = np.asarray(insulin_carbo_ratio_patient, dtype=np.float64).copy()
+
+    guard_latched = np.zeros(g_est.shape, dtype=bool)
+    if config.enable_hypo_guard:
+        trigger = (
+            (g_est <= config.hypo_guard_mmol)
+            & (current_abs_min > state.guard_suspend_until_min)
+            & (current_abs_min >= state.guard_next_trigger_min)
+        )
+        if trigger.any():
+            suspend_until = current_abs_min + max(1, config.hypo_guard_suspend_min) - 1
+            state.guard_suspend_until_min[trigger] = suspend_until
+            state.guard_next_trigger_min[trigger] = suspend_until + max(0, config.hypo_guard_retrigger_cooldown_min)
+        guard_latched = current_abs_min <= state.guard_suspend_until_min
+        basal_hourly_effective[guard_latched] = 0.0
+        if config.suppress_meal_bolus_on_guard:
+            insulin_carbo_ratio_effective[guard_latched] = 1e6
+
+    if config.enable_iob_bolus_guard:
+        iob_guard = max(0.0, config.iob_guard_units)
+        iob_full = max(iob_guard + 1e-6, config.iob_full_attenuation_units)
+        above = iob_u > iob_guard
+        if above.any():
+            frac = np.clip((iob_u[above] - iob_guard) / (iob_full - iob_guard), 0.0, 1.0)
+            icr_mult_max = max(1.0, config.iob_max_icr_multiplier)
+            insulin_carbo_ratio_effective[above] = insulin_carbo_ratio_effective[above] * (
+                1.0 + frac * (icr_mult_max - 1.0)
+            )
+
+    if config.enable_correction_isf:
+        check_interval_min = max(1, int(config.correction_isf_check_interval_min))
+        expired = current_abs_min > state.correction_isf_active_until_min
+        state.correction_isf_rate_mU_min[expired] = 0.0
+
+        if (current_abs_min % check_interval_min) == 0:
+            candidates = (
+                ~guard_latched
+                & (g_est > config.correction_isf_target_mmol)
+                & expired
+                & (current_abs_min >= state.correction_isf_next_trigger_min)
+            )
+            # Correction boluses are rare events: dose them per patient with the scalar rules.
+            for j in np.flatnonzero(candidates):
+                isf_eff = max(1e-6, float(insulin_sensitivity_patient[j]))
+                raw_correction_u = (float(g_est[j]) - config.correction_isf_target_mmol) / isf_eff
+                iob_credit_u = max(0.0, float(iob_u[j]) - max(0.0, config.correction_isf_iob_free_units))
+                net_correction_u = max(0.0, raw_correction_u - iob_credit_u)
+                dose_u = min(max(0.0, config.correction_isf_max_bolus_units), net_correction_u)
+                if dose_u >= max(0.0, config.correction_isf_min_bolus_units):
+                    corr_duration = max(1, config.correction_isf_bolus_duration_min)
+                    corr_end = current_abs_min + corr_duration - 1
+                    state.correction_isf_rate_mU_min[j] = (dose_u * 1000.0) / corr_duration
+                    state.correction_isf_active_until_min[j] = corr_end
+                    state.correction_isf_next_trigger_min[j] = corr_end + max(0, config.correction_isf_cooldown_min)
+                    state.correction_isf_windows_abs[j].append((current_abs_min, corr_end))
+                    state.correction_isf_events[j] += 1
+                    state.correction_isf_units[j] += float(dose_u)
+
+        correcting = (current_abs_min <= state.correction_isf_active_until_min) & ~guard_latched
+        basal_hourly_effective[correcting] += state.correction_isf_rate_mU_min[correcting] * 60.0 / 1000.0
+
+    return basal_hourly_effective, insulin_carbo_ratio_effective, guard_latched
+
+
+def compute_hypo_rescue_rate_batch(
+    current_abs_min: int,
+    g_est: np.ndarray,
+    ag: np.ndarray,
+    mwg: np.ndarray,
+    config: SimulationConfig,
+    state: CohortControllerState,
+) -> np.ndarray:
+    """Vectorized apply_hypo_rescue_to_derivative: return the (N,) rescue term added to dD1.
+
+    Same two-tier L1/L2 latch logic as the scalar version; the caller adds the
+    returned rate to the D1 derivative instead of having it mutated in place.
+    """
+    rescue_d1 = np.zeros(g_est.shape, dtype=np.float64)
+
+    if config.enable_hypo_rescue:
+        trigger = (
+            (g_est <= config.hypo_rescue_trigger_mmol)
+            & (current_abs_min > state.rescue_active_until_min)
+            & (current_abs_min >= state.rescue_next_trigger_min)
+        )
+        if trigger.any():
+            active_until = current_abs_min + max(1, config.hypo_rescue_duration_min) - 1
+            state.rescue_active_until_min[trigger] = active_until
+            state.rescue_next_trigger_min[trigger] = active_until + max(0, config.hypo_rescue_retrigger_cooldown_min)
+    l1_active = current_abs_min <= state.rescue_active_until_min
+    if l1_active.any():
+        l1_rate_mg_min = max(0.0, config.hypo_rescue_carbs_g) * 1000.0 / max(1, config.hypo_rescue_duration_min)
+        rescue_d1[l1_active] += ag[l1_active] * (l1_rate_mg_min / mwg[l1_active])
+
+    if config.enable_hypo_rescue_l2:
+        trigger = (
+            (g_est <= config.hypo_rescue_l2_trigger_mmol)
+            & (current_abs_min > state.rescue_l2_active_until_min)
+            & (current_abs_min >= state.rescue_l2_next_trigger_min)
+        )
+        if trigger.any():
+            active_until = current_abs_min + max(1, config.hypo_rescue_l2_duration_min) - 1
+            state.rescue_l2_active_until_min[trigger] = active_until
+            state.rescue_l2_next_trigger_min[trigger] = active_until + max(0, config.hypo_rescue_l2_retrigger_cooldown_min)
+    l2_active = current_abs_min <= state.rescue_l2_active_until_min
+    if l2_active.any():
+        l2_rate_mg_min = max(0.0, config.hypo_rescue_l2_carbs_g) * 1000.0 / max(1, config.hypo_rescue_l2_duration_min)
+        rescue_d1[l2_active] += ag[l2_active] * (l2_rate_mg_min / mwg[l2_active])
+
+    return rescue_d1
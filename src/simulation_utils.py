@@ -1,13 +1,38 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import cast
+from typing import Any, Callable
 
 import matplotlib.pyplot as plt  # type: ignore[import-untyped]
 import numpy as np  # type: ignore[import-untyped]
+from scipy.integrate import BDF, DOP853, LSODA, RK23, RK45, Radau, solve_ivp  # type: ignore[import-untyped]
+from scipy.optimize import OptimizeResult  # type: ignore[import-untyped]
+from scipy.signal import lfilter  # type: ignore[import-untyped]
 
-from src.model import ParameterSet, get_non_negative_state_indices
+from src.model import (
+    LINEAR_STATE_INDICES,
+    NONLINEAR_STATE_INDICES,
+    LinearChainPropagator,
+    ParameterSet,
+    PatientModel,
+    get_non_negative_state_indices,
+)
+
+# solve_ivp methods that use a Jacobian; they receive PatientModel.jac instead of
+# estimating it by finite differences (18 extra RHS evaluations per Jacobian).
+JACOBIAN_SOLVER_METHODS = frozenset({"BDF", "Radau", "LSODA"})
+# SimulationConfig.solver_method value selecting integrate_minute_rk4 instead of solve_ivp.
+MINUTE_RK4 = "minute_rk4"
+# SimulationConfig.solver_method value selecting integrate_minute_exponential.
+MINUTE_EXPONENTIAL = "minute_exp"
+# (u [mU/min], d [mg/min], ac [counts], rescue D1 rate [mmol/min]) held over one minute.
+MinuteInputs = tuple[float, float, float, float]
+# SimulationConfig.control_mode values: controller evaluated inside the ODE right-hand side
+# (every RK stage, trial steps included) or once per minute boundary with inputs held.
+CONTROL_IN_RHS = "rhs"
+CONTROL_PER_MINUTE = "minute"
 
 
 def clip_state_trajectory(state_trajectory: np.ndarray) -> np.ndarray:
@@ -23,29 +48,309 @@ def clip_state_trajectory(state_trajectory: np.ndarray) -> np.ndarray:
     return clipped
 
 
+@dataclass(frozen=True)
+class GlucoseStop:
+    """Hard per-sample cap on sampled glucose Q1 / (VG·BW) [mmol/L].
+
+    A sample crosses when it is above max_mmol after the same nan_to_num /
+    non-negative clip the recorded trajectory gets, i.e. exactly when
+    _record_day's instability cap would reject the day.
+    """
+
+    vg_bw: float
+    max_mmol: float
+    clip: bool = True
+
+    def crossed(self, q1: float) -> bool:
+        """Whether one sampled Q1 [mmol] is above the cap."""
+        if q1 != q1:
+            q1 = 0.0
+        elif q1 == float("inf"):
+            q1 = 1e6
+        elif q1 == float("-inf") or (self.clip and q1 < 0.0):
+            q1 = 0.0
+        return q1 / self.vg_bw > self.max_mmol
+
+    def first_crossing(self, q1: np.ndarray) -> int:
+        """Index of the first sample in q1 above the cap, or -1."""
+        q = np.nan_to_num(np.asarray(q1, dtype=np.float64), nan=0.0, posinf=1e6, neginf=0.0)
+        if self.clip:
+            q = np.maximum(q, 0.0)
+        hits = np.flatnonzero(q / self.vg_bw > self.max_mmol)
+        return int(hits[0]) if hits.size else -1
+
+
+def jacobian_solver_options(
+    model: PatientModel,
+    solver_method: str,
+    activity_at: Callable[[int], float] | None = None,
+) -> dict[str, Any]:
+    """Extra solve_ivp keyword arguments for solver_method: {"jac": ...} or {}.
+
+    The Jacobian applies the same state guard (nan_to_num + clip to ±1e6) and
+    minute flooring as the ode functions; activity_at(minute) returns the AC
+    input of that minute (None = no exercise input). Explicit methods get no
+    options, since solve_ivp warns about arguments they ignore.
+    """
+    if solver_method not in JACOBIAN_SOLVER_METHODS:
+        return {}
+
+    def jac(t: float, x: np.ndarray) -> np.ndarray:
+        x_safe = np.nan_to_num(np.asarray(x, dtype=np.float64), copy=True, nan=0.0, posinf=1e6, neginf=-1e6)
+        np.clip(x_safe, -1e6, 1e6, out=x_safe)
+        minute = int(np.floor(t))
+        return model.jac(minute, x_safe, activity_at(minute) if activity_at is not None else 0.0)
+
+    return {"jac": jac}
+
+
+def integrate_minute_rk4(
+    rhs: Callable[[int, np.ndarray], np.ndarray],
+    x0: np.ndarray,
+    n_minutes: int,
+    out: np.ndarray | None = None,
+    stop: GlucoseStop | None = None,
+) -> np.ndarray:
+    """Integrate x' = rhs(minute, x) with one classical RK4 step per minute.
+
+    Inputs are piecewise constant per integer minute, so all four stages of the
+    step from m to m + 1 are evaluated with minute=m (solve_ivp would see the
+    k4 stage at t = m + 1 floored to the next minute). No step-size control, no
+    dense output and no t_eval interpolation: state m + 1 is written straight
+    into column m + 1 of `out`, a (n_states, n_minutes + 1) buffer allocated here
+    when omitted. rhs must return a fresh array. Returns the filled buffer, or
+    its columns up to and including the first minute that crosses `stop`.
+    """
+    x = np.array(x0, dtype=np.float64, copy=True)
+    trajectory = out if out is not None else np.empty((x.size, n_minutes + 1), dtype=np.float64)
+    trajectory[:, 0] = x
+    for minute in range(n_minutes):
+        k1 = rhs(minute, x)
+        k2 = rhs(minute, x + 0.5 * k1)
+        k3 = rhs(minute, x + 0.5 * k2)
+        k4 = rhs(minute, x + k3)
+        x = x + (k1 + 2.0 * (k2 + k3) + k4) / 6.0
+        trajectory[:, minute + 1] = x
+        if stop is not None and stop.crossed(float(x[0])):
+            return trajectory[:, :minute + 2]
+    return trajectory
+
+
+def integrate_minute_hybrid(
+    model: PatientModel,
+    minute_inputs: Callable[[int, np.ndarray], MinuteInputs],
+    frozen_rhs: Callable[[int, np.ndarray, MinuteInputs], np.ndarray],
+    x0: np.ndarray,
+    n_minutes: int,
+    solver_method: str,
+    out: np.ndarray | None = None,
+    max_step: float = 1.0,
+    minute_step: Callable[[int, np.ndarray, MinuteInputs], np.ndarray] | None = None,
+    stop: GlucoseStop | None = None,
+) -> np.ndarray:
+    """Hybrid integration: discrete controller decisions at minute boundaries, frozen inputs in between.
+
+    minute_inputs(minute, x) is called exactly once per minute with the boundary
+    state (it may update controller latches); frozen_rhs(minute, x, inputs) must
+    not touch controller state. The minute from m to m + 1 is then advanced with
+    one RK4 step (solver_method="minute_rk4") or by a solve_ivp(solver_method)
+    restarted at every boundary, so the decision sequence does not depend on the
+    solver's stage pattern or rejected trial steps. minute_step(minute, x, inputs),
+    when given, replaces the four frozen_rhs stages of the RK4 minute (compiled
+    kernel, see src/kernels). Writes into `out` and stops at `stop` like
+    integrate_minute_rk4.
+    """
+    x = np.array(x0, dtype=np.float64, copy=True)
+    trajectory = out if out is not None else np.empty((x.size, n_minutes + 1), dtype=np.float64)
+    trajectory[:, 0] = x
+    for minute in range(n_minutes):
+        held = minute_inputs(minute, x)
+        if solver_method == MINUTE_RK4 and minute_step is not None:
+            x = minute_step(minute, x, held)
+        elif solver_method == MINUTE_RK4:
+            k1 = frozen_rhs(minute, x, held)
+            k2 = frozen_rhs(minute, x + 0.5 * k1, held)
+            k3 = frozen_rhs(minute, x + 0.5 * k2, held)
+            k4 = frozen_rhs(minute, x + k3, held)
+            x = x + (k1 + 2.0 * (k2 + k3) + k4) / 6.0
+        else:
+            ac = held[2]
+            # Explicit methods try the whole minute first instead of re-estimating a step
+            # size after every restart; implicit methods keep their own start-up.
+            first_step = None if solver_method in JACOBIAN_SOLVER_METHODS else min(1.0, max_step)
+            sol = solve_ivp(  # type: ignore[misc]
+                lambda _t, y: frozen_rhs(minute, y, held),
+                (minute, minute + 1),
+                x,
+                method=solver_method,
+                rtol=1e-6,
+                atol=1e-8,
+                max_step=max_step,
+                first_step=first_step,
+                **jacobian_solver_options(model, solver_method, lambda _m: ac),
+            )
+            x = np.asarray(sol.y[:, -1], dtype=np.float64)  # type: ignore[misc]
+        trajectory[:, minute + 1] = x
+        if stop is not None and stop.crossed(float(x[0])):
+            return trajectory[:, :minute + 2]
+    return trajectory
+
+
+def integrate_minute_exponential(
+    model: PatientModel,
+    minute_inputs: Callable[[int, np.ndarray], MinuteInputs],
+    x0: np.ndarray,
+    n_minutes: int,
+    out: np.ndarray | None = None,
+    derivative_clip: float = 1e5,
+    propagator: LinearChainPropagator | None = None,
+    stop: GlucoseStop | None = None,
+) -> np.ndarray:
+    """Integrate one minute at a time, advancing the linear chains exactly.
+
+    minute_inputs(minute, x) is called once per minute with the boundary state
+    and returns the inputs held until the next boundary (controller decisions
+    included). The insulin and gut chains (LINEAR_STATE_INDICES) are advanced
+    by the exact LinearChainPropagator, so only Q1/Q2 and the ETH states need a
+    numerical step: the explicit midpoint rule, with the linear states taken
+    from the exact solution at m + 1/2. That is 2 RHS evaluations per minute
+    (minute_rk4: 4). Stage states and derivatives get the same nan_to_num /
+    clip guards as the solve_ivp ode functions. Writes into `out` and stops at
+    `stop` like integrate_minute_rk4.
+    """
+    prop = propagator if propagator is not None else LinearChainPropagator(model)
+    lin = LINEAR_STATE_INDICES
+    nonlin = NONLINEAR_STATE_INDICES
+    rate_per_mg = model.ag / model.mwg
+
+    def nonlinear_rhs(minute: int, x: np.ndarray, u: float, d: float, ac: float) -> np.ndarray:
+        x_safe = np.nan_to_num(x, copy=True, nan=0.0, posinf=1e6, neginf=-1e6)
+        np.clip(x_safe, -1e6, 1e6, out=x_safe)
+        dy = model.rhs(minute, x_safe, u, d, ac)[nonlin]
+        np.nan_to_num(dy, copy=False, nan=0.0, posinf=derivative_clip, neginf=-derivative_clip)
+        return np.clip(dy, -derivative_clip, derivative_clip, out=dy)
+
+    x = np.array(x0, dtype=np.float64, copy=True)
+    trajectory = out if out is not None else np.empty((x.size, n_minutes + 1), dtype=np.float64)
+    trajectory[:, 0] = x
+    stage = np.empty_like(x)
+    for minute in range(n_minutes):
+        u, d, ac, rescue = minute_inputs(minute, x)
+        cortisol = model.cortisol_factor(minute)
+        r = rate_per_mg * d + rescue
+        z = x[lin]
+        y = x[nonlin]
+
+        # Explicit midpoint for the nonlinear states, with the exact linear states at m + 1/2.
+        k1 = nonlinear_rhs(minute, x, u, d, ac)
+        stage[lin] = prop.advance(z, u, r, cortisol, 0.5)
+        stage[nonlin] = y + 0.5 * k1
+        k2 = nonlinear_rhs(minute, stage, u, d, ac)
+
+        x = np.empty_like(x)
+        x[lin] = prop.advance(z, u, r, cortisol, 1.0)
+        x[nonlin] = y + k2
+        trajectory[:, minute + 1] = x
+        if stop is not None and stop.crossed(float(x[0])):
+            return trajectory[:, :minute + 2]
+    return trajectory
+
+
+_SOLVE_IVP_METHODS = {"RK23": RK23, "RK45": RK45, "DOP853": DOP853, "Radau": Radau, "BDF": BDF, "LSODA": LSODA}
+
+
+def solve_ivp_until(
+    fun: Callable[[float, np.ndarray], np.ndarray],
+    t_span: tuple[float, float],
+    y0: np.ndarray,
+    method: str,
+    t_eval: np.ndarray,
+    stop: GlucoseStop,
+    **options: Any,
+) -> OptimizeResult:
+    """solve_ivp(fun, t_span, y0, method=method, t_eval=t_eval, **options), stopped at `stop`.
+
+    Runs solve_ivp's own stepping loop (same OdeSolver, steps and dense-output
+    interpolation at t_eval), so every returned sample equals solve_ivp's, and
+    checks Q1 of each new block of samples: after the first crossing sample the
+    integration ends and y holds the samples up to and including it (status 1,
+    like a terminal event). Forward integration, increasing t_eval only.
+    """
+    t0, tf = map(float, t_span)
+    t_eval = np.asarray(t_eval)
+    solver = _SOLVE_IVP_METHODS[method](fun, t0, y0, tf, vectorized=False, **options)
+    ts: list[np.ndarray] = []
+    ys: list[np.ndarray] = []
+    t_eval_i = 0
+    status: int | None = None
+    message = ""
+    while status is None:
+        message = solver.step() or ""
+        if solver.status == "finished":
+            status = 0
+        elif solver.status == "failed":
+            status = -1
+            break
+        t_eval_i_new = int(np.searchsorted(t_eval, solver.t, side="right"))
+        t_eval_step = t_eval[t_eval_i:t_eval_i_new]
+        if t_eval_step.size > 0:
+            y_step = solver.dense_output()(t_eval_step)
+            t_eval_i = t_eval_i_new
+            hit = stop.first_crossing(y_step[0])
+            if hit >= 0:
+                t_eval_step, y_step = t_eval_step[:hit + 1], y_step[:, :hit + 1]
+                status = 1
+                message = "The glucose cap was crossed."
+            ts.append(t_eval_step)
+            ys.append(y_step)
+    if status == 0:
+        message = "The solver successfully reached the end of the integration interval."
+    return OptimizeResult(
+        t=np.hstack(ts) if ts else np.empty(0),
+        y=np.hstack(ys) if ys else np.empty((np.size(y0), 0)),
+        nfev=solver.nfev, njev=solver.njev, nlu=solver.nlu,
+        status=status, message=message, success=status >= 0,
+    )
+
+
 def generate_autocorrelated_noise(
     n_samples: int,
     noise_std: float,
     autocorr: float,
     rng: np.random.Generator,
-    initial_value: float | None = None,
+    initial_value: float | np.ndarray | None = None,
+    n_series: int | None = None,
 ) -> np.ndarray:
-    """Generate AR(1) sensor noise, optionally continuous across day boundaries."""
-    noise = np.zeros(n_samples, dtype=np.float64)
-    innovation_std = noise_std * np.sqrt(1 - autocorr**2)
+    """Generate AR(1) sensor noise, optionally continuous across day boundaries.
 
-    for idx in range(n_samples):
-        if idx == 0:
-            if initial_value is None:
-                noise[idx] = float(rng.normal(0, noise_std))
-            else:
-                innovation = cast(float, rng.normal(0, innovation_std))
-                noise[idx] = autocorr * initial_value + innovation
-        else:
-            innovation = cast(float, rng.normal(0, innovation_std))
-            noise[idx] = autocorr * noise[idx - 1] + innovation
+    e[0] = φ·initial_value + η[0] (or e[0] ~ N(0, σ²) without an initial value),
+    e[k] = φ·e[k-1] + η[k] with η ~ N(0, σ²(1-φ²)). All draws are taken from rng
+    in one block and the recursion runs as a linear filter (scipy.signal.lfilter).
 
-    return noise
+    With n_series=None (and a scalar or no initial_value) the result is one (n_samples,)
+    series; otherwise (n_series, n_samples), one row per patient, with initial_value
+    a scalar or one value per row. Row r consumes the generator as the r-th of
+    consecutive single-series calls would.
+    """
+    initial = None if initial_value is None else np.asarray(initial_value, dtype=np.float64)
+    single = n_series is None and (initial is None or initial.ndim == 0)
+    if n_series is None:
+        n_series = 1 if initial is None or initial.ndim == 0 else int(initial.size)
+    if n_samples <= 0:
+        return np.zeros(n_samples if single else (n_series, max(0, n_samples)), dtype=np.float64)
+
+    innovation_std = noise_std * np.sqrt(1 - autocorr**2)
+    # rng.normal(0, s) is s times a standard normal draw, so scaling one block of
+    # standard normals consumes the generator exactly like per-sample draws.
+    z = rng.standard_normal(size=(n_series, n_samples))
+    innovations = innovation_std * z
+    carried = np.zeros(n_series, dtype=np.float64)
+    if initial is None:
+        innovations[:, 0] = noise_std * z[:, 0]
+    else:
+        carried[:] = autocorr * np.broadcast_to(initial, (n_series,))
+    noise, _ = lfilter([1.0], [1.0, -autocorr], innovations, axis=1, zi=carried[:, None])
+    return noise[0] if single else noise
 
 
 def get_patient_color(patient_idx: int, n_patients: int) -> tuple[float, float, float, float]:
@@ -0,0 +1,415 @@
+"""
+ICR/ISF calibration search verification test (src/sensitivity.py).
+
+Seven levels of verification:
+  1. Synthetic residuals — on monotone glucose responses with known roots (near zero, near
+                           the 30 U bound, far from the seed, saturating, unreachable in
+                           either direction) the secant search lands within tolerance or
+                           returns the matching bolus bound, within max_iterations
+  2. Simulation count    — n_simulations equals the number of glucose evaluations, for both
+                           the secant and the bisection method
+  3. Patients            — on Monte Carlo patients the secant calibration reaches tolerance
+                           whenever bisection does, with fewer simulations in total
+  4. Reduced model       — PatientModel.rhs_classic / jac_classic equal the classic block of
+                           rhs / jac with the ETH states at rest, and the ICR/ISF calibrated on
+                           the 10-state model match the full 18-state model within tolerance
+  5. Forward sensitivity — the bolus derivative of simulate_duration_with_sensitivity matches
+                           central finite differences of simulate_duration, both report the
+                           same clamped glycemia (zero slope where the clamp applies), and the
+                           Newton calibration reaches tolerance whenever the secant search does
+  6. Batched calibration — hovorka_classic_equations_batch equals rhs_classic column by column,
+                           simulate_duration_batch tracks simulate_duration, and the batched
+                           ICR/ISF match the per-patient calibrations within tolerance
+  7. Surrogate           — the shipped coefficient file loads, round-trips and rejects other
+                           versions and settings (run_simulation before any candidate work);
+                           surrogate-seeded calibrations reach tolerance whenever the plain
+                           search does, with fewer simulations, and a deliberately biased
+                           surrogate still falls back to the full search
+"""
+from __future__ import annotations
+
+import dataclasses
+import functools
+import json
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+import src.sensitivity as sensitivity
+import src.simulation as simulation
+from src.export import ExportConfig
+from src.model import PatientModel, compute_optimal_steady_state_from_glucose, hovorka_classic_equations_batch
+from src.parameters import generate_monte_carlo_patients, stack_parameter_sets
+from src.sensitivity import (
+    CALIBRATION_BISECTION,
+    CALIBRATION_NEWTON,
+    CALIBRATION_SECANT,
+    CALIBRATION_SURROGATE_VERSION,
+    _calibrate_bolus,
+    _final_glycemia,
+    find_insulin_carbo_ratio,
+    find_insulin_sensitivity_factor,
+    find_insulin_carbo_ratio_batch,
+    find_insulin_sensitivity_factor_batch,
+    load_calibration_surrogate,
+    save_calibration_surrogate,
+    simulate_duration,
+    simulate_duration_batch,
+    simulate_duration_with_sensitivity,
+)
+from src.simulation_config import SimulationConfig
+
+TOLERANCE_MMOL = 0.6
+TARGET_MMOL = 6.5
+MAX_ITERATIONS = 40
+N_PATIENTS = 8
+REDUCED_RATIO_TOLERANCE = 0.01  # relative ICR/ISF difference, reduced vs full model
+SLOPE_RELATIVE_TOLERANCE = 0.02  # forward sensitivity vs the closest central difference
+# Small steps pick up the solver's step-control noise, large ones the F01/renal kinks.
+FD_STEPS_MU = (30.0, 100.0, 300.0)
+BATCH_GLUCOSE_TOLERANCE_MMOL = 0.01  # RK4 (2 substeps/min) vs RK45 final glucose
+BATCH_RATIO_TOLERANCE = 0.01  # relative ICR/ISF difference, batched vs per-patient
+N_BATCH_PATIENTS = 24
+N_SURROGATE_PATIENTS = 16  # drawn with a seed other than the surrogate's fitting seed
+
+
+# (label, glucose response g(bolus_mU), seed bolus [mU], expected bolus or None for "within tolerance")
+SYNTHETIC_CASES = [
+    ("root near zero", lambda b: TARGET_MMOL + 0.8 - 3.0 * b / 1000.0, 3000.0, None),
+    ("root near 30 U", lambda b: TARGET_MMOL + 3.0 * (29.5 - b / 1000.0), 2000.0, None),
+    ("seed 100x too small", lambda b: TARGET_MMOL + 2.5 * (8.0 - b / 1000.0), 80.0, None),
+    ("seed 20x too large", lambda b: TARGET_MMOL + 2.5 * (1.0 - b / 1000.0), 20000.0, None),
+    ("saturating response", lambda b: TARGET_MMOL + 6.0 * math.tanh(3.0 - b / 1000.0), 1000.0, None),
+    ("steep response", lambda b: TARGET_MMOL + 40.0 * (2.2 - b / 1000.0), 5000.0, None),
+    ("unreachable: needs > 30 U", lambda b: TARGET_MMOL + 5.0 - 0.01 * b / 1000.0, 4000.0, 30000.0),
+    ("unreachable: low without bolus", lambda b: TARGET_MMOL - 2.0 - b / 1000.0, 4000.0, 0.0),
+]
+
+
+def _run_level1_synthetic() -> str:
+    sims = 0
+    for label, response, seed, expected in SYNTHETIC_CASES:
+        bolus, final_g, n = _calibrate_bolus(
+            response, TARGET_MMOL, seed, isf_estimate=3.1, tolerance_mmol=TOLERANCE_MMOL,
+            max_iterations=MAX_ITERATIONS,
+        )
+        assert n <= MAX_ITERATIONS, f"Level 1 FAILED: [{label}] {n} simulations > {MAX_ITERATIONS}"
+        if expected is None:
+            assert abs(final_g - TARGET_MMOL) < TOLERANCE_MMOL, (
+                f"Level 1 FAILED: [{label}] final G {final_g:.3f} misses target after {n} simulations"
+            )
+        else:
+            assert bolus == expected, f"Level 1 FAILED: [{label}] bolus {bolus:.1f} mU, expected the bound {expected}"
+        assert final_g == response(bolus), f"Level 1 FAILED: [{label}] returned glucose is not g(bolus)"
+        sims += n
+    return f"{len(SYNTHETIC_CASES)} responses, {sims} simulations"
+
+
+def _run_level2_simulation_count(patient: dict[str, float]) -> str:
+    counts = []
+    for method in (CALIBRATION_SECANT, CALIBRATION_BISECTION):
+        calls = [0]
+
+        def response(b: float) -> float:
+            calls[0] += 1
+            return TARGET_MMOL + 2.0 * math.tanh(1.5 - b / 2000.0)
+
+        _, _, n = _calibrate_bolus(response, TARGET_MMOL, 1000.0, 3.1, 0.01, MAX_ITERATIONS, method=method)
+        assert n == calls[0], f"Level 2 FAILED: [{method}] reported {n} simulations, ran {calls[0]}"
+        counts.append(n)
+
+    reported = find_insulin_carbo_ratio(patient, target_glycemia_mmol=TARGET_MMOL)["n_simulations"]
+    assert 1 <= reported <= MAX_ITERATIONS, f"Level 2 FAILED: ICR reported {reported} simulations"
+    return f"secant {counts[0]}, bisection {counts[1]} evaluations reported exactly"
+
+
+def _run_level3_patients(patients: list[dict[str, float]]) -> str:
+    totals: dict[str, int] = {}
+    elapsed: dict[str, float] = {}
+    converged: dict[str, list[bool]] = {}
+    for method in (CALIBRATION_BISECTION, CALIBRATION_SECANT):
+        t0 = time.perf_counter()
+        totals[method] = 0
+        converged[method] = []
+        for p in patients:
+            icr = find_insulin_carbo_ratio(p, target_glycemia_mmol=TARGET_MMOL, method=method)
+            isf = find_insulin_sensitivity_factor(p, target_glycemia_mmol=TARGET_MMOL, method=method)
+            totals[method] += int(icr["n_simulations"]) + int(isf["n_simulations"])
+            for result in (icr, isf):
+                converged[method].append(abs(result["final_glycemia_mmol"] - TARGET_MMOL) < TOLERANCE_MMOL)
+        elapsed[method] = time.perf_counter() - t0
+
+    for k, (bis, sec) in enumerate(zip(converged[CALIBRATION_BISECTION], converged[CALIBRATION_SECANT])):
+        assert sec or not bis, f"Level 3 FAILED: calibration {k} converges with bisection but not with secant"
+    assert totals[CALIBRATION_SECANT] < totals[CALIBRATION_BISECTION], (
+        f"Level 3 FAILED: secant used {totals[CALIBRATION_SECANT]} simulations, "
+        f"bisection {totals[CALIBRATION_BISECTION]}"
+    )
+    return (
+        f"{sum(converged[CALIBRATION_SECANT])}/{len(converged[CALIBRATION_SECANT])} converged, "
+        f"{totals[CALIBRATION_SECANT]} vs {totals[CALIBRATION_BISECTION]} simulations, "
+        f"{elapsed[CALIBRATION_SECANT]:.1f} vs {elapsed[CALIBRATION_BISECTION]:.1f} s"
+    )
+
+
+def _run_level4_reduced_model(patients: list[dict[str, float]]) -> str:
+    rng = np.random.default_rng(4)
+    for p in patients:
+        model = PatientModel(p)
+        x0 = np.array(compute_optimal_steady_state_from_glucose(p, 5.5, print_progress=False), dtype=np.float64)
+        for _ in range(20):
+            x = x0 * rng.uniform(0.2, 3.0, size=18)
+            x[8:10] = rng.uniform(0.0, 5e4, size=2)
+            x[10:] = 0.0
+            t = float(rng.integers(0, 1440))
+            u = float(rng.uniform(0.0, 5000.0))
+            d = float(rng.uniform(0.0, 5000.0))
+            full = model.rhs(t, x, u, d, 0.0)[:10].copy()
+            assert np.array_equal(model.rhs_classic(t, x[:10], u, d), full), (
+                "Level 4 FAILED: rhs_classic differs from the classic block of rhs"
+            )
+            assert np.array_equal(model.jac_classic(t, x[:10]), model.jac(t, x, 0.0)[:10, :10]), (
+                "Level 4 FAILED: jac_classic differs from the classic block of jac"
+            )
+
+    elapsed: dict[bool, float] = {}
+    ratios: dict[bool, np.ndarray] = {}
+    original = sensitivity.simulate_duration
+    try:
+        for reduced in (True, False):
+            sensitivity.simulate_duration = functools.partial(original, reduced_model=reduced)
+            t0 = time.perf_counter()
+            ratios[reduced] = np.array([
+                (
+                    find_insulin_carbo_ratio(p, target_glycemia_mmol=TARGET_MMOL)["icr_g_per_U"],
+                    find_insulin_sensitivity_factor(p, target_glycemia_mmol=TARGET_MMOL)["isf_mmol_per_U"],
+                )
+                for p in patients
+            ])
+            elapsed[reduced] = time.perf_counter() - t0
+    finally:
+        sensitivity.simulate_duration = original
+    rel = float(np.max(np.abs(ratios[True] / ratios[False] - 1.0)))
+    assert rel < REDUCED_RATIO_TOLERANCE, f"Level 4 FAILED: reduced-model ICR/ISF differ by {rel:.2%}"
+    return f"max ICR/ISF difference {rel:.3%}, {elapsed[True]:.1f} vs {elapsed[False]:.1f} s"
+
+
+def _run_level5_forward_sensitivity(patients: list[dict[str, float]]) -> str:
+    worst = 0.0
+    for p in patients:
+        x0 = np.array(compute_optimal_steady_state_from_glucose(p, 5.5, print_progress=False), dtype=np.float64)
+        for bolus, cho in ((1500.0, 0.0), (4000.0, 50000.0), (9000.0, 80000.0)):
+            common = dict(initial_state=x0, params=p, duration_minutes=180, basal_hourly=0.8, cho_mg=cho)
+            glucose, slope = simulate_duration_with_sensitivity(bolus_mU=bolus, **common)  # type: ignore[arg-type]
+            _, reference = simulate_duration(bolus_mU=bolus, **common)  # type: ignore[arg-type]
+            assert abs(glucose - reference) < 0.01, f"Level 5 FAILED: glucose {glucose:.4f} vs {reference:.4f}"
+            rel = float("inf")
+            for h in FD_STEPS_MU:
+                _, g_plus = simulate_duration(bolus_mU=bolus + h, **common)  # type: ignore[arg-type]
+                _, g_minus = simulate_duration(bolus_mU=bolus - h, **common)  # type: ignore[arg-type]
+                fd = (g_plus - g_minus) / (2.0 * h)
+                rel = min(rel, abs(slope - fd) / abs(fd))
+            assert rel < SLOPE_RELATIVE_TOLERANCE, (
+                f"Level 5 FAILED: dG/dbolus {slope:.3e} off every central difference by >= {rel:.1%}"
+            )
+            worst = max(worst, rel)
+
+    # Both paths read their glycemia through _final_glycemia; a replaced Q1 has no slope.
+    for q1, expected in ((12.5, (1.25, True)), (-3.0, (0.0, False)), (math.nan, (0.0, False)), (math.inf, (1e5, False))):
+        got = _final_glycemia(q1, 10.0, clip_states=True)
+        assert got == expected, f"Level 5 FAILED: _final_glycemia({q1}) = {got}, expected {expected}"
+    assert _final_glycemia(-3.0, 10.0, clip_states=False) == (-0.3, True), "Level 5 FAILED: unclipped Q1 was clamped"
+
+    sims = {CALIBRATION_SECANT: 0, CALIBRATION_NEWTON: 0}
+    for p in patients:
+        results = {}
+        for method in sims:
+            icr = find_insulin_carbo_ratio(p, target_glycemia_mmol=TARGET_MMOL, method=method)
+            isf = find_insulin_sensitivity_factor(p, target_glycemia_mmol=TARGET_MMOL, method=method)
+            sims[method] += int(icr["n_simulations"]) + int(isf["n_simulations"])
+            results[method] = [abs(r["final_glycemia_mmol"] - TARGET_MMOL) < TOLERANCE_MMOL for r in (icr, isf)]
+        for sec, newton in zip(results[CALIBRATION_SECANT], results[CALIBRATION_NEWTON]):
+            assert newton or not sec, "Level 5 FAILED: calibration converges with secant but not with Newton"
+    return (
+        f"max slope error {worst:.2%}, Newton {sims[CALIBRATION_NEWTON]} augmented vs "
+        f"secant {sims[CALIBRATION_SECANT]} plain simulations"
+    )
+
+
+def _run_level6_batch(patients: list[dict[str, float]]) -> str:
+    params = stack_parameter_sets(patients)
+    x0 = np.column_stack([
+        np.array(compute_optimal_steady_state_from_glucose(p, 5.5, print_progress=False), dtype=np.float64)
+        for p in patients
+    ])
+    rng = np.random.default_rng(6)
+    for _ in range(10):
+        x = x0 * rng.uniform(0.2, 3.0, size=x0.shape)
+        x[10:] = 0.0
+        t = float(rng.integers(0, 1440))
+        u = rng.uniform(0.0, 5000.0, size=len(patients))
+        d = rng.uniform(0.0, 5000.0, size=len(patients))
+        batch = hovorka_classic_equations_batch(t, x, params, u, d)
+        for j, p in enumerate(patients):
+            scalar = PatientModel(p).rhs_classic(t, x[:10, j], float(u[j]), float(d[j]))
+            assert np.allclose(batch[:, j], scalar, rtol=1e-12, atol=0.0), (
+                f"Level 6 FAILED: hovorka_classic_equations_batch column {j} differs from rhs_classic"
+            )
+
+    bolus = np.linspace(1000.0, 9000.0, len(patients))
+    basal = np.full(len(patients), 0.8)
+    _, batch_g = simulate_duration_batch(x0, params, 180, basal, bolus, cho_mg=50000.0)
+    for j, p in enumerate(patients):
+        _, scalar_g = simulate_duration(x0[:, j], p, 180, 0.8, bolus_mU=float(bolus[j]), cho_mg=50000.0)
+        assert abs(batch_g[j] - scalar_g) < BATCH_GLUCOSE_TOLERANCE_MMOL, (
+            f"Level 6 FAILED: simulate_duration_batch {batch_g[j]:.4f} vs simulate_duration {scalar_g:.4f}"
+        )
+
+    t0 = time.perf_counter()
+    icr = find_insulin_carbo_ratio_batch(patients, target_glycemia_mmol=TARGET_MMOL)
+    isf = find_insulin_sensitivity_factor_batch(patients, target_glycemia_mmol=TARGET_MMOL)
+    batch_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    scalar_icr = np.array([find_insulin_carbo_ratio(p, target_glycemia_mmol=TARGET_MMOL)["icr_g_per_U"] for p in patients])
+    scalar_isf = np.array([
+        find_insulin_sensitivity_factor(p, target_glycemia_mmol=TARGET_MMOL)["isf_mmol_per_U"] for p in patients
+    ])
+    scalar_time = time.perf_counter() - t0
+    rel = float(max(
+        np.max(np.abs(icr["icr_g_per_U"] / scalar_icr - 1.0)),
+        np.max(np.abs(isf["isf_mmol_per_U"] / scalar_isf - 1.0)),
+    ))
+    assert rel < BATCH_RATIO_TOLERANCE, f"Level 6 FAILED: batched ICR/ISF differ by {rel:.2%} from per-patient"
+    return f"max ICR/ISF difference {rel:.3%}, {batch_time:.2f} vs {scalar_time:.2f} s for {len(patients)} patients"
+
+
+def _run_level7_surrogate(patients: list[dict[str, float]]) -> str:
+    surrogate = load_calibration_surrogate()
+    params = stack_parameter_sets(patients)
+    basal = np.full(len(patients), 0.8)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "surrogate.json"
+        save_calibration_surrogate(surrogate, path)
+        reloaded = load_calibration_surrogate(path)
+        assert np.array_equal(reloaded.predict_icr(params, basal), surrogate.predict_icr(params, basal)), (
+            "Level 7 FAILED: ICR predictions change after a save/load round trip"
+        )
+        payload = json.loads(path.read_text())
+        payload["version"] = CALIBRATION_SURROGATE_VERSION + 1
+        stale = Path(tmp) / "stale.json"
+        stale.write_text(json.dumps(payload))
+        try:
+            load_calibration_surrogate(stale)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Level 7 FAILED: a coefficient file of another version was accepted")
+    try:
+        find_insulin_carbo_ratio(patients[0], target_glycemia_mmol=TARGET_MMOL + 1.0, surrogate=surrogate)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Level 7 FAILED: the surrogate was used for a target it was not fitted for")
+    # run_simulation must refuse the mismatch before screening any candidate.
+    screen = simulation._screen_candidate_pool
+
+    def no_screening(*_: object) -> list[np.ndarray | None]:
+        raise AssertionError("Level 7 FAILED: run_simulation screened candidates before checking the surrogate")
+
+    simulation._screen_candidate_pool = no_screening
+    try:
+        simulation.run_simulation(
+            SimulationConfig(n_patients=1, n_days=1, enable_plots=False, calibration_surrogate=True,
+                             calibration_target_glycemia_mmol=TARGET_MMOL + 1.0),
+            ExportConfig(export_to_parquet=False, export_to_csv=False), show_progress=False, show_summary=False,
+        )
+    except ValueError as err:
+        assert "calibration_target_glycemia_mmol" in str(err), f"Level 7 FAILED: error does not name the field: {err}"
+    else:
+        raise AssertionError("Level 7 FAILED: run_simulation accepted a surrogate fitted for another target")
+    finally:
+        simulation._screen_candidate_pool = screen
+
+    # A biased surrogate (ICR and ISF predicted 3x too high) must fall back to the full search.
+    biased = dataclasses.replace(
+        surrogate,
+        icr_coefficients=surrogate.icr_coefficients + np.log(3.0) * (np.arange(surrogate.icr_coefficients.size) == 0),
+        isf_coefficients=surrogate.isf_coefficients + np.log(3.0) * (np.arange(surrogate.isf_coefficients.size) == 0),
+    )
+    totals = {"plain": 0, "surrogate": 0, "biased": 0}
+    single = 0
+    for p in patients:
+        for label, model in (("plain", None), ("surrogate", surrogate), ("biased", biased)):
+            icr = find_insulin_carbo_ratio(p, target_glycemia_mmol=TARGET_MMOL, surrogate=model)
+            isf = find_insulin_sensitivity_factor(p, target_glycemia_mmol=TARGET_MMOL, surrogate=model)
+            for result in (icr, isf):
+                totals[label] += int(result["n_simulations"])
+                hit = abs(result["final_glycemia_mmol"] - TARGET_MMOL) < TOLERANCE_MMOL
+                if label == "plain":
+                    plain_hit = hit
+                    continue
+                assert hit or not plain_hit, (
+                    f"Level 7 FAILED: {label} calibration misses tolerance where the plain search converges"
+                )
+                single += label == "surrogate" and int(result["n_simulations"]) == 1
+    assert totals["surrogate"] < totals["plain"], (
+        f"Level 7 FAILED: surrogate-seeded calibration used {totals['surrogate']} simulations, plain {totals['plain']}"
+    )
+    assert totals["biased"] > 2 * len(patients), "Level 7 FAILED: the biased surrogate was never rejected"
+    return (
+        f"{single}/{2 * len(patients)} verified by one simulation, "
+        f"{totals['surrogate']} vs {totals['plain']} simulations ({totals['biased']} biased)"
+    )
+
+
+def run_all_tests() -> bool:
+    passed = 0
+    failed = 0
+    patients = generate_monte_carlo_patients(N_PATIENTS, standard_patient=False, seed=5)
+
+    print("=" * 70)
+    print("ICR/ISF CALIBRATION SEARCH TEST")
+    print("=" * 70)
+
+    checks = [
+        ("secant search on synthetic responses", _run_level1_synthetic),
+        ("simulation count", lambda: _run_level2_simulation_count(patients[0])),
+        (f"secant vs bisection, {N_PATIENTS} patients", lambda: _run_level3_patients(patients)),
+        (f"10-state vs 18-state calibration, {N_PATIENTS} patients", lambda: _run_level4_reduced_model(patients)),
+        ("forward-sensitivity Newton calibration", lambda: _run_level5_forward_sensitivity(patients)),
+        (
+            f"batched vs per-patient calibration, {N_BATCH_PATIENTS} patients",
+            lambda: _run_level6_batch(generate_monte_carlo_patients(N_BATCH_PATIENTS, standard_patient=False, seed=6)),
+        ),
+        (
+            f"calibration surrogate, {N_SURROGATE_PATIENTS} patients",
+            lambda: _run_level7_surrogate(
+                generate_monte_carlo_patients(N_SURROGATE_PATIENTS, standard_patient=False, seed=7)
+            ),
+        ),
+    ]
+    for label, check in checks:
+        try:
+            detail = check()
+            print(f"  PASS  {label}: {detail}")
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    ok = run_all_tests()
+    sys.exit(0 if ok else 1)
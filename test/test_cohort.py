@@ -0,0 +1,196 @@
+"""
+Cohort (batched) engine verification test.
+
+Three levels of verification:
+  1. Batched RHS        — hovorka_equations_batch matches hovorka_equations column by column,
+                          and the compiled PatientModel.rhs is bit-identical to it
+  2. Batched controller — apply_guard_iob_isf_batch / compute_hypo_rescue_rate_batch reproduce
+                          the scalar ControllerState latches minute by minute
+  3. Engine agreement   — one simulated day on the cohort engine tracks the scalar solve_ivp
+                          engine (controller disabled so both see identical inputs), and a
+                          small run_simulation(engine="cohort") returns complete results
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.export import ExportConfig
+from src.model import PatientModel, compute_optimal_steady_state_from_glucose, hovorka_equations, hovorka_equations_batch
+from src.parameters import generate_monte_carlo_patients, stack_parameter_sets
+from src.simulation import _PatientRun, _prepare_patient_run, _simulate_cohort_block, _simulate_patient_scalar, run_simulation
+from src.simulation_config import SimulationConfig
+from src.simulation_control import (
+    CohortControllerState,
+    ControllerState,
+    apply_guard_iob_isf,
+    apply_guard_iob_isf_batch,
+    apply_hypo_rescue_to_derivative,
+    compute_hypo_rescue_rate_batch,
+)
+
+# ── Tolerances ────────────────────────────────────────────────────────────────
+RHS_RELATIVE_TOLERANCE   = 1e-12  # batched vs scalar derivative, relative
+ENGINE_TOLERANCE_MMOL    = 0.02   # cohort RK4 vs scalar RK45 glucose, controller disabled
+N_PATIENTS = 6
+
+
+def _random_states(patients: list[dict[str, float]], rng: np.random.Generator) -> np.ndarray:
+    """Perturbed steady states with active exercise states, one column per patient."""
+    columns = []
+    for p in patients:
+        x = np.array(compute_optimal_steady_state_from_glucose(p, 7.0, print_progress=False), dtype=np.float64)
+        x *= rng.uniform(0.5, 1.5, size=x.size)
+        x[10:] = rng.uniform(0.0, 1.0, size=8) * np.array([500.0, 0.2, 0.01, 0.01, 50.0, 5e4, 0.01, 50.0])
+        columns.append(x)
+    return np.column_stack(columns)
+
+
+def _run_level1_batched_rhs(patients: list[dict[str, float]]) -> float:
+    rng = np.random.default_rng(0)
+    x = _random_states(patients, rng)
+    params = stack_parameter_sets(patients)
+    models = [PatientModel(p) for p in patients]
+    worst = 0.0
+    for t in (100, 250, 300, 420, 480, 700, 1439):
+        u = rng.uniform(0.0, 50.0, N_PATIENTS)
+        d = rng.uniform(0.0, 5000.0, N_PATIENTS)
+        ac = rng.uniform(0.0, 8000.0, N_PATIENTS)
+        batch = hovorka_equations_batch(t, x, params, u, d, ac)
+        for j, p in enumerate(patients):
+            scalar = np.asarray(
+                hovorka_equations(t, x[:, j], p, None, 1, precomputed_inputs=(u[j], d[j], ac[j])),  # type: ignore[arg-type]
+                dtype=np.float64,
+            )
+            compiled = models[j].rhs(t, x[:, j], float(u[j]), float(d[j]), float(ac[j]))
+            assert np.array_equal(compiled, scalar), f"Level 1 FAILED: PatientModel.rhs differs from hovorka_equations at t={t}"
+            rel = float(np.max(np.abs(batch[:, j] - scalar) / np.maximum(np.abs(scalar), 1e-300)))
+            worst = max(worst, rel)
+    assert worst <= RHS_RELATIVE_TOLERANCE, f"Level 1 FAILED: max relative RHS error {worst:.3e}"
+    return worst
+
+
+def _run_level2_batched_controller() -> int:
+    config = SimulationConfig()
+    rng = np.random.default_rng(1)
+    n = 5
+    basal = rng.uniform(0.5, 1.2, n)
+    icr = rng.uniform(8.0, 15.0, n)
+    isf = rng.uniform(1.5, 3.5, n)
+    ag = np.full(n, 0.8)
+    mwg = np.full(n, 180.16)
+    scalar_states = [ControllerState() for _ in range(n)]
+    batch_state = CohortControllerState.create(n)
+    # Slow glucose random walk crossing the guard, rescue and correction thresholds.
+    glucose = np.full(n, 7.0)
+    events = 0
+    for minute in range(2000):
+        glucose = np.clip(glucose + rng.normal(0.0, 0.25, n), 2.0, 16.0)
+        iob = rng.uniform(0.0, 10.0, n)
+        b_basal, b_icr, b_latched = apply_guard_iob_isf_batch(minute, glucose, iob, basal, icr, isf, config, batch_state)
+        b_rescue = compute_hypo_rescue_rate_batch(minute, glucose, ag, mwg, config, batch_state)
+        for j in range(n):
+            s_basal, s_icr, s_latched = apply_guard_iob_isf(
+                minute, float(glucose[j]), float(iob[j]), float(basal[j]), float(icr[j]), float(isf[j]),
+                config, scalar_states[j],
+            )
+            dy = np.zeros(18)
+            apply_hypo_rescue_to_derivative(dy, minute, float(glucose[j]), {"Ag": 0.8, "MwG": 180.16}, config, scalar_states[j])
+            assert np.isclose(b_basal[j], s_basal, rtol=1e-12), f"Level 2 FAILED: basal mismatch at minute {minute}"
+            assert np.isclose(b_icr[j], s_icr, rtol=1e-12), f"Level 2 FAILED: ICR mismatch at minute {minute}"
+            assert bool(b_latched[j]) == s_latched, f"Level 2 FAILED: guard latch mismatch at minute {minute}"
+            assert np.isclose(b_rescue[j], dy[8], rtol=1e-12), f"Level 2 FAILED: rescue mismatch at minute {minute}"
+    for j in range(n):
+        view = batch_state.patient_state(j)
+        assert view == scalar_states[j], f"Level 2 FAILED: final controller state differs for patient {j}"
+        events += view.correction_isf_events
+    return events
+
+
+def _run_level3_engine_agreement() -> float:
+    config = SimulationConfig(
+        n_patients=3, n_days=1, n_warmup_days=0, noise_std=0.0, random_scenarios=True, random_seed=7,
+        enable_hypo_guard=False, enable_hypo_rescue=False, enable_hypo_rescue_l2=False,
+        enable_iob_bolus_guard=False, enable_correction_isf=False,
+        # Disable rejection so both engines record the same day.
+        quality_max_hyper_pct_threshold=101.0, quality_max_hypo_pct_threshold=101.0,
+        quality_max_hypo_pct_exercise_threshold=101.0, quality_min_glucose_mmol=0.0,
+        instability_max_glucose_mmol=1e9, instability_hyper_pct_threshold=101.0,
+    )
+    scalar_runs: list[_PatientRun] = []
+    for k, p in enumerate(generate_monte_carlo_patients(6, seed=7)):
+        run = _prepare_patient_run(p, k, config)
+        if run.reject_reason is None and len(scalar_runs) < 2:
+            scalar_runs.append(run)
+    assert scalar_runs, "Level 3 FAILED: no candidate passed initial-glucose screening"
+    # Same calibrated inputs for the cohort engine, without re-running the calibration.
+    cohort_runs = [
+        _PatientRun(
+            patient_id=r.patient_id, params=dict(r.params), x0=r.x0.copy(), basal_hourly=r.basal_hourly,
+            insulin_carbo_ratio=r.insulin_carbo_ratio, insulin_sensitivity=r.insulin_sensitivity,
+        )
+        for r in scalar_runs
+    ]
+    for run in scalar_runs:
+        # Single-patient generator so the per-day SI draw matches the cohort draw below.
+        _simulate_patient_scalar(run, config, np.random.default_rng(11))
+    worst = 0.0
+    for run in cohort_runs:
+        _simulate_cohort_block([run], config, np.random.default_rng(11))
+    for s_run, c_run in zip(scalar_runs, cohort_runs):
+        s_bg = s_run.days[0]["blood_glucose"]
+        c_bg = c_run.days[0]["blood_glucose"]
+        assert s_bg.shape == c_bg.shape == (1441,), "Level 3 FAILED: unexpected trajectory length"
+        worst = max(worst, float(np.max(np.abs(s_bg - c_bg))))
+    assert worst <= ENGINE_TOLERANCE_MMOL, f"Level 3 FAILED: cohort vs scalar max |ΔG|={worst:.4f} mmol/L"
+
+    results = run_simulation(
+        SimulationConfig(n_patients=2, n_days=2, random_scenarios=True, random_seed=3,
+                         enable_plots=False, engine="cohort", n_warmup_days=1),
+        ExportConfig(export_to_parquet=False, export_to_csv=False),
+        return_results=True, show_progress=False, show_summary=False,
+    )
+    assert isinstance(results, dict) and len(results) == 2, "Level 3 FAILED: cohort run_simulation result count"
+    for patient in results.values():
+        assert sorted(patient["days"]) == [0, 1], "Level 3 FAILED: missing recorded days"
+        for day in patient["days"].values():
+            assert np.all(np.isfinite(day["blood_glucose"])) and day["blood_glucose"].size == 1441
+    return worst
+
+
+def run_all_tests() -> bool:
+    passed = 0
+    failed = 0
+    patients = generate_monte_carlo_patients(N_PATIENTS, standard_patient=False, seed=42)
+
+    print("=" * 70)
+    print("COHORT ENGINE TEST")
+    print("=" * 70)
+    checks = [
+        ("batched / compiled RHS vs scalar RHS", lambda: f"max rel err={_run_level1_batched_rhs(patients):.2e}"),
+        ("batched controller vs ControllerState", lambda: f"correction events={_run_level2_batched_controller()}"),
+        ("cohort engine vs scalar engine", lambda: f"max |ΔG|={_run_level3_engine_agreement():.4f} mmol/L"),
+    ]
+    for label, check in checks:
+        try:
+            detail = check()
+            print(f"  PASS  {label}: {detail}")
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    ok = run_all_tests()
+    sys.exit(0 if ok else 1)
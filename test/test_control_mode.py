@@ -0,0 +1,139 @@
+"""
+Hybrid controller timing verification test (control_mode="minute").
+
+Two levels of verification:
+  1. Decision points     — integrate_minute_hybrid calls minute_inputs exactly once per
+                           minute, in order, with the boundary state of the trajectory,
+                           for both the RK4 step and a restarted solve_ivp
+  2. Solver independence — scalar-engine days with the full control stack enabled take
+                           the same controller decisions with RK45, minute_rk4 and LSODA
+                           (delivered insulin departs from the open-loop plan on the same
+                           minutes), and their glucose agrees to integrator accuracy
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.input import TAPE_MINUTES, get_day_input_tape
+from src.model import PatientModel
+from src.parameters import generate_monte_carlo_patients
+from src.simulation import _PatientRun, _prepare_patient_run, _simulate_patient_scalar
+from src.simulation_config import SimulationConfig
+from src.simulation_utils import CONTROL_PER_MINUTE, MINUTE_RK4, integrate_minute_hybrid
+
+# ── Tolerances ────────────────────────────────────────────────────────────────
+SOLVER_TOLERANCE_MMOL = 0.005   # hybrid-mode glucose across solver methods, controller enabled
+SOLVER_METHODS = ("RK45", MINUTE_RK4, "LSODA")
+
+
+def _run_level1_decision_points() -> int:
+    # x' = -0.1 x + u: the "controller" doses u = 1 while x < 5 (decided at the boundary only).
+    model = PatientModel(generate_monte_carlo_patients(1, seed=3)[0])
+    n_minutes = 90
+    checked = 0
+    for method in (MINUTE_RK4, "RK45"):
+        calls: list[tuple[int, float]] = []
+
+        def minute_inputs(minute: int, x: np.ndarray) -> tuple[float, float, float, float]:
+            calls.append((minute, float(x[0])))
+            return (1.0 if x[0] < 5.0 else 0.0), 0.0, 0.0, 0.0
+
+        trajectory = integrate_minute_hybrid(
+            model, minute_inputs, lambda _m, x, held: -0.1 * x + held[0], np.array([0.0]), n_minutes, method,
+        )
+        assert [m for m, _ in calls] == list(range(n_minutes)), (
+            f"Level 1 FAILED: {method} decision minutes {[m for m, _ in calls][:10]}..."
+        )
+        boundary = np.array([x for _, x in calls])
+        assert np.array_equal(boundary, trajectory[0, :-1]), f"Level 1 FAILED: {method} decided on non-boundary states"
+        checked += len(calls)
+    return checked
+
+
+def _config(solver_method: str) -> SimulationConfig:
+    return SimulationConfig(
+        n_days=2, n_warmup_days=1, noise_std=0.0, random_scenarios=True, random_seed=7,
+        solver_method=solver_method, control_mode=CONTROL_PER_MINUTE,
+        # Disable rejection so all solver methods record the same days.
+        quality_max_hyper_pct_threshold=101.0, quality_max_hypo_pct_threshold=101.0,
+        quality_max_hypo_pct_soft_threshold=101.0, quality_max_hypo_pct_exercise_threshold=101.0,
+        quality_min_glucose_mmol=0.0, instability_max_glucose_mmol=1e9, instability_hyper_pct_threshold=101.0,
+    )
+
+
+def _controller_minutes(run: _PatientRun) -> np.ndarray:
+    """Mask of minutes where the delivered insulin differs from the open-loop basal + meal bolus."""
+    masks = []
+    for day_idx, day in run.days.items():
+        tape = get_day_input_tape(run.patient_id, day_idx, seed=_config("RK45").random_seed)
+        open_loop = [tape.inputs_at(t, run.basal_hourly, run.insulin_carbo_ratio)[0] for t in range(TAPE_MINUTES)]
+        masks.append(day["insulin_mU_min"] != np.array(open_loop))
+    return np.concatenate(masks)
+
+
+def _run_level2_solver_independence() -> str:
+    worst = 0.0
+    decisions = 0
+    for k, p in enumerate(generate_monte_carlo_patients(4, seed=7)):
+        base = _prepare_patient_run(p, k, _config("RK45"))
+        if base.reject_reason is not None:
+            continue
+        glucose = {}
+        controlled = {}
+        for method in SOLVER_METHODS:
+            run = _PatientRun(
+                patient_id=base.patient_id, params=dict(base.params), x0=base.x0.copy(),
+                basal_hourly=base.basal_hourly, insulin_carbo_ratio=base.insulin_carbo_ratio,
+                insulin_sensitivity=base.insulin_sensitivity,
+            )
+            _simulate_patient_scalar(run, _config(method), np.random.default_rng(11))
+            assert sorted(run.days) == [0, 1], f"Level 2 FAILED: {method} did not record both days"
+            glucose[method] = np.concatenate([day["blood_glucose"] for day in run.days.values()])
+            controlled[method] = _controller_minutes(run)
+        for method in SOLVER_METHODS[1:]:
+            assert np.array_equal(controlled[method], controlled["RK45"]), (
+                f"Level 2 FAILED: {method} controller acted on different minutes than RK45 "
+                f"({int(np.sum(controlled[method] != controlled['RK45']))} differ)"
+            )
+            worst = max(worst, float(np.max(np.abs(glucose[method] - glucose["RK45"]))))
+        decisions += int(np.sum(controlled["RK45"]))
+    assert decisions > 0, "Level 2 FAILED: the controller never acted; nothing was compared"
+    assert worst <= SOLVER_TOLERANCE_MMOL, f"Level 2 FAILED: max |ΔG| across solvers {worst:.4f} mmol/L"
+    return f"controller-modified minutes={decisions}, max |ΔG|={worst:.4f} mmol/L"
+
+
+def run_all_tests() -> bool:
+    passed = 0
+    failed = 0
+
+    print("=" * 70)
+    print("HYBRID CONTROL MODE TEST")
+    print("=" * 70)
+    checks = [
+        ("one decision per minute boundary", lambda: f"{_run_level1_decision_points()} decisions checked"),
+        ("RK45 / minute_rk4 / LSODA decisions", _run_level2_solver_independence),
+    ]
+    for label, check in checks:
+        try:
+            detail = check()
+            print(f"  PASS  {label}: {detail}")
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    ok = run_all_tests()
+    sys.exit(0 if ok else 1)
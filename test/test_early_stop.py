@@ -0,0 +1,193 @@
+"""
+Early rejection verification test (intra-day instability stop, warm-up checks).
+
+Four levels of verification:
+  1. solve_ivp_until   — on an exponentially growing test system, the samples up to the
+                         first one above the glucose cap equal solve_ivp's bit for bit
+                         (RK45, BDF), and without a crossing the whole result does
+  2. Minute integrator — integrate_minute_rk4 with a stop returns exactly the prefix of
+                         the full run, ending at the first crossing minute
+  3. Engine agreement  — scalar-engine candidates with a lowered instability cap get the
+                         same reject reasons, recorded days and generator state with
+                         stop_on_instability on and off
+  4. Warm-up checks    — with permissive warm-up thresholds the sparse warm-up grid leaves
+                         the recorded days unchanged (RK45); with a lowered cap, scalar and
+                         cohort engines drop candidates during warm-up before any recorded day
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scipy.integrate import solve_ivp  # type: ignore[import-untyped]
+
+from src.parameters import generate_monte_carlo_patients
+from src.simulation import _PatientRun, _prepare_patient_run, _simulate_cohort_block, _simulate_patient_scalar
+from src.simulation_config import SimulationConfig
+from src.simulation_utils import MINUTE_RK4, GlucoseStop, integrate_minute_rk4, solve_ivp_until
+
+GROWTH_RATE = 0.003          # /min: the test glucose doubles after ~231 min
+TEST_CAP = GlucoseStop(vg_bw=1.0, max_mmol=2.0)
+ENGINE_CAP_MMOL = 13.0       # low enough that some candidates cross it on day 0
+
+
+def _growth(t: float, y: np.ndarray) -> np.ndarray:
+    return np.array([GROWTH_RATE * y[0], -0.01 * y[1]])
+
+
+def _run_level1_solve_ivp_until() -> str:
+    y0 = np.array([1.0, 0.5])
+    t_eval = np.arange(0, 1441)
+    for method in ("RK45", "BDF"):
+        full = solve_ivp(_growth, (0, 1440), y0, method=method, t_eval=t_eval, rtol=1e-6, atol=1e-8, max_step=30.0)
+        stopped = solve_ivp_until(_growth, (0, 1440), y0, method, t_eval, TEST_CAP, rtol=1e-6, atol=1e-8, max_step=30.0)
+        n = stopped.y.shape[1]
+        assert stopped.status == 1, f"Level 1 FAILED: {method} status={stopped.status}, expected 1"
+        assert np.array_equal(stopped.y, full.y[:, :n]), f"Level 1 FAILED: {method} samples differ from solve_ivp"
+        assert np.array_equal(stopped.t, full.t[:n]), f"Level 1 FAILED: {method} sample times differ"
+        assert TEST_CAP.first_crossing(full.y[0]) == n - 1, f"Level 1 FAILED: {method} did not stop at the first crossing"
+        uncapped = solve_ivp_until(
+            _growth, (0, 1440), y0, method, t_eval, GlucoseStop(vg_bw=1.0, max_mmol=1e9),
+            rtol=1e-6, atol=1e-8, max_step=30.0,
+        )
+        assert uncapped.status == 0 and np.array_equal(uncapped.y, full.y), f"Level 1 FAILED: {method} uncapped run differs"
+    return f"stopped at minute {n - 1} of 1440"
+
+
+def _run_level2_minute_integrator() -> str:
+    y0 = np.array([1.0, 0.5])
+
+    def rhs(minute: int, y: np.ndarray) -> np.ndarray:
+        return _growth(float(minute), y)
+
+    full = integrate_minute_rk4(rhs, y0, 1440)
+    stopped = integrate_minute_rk4(rhs, y0, 1440, stop=TEST_CAP)
+    n = stopped.shape[1]
+    assert n < full.shape[1], "Level 2 FAILED: integrate_minute_rk4 did not stop"
+    assert np.array_equal(stopped, full[:, :n]), "Level 2 FAILED: stopped run is not a prefix of the full run"
+    assert TEST_CAP.first_crossing(full[0]) == n - 1, "Level 2 FAILED: did not stop at the first crossing"
+    return f"stopped at minute {n - 1} of 1440"
+
+
+def _copy_run(base: _PatientRun) -> _PatientRun:
+    return _PatientRun(
+        patient_id=base.patient_id, params=dict(base.params), x0=base.x0.copy(),
+        basal_hourly=base.basal_hourly, insulin_carbo_ratio=base.insulin_carbo_ratio,
+        insulin_sensitivity=base.insulin_sensitivity,
+    )
+
+
+def _run_level3_engine_agreement() -> str:
+    checked = 0
+    crossed = 0
+    for method in ("RK45", MINUTE_RK4):
+        base_config = SimulationConfig(
+            n_days=2, n_warmup_days=0, random_scenarios=True, random_seed=3, solver_method=method,
+            instability_max_glucose_mmol=ENGINE_CAP_MMOL,
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            bases = [_prepare_patient_run(p, k, base_config) for k, p in enumerate(generate_monte_carlo_patients(5, seed=3))]
+        outcomes = {}
+        for stop in (False, True):
+            config = replace(base_config, stop_on_instability=stop)
+            outcome = []
+            for base in bases:
+                if base.reject_reason is not None:
+                    continue
+                run = _copy_run(base)
+                rng = np.random.default_rng(base.patient_id)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    _simulate_patient_scalar(run, config, rng)
+                outcome.append((run.reject_reason, sorted(run.days), rng.random()))
+            outcomes[stop] = outcome
+        assert outcomes[True] == outcomes[False], f"Level 3 FAILED: {method} outcomes differ with the stop enabled"
+        checked += len(outcomes[True])
+        crossed += sum(reason == "instability" for reason, _, _ in outcomes[True])
+    assert crossed > 0, "Level 3 FAILED: no candidate crossed the lowered instability cap"
+    return f"{checked} candidate runs, {crossed} instability rejections"
+
+
+def _run_level4_warmup_checks() -> str:
+    base_config = SimulationConfig(n_days=1, n_warmup_days=1, random_scenarios=True, random_seed=3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        bases = [_prepare_patient_run(p, k, base_config) for k, p in enumerate(generate_monte_carlo_patients(5, seed=3))]
+    bases = [base for base in bases if base.reject_reason is None][:3]
+    assert bases, "Level 4 FAILED: no candidate passed initial-glucose screening"
+
+    # Permissive thresholds: every check passes, so only the sparse warm-up grid differs.
+    permissive = replace(
+        base_config, warmup_rejection=True, warmup_quality_checks=True,
+        instability_max_glucose_mmol=1e9, quality_min_glucose_mmol=0.0,
+        quality_max_hypo_pct_threshold=101.0, quality_max_hypo_pct_exercise_threshold=101.0,
+        quality_max_hyper_pct_threshold=101.0,
+    )
+    unchecked = replace(permissive, warmup_rejection=False, warmup_quality_checks=False)
+    for base in bases:
+        glucose = []
+        for config in (unchecked, permissive):
+            run = _copy_run(base)
+            with contextlib.redirect_stdout(io.StringIO()):
+                _simulate_patient_scalar(run, config, np.random.default_rng(base.patient_id))
+            glucose.append(run.days[0]["blood_glucose"])
+        assert np.array_equal(glucose[0], glucose[1]), "Level 4 FAILED: sparse warm-up grid changed the recorded day"
+
+    capped = replace(base_config, warmup_rejection=True, instability_max_glucose_mmol=ENGINE_CAP_MMOL)
+    scalar_reasons = []
+    for base in bases:
+        run = _copy_run(base)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _simulate_patient_scalar(run, replace(capped, solver_method=MINUTE_RK4), np.random.default_rng(0))
+        if run.reject_reason is not None:
+            assert not run.days, "Level 4 FAILED: scalar warm-up rejection still recorded days"
+        scalar_reasons.append(run.reject_reason)
+    cohort_runs = [_copy_run(base) for base in bases]
+    with contextlib.redirect_stdout(io.StringIO()):
+        _simulate_cohort_block(cohort_runs, replace(capped, engine="cohort"), np.random.default_rng(0))
+    for run in cohort_runs:
+        if run.reject_reason is not None:
+            assert not run.days, "Level 4 FAILED: cohort warm-up rejection still recorded days"
+    cohort_reasons = [run.reject_reason for run in cohort_runs]
+    assert "instability" in scalar_reasons, "Level 4 FAILED: no scalar candidate crossed the lowered cap in warm-up"
+    assert "instability" in cohort_reasons, "Level 4 FAILED: no cohort candidate crossed the lowered cap in warm-up"
+    return f"{len(bases)} candidates, warm-up rejections scalar={scalar_reasons} cohort={cohort_reasons}"
+
+
+def run_all_tests() -> bool:
+    passed = 0
+    failed = 0
+
+    print("=" * 70)
+    print("EARLY REJECTION TEST")
+    print("=" * 70)
+    checks = [
+        ("solve_ivp_until vs solve_ivp", _run_level1_solve_ivp_until),
+        ("integrate_minute_rk4 stop prefix", _run_level2_minute_integrator),
+        ("stop_on_instability on vs off", _run_level3_engine_agreement),
+        ("warm-up rejection checks", _run_level4_warmup_checks),
+    ]
+    for label, check in checks:
+        try:
+            detail = check()
+            print(f"  PASS  {label}: {detail}")
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    ok = run_all_tests()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,209 @@
+"""
+Quiescent ETH fast-path verification test (ETHConstants.is_quiescent, PatientModel.rhs).
+
+Three levels of verification:
+  1. Underflow bound — below the quiescence thresholds every Hill power (Y/aY)^n1,
+                       (AC/aAC)^n2, (AC/ah)^n2, (th/tp)^n2 is exactly 0.0, for the
+                       fixed Hill coefficients and for sampled ones
+  2. Switch-over     — on states straddling the thresholds (just below, at, just above,
+                       clamped negatives, all-zero rest state) the fast path of
+                       PatientModel.rhs and of the hovorka_rhs kernel equals the full Hill
+                       evaluation bit-for-bit, and compute_eth_exercise_terms' rest-state
+                       shortcut (through hovorka_equations) matches the full Hill path
+  3. Trajectories    — closed-loop days with exercise are bit-identical with the fast path
+                       disabled, and a non-trivial share of RHS calls takes the fast path
+"""
+from __future__ import annotations
+
+import dataclasses
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.hovorka_exercise import ETHConstants, hill_zero_ratio
+from src.kernels import hovorka_rhs, pack_patient_model
+from src.kernels.hovorka import _P_AC_QUIET, _P_TH_QUIET, _P_Y_QUIET
+from src.model import PatientModel, compute_optimal_steady_state_from_glucose, hovorka_equations
+from src.parameters import generate_monte_carlo_patients
+from src.simulation import _PatientRun, _prepare_patient_run, _simulate_patient_scalar
+from src.simulation_config import SimulationConfig
+from src.simulation_utils import MINUTE_RK4
+
+N_PATIENTS = 4
+
+
+def _full_model(params: dict[str, float]) -> PatientModel:
+    """PatientModel whose thresholds are 0.0, so rhs always takes the full Hill path."""
+    model = PatientModel(params)
+    model.eth = dataclasses.replace(model.eth, Y_quiet=0.0, AC_quiet=0.0, th_quiet=0.0)
+    return model
+
+
+def _run_level1_underflow(patients: list[dict[str, float]]) -> int:
+    rng = np.random.default_rng(0)
+    n_values = [20.0, 100.0, *rng.uniform(1.0, 150.0, size=50)]
+    checked = 0
+    for n in n_values:
+        r = hill_zero_ratio(float(n))
+        assert r ** n == 0.0, f"Level 1 FAILED: hill_zero_ratio({n})**n = {r ** n!r}"
+        checked += 1
+    for p in patients:
+        eth = ETHConstants.from_params(p)
+        for value, scale, n in (
+            (eth.Y_quiet, eth.aY, eth.n1),
+            (eth.AC_quiet, eth.aAC, eth.n2),
+            (eth.AC_quiet, eth.ah, eth.n2),
+            (eth.th_quiet, eth.tp, eth.n2),
+        ):
+            below = np.nextafter(value, 0.0)
+            for v in (below, below * 0.5, below * 1e-3):
+                assert (v / scale) ** n == 0.0, (
+                    f"Level 1 FAILED: ({v!r}/{scale})**{n} = {(v / scale) ** n!r} below the threshold"
+                )
+                checked += 1
+    return checked
+
+
+def _straddling_states(eth: ETHConstants, x0: np.ndarray, rng: np.random.Generator) -> list[tuple[np.ndarray, float]]:
+    states: list[tuple[np.ndarray, float]] = []
+    for _ in range(30):
+        x = x0.copy()
+        x[0] *= rng.uniform(0.5, 2.0)
+        x[10] = eth.Y_quiet * rng.choice([0.0, 0.5, 1.0, 2.0]) * rng.choice([1.0, -1.0])
+        x[11] = rng.uniform(0.0, 0.05)
+        x[12] = rng.uniform(0.0, 1e-3)
+        x[13] = rng.uniform(-1e-3, 0.03)
+        x[14] = rng.choice([0.0, 5e-7, 0.2])
+        x[15] = rng.choice([0.0, 5e-7, 30.0])
+        x[16] = rng.uniform(0.0, 1e-3)
+        x[17] = eth.th_quiet * rng.choice([0.0, 0.5, 1.0, 2.0])
+        ac = eth.AC_quiet * float(rng.choice([0.0, 0.5, 1.0, 2.0, -1.0]))
+        states.append((x, ac))
+    return states
+
+
+def _run_level2_switch_over(patients: list[dict[str, float]]) -> tuple[int, int]:
+    rng = np.random.default_rng(1)
+    dy = np.empty(18, dtype=np.float64)
+    checked = 0
+    quiescent = 0
+    for p in patients:
+        model = PatientModel(p)
+        full = _full_model(p)
+        packed = pack_patient_model(model)
+        packed_full = packed.copy()
+        packed_full[[_P_Y_QUIET, _P_AC_QUIET, _P_TH_QUIET]] = 0.0
+        x0 = np.array(compute_optimal_steady_state_from_glucose(p, 7.0, print_progress=False), dtype=np.float64)
+        for x, ac in _straddling_states(model.eth, x0, rng):
+            t = float(rng.integers(0, 1440))
+            u = float(rng.uniform(0.0, 2000.0))
+            ref = full.rhs(t, x, u, 0.0, ac).copy()
+            fast = model.rhs(t, x, u, 0.0, ac)
+            assert np.array_equal(fast, ref), (
+                f"Level 2 FAILED: rhs max |Δ|={np.max(np.abs(fast - ref)):.3e} (Y={x[10]!r}, ac={ac!r})"
+            )
+            hovorka_rhs(t, x, packed, u, 0.0, ac, dy)
+            assert np.array_equal(dy, ref), "Level 2 FAILED: hovorka_rhs fast path differs from PatientModel.rhs"
+            hovorka_rhs(t, x, packed_full, u, 0.0, ac, dy)
+            assert np.array_equal(dy, ref), "Level 2 FAILED: hovorka_rhs full path differs from PatientModel.rhs"
+            eth = model.eth
+            quiescent += eth.is_quiescent(
+                max(0.0, x[10]), max(0.0, ac), max(0.0, x[17]), max(0.0, x[14]), max(0.0, x[15])
+            )
+            checked += 1
+
+        # compute_eth_exercise_terms' rest-state shortcut (via hovorka_equations) vs the full path.
+        rest = x0.copy()
+        rest[10:] = 0.0
+        reference = hovorka_equations(600, rest, p, None, 1, precomputed_inputs=(800.0, 0.0, 0.0))  # type: ignore[arg-type]
+        assert np.array_equal(np.asarray(reference, dtype=np.float64), full.rhs(600.0, rest, 800.0, 0.0, 0.0)), (
+            "Level 2 FAILED: compute_eth_exercise_terms rest-state shortcut differs from the full evaluation"
+        )
+    assert 0 < quiescent < checked, f"Level 2 FAILED: {quiescent}/{checked} states quiescent (no straddling)"
+    return checked, quiescent
+
+
+def _run_level3_trajectories() -> str:
+    config = SimulationConfig(
+        n_days=2, n_warmup_days=1, noise_std=0.10, random_scenarios=True, random_seed=7,
+        solver_method=MINUTE_RK4,
+    )
+    calls = [0, 0]
+    original = ETHConstants.is_quiescent
+
+    def counting(self: ETHConstants, *args: float) -> bool:
+        result = original(self, *args)
+        calls[0] += result
+        calls[1] += 1
+        return result
+
+    def never(self: ETHConstants, *args: float) -> bool:
+        return False
+
+    glucose: dict[str, list[np.ndarray]] = {"fast": [], "full": []}
+    try:
+        for k, p in enumerate(generate_monte_carlo_patients(3, seed=7)):
+            base = _prepare_patient_run(p, k, config)
+            if base.reject_reason is not None:
+                continue
+            for label, predicate in (("fast", counting), ("full", never)):
+                ETHConstants.is_quiescent = predicate  # type: ignore[method-assign]
+                run = _PatientRun(
+                    patient_id=base.patient_id, params=dict(base.params), x0=base.x0.copy(),
+                    basal_hourly=base.basal_hourly, insulin_carbo_ratio=base.insulin_carbo_ratio,
+                    insulin_sensitivity=base.insulin_sensitivity,
+                )
+                _simulate_patient_scalar(run, config, np.random.default_rng(11))
+                glucose[label].extend(day["blood_glucose"] for day in run.days.values())
+    finally:
+        ETHConstants.is_quiescent = original  # type: ignore[method-assign]
+
+    assert glucose["fast"], "Level 3 FAILED: no candidate passed initial-glucose screening"
+    assert len(glucose["fast"]) == len(glucose["full"]), "Level 3 FAILED: different number of recorded days"
+    for a, b in zip(glucose["fast"], glucose["full"]):
+        assert np.array_equal(a, b), f"Level 3 FAILED: max |ΔG|={np.max(np.abs(a - b)):.3e}"
+    share = calls[0] / max(1, calls[1])
+    assert share > 0.05, f"Level 3 FAILED: only {share:.1%} of RHS calls took the fast path"
+    return f"{len(glucose['fast'])} days identical, {share:.1%} of RHS calls quiescent"
+
+
+def run_all_tests() -> bool:
+    passed = 0
+    failed = 0
+    patients = generate_monte_carlo_patients(N_PATIENTS, standard_patient=False, seed=3)
+
+    print("=" * 70)
+    print("QUIESCENT ETH FAST-PATH TEST")
+    print("=" * 70)
+
+    def _level2() -> str:
+        checked, quiescent = _run_level2_switch_over(patients)
+        return f"{checked} states identical ({quiescent} quiescent)"
+
+    checks = [
+        ("Hill powers underflow below thresholds", lambda: f"{_run_level1_underflow(patients)} powers exactly 0.0"),
+        ("fast path vs full Hill evaluation", _level2),
+        ("closed-loop days with fast path disabled", _run_level3_trajectories),
+    ]
+    for label, check in checks:
+        try:
+            detail = check()
+            print(f"  PASS  {label}: {detail}")
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    ok = run_all_tests()
+    sys.exit(0 if ok else 1)
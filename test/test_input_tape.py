@@ -0,0 +1,128 @@
+"""
+Per-day input tape verification test.
+
+Three levels of verification:
+  1. Scalar lookup  — DayInputTape.inputs_at equals _day_plan_inputs_at_minute
+                      bit-for-bit at every minute of many day plans (all base
+                      scenarios, exercise overlays, late / missed boluses), for
+                      several basal rates and ICRs
+  2. Batched lookup — inputs_at_batch on stacked tapes equals the scalar lookup
+                      row by row with per-patient basal / ICR
+  3. No retention   — get_day_input_tape renders a fresh tape per call and nothing
+                      keeps it alive once the caller drops it (only the DayPlan is cached)
+"""
+from __future__ import annotations
+
+import gc
+import sys
+import weakref
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.input import (
+    TAPE_MINUTES,
+    _day_plan_inputs_at_minute,
+    clear_meal_cache,
+    get_cached_day_plan,
+    get_day_input_tape,
+    stack_day_input_tapes,
+)
+
+N_PLAN_IDS = 40
+DAYS = (-2, 0, 1, 5)
+SCENARIOS = (None, 1, 2, 3)
+SEED = 42
+
+
+def _tapes_and_plans(scenario: int | None) -> list[tuple[object, object]]:
+    clear_meal_cache()
+    pairs = []
+    for plan_id in range(N_PLAN_IDS):
+        for day in DAYS:
+            tape = get_day_input_tape(plan_id, day, scenario=scenario, seed=SEED)
+            pairs.append((tape, get_cached_day_plan(plan_id, day)))
+    return pairs
+
+
+def _run_level1_scalar() -> int:
+    checked = 0
+    for scenario in SCENARIOS:
+        for tape, plan in _tapes_and_plans(scenario):
+            for basal, icr in ((0.4, 6.5), (1.1, 13.0), (2.3, 21.7)):
+                for t in range(TAPE_MINUTES):
+                    got = tape.inputs_at(t, basal, icr)  # type: ignore[attr-defined]
+                    ref = _day_plan_inputs_at_minute(t, plan, basal, icr)  # type: ignore[arg-type]
+                    assert got == ref, f"Level 1 FAILED: minute {t} tape={got} plan={ref}"
+                    checked += 1
+    return checked
+
+
+def _run_level2_batch() -> int:
+    rng = np.random.default_rng(0)
+    pairs = _tapes_and_plans(None)
+    tapes = [tape for tape, _ in pairs]
+    stacked = stack_day_input_tapes(tapes)  # type: ignore[arg-type]
+    basal = rng.uniform(0.3, 2.5, size=len(tapes))
+    icr = rng.uniform(5.0, 25.0, size=len(tapes))
+    for t in range(TAPE_MINUTES):
+        u, d, ac = stacked.inputs_at_batch(t, basal, icr)
+        for j, tape in enumerate(tapes):
+            ref = tape.inputs_at(t, float(basal[j]), float(icr[j]))  # type: ignore[attr-defined]
+            assert (float(u[j]), float(d[j]), float(ac[j])) == ref, (
+                f"Level 2 FAILED: row {j} minute {t} batch={(u[j], d[j], ac[j])} scalar={ref}"
+            )
+    return len(tapes)
+
+
+def _run_level3_no_retention() -> int:
+    clear_meal_cache()
+    refs = []
+    for plan_id in range(N_PLAN_IDS):
+        tape = get_day_input_tape(plan_id, 0, seed=SEED)
+        again = get_day_input_tape(plan_id, 0, seed=SEED)
+        assert tape is not again, "Level 3 FAILED: get_day_input_tape returned a cached tape"
+        assert all(np.array_equal(getattr(tape, name), getattr(again, name)) for name in ("cho_mg_min", "bolus_carbs_g", "ac")), (
+            f"Level 3 FAILED: plan {plan_id} rendered two different tapes"
+        )
+        refs.append(weakref.ref(tape))
+        del tape, again
+    gc.collect()
+    alive = sum(ref() is not None for ref in refs)
+    assert alive == 0, f"Level 3 FAILED: {alive} tapes still alive after the caller dropped them"
+    return len(refs)
+
+
+def run_all_tests() -> bool:
+    passed = 0
+    failed = 0
+
+    print("=" * 70)
+    print("DAY INPUT TAPE TEST")
+    print("=" * 70)
+    checks = [
+        ("tape lookup vs day-plan evaluation", lambda: f"{_run_level1_scalar()} minutes identical"),
+        ("stacked tape vs scalar lookup", lambda: f"{_run_level2_batch()} tapes identical"),
+        ("tapes freed with their day", lambda: f"{_run_level3_no_retention()} tapes released"),
+    ]
+    for label, check in checks:
+        try:
+            detail = check()
+            print(f"  PASS  {label}: {detail}")
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    ok = run_all_tests()
+    sys.exit(0 if ok else 1)
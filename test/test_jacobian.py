@@ -0,0 +1,107 @@
+"""
+Analytical Jacobian verification test.
+
+Two levels of verification:
+  1. Jacobian accuracy  — PatientModel.jac matches a central finite-difference
+                          Jacobian of PatientModel.rhs on perturbed states with active
+                          exercise (Hill terms, glycogen depletion, dawn/cortisol windows),
+                          and has no entries outside HOVORKA_JAC_SPARSITY
+  2. Stiff solvers      — a meal + bolus response integrated with BDF / Radau / LSODA
+                          (which receive jac=PatientModel.jac) ends at the RK45 glucose
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.model import HOVORKA_JAC_SPARSITY, PatientModel, compute_optimal_steady_state_from_glucose
+from src.parameters import generate_monte_carlo_patients
+from src.sensitivity import simulate_duration
+
+# ── Tolerances ────────────────────────────────────────────────────────────────
+JACOBIAN_RELATIVE_TOLERANCE = 1e-4   # analytical vs central differences, relative to max(|J|, 1e-6)
+SOLVER_TOLERANCE_MMOL       = 0.05   # stiff solver vs RK45 glucose over the meal response
+N_PATIENTS = 6
+
+
+def _run_level1_jacobian(patients: list[dict[str, float]]) -> float:
+    rng = np.random.default_rng(0)
+    scale = np.array([3000.0, 0.2, 0.01, 0.02, 50.0, 5e4, 0.01, 20.0])
+    worst = 0.0
+    for p in patients:
+        model = PatientModel(p)
+        x0 = np.array(compute_optimal_steady_state_from_glucose(p, 7.0, print_progress=False), dtype=np.float64)
+        for _ in range(25):
+            x = x0 * rng.uniform(0.5, 1.5, size=x0.size)
+            x[0] *= rng.uniform(0.3, 2.5)  # below the F01 threshold and above the renal threshold
+            x[10:] = rng.uniform(0.05, 1.0, size=8) * scale
+            t = float(rng.integers(0, 1440))
+            ac = float(rng.choice([0.0, 800.0, 1500.0, 4000.0, 7000.0]))
+            jac = model.jac(t, x, ac)
+            assert not np.any(jac[~HOVORKA_JAC_SPARSITY]), "Level 1 FAILED: Jacobian entry outside sparsity pattern"
+            numeric = np.empty_like(jac)
+            for j in range(x.size):
+                h = 1e-6 * max(1.0, abs(x[j]))
+                xp = x.copy()
+                xm = x.copy()
+                xp[j] += h
+                xm[j] -= h
+                numeric[:, j] = (model.rhs(t, xp, 0.0, 0.0, ac).copy() - model.rhs(t, xm, 0.0, 0.0, ac)) / (2.0 * h)
+            rel = float(np.max(np.abs(jac - numeric) / np.maximum(np.abs(jac), 1e-6)))
+            worst = max(worst, rel)
+    assert worst <= JACOBIAN_RELATIVE_TOLERANCE, f"Level 1 FAILED: max relative Jacobian error {worst:.3e}"
+    return worst
+
+
+def _run_level2_stiff_solvers(patient: dict[str, float]) -> float:
+    x0 = np.array(compute_optimal_steady_state_from_glucose(patient, 7.0, print_progress=False), dtype=np.float64)
+    worst = 0.0
+    # Rising limb of the meal response and the post-bolus tail.
+    for duration in (90, 300):
+        common = dict(
+            initial_state=x0, params=patient, duration_minutes=duration, basal_hourly=0.8,
+            bolus_mU=5000.0, cho_mg=60000.0,
+        )
+        _, reference = simulate_duration(**common, solver_method="RK45")  # type: ignore[arg-type]
+        for method in ("BDF", "Radau", "LSODA"):
+            _, glucose = simulate_duration(**common, solver_method=method)  # type: ignore[arg-type]
+            worst = max(worst, abs(glucose - reference))
+    assert worst <= SOLVER_TOLERANCE_MMOL, f"Level 2 FAILED: stiff solver vs RK45 max |ΔG|={worst:.4f} mmol/L"
+    return worst
+
+
+def run_all_tests() -> bool:
+    passed = 0
+    failed = 0
+    patients = generate_monte_carlo_patients(N_PATIENTS, standard_patient=False, seed=3)
+
+    print("=" * 70)
+    print("ANALYTICAL JACOBIAN TEST")
+    print("=" * 70)
+    checks = [
+        ("analytical vs finite-difference Jacobian", lambda: f"max rel err={_run_level1_jacobian(patients):.2e}"),
+        ("BDF / Radau / LSODA vs RK45", lambda: f"max |ΔG|={_run_level2_stiff_solvers(patients[0]):.4f} mmol/L"),
+    ]
+    for label, check in checks:
+        try:
+            detail = check()
+            print(f"  PASS  {label}: {detail}")
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    ok = run_all_tests()
+    sys.exit(0 if ok else 1)
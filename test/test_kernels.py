@@ -0,0 +1,155 @@
+"""
+Numba kernel backend verification test (src/kernels, SimulationConfig.backend="numba").
+
+Three levels of verification:
+  1. RHS kernel      — hovorka_rhs (compiled, and its plain-Python source when Numba is
+                       installed) equals PatientModel.rhs bit-for-bit on perturbed states
+                       with active exercise and dawn/cortisol windows
+  2. Sensor kernel   — lagged_cgm_day equals the point-by-point measure_glycemia loop,
+                       carrying sensor_state across two days, and leaves the generator in
+                       the same state
+  3. Engine backends — scalar-engine days with backend="numba" equal backend="numpy"
+                       bit-for-bit (RK45 with the controller in the RHS, and minute_rk4
+                       with the hybrid per-minute controller and the compiled RK4 minute)
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.kernels import NUMBA_AVAILABLE, hovorka_rhs, lagged_cgm_day, pack_patient_model
+from src.model import PatientModel, compute_optimal_steady_state_from_glucose
+from src.parameters import generate_monte_carlo_patients
+from src.sensor import measure_glycemia
+from src.simulation import _PatientRun, _prepare_patient_run, _simulate_patient_scalar
+from src.simulation_config import SimulationConfig
+from src.simulation_utils import CONTROL_PER_MINUTE, MINUTE_RK4
+
+N_PATIENTS = 6
+
+
+def _run_level1_rhs(patients: list[dict[str, float]]) -> int:
+    rng = np.random.default_rng(0)
+    scale = np.array([3000.0, 0.2, 0.01, 0.02, 50.0, 5e4, 0.01, 20.0])
+    kernels = [hovorka_rhs]
+    if NUMBA_AVAILABLE:
+        kernels.append(hovorka_rhs.py_func)  # type: ignore[attr-defined]
+    dy = np.empty(18, dtype=np.float64)
+    checked = 0
+    for p in patients:
+        model = PatientModel(p)
+        packed = pack_patient_model(model)
+        x0 = np.array(compute_optimal_steady_state_from_glucose(p, 7.0, print_progress=False), dtype=np.float64)
+        for _ in range(40):
+            x = x0 * rng.uniform(0.5, 1.5, size=x0.size)
+            x[0] *= rng.uniform(0.3, 2.5)
+            x[10:] = rng.uniform(0.0, 1.0, size=8) * scale
+            t = float(rng.integers(0, 1440))
+            u, d = float(rng.uniform(0.0, 2000.0)), float(rng.choice([0.0, 4000.0]))
+            ac = float(rng.choice([0.0, 800.0, 4000.0, 7000.0]))
+            ref = model.rhs(t, x, u, d, ac).copy()
+            for kernel in kernels:
+                kernel(t, x, packed, u, d, ac, dy)
+                assert np.array_equal(dy, ref), (
+                    f"Level 1 FAILED: max |Δ|={np.max(np.abs(dy - ref)):.3e} at t={t}, ac={ac}"
+                )
+                checked += 1
+    return checked
+
+
+def _run_level2_sensor(patient: dict[str, float]) -> int:
+    rng_states = np.random.default_rng(1)
+    vg_bw = float(patient["VG"]) * float(patient["BW"])
+    reference_rng = np.random.default_rng(5)
+    kernel_rng = np.random.default_rng(5)
+    reference_state: dict[str, float] = {}
+    kernel_state: dict[str, float] = {}
+    checked = 0
+    for noise_std in (0.10, 0.10, 0.0):
+        q1 = vg_bw * (6.0 + np.cumsum(rng_states.normal(0.0, 0.05, size=1441)))
+        reference = np.array([
+            measure_glycemia(
+                [q], patient, noise_std=noise_std, mode="lagged", phi=0.7, lag_alpha=0.25,
+                sensor_state=reference_state, rng=reference_rng, output_unit="mmol/L", min_glucose=2.2,
+            )
+            for q in q1
+        ])
+        readings = lagged_cgm_day(q1, vg_bw, noise_std, 0.7, 0.25, kernel_state, kernel_rng, min_glucose=2.2)
+        assert np.array_equal(readings, reference), (
+            f"Level 2 FAILED: max |Δ|={np.max(np.abs(readings - reference)):.3e} (noise_std={noise_std})"
+        )
+        assert kernel_state == reference_state, "Level 2 FAILED: sensor_state differs after the day"
+        checked += q1.size
+    assert kernel_rng.random() == reference_rng.random(), "Level 2 FAILED: generator consumed differently"
+    return checked
+
+
+def _config(solver_method: str, control_mode: str, backend: str) -> SimulationConfig:
+    return SimulationConfig(
+        n_days=2, n_warmup_days=1, noise_std=0.10, random_scenarios=True, random_seed=7,
+        solver_method=solver_method, control_mode=control_mode, backend=backend,
+    )
+
+
+def _run_level3_backends() -> int:
+    checked = 0
+    for k, p in enumerate(generate_monte_carlo_patients(3, seed=7)):
+        base = _prepare_patient_run(p, k, _config("RK45", "rhs", "numpy"))
+        if base.reject_reason is not None:
+            continue
+        for method, mode in (("RK45", "rhs"), (MINUTE_RK4, CONTROL_PER_MINUTE)):
+            glucose = {}
+            for backend in ("numpy", "numba"):
+                run = _PatientRun(
+                    patient_id=base.patient_id, params=dict(base.params), x0=base.x0.copy(),
+                    basal_hourly=base.basal_hourly, insulin_carbo_ratio=base.insulin_carbo_ratio,
+                    insulin_sensitivity=base.insulin_sensitivity,
+                )
+                _simulate_patient_scalar(run, _config(method, mode, backend), np.random.default_rng(11))
+                glucose[backend] = [day["blood_glucose"] for day in run.days.values()]
+            assert len(glucose["numpy"]) == len(glucose["numba"]), (
+                f"Level 3 FAILED: {method}/{mode} recorded a different number of days"
+            )
+            for a, b in zip(glucose["numpy"], glucose["numba"]):
+                assert np.array_equal(a, b), f"Level 3 FAILED: {method}/{mode} max |ΔG|={np.max(np.abs(a - b)):.3e}"
+            checked += len(glucose["numpy"])
+    assert checked > 0, "Level 3 FAILED: no candidate passed initial-glucose screening"
+    return checked
+
+
+def run_all_tests() -> bool:
+    passed = 0
+    failed = 0
+    patients = generate_monte_carlo_patients(N_PATIENTS, standard_patient=False, seed=3)
+
+    print("=" * 70)
+    print(f"KERNEL BACKEND TEST (Numba {'available' if NUMBA_AVAILABLE else 'not installed: plain-Python kernels'})")
+    print("=" * 70)
+    checks = [
+        ("hovorka_rhs vs PatientModel.rhs", lambda: f"{_run_level1_rhs(patients)} evaluations identical"),
+        ("lagged_cgm_day vs measure_glycemia", lambda: f"{_run_level2_sensor(patients[0])} readings identical"),
+        ("backend numba vs numpy", lambda: f"{_run_level3_backends()} days identical"),
+    ]
+    for label, check in checks:
+        try:
+            detail = check()
+            print(f"  PASS  {label}: {detail}")
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    ok = run_all_tests()
+    sys.exit(0 if ok else 1)
@@ -56,7 +56,7 @@ if __name__ == "__main__":
         sys.exit(0)
 
     # Load merged parquet and plot all patient BG trajectories
-    parquet_files = list(folder.glob("*.parquet"))
+    parquet_files = list(folder.glob("results_*.parquet"))
     if not parquet_files:
         print("No parquet file found, skipping plot.")
         sys.exit(1)
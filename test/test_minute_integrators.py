@@ -0,0 +1,144 @@
+"""
+Minute-synchronous integrator verification test (minute_rk4, minute_exp).
+
+Three levels of verification:
+  1. Integrator        — integrate_minute_rk4 on a linear test system with a
+                         minute-wise constant forcing matches the exact solution
+  2. Linear propagator — LinearChainPropagator advances S1, S2, I, x1-x3, D1, D2 over
+                         one minute exactly (tight DOP853 reference), inside and
+                         outside the cortisol window
+  3. Engine agreement  — scalar-engine days with solver_method="minute_rk4" and
+                         "minute_exp" track the adaptive RK45 path (controller disabled
+                         so all see identical inputs)
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scipy.integrate import solve_ivp  # type: ignore[import-untyped]
+
+from src.model import LINEAR_STATE_INDICES, LinearChainPropagator, PatientModel, compute_optimal_steady_state_from_glucose
+from src.parameters import generate_monte_carlo_patients
+from src.simulation import _PatientRun, _prepare_patient_run, _simulate_patient_scalar
+from src.simulation_config import SimulationConfig
+from src.simulation_utils import MINUTE_EXPONENTIAL, MINUTE_RK4, integrate_minute_rk4
+
+# ── Tolerances ────────────────────────────────────────────────────────────────
+LINEAR_TOLERANCE       = 1e-5   # RK4 with h=1 min on a decay rate of 0.1 /min (local error ~(kh)^5/120), relative
+PROPAGATOR_TOLERANCE   = 1e-9   # matrix exponential vs DOP853 (rtol=1e-12), relative
+ENGINE_TOLERANCE_MMOL  = 0.02   # minute_rk4 / minute_exp vs RK45 glucose, controller disabled
+
+
+def _run_level1_linear() -> float:
+    # x' = -k x + f(minute), f piecewise constant per minute: exact minute-to-minute map
+    # x(m+1) = e^{-k} x(m) + f(m) (1 - e^{-k}) / k
+    k = 0.1
+    forcing = np.where(np.arange(120) % 30 < 10, 2.0, 0.0)
+    trajectory = integrate_minute_rk4(lambda m, x: -k * x + forcing[m], np.array([1.0]), forcing.size)
+    exact = np.empty(forcing.size + 1)
+    exact[0] = 1.0
+    for m, f in enumerate(forcing):
+        exact[m + 1] = np.exp(-k) * exact[m] + f * (1.0 - np.exp(-k)) / k
+    assert trajectory.shape == (1, forcing.size + 1), "Level 1 FAILED: unexpected trajectory shape"
+    worst = float(np.max(np.abs(trajectory[0] - exact) / np.abs(exact)))
+    assert worst <= LINEAR_TOLERANCE, f"Level 1 FAILED: max relative error {worst:.3e}"
+    return worst
+
+
+def _run_level2_propagator() -> float:
+    patient = generate_monte_carlo_patients(1, seed=3)[0]
+    model = PatientModel(patient)
+    propagator = LinearChainPropagator(model)
+    x = np.array(compute_optimal_steady_state_from_glucose(patient, 7.0, print_progress=False), dtype=np.float64)
+    x[2:10] *= 1.3
+    x[8:10] = (30.0, 10.0)  # gut chain mid-meal
+    u, d = 40.0, 3000.0
+    worst = 0.0
+    for t in (100, 420, 480, 540):  # before / inside the cortisol window
+        ref = solve_ivp(
+            lambda _, y: model.rhs(t, y, u, d, 0.0).copy(), (0.0, 1.0), x,
+            method="DOP853", rtol=1e-12, atol=1e-12,
+        ).y[LINEAR_STATE_INDICES, -1]
+        z = propagator.advance(x[LINEAR_STATE_INDICES], u, model.ag * (d / model.mwg), model.cortisol_factor(t))
+        worst = max(worst, float(np.max(np.abs(z - ref) / np.abs(ref))))
+    assert worst <= PROPAGATOR_TOLERANCE, f"Level 2 FAILED: max relative propagator error {worst:.3e}"
+    return worst
+
+
+def _config(solver_method: str) -> SimulationConfig:
+    return SimulationConfig(
+        n_days=2, n_warmup_days=1, noise_std=0.0, random_scenarios=True, random_seed=7,
+        solver_method=solver_method,
+        enable_hypo_guard=False, enable_hypo_rescue=False, enable_hypo_rescue_l2=False,
+        enable_iob_bolus_guard=False, enable_correction_isf=False,
+        # Disable rejection so all integrators record the same days.
+        quality_max_hyper_pct_threshold=101.0, quality_max_hypo_pct_threshold=101.0,
+        quality_max_hypo_pct_soft_threshold=101.0, quality_max_hypo_pct_exercise_threshold=101.0,
+        quality_min_glucose_mmol=0.0, instability_max_glucose_mmol=1e9, instability_hyper_pct_threshold=101.0,
+    )
+
+
+def _run_level3_engine_agreement() -> str:
+    worst = {MINUTE_RK4: 0.0, MINUTE_EXPONENTIAL: 0.0}
+    checked = 0
+    for k, p in enumerate(generate_monte_carlo_patients(4, seed=7)):
+        base = _prepare_patient_run(p, k, _config("RK45"))
+        if base.reject_reason is not None:
+            continue
+        glucose = {}
+        for method in ("RK45", MINUTE_RK4, MINUTE_EXPONENTIAL):
+            run = _PatientRun(
+                patient_id=base.patient_id, params=dict(base.params), x0=base.x0.copy(),
+                basal_hourly=base.basal_hourly, insulin_carbo_ratio=base.insulin_carbo_ratio,
+                insulin_sensitivity=base.insulin_sensitivity,
+            )
+            _simulate_patient_scalar(run, _config(method), np.random.default_rng(11))
+            assert sorted(run.days) == [0, 1], f"Level 3 FAILED: {method} did not record both days"
+            glucose[method] = np.concatenate([day["blood_glucose"] for day in run.days.values()])
+        for method in worst:
+            worst[method] = max(worst[method], float(np.max(np.abs(glucose["RK45"] - glucose[method]))))
+        checked += 1
+        if checked == 2:
+            break
+    assert checked > 0, "Level 3 FAILED: no candidate passed initial-glucose screening"
+    for method, err in worst.items():
+        assert err <= ENGINE_TOLERANCE_MMOL, f"Level 3 FAILED: {method} vs RK45 max |ΔG|={err:.4f} mmol/L"
+    return ", ".join(f"{method} max |ΔG|={err:.4f} mmol/L" for method, err in worst.items())
+
+
+def run_all_tests() -> bool:
+    passed = 0
+    failed = 0
+
+    print("=" * 70)
+    print("MINUTE INTEGRATORS TEST")
+    print("=" * 70)
+    checks = [
+        ("minute_rk4 vs exact linear solution", lambda: f"max rel err={_run_level1_linear():.2e}"),
+        ("linear-chain propagator vs DOP853", lambda: f"max rel err={_run_level2_propagator():.2e}"),
+        ("minute integrators vs RK45 scalar engine", _run_level3_engine_agreement),
+    ]
+    for label, check in checks:
+        try:
+            detail = check()
+            print(f"  PASS  {label}: {detail}")
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    ok = run_all_tests()
+    sys.exit(0 if ok else 1)
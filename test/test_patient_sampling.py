@@ -0,0 +1,259 @@
+"""
+Vectorized Monte Carlo patient sampling test (sample_patient_pool, PatientPool, ParameterRecord, CandidateStream).
+
+Six levels of verification:
+  1. Truncation   — _sample_truncated_normal matches the exact truncated normal (KS test) for
+                    mild and heavy truncation, and every pooled patient passes the plausibility
+                    checks with its sampled columns inside their bounds
+  2. Distribution — drawing the whole pool at once gives the same per-parameter distribution
+                    as drawing patients one at a time (two-sample KS test per sampled key)
+  3. Views        — indexing, slicing and iteration build the same ParameterSets as
+                    generate_monte_carlo_patients, stack_parameter_sets returns the columns,
+                    and a seed reproduces the pool
+  4. Speed        — sampling the pool column-wise is much faster than one patient at a time
+  5. Records      — ParameterRecord rows of the structured parameter table read back the stored
+                    ParameterSets, pickle smaller than a dict, and export as a patient-level table
+  6. Stream       — CandidateStream yields the same candidates for a seed however it is batched,
+                    sizes batches from the running acceptance rate and stops at the target or
+                    the candidate budget
+"""
+from __future__ import annotations
+
+import pickle
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats  # type: ignore[import-untyped]
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.export import export_to_formats
+from src.parameters import (
+    CANDIDATE_CHUNK_SIZE,
+    PATIENT_PARAMETER_DTYPE,
+    CandidateStream,
+    ParameterRecord,
+    PatientPool,
+    _plausible_patients,
+    _sample_truncated_normal,
+    generate_monte_carlo_patients,
+    get_base_params,
+    parameter_table,
+    sample_patient_pool,
+    stack_parameter_sets,
+    store_parameter_set,
+)
+
+N_POOL = 20_000
+N_SINGLE = 2_000
+KS_MIN_P_VALUE = 1e-3
+SAMPLED_KEYS = (
+    "EGP0", "F01", "k12", "ka1", "ka2", "ka3", "SI1", "SI2", "SI3", "ke", "VI", "VG",
+    "tauI", "tauG", "Ag", "age_years", "BW", "eth_b", "eth_q1", "eth_q2", "eth_q3l", "eth_q4l", "dawn_amp",
+)
+
+
+def _run_level1_truncation(pool: PatientPool) -> str:
+    rng = np.random.default_rng(1)
+    # (mean, std, lower, upper): untruncated, one-sided, two-sided, heavy truncation
+    cases = [(0.0161, 0.0039, 1e-9, np.inf), (5.1e-4, 4.9e-4, 1e-6, np.inf),
+             (7.33e-7, 1.60e-7, 1e-9, 1.3e-6), (0.0707, 0.0219, 0.032, np.inf), (0.0, 1.0, 0.5, 3.0)]
+    for mean, std, lower, upper in cases:
+        samples = _sample_truncated_normal(rng, 20_000, mean, std, lower=lower, upper=upper)
+        assert np.all((samples > lower) & (samples < upper)), f"Level 1 FAILED: sample outside ({lower}, {upper})"
+        exact = stats.truncnorm((lower - mean) / std, (upper - mean) / std, loc=mean, scale=std)
+        p_value = stats.kstest(samples, exact.cdf).pvalue
+        assert p_value > KS_MIN_P_VALUE, f"Level 1 FAILED: N({mean}, {std}) on ({lower}, {upper}) KS p={p_value:.2e}"
+
+    c = pool.columns
+    assert np.all(_plausible_patients(c)), "Level 1 FAILED: implausible patient in the pool"
+    assert np.all(c["eth_q1"] < 1.3e-6) and np.all(c["eth_q2"] > 0.032), "Level 1 FAILED: ETH bounds violated"
+    assert np.all(c["age_years"] == np.rint(c["age_years"])), "Level 1 FAILED: non-integer age"
+    assert np.all((c["dawn_amp"] >= 0.0) & (c["dawn_amp"] <= 0.22)), "Level 1 FAILED: dawn_amp outside [0, 0.22]"
+    base = get_base_params()
+    for key in set(base) - set(SAMPLED_KEYS):
+        assert np.all(c[key] == base[key]), f"Level 1 FAILED: unsampled key {key} differs from the base value"
+    return f"{len(cases)} truncated normals match, {len(pool)} patients plausible"
+
+
+def _run_level2_distribution(pool: PatientPool) -> str:
+    singles = stack_parameter_sets([sample_patient_pool(1, seed=seed)[0] for seed in range(N_SINGLE)])
+    worst = 1.0
+    for key in SAMPLED_KEYS:
+        p_value = stats.ks_2samp(pool.columns[key], singles[key]).pvalue
+        worst = min(worst, p_value)
+        assert p_value > KS_MIN_P_VALUE, f"Level 2 FAILED: {key} pooled vs one-at-a-time KS p={p_value:.2e}"
+    return f"{len(SAMPLED_KEYS)} parameters, min KS p={worst:.3f}"
+
+
+def _run_level3_views() -> str:
+    pool = sample_patient_pool(50, seed=3)
+    dicts = generate_monte_carlo_patients(50, seed=3)
+    assert list(pool) == dicts, "Level 3 FAILED: iteration differs from generate_monte_carlo_patients"
+    assert [pool[k] for k in range(len(pool))] == dicts, "Level 3 FAILED: indexing differs from iteration"
+    assert pool[-1] == dicts[-1] and list(pool[10:20]) == dicts[10:20], "Level 3 FAILED: negative index or slice"
+    assert isinstance(pool[10:20], PatientPool), "Level 3 FAILED: slicing did not return a PatientPool"
+    assert list(dicts[0]) == list(get_base_params()), "Level 3 FAILED: key order differs from the base parameters"
+    assert all(type(v) is float for v in dicts[0].values()), "Level 3 FAILED: dict values are not Python floats"
+    view = pool[0]
+    view["ICR"] = 12.0
+    view["SI1"] = -1.0
+    assert "ICR" not in pool[0] and pool[0]["SI1"] > 0.0, "Level 3 FAILED: mutating a view changed the pool"
+    try:
+        pool[50]
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("Level 3 FAILED: out-of-range index did not raise IndexError")
+
+    from_pool, from_dicts = stack_parameter_sets(pool), stack_parameter_sets(dicts)
+    assert list(from_pool) == list(from_dicts), "Level 3 FAILED: stacked keys differ"
+    for key, values in from_dicts.items():
+        assert np.array_equal(from_pool[key], values), f"Level 3 FAILED: stacked {key} differs"
+
+    again = sample_patient_pool(50, seed=3)
+    assert all(np.array_equal(again.columns[k], v) for k, v in pool.columns.items()), "Level 3 FAILED: seed not reproducible"
+    standard = sample_patient_pool(4, standard_patient=True)
+    assert list(standard) == [get_base_params()] * 4, "Level 3 FAILED: standard_patient pool"
+    assert len(sample_patient_pool(0)) == 0 and generate_monte_carlo_patients(0) == [], "Level 3 FAILED: empty pool"
+    return "views, slices, stacking and seeds consistent"
+
+
+def _run_level4_speed() -> str:
+    t0 = time.perf_counter()
+    for seed in range(N_SINGLE):
+        sample_patient_pool(1, seed=seed)
+    single_per_patient = (time.perf_counter() - t0) / N_SINGLE
+    t0 = time.perf_counter()
+    sample_patient_pool(N_POOL, seed=4)
+    pooled_per_patient = (time.perf_counter() - t0) / N_POOL
+    speedup = single_per_patient / pooled_per_patient
+    assert speedup > 10.0, f"Level 4 FAILED: pooled sampling only {speedup:.1f}x faster"
+    return f"{pooled_per_patient * 1e6:.1f} vs {single_per_patient * 1e6:.0f} us per patient ({speedup:.0f}x)"
+
+
+def _run_level5_records() -> str:
+    patients = list(sample_patient_pool(20, seed=5))
+    for k, p in enumerate(patients):
+        p["ICR"], p["ISF"] = 10.0 + k, 2.0 + 0.1 * k
+    table = np.full(len(patients), np.nan, dtype=PATIENT_PARAMETER_DTYPE)
+    records = [store_parameter_set(table, k, p) for k, p in enumerate(patients)]
+    assert all(dict(r) == p for r, p in zip(records, patients)), "Level 5 FAILED: record differs from its ParameterSet"
+    assert np.shares_memory(records[3].record, table), "Level 5 FAILED: record is not a view into the table"
+    table["SI1"][3] = 1.0
+    assert records[3]["SI1"] == 1.0, "Level 5 FAILED: record does not read through to the table"
+    table["SI1"][3] = patients[3]["SI1"]
+    try:
+        records[0]["missing"]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("Level 5 FAILED: unknown key did not raise KeyError")
+    partial = store_parameter_set(np.empty(1, dtype=PATIENT_PARAMETER_DTYPE), 0, get_base_params())
+    assert np.isnan(partial["ICR"]) and partial["SI1"] == get_base_params()["SI1"], "Level 5 FAILED: missing key not NaN"
+
+    restored = pickle.loads(pickle.dumps(records))
+    assert all(isinstance(r, ParameterRecord) and dict(r) == p for r, p in zip(restored, patients)), (
+        "Level 5 FAILED: pickle round trip changed a record"
+    )
+    record_bytes, dict_bytes = len(pickle.dumps(records[0])), len(pickle.dumps(patients[0]))
+    assert record_bytes < dict_bytes, f"Level 5 FAILED: pickled record {record_bytes} B >= dict {dict_bytes} B"
+    assert np.array_equal(parameter_table(restored), table), "Level 5 FAILED: parameter_table from records"
+    assert np.array_equal(parameter_table(patients), table), "Level 5 FAILED: parameter_table from dicts"
+
+    results = {k: {"patient_id": k, "params": r, "days": {1: np.full(1440, 6.0)}} for k, r in enumerate(records)}
+    with tempfile.TemporaryDirectory() as tmp:
+        export_to_formats(results, len(records), 1, Path(tmp), export=[True, True])
+        for frame in (pd.read_parquet(Path(tmp) / "patients_20p_1d.parquet"), pd.read_csv(Path(tmp) / "patients_20p_1d.csv")):
+            assert len(frame) == len(records), f"Level 5 FAILED: patient table has {len(frame)} rows"
+            assert list(frame.columns) == ["patient_id", *PATIENT_PARAMETER_DTYPE.names], "Level 5 FAILED: patient table columns"
+            assert np.allclose(frame["ICR"], table["ICR"]) and np.allclose(frame["SI1"], table["SI1"], rtol=1e-12), (
+                "Level 5 FAILED: patient table values differ"
+            )
+    return f"{len(records)} records, pickled {record_bytes} B vs {dict_bytes} B per dict, patient table exported"
+
+
+def _run_level6_stream() -> str:
+    n_candidates = 3 * CANDIDATE_CHUNK_SIZE + 17
+    whole = CandidateStream(100, seed=6).take(n_candidates)
+    ragged = CandidateStream(100, seed=6)
+    pieces = [ragged.take(size) for size in (1, 300, 5, CANDIDATE_CHUNK_SIZE, n_candidates)]
+    assert sum(map(len, pieces)) == n_candidates + 1 + 300 + 5 + CANDIDATE_CHUNK_SIZE, "Level 6 FAILED: take() sizes"
+    assert list(whole) == [p for piece in pieces for p in piece][:n_candidates], (
+        "Level 6 FAILED: candidate sequence depends on the batch sizes"
+    )
+    first_chunk = sample_patient_pool(CANDIDATE_CHUNK_SIZE, seed=np.random.SeedSequence(6).spawn(1)[0])
+    assert list(whole[:CANDIDATE_CHUNK_SIZE]) == list(first_chunk), "Level 6 FAILED: first chunk seed"
+    assert list(CandidateStream(5, seed=7).take(10)) != list(whole[:10]), "Level 6 FAILED: seeds give the same stream"
+
+    # Batch sizes follow the acceptance rate; accept every fourth candidate.
+    stream = CandidateStream(100, seed=8)
+    sizes: list[int] = []
+    while not stream.exhausted:
+        batch = stream.next_batch()
+        sizes.append(len(batch))
+        for _ in batch:
+            stream.record(stream.n_evaluated % 4 == 3)
+            if stream.exhausted:
+                break
+    assert sizes[0] == 200, f"Level 6 FAILED: first batch {sizes[0]} (prior acceptance 0.5)"
+    assert stream.n_accepted == 100 and stream.n_evaluated == 400, (
+        f"Level 6 FAILED: {stream.n_accepted} accepted of {stream.n_evaluated} evaluated"
+    )
+    assert abs(stream.acceptance_rate - 0.25) < 0.01, f"Level 6 FAILED: acceptance rate {stream.acceptance_rate:.3f}"
+    assert stream.n_drawn <= 410, f"Level 6 FAILED: drew {stream.n_drawn} candidates for 400 evaluated"
+
+    capped = CandidateStream(10, seed=9, max_candidates=25)
+    drawn = 0
+    while not capped.exhausted:
+        batch = capped.next_batch(limit=8)
+        assert 0 < len(batch) <= 8, f"Level 6 FAILED: batch of {len(batch)} with limit 8"
+        drawn += len(batch)
+        for _ in batch:
+            capped.record(False)
+    assert drawn == 25 and len(capped.next_batch()) == 0, f"Level 6 FAILED: budget of 25 drew {drawn}"
+    standard = CandidateStream(3, standard_patient=True).take(3)
+    assert list(standard) == [get_base_params()] * 3, "Level 6 FAILED: standard_patient stream"
+    return f"batch-independent sequence, batches {sizes[:4]} at 25% acceptance, budget respected"
+
+
+def run_all_tests() -> bool:
+    passed = 0
+    failed = 0
+    pool = sample_patient_pool(N_POOL, seed=2)
+
+    print("=" * 70)
+    print("VECTORIZED PATIENT SAMPLING TEST")
+    print("=" * 70)
+
+    checks = [
+        ("truncation and plausibility", lambda: _run_level1_truncation(pool)),
+        (f"pooled vs one-at-a-time, {N_POOL} vs {N_SINGLE} patients", lambda: _run_level2_distribution(pool)),
+        ("dict views of the columnar pool", _run_level3_views),
+        ("column-wise sampling speed", _run_level4_speed),
+        ("structured parameter records and patient table", _run_level5_records),
+        ("lazy candidate stream", _run_level6_stream),
+    ]
+    for label, check in checks:
+        try:
+            detail = check()
+            print(f"  PASS  {label}: {detail}")
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    ok = run_all_tests()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,298 @@
+"""
+Trace-level CGM sensor test (measure_glycemia_trace, SensorProfile, generate_autocorrelated_noise).
+
+Five levels of verification:
+  1. Equivalence — for every sensor mode and both output units, measure_glycemia_trace equals
+                   the point-by-point measure_glycemia loop bit-for-bit, carries sensor_state
+                   across consecutive days and leaves the generator in the same state
+  2. Validation  — invalid settings raise the same ValueErrors as measure_glycemia, and an
+                   empty trace returns no readings without touching the state or generator
+  3. Speed       — one day of lagged readings is much faster as a trace than point by point
+  4. Profiles    — SimulationConfig.sensor_profiles add one reading per profile without changing
+                   blood_glucose, noise-free profiles differ only by their bias, profile noise
+                   is reproducible for a seed, and each profile exports as blood_glucose_<name>
+  5. AR(1) noise — the filtered generate_autocorrelated_noise equals the per-sample loop
+                   bit-for-bit, batch rows equal consecutive single-series calls, and the
+                   noise has the stationary std, lag-k autocorrelation and day-to-day carry
+                   of an AR(1) process
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.export import ExportConfig, export_to_formats
+from src.parameters import generate_monte_carlo_patients
+from src.sensor import SensorProfile, measure_glycemia, measure_glycemia_trace
+from src.simulation import run_simulation
+from src.simulation_config import SimulationConfig
+from src.simulation_utils import MINUTE_RK4, generate_autocorrelated_noise
+
+POINTS_PER_DAY = 1441
+MODES = ("lagged", "none", "gaussian", "bias_gaussian")
+
+
+def _day_q1(patient: dict[str, float], rng: np.random.Generator) -> np.ndarray:
+    """A random-walk glucose day around 7 mmol/L, dipping below the clamp, as Q1 [mmol]."""
+    glucose = 7.0 + np.cumsum(rng.normal(0.0, 0.15, size=POINTS_PER_DAY))
+    glucose[600:620] = 1.5
+    return glucose * float(patient["VG"]) * float(patient["BW"])
+
+
+def _run_level1_equivalence(patients: list[dict[str, float]]) -> int:
+    checked = 0
+    for k, patient in enumerate(patients):
+        day_rng = np.random.default_rng(10 + k)
+        days = [_day_q1(patient, day_rng) for _ in range(3)]
+        for mode in MODES:
+            for unit, min_glucose in (("mmol/L", 2.2), ("mg/dL", 40.0)):
+                settings = dict(
+                    mode=mode, bias=0.3, phi=0.7, lag_alpha=0.25, output_unit=unit, min_glucose=min_glucose,
+                )
+                noise_std = 0.10 if unit == "mmol/L" else 1.8
+                reference_rng, trace_rng = np.random.default_rng(5), np.random.default_rng(5)
+                reference_state: dict[str, float] = {}
+                trace_state: dict[str, float] = {}
+                for day_idx, q1 in enumerate(days):
+                    day_noise = 0.0 if day_idx == 2 else noise_std
+                    reference = np.array([
+                        measure_glycemia(
+                            [q], patient, noise_std=day_noise,
+                            sensor_state=reference_state, rng=reference_rng, **settings,  # type: ignore[arg-type]
+                        )
+                        for q in q1
+                    ])
+                    readings, state = measure_glycemia_trace(
+                        q1, patient, noise_std=day_noise,
+                        sensor_state=trace_state, rng=trace_rng, **settings,  # type: ignore[arg-type]
+                    )
+                    assert state is trace_state, "Level 1 FAILED: sensor_state not updated in place"
+                    assert np.array_equal(readings, reference), (
+                        f"Level 1 FAILED: {mode} {unit} day {day_idx} max |Δ|="
+                        f"{np.max(np.abs(readings - reference)):.3e}"
+                    )
+                    assert trace_state == reference_state, f"Level 1 FAILED: {mode} {unit} sensor_state differs"
+                    checked += q1.size
+                assert trace_rng.random() == reference_rng.random(), (
+                    f"Level 1 FAILED: {mode} {unit} generator consumed differently"
+                )
+    return checked
+
+
+def _run_level2_validation(patient: dict[str, float]) -> str:
+    q1 = _day_q1(patient, np.random.default_rng(0))[:10]
+    bad_settings = [
+        ({"noise_std": -0.1}, "noise_std"),
+        ({"mode": "spline"}, "Unsupported mode"),
+        ({"phi": 1.0}, "phi"),
+        ({"lag_alpha": 0.0}, "lag_alpha"),
+        ({"min_glucose": -1.0}, "min_glucose"),
+        ({"output_unit": "g/L"}, "output_unit"),
+    ]
+    for kwargs, message in bad_settings:
+        for fn, x in ((measure_glycemia, q1[:1]), (measure_glycemia_trace, q1)):
+            try:
+                fn(x, patient, **kwargs)  # type: ignore[operator]
+            except ValueError as exc:
+                assert message in str(exc), f"Level 2 FAILED: {fn.__name__}{kwargs} raised {exc!r}"
+            else:
+                raise AssertionError(f"Level 2 FAILED: {fn.__name__}{kwargs} did not raise")
+    for params in ({k: v for k, v in patient.items() if k != "VG"}, {**patient, "BW": 0.0}):
+        try:
+            measure_glycemia_trace(q1, params)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Level 2 FAILED: missing VG or BW <= 0 did not raise")
+    try:
+        measure_glycemia_trace(np.array([q1[0], np.nan]), patient, noise_std=0.1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Level 2 FAILED: non-finite Q1 did not raise")
+
+    rng = np.random.default_rng(3)
+    state = {"display": 6.0, "error": 0.1}
+    readings, out_state = measure_glycemia_trace(np.empty(0), patient, noise_std=0.1, sensor_state=state, rng=rng)
+    assert readings.size == 0 and out_state == {"display": 6.0, "error": 0.1}, "Level 2 FAILED: empty trace"
+    assert rng.random() == np.random.default_rng(3).random(), "Level 2 FAILED: empty trace drew from the generator"
+    return f"{len(bad_settings)} invalid settings rejected, empty trace is a no-op"
+
+
+def _run_level3_speed(patient: dict[str, float]) -> str:
+    q1 = _day_q1(patient, np.random.default_rng(1))
+    t0 = time.perf_counter()
+    state: dict[str, float] = {}
+    rng = np.random.default_rng(2)
+    for q in q1:
+        measure_glycemia([q], patient, noise_std=0.1, phi=0.7, sensor_state=state, rng=rng)
+    per_point_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    repeats = 20
+    for _ in range(repeats):
+        measure_glycemia_trace(q1, patient, noise_std=0.1, phi=0.7, sensor_state={}, rng=rng)
+    trace_s = (time.perf_counter() - t0) / repeats
+    speedup = per_point_s / trace_s
+    assert speedup > 5.0, f"Level 3 FAILED: trace only {speedup:.1f}x faster"
+    return f"{trace_s * 1e3:.2f} ms vs {per_point_s * 1e3:.1f} ms per day ({speedup:.0f}x)"
+
+
+def _simulate(profiles: tuple[SensorProfile, ...]) -> dict:
+    config = SimulationConfig(
+        n_patients=2, n_days=2, n_warmup_days=1, noise_std=0.33, random_seed=11, enable_plots=False,
+        solver_method=MINUTE_RK4, sensor_profiles=profiles,
+    )
+    return run_simulation(  # type: ignore[return-value]
+        config, ExportConfig(export_to_parquet=False, export_to_csv=False),
+        return_results=True, show_progress=False, show_summary=False,
+    )
+
+
+def _run_level4_profiles() -> str:
+    profiles = (
+        SensorProfile("clean", noise_std=0.0),
+        SensorProfile("biased", noise_std=0.0, bias=0.5),
+        SensorProfile("noisy", noise_std=0.6, noise_autocorr=0.9, cgm_lag_alpha=0.5),
+    )
+    plain = _simulate(())
+    augmented = _simulate(profiles)
+    again = _simulate(profiles)
+    assert list(plain) == list(augmented), "Level 4 FAILED: profiles changed the accepted cohort"
+    residuals: list[np.ndarray] = []
+    for p_id, patient in augmented.items():
+        for day, day_result in patient["days"].items():
+            readings = day_result["sensor_glucose"]
+            assert list(readings) == ["clean", "biased", "noisy"], "Level 4 FAILED: profile readings missing"
+            assert plain[p_id]["days"][day]["sensor_glucose"] == {}, "Level 4 FAILED: readings without profiles"
+            assert np.array_equal(day_result["blood_glucose"], plain[p_id]["days"][day]["blood_glucose"]), (
+                "Level 4 FAILED: blood_glucose changed by the sensor profiles"
+            )
+            above = readings["clean"] > 2.5
+            assert np.allclose(readings["biased"][above] - readings["clean"][above], 0.5), (
+                "Level 4 FAILED: noise-free profiles differ by more than their bias"
+            )
+            for name in readings:
+                assert np.array_equal(readings[name], again[p_id]["days"][day]["sensor_glucose"][name]), (
+                    f"Level 4 FAILED: profile {name} not reproducible for the seed"
+                )
+            residuals.append(readings["noisy"] - readings["clean"])
+    rmse = float(np.sqrt(np.mean(np.concatenate(residuals) ** 2)))
+    assert 0.2 < rmse < 1.5, f"Level 4 FAILED: noisy profile RMSE {rmse:.3f} mmol/L vs noise_std 0.6"
+
+    for bad in (lambda: SensorProfile("two words"), lambda: SensorProfile("x", noise_autocorr=1.0)):
+        try:
+            bad()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Level 4 FAILED: invalid SensorProfile accepted")
+    try:
+        _simulate((SensorProfile("a"), SensorProfile("a", noise_std=0.1)))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Level 4 FAILED: duplicate profile names accepted")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_to_formats(augmented, len(augmented), 2, Path(tmp), export=[True, False])
+        frame = pd.read_parquet(next(Path(tmp).glob("results_*.parquet")))
+    columns = list(frame.columns)
+    expected = ["blood_glucose", "blood_glucose_clean", "blood_glucose_biased", "blood_glucose_noisy"]
+    assert columns[columns.index("blood_glucose"):][:4] == expected, f"Level 4 FAILED: exported columns {columns}"
+    assert not frame[expected].isna().any().any(), "Level 4 FAILED: missing profile readings in the export"
+    return f"{len(profiles)} profiles on {len(residuals)} days, noisy RMSE {rmse:.2f} mmol/L, exported"
+
+
+def _reference_ar1_noise(
+    n_samples: int, noise_std: float, autocorr: float, rng: np.random.Generator, initial_value: float | None,
+) -> np.ndarray:
+    """The per-sample AR(1) loop generate_autocorrelated_noise replaced."""
+    noise = np.zeros(n_samples, dtype=np.float64)
+    innovation_std = noise_std * np.sqrt(1 - autocorr**2)
+    for idx in range(n_samples):
+        if idx == 0 and initial_value is None:
+            noise[idx] = float(rng.normal(0, noise_std))
+        else:
+            previous = initial_value if idx == 0 else noise[idx - 1]
+            noise[idx] = autocorr * previous + float(rng.normal(0, innovation_std))
+    return noise
+
+
+def _run_level5_ar1_noise() -> str:
+    for autocorr in (0.0, 0.7, 0.95):
+        for initial_value in (None, 0.4):
+            reference = _reference_ar1_noise(1441, 0.33, autocorr, np.random.default_rng(1), initial_value)
+            filtered = generate_autocorrelated_noise(1441, 0.33, autocorr, np.random.default_rng(1), initial_value)
+            assert np.array_equal(filtered, reference), (
+                f"Level 5 FAILED: φ={autocorr}, initial={initial_value} max |Δ|={np.max(np.abs(filtered - reference)):.3e}"
+            )
+
+    initial = np.array([0.1, -0.2, 0.3])
+    sequential_rng = np.random.default_rng(2)
+    sequential = np.stack([generate_autocorrelated_noise(100, 0.3, 0.8, sequential_rng, v) for v in initial])
+    batch = generate_autocorrelated_noise(100, 0.3, 0.8, np.random.default_rng(2), initial)
+    assert batch.shape == (3, 100) and np.array_equal(batch, sequential), "Level 5 FAILED: batch rows differ"
+    assert generate_autocorrelated_noise(5, 0.3, 0.8, np.random.default_rng(2), n_series=4).shape == (4, 5), (
+        "Level 5 FAILED: n_series shape"
+    )
+
+    # Stationary statistics over 2000 patients x 1441 minutes, continued over a second day.
+    noise_std, autocorr, n_series = 0.33, 0.7, 2000
+    rng = np.random.default_rng(3)
+    day1 = generate_autocorrelated_noise(1441, noise_std, autocorr, rng, n_series=n_series)
+    day2 = generate_autocorrelated_noise(1441, noise_std, autocorr, rng, initial_value=day1[:, -1])
+    for label, noise in (("day 1", day1), ("day 2", day2)):
+        std = float(np.std(noise))
+        assert abs(std - noise_std) < 0.01 * noise_std, f"Level 5 FAILED: {label} std {std:.4f} vs {noise_std}"
+        for lag in (1, 5):
+            rho = float(np.mean(noise[:, lag:] * noise[:, :-lag]) / np.var(noise))
+            assert abs(rho - autocorr**lag) < 0.01, f"Level 5 FAILED: {label} lag-{lag} autocorrelation {rho:.4f}"
+    first_std = float(np.std(day1[:, 0]))
+    assert abs(first_std - noise_std) < 0.05 * noise_std, f"Level 5 FAILED: first-sample std {first_std:.4f}"
+    carry = float(np.corrcoef(day1[:, -1], day2[:, 0])[0, 1])
+    assert abs(carry - autocorr) < 0.05, f"Level 5 FAILED: day-boundary correlation {carry:.3f} vs {autocorr}"
+    return f"loop-identical, std {float(np.std(day2)):.4f}, lag-1 ρ {autocorr} reproduced, boundary ρ {carry:.3f}"
+
+
+def run_all_tests() -> bool:
+    passed = 0
+    failed = 0
+    patients = generate_monte_carlo_patients(3, seed=4)
+
+    print("=" * 70)
+    print("TRACE-LEVEL CGM SENSOR TEST")
+    print("=" * 70)
+
+    checks = [
+        ("trace vs point-by-point measure_glycemia", lambda: f"{_run_level1_equivalence(patients)} readings identical"),
+        ("argument validation", lambda: _run_level2_validation(patients[0])),
+        ("lagged trace speed", lambda: _run_level3_speed(patients[0])),
+        ("sensor profiles on one trajectory", _run_level4_profiles),
+        ("filtered AR(1) noise", _run_level5_ar1_noise),
+    ]
+    for label, check in checks:
+        try:
+            detail = check()
+            print(f"  PASS  {label}: {detail}")
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 70)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    ok = run_all_tests()
+    sys.exit(0 if ok else 1)
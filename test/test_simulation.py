@@ -35,6 +35,34 @@ def _parse_args() -> argparse.Namespace:
         action="store_true",
         help="Sample a scenario each day instead of using --scenario",
     )
+    parser.add_argument(
+        "--engine",
+        default="scalar",
+        choices=["scalar", "cohort"],
+        help="Integration engine (scalar solve_ivp per patient, or batched cohort RK4)",
+    )
+    parser.add_argument(
+        "--solver-method",
+        default="RK45",
+        help="Scalar-engine integrator: a solve_ivp method (RK45, BDF, Radau, LSODA, ...), minute_rk4 or minute_exp",
+    )
+    parser.add_argument(
+        "--control-mode",
+        default="rhs",
+        choices=["rhs", "minute"],
+        help="Scalar-engine controller timing: inside the ODE RHS, or once per minute boundary (hybrid)",
+    )
+    parser.add_argument(
+        "--backend",
+        default="numpy",
+        choices=["numpy", "numba"],
+        help="Scalar-engine arithmetic backend (numba falls back to numpy when not installed)",
+    )
+    parser.add_argument(
+        "--calibration-surrogate",
+        action="store_true",
+        help="Seed the ICR/ISF calibration with the fitted surrogate (src/calibration_surrogate.json)",
+    )
     parser.add_argument(
         "--no-export",
         action="store_true",
@@ -120,6 +148,11 @@ if __name__ == "__main__":
         std_patient=False,
         random_seed=args.seed,
         enable_plots=not args.no_plots,
+        engine=args.engine,
+        solver_method=args.solver_method,
+        control_mode=args.control_mode,
+        backend=args.backend,
+        calibration_surrogate=args.calibration_surrogate,
     )
 
     export_enabled = not args.no_export
@@ -6,11 +6,20 @@ Three levels of verification for each target glucose:
   2. Fixed-point check  — all 18 ODE derivatives are ~0 at the returned state
   3. Integration stability — forward ODE integration with basal-only for 60 min stays flat
 
-Also tests the mg/dL input path (what the main simulation uses) in addition to mmol/L.
+Also tests the mg/dL input path (what the main simulation uses) in addition to mmol/L,
+and the reduced 1-D solver (default) against the multivariate Newton solver it falls
+back to: both pass levels 1-2, the reduced state hits the target to rounding, and
+unreachable targets return exactly the Newton result. The batched pool solve
+(compute_fasting_steady_states_batch) must equal the per-patient solve bit-for-bit, and
+the multi-target solve (compute_optimal_steady_states) must equal per-target solves.
+A run_simulation must solve each candidate's steady state at each target at most once,
+and each accepted candidate's ICR and ISF starts exactly once.
 """
 from __future__ import annotations
 
 import sys
+import time
+from collections import Counter
 from pathlib import Path
 
 import numpy as np
@@ -18,14 +27,24 @@ from scipy.integrate import solve_ivp  # type: ignore[import-untyped]
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+import src.model as model
+from src.export import ExportConfig
 from src.model import (
+    STEADY_STATE_NEWTON,
     ParameterSet,
     StateVector,
+    _compute_hovorka_steady_state_reduced,
+    compute_fasting_steady_states_batch,
     compute_optimal_steady_state_from_glucose,
+    compute_optimal_steady_states,
     hovorka_equations,
     get_glucose_from_state,
 )
-from src.parameters import get_base_params, generate_monte_carlo_patients
+from src.parameters import get_base_params, generate_monte_carlo_patients, stack_parameter_sets
+from src.sensitivity import ICR_INITIAL_GLUCOSE_MMOL, ISF_INITIAL_GLUCOSE_MMOL
+from src.simulation import run_simulation
+from src.simulation_config import SimulationConfig
+from src.simulation_utils import MINUTE_RK4
 
 # ── Tolerances ────────────────────────────────────────────────────────────────
 GLUCOSE_TOLERANCE_MMOL   = 0.05   # max acceptable |G_actual - G_target| [mmol/L]
@@ -35,6 +54,14 @@ DRIFT_TOLERANCE_MMOL     = 0.10   # max acceptable glucose drift over 60 min int
 TARGETS_MMOL   = [4.5, 5.0, 5.5, 6.0, 7.0, 8.0]
 TARGETS_MGDL   = [81.0, 90.0, 100.0, 108.0, 126.0, 144.0]   # same values, different units
 N_RANDOM_PATIENTS = 5
+REDUCED_TARGETS_MMOL = [4.0, 5.5, 7.0, 13.0]   # 4.0 and 13.0 exercise the F01 and renal branches
+N_REDUCED_PATIENTS = 40
+N_BATCH_PATIENTS = 300
+MULTI_TARGETS_MMOL = [5.5, 13.0, 7.0]   # ICR start, ISF start, a third target
+N_MULTI_PATIENTS = 40
+N_RUN_PATIENTS = 4
+CANDIDATE_KEY_FIELDS = ("EGP0", "F01", "k12", "SI1", "SI2", "SI3", "VG", "BW", "tauI")
+REDUCED_GLUCOSE_TOLERANCE_MMOL = 1e-9
 
 
 def _basal_from_state(state: StateVector, params: ParameterSet) -> float:
@@ -117,6 +144,113 @@ def _run_level3_integration_stability(state: StateVector, params: ParameterSet,
     return drift
 
 
+def _run_reduced_vs_newton(patients: list[ParameterSet], target_mmol: float) -> tuple[int, int, float, float]:
+    """Reduced solver vs Newton: (solved by reduced, Newton fallbacks, reduced time, Newton time)."""
+    solved = 0
+    fallbacks = 0
+    reduced_time = 0.0
+    newton_time = 0.0
+    for i, p in enumerate(patients):
+        label = f"mc[{i}] {target_mmol:.1f} mmol/L"
+        t0 = time.perf_counter()
+        state = compute_optimal_steady_state_from_glucose(p, target_mmol, print_progress=False)
+        t1 = time.perf_counter()
+        newton_state = compute_optimal_steady_state_from_glucose(
+            p, target_mmol, print_progress=False, method=STEADY_STATE_NEWTON,
+        )
+        t2 = time.perf_counter()
+        reduced_time += t1 - t0
+        newton_time += t2 - t1
+        if _compute_hovorka_steady_state_reduced(p, target_mmol, 0.1, print_progress=False) is None:
+            assert state == newton_state, f"[{label}] reduced: fallback differs from the Newton solver"
+            fallbacks += 1
+            continue
+        g = get_glucose_from_state(state, p)
+        assert abs(g - target_mmol) <= REDUCED_GLUCOSE_TOLERANCE_MMOL, (
+            f"[{label}] reduced: G={g!r} misses target by {abs(g - target_mmol):.3e} mmol/L"
+        )
+        _run_level2_fixed_point(state, p, label)
+        _run_level1_glucose_accuracy(newton_state, target_mmol, p, label)
+        _run_level2_fixed_point(newton_state, p, label)
+        solved += 1
+    return solved, fallbacks, reduced_time, newton_time
+
+
+def _run_batch_vs_scalar(patients: list[ParameterSet], target: float, international_units: bool) -> tuple[int, float, float]:
+    """Batched pool solve vs per-patient solves: (columns solved, batch time, scalar time)."""
+    t0 = time.perf_counter()
+    states, solved = compute_fasting_steady_states_batch(stack_parameter_sets(patients), target, international_units)
+    t1 = time.perf_counter()
+    scalar = [
+        compute_optimal_steady_state_from_glucose(p, target, international_units, print_progress=False)
+        for p in patients
+    ]
+    t2 = time.perf_counter()
+    for k, p in enumerate(patients):
+        if solved[k]:
+            assert np.array_equal(states[:, k], np.asarray(scalar[k], dtype=np.float64)), (
+                f"[batch {target}] column {k} differs from the per-patient solve"
+            )
+        else:
+            assert np.all(np.isnan(states[:, k])), f"[batch {target}] unsolved column {k} is not NaN"
+            target_mmol = target if international_units else target / (float(p["MwG"]) / 10.0)
+            assert _compute_hovorka_steady_state_reduced(p, target_mmol, 0.1, print_progress=False) is None, (
+                f"[batch {target}] column {k} unsolved but the scalar reduced solver succeeds"
+            )
+    return int(solved.sum()), t1 - t0, t2 - t1
+
+
+def _run_multi_target(patients: list[ParameterSet], targets: list[float]) -> tuple[int, float, float]:
+    """Multi-target solve vs per-target solves: (states, multi-target time, single-target time)."""
+    t0 = time.perf_counter()
+    multi = [compute_optimal_steady_states(p, targets, print_progress=False) for p in patients]
+    t1 = time.perf_counter()
+    single = [[compute_optimal_steady_state_from_glucose(p, t, print_progress=False) for t in targets] for p in patients]
+    t2 = time.perf_counter()
+    for i in range(len(patients)):
+        for target, state, expected in zip(targets, multi[i], single[i]):
+            assert state == expected, f"[multi] mc[{i}] {target} mmol/L differs from the single-target solve"
+        assert len({id(state) for state in multi[i]}) == len(targets), f"[multi] mc[{i}] returned a shared state list"
+    return len(patients) * len(targets), t1 - t0, t2 - t1
+
+
+def _candidate_key(params: ParameterSet) -> tuple[float, ...]:
+    return tuple(float(params[key]) for key in CANDIDATE_KEY_FIELDS)
+
+
+def _run_solves_per_candidate() -> tuple[int, int]:
+    """Scalar steady-state solves during a run_simulation: (accepted patients, solves)."""
+    solves: Counter[tuple[tuple[float, ...], float]] = Counter()
+    reduced_solver = model._compute_hovorka_steady_state_reduced
+
+    def counting_solver(params: ParameterSet, target_mmol: float, *args: object, **kwargs: object) -> StateVector | None:
+        solves[(_candidate_key(params), target_mmol)] += 1
+        return reduced_solver(params, target_mmol, *args, **kwargs)  # type: ignore[arg-type]
+
+    config = SimulationConfig(
+        n_patients=N_RUN_PATIENTS, n_days=1, n_warmup_days=0, random_seed=5, enable_plots=False,
+        solver_method=MINUTE_RK4,
+    )
+    model._compute_hovorka_steady_state_reduced = counting_solver
+    try:
+        results = run_simulation(  # type: ignore[assignment]
+            config, ExportConfig(export_to_parquet=False, export_to_csv=False),
+            return_results=True, show_progress=False, show_summary=False,
+        )
+    finally:
+        model._compute_hovorka_steady_state_reduced = reduced_solver
+    assert results, "[run] run_simulation accepted no patients"
+    repeated = {key: count for key, count in solves.items() if count > 1}
+    assert not repeated, f"[run] {len(repeated)} (candidate, target) steady states solved more than once"
+    for patient_id, result in results.items():
+        key = _candidate_key(result["params"])
+        for target in (ICR_INITIAL_GLUCOSE_MMOL, ISF_INITIAL_GLUCOSE_MMOL):
+            assert solves[(key, target)] == 1, (
+                f"[run] patient {patient_id}: {solves[(key, target)]} solves at {target} mmol/L, expected 1"
+            )
+    return len(results), sum(solves.values())
+
+
 def run_all_tests():
     params = get_base_params()
     passed = 0
@@ -183,6 +317,76 @@ def run_all_tests():
             print(f"  FAIL  {e}")
             failed += 1
 
+    print()
+    print("=" * 70)
+    print(f"STEADY STATE TEST — reduced 1-D solver vs Newton, {N_REDUCED_PATIENTS} Monte Carlo patients")
+    print("=" * 70)
+    patients = generate_monte_carlo_patients(N_REDUCED_PATIENTS, standard_patient=False, seed=1)
+    for target in REDUCED_TARGETS_MMOL:
+        label = f"reduced {target:.1f} mmol/L"
+        try:
+            solved, fallbacks, reduced_time, newton_time = _run_reduced_vs_newton(patients, target)
+            assert solved > 0, f"[{label}] reduced solver found no steady state"
+            print(
+                f"  PASS  {label}: {solved} solved, {fallbacks} Newton fallbacks, "
+                f"{1e3 * reduced_time / len(patients):.2f} vs {1e3 * newton_time / len(patients):.2f} ms/solve"
+            )
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"STEADY STATE TEST — batched pool solve, {N_BATCH_PATIENTS} Monte Carlo patients")
+    print("=" * 70)
+    patients = generate_monte_carlo_patients(N_BATCH_PATIENTS, standard_patient=False, seed=2)
+    for target, international_units, unit in ((100.0, False, "mg/dL"), (13.0, True, "mmol/L")):
+        label = f"batch {target:g} {unit}"
+        try:
+            solved, batch_time, scalar_time = _run_batch_vs_scalar(patients, target, international_units)
+            print(
+                f"  PASS  {label}: {solved}/{len(patients)} columns identical to per-patient solves, "
+                f"{1e3 * batch_time:.1f} vs {1e3 * scalar_time:.1f} ms"
+            )
+            passed += 1
+        except AssertionError as e:
+            print(f"  FAIL  {e}")
+            failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"STEADY STATE TEST — multi-target solve, {N_MULTI_PATIENTS} Monte Carlo patients")
+    print("=" * 70)
+    patients = generate_monte_carlo_patients(N_MULTI_PATIENTS, standard_patient=False, seed=3)
+    label = "multi " + ", ".join(f"{t:g}" for t in MULTI_TARGETS_MMOL) + " mmol/L"
+    try:
+        n_states, multi_time, single_time = _run_multi_target(patients, MULTI_TARGETS_MMOL)
+        print(
+            f"  PASS  {label}: {n_states} states identical to single-target solves, "
+            f"{1e3 * multi_time:.1f} vs {1e3 * single_time:.1f} ms"
+        )
+        passed += 1
+    except AssertionError as e:
+        print(f"  FAIL  {e}")
+        failed += 1
+
+    print()
+    print("=" * 70)
+    print(f"STEADY STATE TEST — solves per candidate in run_simulation, {N_RUN_PATIENTS} patients")
+    print("=" * 70)
+    try:
+        n_accepted, n_solves = _run_solves_per_candidate()
+        print(
+            f"  PASS  solves per candidate: {n_solves} scalar solves, none repeated; "
+            f"each of {n_accepted} accepted patients solved once at {ICR_INITIAL_GLUCOSE_MMOL:g} "
+            f"and {ISF_INITIAL_GLUCOSE_MMOL:g} mmol/L"
+        )
+        passed += 1
+    except AssertionError as e:
+        print(f"  FAIL  {e}")
+        failed += 1
+
     print()
     print("=" * 70)
     print(f"Results: {passed} passed, {failed} failed")